@@ -0,0 +1,33 @@
+"""add_return_stats_provider
+
+Revision ID: a9d4e2b6c873
+Revises: d2f7a4c9e315
+Create Date: 2026-10-19 11:02:51.684930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2b6c873'
+down_revision = 'd2f7a4c9e315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 기존 통계는 제공자 구분 없이 누적되었으므로 기본 제공자(cmc)의 통계로 이어 씀
+    with op.batch_alter_table('return_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('provider', sa.String(), server_default='cmc', nullable=False))
+        batch_op.drop_constraint('uq_return_stats_key', type_='unique')
+        batch_op.create_unique_constraint('uq_return_stats_key', ['provider', 'symbol', 'currency'])
+
+
+def downgrade() -> None:
+    # 제공자별 통계 중 기본 제공자(cmc)가 아닌 행은 (심볼, 통화) 키가 겹치므로 삭제
+    op.execute("DELETE FROM return_stats WHERE provider != 'cmc'")
+    with op.batch_alter_table('return_stats', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_return_stats_key', type_='unique')
+        batch_op.create_unique_constraint('uq_return_stats_key', ['symbol', 'currency'])
+        batch_op.drop_column('provider')
@@ -0,0 +1,254 @@
+"""add_price_ticks
+
+Revision ID: c41e7b2d9f06
+Revises: 8a4c2e6f1b93
+Create Date: 2026-10-18 16:03:42.118527
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7b2d9f06'
+down_revision = '8a4c2e6f1b93'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+# 같은 틱 키에 다른 시세가 있는 스냅샷의 틱 시각을 밀어내는 간격
+TICK_OFFSET = timedelta(microseconds=1)
+
+price_ticks = sa.table(
+    'price_ticks',
+    sa.column('id', sa.Integer()),
+    sa.column('provider', sa.String()),
+    sa.column('symbol', sa.String()),
+    sa.column('currency', sa.String()),
+    sa.column('timestamp', sa.DateTime(timezone=True)),
+    sa.column('price', sa.Float()),
+    sa.column('market_cap', sa.Float()),
+    sa.column('percent_change_24h', sa.Float()),
+)
+holdings_versions = sa.Table(
+    'holdings_versions',
+    sa.MetaData(),
+    sa.Column('id', sa.Integer(), primary_key=True),
+    sa.Column('user_id', sa.Integer()),
+    sa.Column('holdings', sa.JSON()),
+)
+price_snapshots = sa.table(
+    'price_snapshots',
+    sa.column('id', sa.Integer()),
+    sa.column('user_id', sa.Integer()),
+    sa.column('timestamp', sa.DateTime(timezone=True)),
+    sa.column('snapshot_data', sa.JSON()),
+    sa.column('price_provider', sa.String()),
+    sa.column('price_currency', sa.String()),
+    sa.column('tick_at', sa.DateTime(timezone=True)),
+    sa.column('holdings_version_id', sa.Integer()),
+)
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer()),
+    sa.column('api_provider', sa.String()),
+    sa.column('base_currency', sa.String()),
+)
+
+
+def _normalize_provider(api_provider):
+    if api_provider and api_provider.lower() == "coingecko":
+        return "coingecko"
+    return "cmc"
+
+
+def _backfill(bind) -> None:
+    """
+    기존 스냅샷 JSON을 시세 틱과 보유 내역 버전으로 옮김
+    
+    틱 키는 (사용자 API 제공자, 심볼, 사용자 기준 통화, 스냅샷 시각)이며 같은 키는 한 번만 기록합니다.
+    같은 시각에 다른 사용자가 다른 시세를 저장한 경우 (예: 같은 초에 조회한 다른 API 키)
+    그 스냅샷은 시세가 겹치지 않을 때까지 틱 시각을 1마이크로초씩 밀어 자신의 틱을 가리킵니다.
+    과거 보유 수량은 스냅샷에 없으므로 보유 내역 버전에는 심볼만 기록합니다 (수량 None).
+    """
+    rows = bind.execute(
+        sa.select(
+            price_snapshots.c.id,
+            price_snapshots.c.user_id,
+            price_snapshots.c.timestamp,
+            price_snapshots.c.snapshot_data,
+            users.c.api_provider,
+            users.c.base_currency,
+        ).select_from(
+            price_snapshots.join(users, users.c.id == price_snapshots.c.user_id)
+        ).where(
+            price_snapshots.c.timestamp.isnot(None)
+        ).order_by(price_snapshots.c.user_id, price_snapshots.c.id)
+    ).fetchall()
+    
+    written = {}
+    tick_rows = []
+    latest_versions = {}
+    snapshot_updates = []
+    for snapshot_id, user_id, timestamp, snapshot_data, api_provider, base_currency in rows:
+        provider = _normalize_provider(api_provider)
+        currency = base_currency or "USD"
+        snapshot_data = snapshot_data or {}
+        quotes = {
+            symbol: (data.get("price"), data.get("market_cap"), data.get("percent_change_24h"))
+            for symbol, data in snapshot_data.items()
+            if isinstance(data, dict) and data.get("price") is not None
+        }
+        tick_at = timestamp
+        while any(written.get((provider, symbol, currency, tick_at), quote) != quote for symbol, quote in quotes.items()):
+            tick_at += TICK_OFFSET
+        for symbol, (price, market_cap, percent_change_24h) in quotes.items():
+            key = (provider, symbol, currency, tick_at)
+            if key in written:
+                continue
+            written[key] = (price, market_cap, percent_change_24h)
+            tick_rows.append({
+                'provider': provider,
+                'symbol': symbol,
+                'currency': currency,
+                'timestamp': tick_at,
+                'price': price,
+                'market_cap': market_cap,
+                'percent_change_24h': percent_change_24h,
+            })
+        
+        # 심볼 구성이 바뀔 때만 새 보유 내역 버전
+        holdings = {symbol: None for symbol in sorted(snapshot_data)}
+        latest = latest_versions.get(user_id)
+        if latest is None or latest[0] != holdings:
+            version_id = bind.execute(
+                holdings_versions.insert().values(user_id=user_id, holdings=holdings)
+            ).inserted_primary_key[0]
+            latest = latest_versions[user_id] = (holdings, version_id)
+        snapshot_updates.append({
+            'snapshot_id': snapshot_id,
+            'price_provider': provider,
+            'price_currency': currency,
+            'tick_at': tick_at,
+            'holdings_version_id': latest[1],
+        })
+        
+        if len(tick_rows) >= BATCH_SIZE:
+            bind.execute(price_ticks.insert(), tick_rows)
+            tick_rows = []
+    
+    if tick_rows:
+        bind.execute(price_ticks.insert(), tick_rows)
+    update = price_snapshots.update().where(
+        price_snapshots.c.id == sa.bindparam('snapshot_id')
+    ).values(
+        price_provider=sa.bindparam('price_provider'),
+        price_currency=sa.bindparam('price_currency'),
+        tick_at=sa.bindparam('tick_at'),
+        holdings_version_id=sa.bindparam('holdings_version_id'),
+    )
+    for start in range(0, len(snapshot_updates), BATCH_SIZE):
+        bind.execute(update, snapshot_updates[start:start + BATCH_SIZE])
+
+
+def _restore_snapshot_data(bind) -> None:
+    """다운그레이드: 틱 참조와 보유 내역 버전으로 스냅샷 JSON 재구성"""
+    rows = bind.execute(
+        sa.select(
+            price_snapshots.c.id,
+            price_snapshots.c.price_provider,
+            price_snapshots.c.price_currency,
+            price_snapshots.c.tick_at,
+            holdings_versions.c.holdings,
+        ).select_from(
+            price_snapshots.outerjoin(holdings_versions, holdings_versions.c.id == price_snapshots.c.holdings_version_id)
+        )
+    ).fetchall()
+    
+    update = price_snapshots.update().where(
+        price_snapshots.c.id == sa.bindparam('snapshot_id')
+    ).values(snapshot_data=sa.bindparam('data'))
+    for snapshot_id, provider, currency, tick_at, holdings in rows:
+        data = {}
+        if holdings and tick_at is not None:
+            ticks = bind.execute(
+                sa.select(
+                    price_ticks.c.symbol,
+                    price_ticks.c.price,
+                    price_ticks.c.market_cap,
+                    price_ticks.c.percent_change_24h,
+                ).where(
+                    price_ticks.c.provider == provider,
+                    price_ticks.c.currency == currency,
+                    price_ticks.c.timestamp == tick_at,
+                    price_ticks.c.symbol.in_(list(holdings)),
+                )
+            ).fetchall()
+            data = {
+                symbol: {"price": price, "market_cap": market_cap, "percent_change_24h": percent_change_24h}
+                for symbol, price, market_cap, percent_change_24h in ticks
+            }
+        bind.execute(update, {'snapshot_id': snapshot_id, 'data': data})
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table(
+        'price_ticks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('symbol', sa.String(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('market_cap', sa.Float(), nullable=True),
+        sa.Column('percent_change_24h', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'symbol', 'currency', 'timestamp', name='uq_price_ticks_key')
+    )
+    op.create_index(op.f('ix_price_ticks_id'), 'price_ticks', ['id'], unique=False)
+    op.create_table(
+        'holdings_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('holdings', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_holdings_versions_id'), 'holdings_versions', ['id'], unique=False)
+    op.create_index(op.f('ix_holdings_versions_user_id'), 'holdings_versions', ['user_id'], unique=False)
+    with op.batch_alter_table('price_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price_provider', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('price_currency', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('tick_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('holdings_version_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_price_snapshots_holdings_version_id', 'holdings_versions', ['holdings_version_id'], ['id'])
+    
+    # 기존 스냅샷 JSON을 틱/보유 내역 버전으로 옮긴 뒤 JSON 컬럼 삭제
+    _backfill(op.get_bind())
+    with op.batch_alter_table('price_snapshots', schema=None) as batch_op:
+        batch_op.drop_column('snapshot_data')
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('price_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot_data', sa.JSON(), nullable=True))
+    _restore_snapshot_data(op.get_bind())
+    with op.batch_alter_table('price_snapshots', schema=None) as batch_op:
+        batch_op.alter_column('snapshot_data', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_constraint('fk_price_snapshots_holdings_version_id', type_='foreignkey')
+        batch_op.drop_column('holdings_version_id')
+        batch_op.drop_column('tick_at')
+        batch_op.drop_column('price_currency')
+        batch_op.drop_column('price_provider')
+    op.drop_index(op.f('ix_holdings_versions_user_id'), table_name='holdings_versions')
+    op.drop_index(op.f('ix_holdings_versions_id'), table_name='holdings_versions')
+    op.drop_table('holdings_versions')
+    op.drop_index(op.f('ix_price_ticks_id'), table_name='price_ticks')
+    op.drop_table('price_ticks')
+    # ### end Alembic commands ###
@@ -0,0 +1,291 @@
+"""
+벡터화 알림 엔진
+
+한 틱의 모든 사용자/보유 코인을 (사용자, 심볼, 기준 가격, 현재 가격, 윈도우 최저/최고가, 수익률 z-score, 임계값) 열 배열로 배치하고,
+변동률/변동액 계산과 임계값 비교를 NumPy 벡터 연산으로 한 번에 수행합니다.
+임계값을 넘은 행만 메시지로 만들며, 알림 종류와 메시지는 AlertService.evaluate_alerts와 같습니다.
+"""
+from typing import Dict, Hashable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.models import User, AlertSettings, PriceSnapshot
+from app.volatility import ReturnObservation
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_alert_due(alert_settings: Optional[AlertSettings], baseline: Optional[PriceSnapshot], now: Optional[datetime] = None) -> bool:
+    """알림 설정과 기준 스냅샷이 있고 마지막 알림 이후 최소 알림 간격이 지났는지 확인"""
+    if not alert_settings or not baseline:
+        return False
+    last_notification_time = baseline.timestamp
+    min_interval = timedelta(minutes=alert_settings.min_notification_interval_minutes)
+    now = now or datetime.now(last_notification_time.tzinfo)
+    return now - last_notification_time >= min_interval
+
+
+def portfolio_percentage_alert(change_pct: float, old_total: float, new_total: float, base_currency: str) -> Dict:
+    return {
+        "type": "portfolio_percentage",
+        "message": f"📊 포트폴리오 변동: {change_pct:+.2f}% ({old_total:,.2f} → {new_total:,.2f} {base_currency})"
+    }
+
+
+def portfolio_absolute_alert(absolute_change: float, base_currency: str) -> Dict:
+    return {
+        "type": "portfolio_absolute",
+        "message": f"💰 포트폴리오 금액 변동: {absolute_change:,.2f} {base_currency}"
+    }
+
+
+def coin_percentage_alert(symbol: str, change_pct: float, old_price: float, new_price: float) -> Dict:
+    return {
+        "type": "coin_percentage",
+        "symbol": symbol,
+        "message": f"📈 {symbol} 변동: {change_pct:+.2f}% (${old_price:,.2f} → ${new_price:,.2f})"
+    }
+
+
+def coin_absolute_alert(symbol: str, absolute_change: float) -> Dict:
+    return {
+        "type": "coin_absolute",
+        "symbol": symbol,
+        "message": f"💵 {symbol} 가격 변동: ${absolute_change:,.2f}"
+    }
+
+
+def coin_window_alert(symbol: str, change_pct: float, window_minutes: int, reference_price: float, new_price: float) -> Dict:
+    return {
+        "type": "coin_window",
+        "symbol": symbol,
+        "message": f"⏱️ {symbol} {window_minutes}분 내 변동: {change_pct:+.2f}% (${reference_price:,.2f} → ${new_price:,.2f})"
+    }
+
+
+def coin_anomaly_alert(symbol: str, change_pct: float, zscore: float) -> Dict:
+    return {
+        "type": "coin_anomaly",
+        "symbol": symbol,
+        "message": f"⚡ {symbol} 이상 변동: {change_pct:+.2f}% (평소 변동성의 {zscore:+.1f}σ)"
+    }
+
+
+def window_change(low: float, high: float, new_price: float) -> Tuple[float, float]:
+    """
+    윈도우 최저/최고가 대비 현재 가격 변동률과 기준 가격
+    
+    최저가 대비 상승폭과 최고가 대비 하락폭 중 큰 쪽을 반환합니다. (상승은 +, 하락은 -)
+    """
+    rise = (new_price - low) / low * 100 if low > 0 else 0.0
+    drop = (high - new_price) / high * 100 if high > 0 else 0.0
+    if rise >= drop:
+        return rise, low
+    return -drop, high
+
+
+def _threshold(value: Optional[float], optional: bool = False) -> float:
+    """
+    임계값을 배열 값으로 변환
+    
+    설정되지 않은 임계값은 NaN으로 두어 비교 결과가 항상 False가 되도록 합니다.
+    (금액 임계값은 기존과 같이 0도 비활성으로 취급)
+    """
+    if value is None or (optional and not value):
+        return np.nan
+    return float(value)
+
+
+class AlertEngine:
+    """
+    틱 단위 벡터화 알림 평가기
+    
+    사용법:
+        engine = AlertEngine()
+        for user ...:
+            engine.add(user.id, user, alert_settings, summary, baseline)
+        alerts_by_user = engine.evaluate()
+    """
+    
+    def __init__(self):
+        # 사용자 행: (키, 기준 통화)와 포트폴리오/임계값 열
+        self._users: List[Tuple[Hashable, str]] = []
+        self._old_totals: List[float] = []
+        self._new_totals: List[float] = []
+        self._portfolio_pct_thresholds: List[float] = []
+        self._portfolio_abs_thresholds: List[float] = []
+        self._coin_pct_thresholds: List[float] = []
+        self._coin_abs_thresholds: List[float] = []
+        self._window_pct_thresholds: List[float] = []
+        self._window_minutes: List[int] = []
+        self._anomaly_thresholds: List[float] = []
+        # 보유 코인 행: 사용자 행 번호, 심볼, 기준 가격, 현재 가격, 윈도우 최저/최고가, 이번 틱 수익률과 z-score
+        self._coin_users: List[int] = []
+        self._symbols: List[str] = []
+        self._old_prices: List[float] = []
+        self._new_prices: List[float] = []
+        self._window_lows: List[float] = []
+        self._window_highs: List[float] = []
+        self._return_pcts: List[float] = []
+        self._zscores: List[float] = []
+    
+    def __len__(self) -> int:
+        """배치된 보유 코인 행 수"""
+        return len(self._symbols)
+    
+    def add(
+        self,
+        key: Hashable,
+        user: User,
+        alert_settings: Optional[AlertSettings],
+        summary: Dict,
+        baseline: Optional[PriceSnapshot],
+        now: Optional[datetime] = None,
+        window_extremes: Optional[Dict[str, Tuple[float, float]]] = None,
+        return_observations: Optional[Dict[str, ReturnObservation]] = None
+    ) -> bool:
+        """
+        사용자 한 명의 포트폴리오 평가를 열 배열에 추가
+        
+        Args:
+            key: 결과를 구분할 키 (보통 사용자 ID)
+            summary: build_portfolio_summary 결과
+            baseline: 알림 기준 스냅샷
+            window_extremes: {심볼: (최근 윈도우 최저가, 최고가)} (None이면 윈도우 변동 알림 없음)
+            return_observations: {심볼: 이번 틱 수익률 관측값} (None이면 이상 변동 알림 없음)
+        
+        Returns:
+            추가 여부 (알림 설정/기준이 없거나 최소 알림 간격 이내이면 False)
+        """
+        if not is_alert_due(alert_settings, baseline, now):
+            return False
+        
+        row = len(self._users)
+        self._users.append((key, user.base_currency))
+        self._old_totals.append(baseline.total_portfolio_value)
+        self._new_totals.append(summary["total_value"])
+        self._portfolio_pct_thresholds.append(_threshold(alert_settings.portfolio_percentage_threshold))
+        self._portfolio_abs_thresholds.append(_threshold(alert_settings.portfolio_absolute_threshold, optional=True))
+        self._coin_pct_thresholds.append(_threshold(alert_settings.single_coin_percentage_threshold))
+        self._coin_abs_thresholds.append(_threshold(alert_settings.single_coin_absolute_threshold, optional=True))
+        if window_extremes is None:
+            self._window_pct_thresholds.append(np.nan)
+            self._window_minutes.append(0)
+            window_extremes = {}
+        else:
+            self._window_pct_thresholds.append(_threshold(alert_settings.window_percentage_threshold, optional=True))
+            self._window_minutes.append(alert_settings.window_minutes or 60)
+        if return_observations is None:
+            self._anomaly_thresholds.append(np.nan)
+            return_observations = {}
+        else:
+            self._anomaly_thresholds.append(_threshold(alert_settings.anomaly_zscore_threshold, optional=True))
+        
+        old_data = baseline.snapshot_data
+        price_data = summary["price_data"]
+        symbols = [item["symbol"] for item in summary["items"]]
+        quotes = [price_data.get(symbol) for symbol in symbols]
+        self._coin_users.extend([row] * len(symbols))
+        self._symbols.extend(symbols)
+        self._old_prices.extend([old_data.get(symbol, {}).get("price", 0) for symbol in symbols])
+        self._new_prices.extend([quote.price if quote else 0 for quote in quotes])
+        extremes = [window_extremes.get(symbol, (np.nan, np.nan)) for symbol in symbols]
+        self._window_lows.extend([low for low, _ in extremes])
+        self._window_highs.extend([high for _, high in extremes])
+        observations = [return_observations.get(symbol) for symbol in symbols]
+        self._return_pcts.extend([observation.change_pct if observation else np.nan for observation in observations])
+        self._zscores.extend([observation.zscore if observation else np.nan for observation in observations])
+        return True
+    
+    def evaluate(self) -> Dict[Hashable, List[Dict]]:
+        """
+        배치된 모든 행을 한 번에 평가
+        
+        Returns:
+            {key: [알림, ...]} (알림이 발생한 사용자만 포함, 사용자별 순서는 evaluate_alerts와 같음)
+        """
+        alerts: Dict[Hashable, List[Dict]] = {}
+        if not self._users:
+            return alerts
+        
+        old_totals = np.asarray(self._old_totals, dtype=np.float64)
+        new_totals = np.asarray(self._new_totals, dtype=np.float64)
+        coin_users = np.asarray(self._coin_users, dtype=np.intp)
+        old_prices = np.asarray(self._old_prices, dtype=np.float64)
+        new_prices = np.asarray(self._new_prices, dtype=np.float64)
+        window_lows = np.asarray(self._window_lows, dtype=np.float64)
+        window_highs = np.asarray(self._window_highs, dtype=np.float64)
+        zscores = np.asarray(self._zscores, dtype=np.float64)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 포트폴리오 전체 변동 (기준 총액이 0 이하이면 제외)
+            portfolio_pct = (new_totals - old_totals) / old_totals * 100
+            portfolio_abs = np.abs(new_totals - old_totals)
+            has_total = old_totals > 0
+            portfolio_pct_hit = has_total & (np.abs(portfolio_pct) >= np.asarray(self._portfolio_pct_thresholds))
+            portfolio_abs_hit = has_total & (portfolio_abs >= np.asarray(self._portfolio_abs_thresholds))
+            
+            # 개별 코인 변동 (기준 가격이 0 이하이면 제외, 임계값은 사용자 행에서 가져옴)
+            coin_pct = (new_prices - old_prices) / old_prices * 100
+            coin_abs = np.abs(new_prices - old_prices)
+            has_price = old_prices > 0
+            coin_pct_hit = has_price & (np.abs(coin_pct) >= np.asarray(self._coin_pct_thresholds)[coin_users])
+            coin_abs_hit = has_price & (coin_abs >= np.asarray(self._coin_abs_thresholds)[coin_users])
+            
+            # 윈도우 변동 (최저가 대비 상승 또는 최고가 대비 하락 중 큰 쪽, 현재 시세가 없으면 제외)
+            window_rise = np.where(window_lows > 0, (new_prices - window_lows) / window_lows * 100, 0.0)
+            window_drop = np.where(window_highs > 0, (window_highs - new_prices) / window_highs * 100, 0.0)
+            window_pct = np.where(window_rise >= window_drop, window_rise, -window_drop)
+            window_hit = (new_prices > 0) & (np.abs(window_pct) >= np.asarray(self._window_pct_thresholds)[coin_users])
+            
+            # 이번 틱 수익률이 평소 변동성의 임계값 배 이상 (관측값이 없으면 NaN이라 제외)
+            anomaly_hit = np.abs(zscores) >= np.asarray(self._anomaly_thresholds)[coin_users]
+        
+        # 임계값을 넘은 행만 Python 값으로 꺼내 메시지 생성 (포트폴리오 알림 → 코인 알림, 코인은 보유 순서대로)
+        rows = np.flatnonzero(portfolio_pct_hit | portfolio_abs_hit)
+        for row, pct_hit, abs_hit, change_pct, absolute_change, old_total, new_total in zip(
+            rows.tolist(),
+            portfolio_pct_hit[rows].tolist(),
+            portfolio_abs_hit[rows].tolist(),
+            portfolio_pct[rows].tolist(),
+            portfolio_abs[rows].tolist(),
+            old_totals[rows].tolist(),
+            new_totals[rows].tolist()
+        ):
+            key, base_currency = self._users[row]
+            user_alerts = alerts.setdefault(key, [])
+            if pct_hit:
+                user_alerts.append(portfolio_percentage_alert(change_pct, old_total, new_total, base_currency))
+            if abs_hit:
+                user_alerts.append(portfolio_absolute_alert(absolute_change, base_currency))
+        
+        indexes = np.flatnonzero(coin_pct_hit | coin_abs_hit | window_hit | anomaly_hit)
+        for index, pct_hit, abs_hit, win_hit, z_hit, change_pct, absolute_change, old_price, new_price, low, high in zip(
+            indexes.tolist(),
+            coin_pct_hit[indexes].tolist(),
+            coin_abs_hit[indexes].tolist(),
+            window_hit[indexes].tolist(),
+            anomaly_hit[indexes].tolist(),
+            coin_pct[indexes].tolist(),
+            coin_abs[indexes].tolist(),
+            old_prices[indexes].tolist(),
+            new_prices[indexes].tolist(),
+            window_lows[indexes].tolist(),
+            window_highs[indexes].tolist()
+        ):
+            row = self._coin_users[index]
+            key = self._users[row][0]
+            symbol = self._symbols[index]
+            user_alerts = alerts.setdefault(key, [])
+            if pct_hit:
+                user_alerts.append(coin_percentage_alert(symbol, change_pct, old_price, new_price))
+            if abs_hit:
+                user_alerts.append(coin_absolute_alert(symbol, absolute_change))
+            if win_hit:
+                window_pct, reference_price = window_change(low, high, new_price)
+                user_alerts.append(coin_window_alert(symbol, window_pct, self._window_minutes[row], reference_price, new_price))
+            if z_hit:
+                user_alerts.append(coin_anomaly_alert(symbol, self._return_pcts[index], self._zscores[index]))
+        
+        logger.debug(f"알림 평가 완료: 사용자 {len(self._users)}명, 보유 코인 {len(self)}개, 알림 발생 사용자 {len(alerts)}명")
+        return alerts
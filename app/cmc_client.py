@@ -1,6 +1,15 @@
 import requests
+import httpx
 from typing import Dict, List, Optional
 from app.config import settings
+from app.http_pool import http_pool
+from app.quote_cache import quote_cache
+from app.rate_limit import (
+    rate_limiters, credit_ledger, cmc_credit_cost,
+    call_with_rate_limit, call_with_rate_limit_async
+)
+from app.quote import Quote, loads
+from app.utils import chunked, fetch_chunks, fetch_chunks_async, merge_dicts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,28 +27,69 @@ class CMCClient:
             "Accept": "application/json"
         }
     
-    def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+    def get_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
         """
-        여러 코인의 최신 가격 정보 조회
+        여러 코인의 최신 시세 조회 (공유 시세 캐시 사용)
         
         Args:
             symbols: 코인 심볼 리스트 (예: ["BTC", "ETH"])
             convert: 변환 통화 (USD, KRW 등)
         
         Returns:
-            API 응답 데이터
+            {symbol: Quote} 딕셔너리 (조회되지 않은 심볼은 제외)
         """
-        symbols_str = ",".join(symbols)
-        url = f"{self.BASE_URL}/cryptocurrency/quotes/latest"
-        params = {
-            "symbol": symbols_str,
-            "convert": convert
+        def load(missing: List[str]) -> Dict[str, Quote]:
+            # URL 길이 및 요청당 심볼 수 제한을 넘지 않도록 나누어 동시에 조회
+            return merge_dicts(fetch_chunks(
+                lambda chunk: self._fetch_latest_quotes(chunk, convert),
+                chunked(missing, settings.cmc_max_symbols_per_request),
+                settings.quote_chunk_concurrency
+            ))
+        
+        return quote_cache.get_many("cmc", symbols, convert, load)
+    
+    def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+        """
+        여러 코인의 최신 가격 정보 조회 (이전 인터페이스 호환용)
+        
+        Returns:
+            {"data": {symbol: Quote}} 형식 (parse_quote_data로 추출)
+        """
+        return {"data": self.get_quotes(symbols, convert)}
+    
+    def _quote_params(self, symbols: List[str], convert: str) -> Dict[str, str]:
+        """quotes/latest 요청 파라미터"""
+        return {
+            "symbol": ",".join(symbols),
+            "convert": convert,
+            # 여러 사용자의 심볼을 묶어 조회하므로 잘못된 심볼 하나로 전체 요청이 실패하지 않도록 함
+            "skip_invalid": "true"
         }
+    
+    def _parse_quotes(self, response_data: Dict, symbols: List[str], convert: str) -> Dict[str, Quote]:
+        """quotes/latest 응답에서 요청한 심볼의 Quote 생성"""
+        data = response_data.get("data") or {}
+        quotes = {}
+        for symbol in symbols:
+            quote = Quote.from_cmc(symbol, data.get(symbol), convert)
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+    
+    def _fetch_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
+        """quotes/latest API 호출 (캐시 미사용)"""
+        url = f"{self.BASE_URL}/cryptocurrency/quotes/latest"
+        params = self._quote_params(symbols, convert)
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = call_with_rate_limit(
+                rate_limiters.get("cmc", self.api_key),
+                lambda: requests.get(url, headers=self.headers, params=params, timeout=10)
+            )
             response.raise_for_status()
-            return response.json()
+            data = loads(response.content)
+            credit_ledger.record("cmc", self.api_key, cmc_credit_cost(data, len(symbols)))
+            return self._parse_quotes(data, symbols, convert)
         except requests.exceptions.Timeout:
             logger.error("CMC API 요청 타임아웃")
             raise Exception("CMC API 요청 타임아웃: 서버 응답이 없습니다.")
@@ -72,44 +122,72 @@ class CMCClient:
             logger.error(f"CMC 포트폴리오 조회 실패: {e}")
             raise Exception(f"CMC 포트폴리오 조회 실패: {str(e)}")
     
-    def parse_quote_data(self, response_data: Dict, symbol: str, convert: str = "USD") -> Optional[Dict]:
+    def parse_quote_data(self, response_data: Dict, symbol: str, convert: str = "USD") -> Optional[Quote]:
         """
-        API 응답에서 특정 코인의 가격 데이터 추출
+        API 응답에서 특정 코인의 시세 추출
         
         Args:
-            response_data: API 응답 데이터
+            response_data: get_latest_quotes 결과 또는 quotes/latest 원본 응답
             symbol: 코인 심볼
             convert: 변환 통화
         
         Returns:
-            가격 데이터 딕셔너리 또는 None
+            Quote 또는 None
         """
-        try:
-            data = response_data.get("data", {})
-            coin_data = data.get(symbol)
-            
-            if not coin_data:
-                return None
-            
-            # coin_data가 딕셔너리인 경우 (단일 심볼 조회)
-            if isinstance(coin_data, dict):
-                quote = coin_data.get("quote", {}).get(convert, {})
-            # coin_data가 리스트인 경우 (다중 심볼 조회)
-            elif isinstance(coin_data, list) and len(coin_data) > 0:
-                quote = coin_data[0].get("quote", {}).get(convert, {})
-            else:
-                return None
-            
-            return {
-                "symbol": symbol,
-                "price": quote.get("price", 0),
-                "market_cap": quote.get("market_cap", 0),
-                "volume_24h": quote.get("volume_24h", 0),
-                "percent_change_1h": quote.get("percent_change_1h", 0),
-                "percent_change_24h": quote.get("percent_change_24h", 0),
-                "percent_change_7d": quote.get("percent_change_7d", 0),
-                "last_updated": quote.get("last_updated")
-            }
-        except (KeyError, IndexError, TypeError) as e:
-            return None
+        coin_data = (response_data.get("data") or {}).get(symbol)
+        if isinstance(coin_data, Quote):
+            return coin_data
+        return Quote.from_cmc(symbol, coin_data, convert)
+
 
+class AsyncCMCClient(CMCClient):
+    """
+    CoinMarketCap API 비동기 클라이언트
+    
+    공유 커넥션 풀(http_pool)을 사용하며, CMCClient와 동일한 형식의 데이터를 반환합니다.
+    """
+    
+    async def get_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
+        """
+        여러 코인의 최신 시세 조회 (공유 시세 캐시 사용)
+        
+        Args:
+            symbols: 코인 심볼 리스트 (예: ["BTC", "ETH"])
+            convert: 변환 통화 (USD, KRW 등)
+        
+        Returns:
+            {symbol: Quote} 딕셔너리 (조회되지 않은 심볼은 제외)
+        """
+        async def load(missing: List[str]) -> Dict[str, Quote]:
+            return merge_dicts(await fetch_chunks_async(
+                lambda chunk: self._fetch_latest_quotes(chunk, convert),
+                chunked(missing, settings.cmc_max_symbols_per_request),
+                settings.quote_chunk_concurrency
+            ))
+        
+        return await quote_cache.aget_many("cmc", symbols, convert, load)
+    
+    async def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+        """get_latest_quotes의 비동기 버전 (이전 인터페이스 호환용)"""
+        return {"data": await self.get_quotes(symbols, convert)}
+    
+    async def _fetch_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
+        """quotes/latest API 호출 (캐시 미사용)"""
+        url = f"{self.BASE_URL}/cryptocurrency/quotes/latest"
+        params = self._quote_params(symbols, convert)
+        
+        try:
+            response = await call_with_rate_limit_async(
+                rate_limiters.get("cmc", self.api_key),
+                lambda: http_pool.get(url, headers=self.headers, params=params)
+            )
+            response.raise_for_status()
+            data = loads(response.content)
+            credit_ledger.record("cmc", self.api_key, cmc_credit_cost(data, len(symbols)))
+            return self._parse_quotes(data, symbols, convert)
+        except httpx.TimeoutException:
+            logger.error("CMC API 요청 타임아웃")
+            raise Exception("CMC API 요청 타임아웃: 서버 응답이 없습니다.")
+        except httpx.HTTPError as e:
+            logger.error(f"CMC API 요청 실패: {e}")
+            raise Exception(f"CMC API 요청 실패: {str(e)}")
@@ -1,5 +1,14 @@
 import requests
+import httpx
 from typing import Dict, List, Optional
+from app.coingecko_index import coingecko_index
+from app.http_pool import http_pool
+from app.quote_cache import quote_cache
+from app.rate_limit import rate_limiters, credit_ledger, call_with_rate_limit, call_with_rate_limit_async
+from app.config import settings
+from app.quote import Quote, loads
+from app.utils import chunked, fetch_chunks, fetch_chunks_async, merge_dicts
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,7 +19,7 @@ class CoinGeckoClient:
     
     BASE_URL = "https://api.coingecko.com/api/v3"
     
-    # 주요 코인 심볼 -> CoinGecko ID 매핑
+    # 주요 코인 심볼 -> CoinGecko ID 고정 매핑 (없는 심볼은 전체 코인 인덱스에서 조회)
     SYMBOL_TO_ID = {
         "BTC": "bitcoin",
         "ETH": "ethereum",
@@ -80,9 +89,14 @@ class CoinGeckoClient:
             # 무료 공개 API 사용 (API 키 불필요)
             self.BASE_URL = "https://api.coingecko.com/api/v3"
     
+    @property
+    def _pro_api_key(self) -> Optional[str]:
+        """Pro API 사용 시 API 키, 무료 공개 API면 None"""
+        return self.headers.get("x-cg-pro-api-key")
+    
     def _symbol_to_id(self, symbol: str) -> Optional[str]:
-        """심볼을 CoinGecko ID로 변환"""
-        return self.SYMBOL_TO_ID.get(symbol.upper())
+        """심볼을 CoinGecko ID로 변환 (고정 매핑 우선, 없으면 시가총액 순위 기반 인덱스 사용)"""
+        return self.SYMBOL_TO_ID.get(symbol.upper()) or coingecko_index.resolve(symbol)
     
     def _get_coin_ids(self, symbols: List[str]) -> Dict[str, str]:
         """
@@ -100,45 +114,69 @@ class CoinGeckoClient:
                 logger.warning(f"심볼 {symbol}에 대한 CoinGecko ID를 찾을 수 없습니다.")
         return symbol_to_id
     
-    def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+    def get_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
         """
-        여러 코인의 최신 가격 정보 조회
+        여러 코인의 최신 시세 조회 (공유 시세 캐시 사용)
         
         Args:
             symbols: 코인 심볼 리스트 (예: ["BTC", "ETH"])
             convert: 변환 통화 (USD, KRW 등)
         
         Returns:
-            API 응답 데이터 (CMC 형식과 호환되도록 변환)
+            {symbol: Quote} 딕셔너리 (조회되지 않은 심볼은 제외)
         """
         # 심볼을 CoinGecko ID로 변환
         symbol_to_id = self._get_coin_ids(symbols)
         if not symbol_to_id:
             raise Exception("유효한 코인 심볼을 찾을 수 없습니다.")
         
-        coin_ids = list(symbol_to_id.values())
-        coin_ids_str = ",".join(coin_ids)
+        def load(missing: List[str]) -> Dict[str, Quote]:
+            # URL 길이 제한을 넘지 않도록 ID를 나누어 동시에 조회
+            return merge_dicts(fetch_chunks(
+                lambda chunk: self._fetch_latest_quotes(
+                    {symbol: symbol_to_id[symbol] for symbol in chunk}, convert
+                ),
+                chunked(missing, settings.coingecko_max_ids_per_request),
+                settings.quote_chunk_concurrency
+            ))
+        
+        return quote_cache.get_many("coingecko", list(symbol_to_id.keys()), convert, load)
+    
+    def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+        """
+        여러 코인의 최신 가격 정보 조회 (이전 인터페이스 호환용)
         
+        Returns:
+            {"data": {symbol: Quote}} 형식 (parse_quote_data로 추출)
+        """
+        return {"data": self.get_quotes(symbols, convert)}
+    
+    def _quote_params(self, symbol_to_id: Dict[str, str], convert: str) -> Dict[str, str]:
+        """simple/price 요청 파라미터"""
         # 통화 코드 변환
         vs_currency = self.CURRENCY_MAP.get(convert.upper(), convert.lower())
-        
-        url = f"{self.BASE_URL}/simple/price"
-        params = {
-            "ids": coin_ids_str,
+        return {
+            "ids": ",".join(symbol_to_id.values()),
             "vs_currencies": vs_currency,
             "include_market_cap": "true",
             "include_24hr_change": "true",
             "include_24hr_vol": "true",
             "include_last_updated_at": "true"
         }
+    
+    def _fetch_latest_quotes(self, symbol_to_id: Dict[str, str], convert: str = "USD") -> Dict[str, Quote]:
+        """simple/price API 호출 (캐시 미사용)"""
+        url = f"{self.BASE_URL}/simple/price"
+        params = self._quote_params(symbol_to_id, convert)
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = call_with_rate_limit(
+                rate_limiters.get("coingecko", self._pro_api_key),
+                lambda: requests.get(url, headers=self.headers, params=params, timeout=10)
+            )
             response.raise_for_status()
-            data = response.json()
-            
-            # CMC 형식과 호환되도록 변환
-            return self._convert_to_cmc_format(data, symbol_to_id, convert)
+            credit_ledger.record("coingecko", self._pro_api_key, 1)
+            return self._parse_quotes(loads(response.content), symbol_to_id, convert)
         except requests.exceptions.Timeout:
             logger.error("CoinGecko API 요청 타임아웃")
             raise Exception("CoinGecko API 요청 타임아웃: 서버 응답이 없습니다.")
@@ -146,90 +184,103 @@ class CoinGeckoClient:
             logger.error(f"CoinGecko API 요청 실패: {e}")
             raise Exception(f"CoinGecko API 요청 실패: {str(e)}")
     
-    def _convert_to_cmc_format(self, cg_data: Dict, symbol_to_id: Dict[str, str], convert: str) -> Dict:
+    def _parse_quotes(self, cg_data: Dict, symbol_to_id: Dict[str, str], convert: str) -> Dict[str, Quote]:
         """
-        CoinGecko 응답을 CMC 형식으로 변환
+        simple/price 응답에서 바로 Quote 생성
         
         Args:
-            cg_data: CoinGecko API 응답
+            cg_data: CoinGecko API 응답 ({coin_id: {vs_currency: price, ...}})
             symbol_to_id: {symbol: coin_id} 매핑
             convert: 변환 통화
         
         Returns:
-            CMC 형식과 호환되는 데이터 구조
+            {symbol: Quote} 딕셔너리
         """
         vs_currency = self.CURRENCY_MAP.get(convert.upper(), convert.lower())
-        result = {"data": {}}
-        
-        # ID -> Symbol 역매핑 생성
-        id_to_symbol = {v: k for k, v in symbol_to_id.items()}
-        
-        for coin_id, coin_data in cg_data.items():
-            symbol = id_to_symbol.get(coin_id)
-            if not symbol:
+        quotes = {}
+        for symbol, coin_id in symbol_to_id.items():
+            coin_data = cg_data.get(coin_id)
+            if not coin_data:
                 continue
-            
-            price = coin_data.get(vs_currency, 0)
-            market_cap = coin_data.get(f"{vs_currency}_market_cap", 0)
-            volume_24h = coin_data.get(f"{vs_currency}_24h_vol", 0)
-            percent_change_24h = coin_data.get(f"{vs_currency}_24h_change", 0)
-            last_updated = coin_data.get("last_updated_at")
-            
-            # CMC 형식으로 변환
-            result["data"][symbol] = [{
-                "quote": {
-                    convert: {
-                        "price": price,
-                        "market_cap": market_cap,
-                        "volume_24h": volume_24h,
-                        "percent_change_24h": percent_change_24h,
-                        "last_updated": last_updated
-                    }
-                }
-            }]
-        
-        return result
-    
-    def parse_quote_data(self, response_data: Dict, symbol: str, convert: str = "USD") -> Optional[Dict]:
+            quote = Quote.from_coingecko(symbol, coin_data, vs_currency)
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+    
+    def parse_quote_data(self, response_data: Dict, symbol: str, convert: str = "USD") -> Optional[Quote]:
         """
-        API 응답에서 특정 코인의 가격 데이터 추출
+        get_latest_quotes 결과에서 특정 코인의 시세 추출
         (CMC 클라이언트와 동일한 인터페이스)
         
         Args:
-            response_data: API 응답 데이터 (이미 CMC 형식으로 변환됨)
+            response_data: get_latest_quotes 결과 ({"data": {symbol: Quote}})
             symbol: 코인 심볼
             convert: 변환 통화
         
         Returns:
-            가격 데이터 딕셔너리 또는 None
+            Quote 또는 None
         """
-        try:
-            data = response_data.get("data", {})
-            coin_data = data.get(symbol)
-            
-            if not coin_data:
-                return None
-            
-            # coin_data가 딕셔너리인 경우 (단일 심볼 조회)
-            if isinstance(coin_data, dict):
-                quote = coin_data.get("quote", {}).get(convert, {})
-            # coin_data가 리스트인 경우 (다중 심볼 조회)
-            elif isinstance(coin_data, list) and len(coin_data) > 0:
-                quote = coin_data[0].get("quote", {}).get(convert, {})
-            else:
-                return None
-            
-            return {
-                "symbol": symbol,
-                "price": quote.get("price", 0),
-                "market_cap": quote.get("market_cap", 0),
-                "volume_24h": quote.get("volume_24h", 0),
-                "percent_change_1h": quote.get("percent_change_1h", 0),  # CoinGecko는 제공하지 않음
-                "percent_change_24h": quote.get("percent_change_24h", 0),
-                "percent_change_7d": quote.get("percent_change_7d", 0),  # CoinGecko는 제공하지 않음
-                "last_updated": quote.get("last_updated")
-            }
-        except (KeyError, IndexError, TypeError) as e:
-            logger.error(f"CoinGecko 응답 파싱 오류: {e}")
-            return None
+        quote = (response_data.get("data") or {}).get(symbol)
+        return quote if isinstance(quote, Quote) else None
+
 
+class AsyncCoinGeckoClient(CoinGeckoClient):
+    """
+    CoinGecko API 비동기 클라이언트
+    
+    공유 커넥션 풀(http_pool)을 사용하며, CoinGeckoClient와 동일한 형식의 데이터를 반환합니다.
+    """
+    
+    async def get_quotes(self, symbols: List[str], convert: str = "USD") -> Dict[str, Quote]:
+        """
+        여러 코인의 최신 시세 조회 (공유 시세 캐시 사용)
+        
+        Args:
+            symbols: 코인 심볼 리스트 (예: ["BTC", "ETH"])
+            convert: 변환 통화 (USD, KRW 등)
+        
+        Returns:
+            {symbol: Quote} 딕셔너리 (조회되지 않은 심볼은 제외)
+        """
+        # 인덱스 파일 로드/생성은 블로킹 작업이므로 처음 한 번은 스레드에서 실행
+        if not coingecko_index.is_loaded and any(s.upper() not in self.SYMBOL_TO_ID for s in symbols):
+            await asyncio.to_thread(coingecko_index.ensure_loaded)
+        
+        symbol_to_id = self._get_coin_ids(symbols)
+        if not symbol_to_id:
+            raise Exception("유효한 코인 심볼을 찾을 수 없습니다.")
+        
+        async def load(missing: List[str]) -> Dict[str, Quote]:
+            return merge_dicts(await fetch_chunks_async(
+                lambda chunk: self._fetch_latest_quotes(
+                    {symbol: symbol_to_id[symbol] for symbol in chunk}, convert
+                ),
+                chunked(missing, settings.coingecko_max_ids_per_request),
+                settings.quote_chunk_concurrency
+            ))
+        
+        return await quote_cache.aget_many("coingecko", list(symbol_to_id.keys()), convert, load)
+    
+    async def get_latest_quotes(self, symbols: List[str], convert: str = "USD") -> Dict:
+        """get_latest_quotes의 비동기 버전 (이전 인터페이스 호환용)"""
+        return {"data": await self.get_quotes(symbols, convert)}
+    
+    async def _fetch_latest_quotes(self, symbol_to_id: Dict[str, str], convert: str = "USD") -> Dict[str, Quote]:
+        """simple/price API 호출 (캐시 미사용)"""
+        url = f"{self.BASE_URL}/simple/price"
+        params = self._quote_params(symbol_to_id, convert)
+        
+        try:
+            response = await call_with_rate_limit_async(
+                rate_limiters.get("coingecko", self._pro_api_key),
+                lambda: http_pool.get(url, headers=self.headers, params=params)
+            )
+            response.raise_for_status()
+            credit_ledger.record("coingecko", self._pro_api_key, 1)
+            return self._parse_quotes(loads(response.content), symbol_to_id, convert)
+        except httpx.TimeoutException:
+            logger.error("CoinGecko API 요청 타임아웃")
+            raise Exception("CoinGecko API 요청 타임아웃: 서버 응답이 없습니다.")
+        except httpx.HTTPError as e:
+            logger.error(f"CoinGecko API 요청 실패: {e}")
+            raise Exception(f"CoinGecko API 요청 실패: {str(e)}")
@@ -0,0 +1,194 @@
+"""
+CoinGecko 심볼 → ID 인덱스
+
+CoinGecko 전체 코인 목록(/coins/list)으로 심볼 → ID 인덱스를 만들어 디스크에 저장합니다.
+같은 심볼을 쓰는 코인이 여러 개면 시가총액 순위(/coins/markets)가 높은 코인을 선택합니다.
+"""
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from app.config import settings
+from app.rate_limit import rate_limiters, credit_ledger, call_with_rate_limit
+import gzip
+import math
+import threading
+import time
+import requests
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_api_key(api_key: Optional[str]) -> Optional[str]:
+    if api_key and api_key.strip() and api_key.strip().lower() != "none":
+        return api_key.strip()
+    return None
+
+
+class CoinGeckoSymbolIndex:
+    """CoinGecko 심볼 → ID 인덱스 (지연 로딩, 디스크 캐시)"""
+    
+    FILE_HEADER = "# coingecko-symbol-index v1"
+    MARKETS_PER_PAGE = 250
+    # 다운로드 실패 후 재시도까지 대기 시간 (초)
+    RETRY_INTERVAL_SECONDS = 600
+    
+    def __init__(self, path: str, refresh_hours: float, rank_pages: int, api_key: Optional[str] = None):
+        """
+        Args:
+            path: 인덱스 파일 경로 (gzip 압축 TSV)
+            refresh_hours: 인덱스 갱신 주기 (시간)
+            rank_pages: 시가총액 순위를 가져올 /coins/markets 페이지 수 (페이지당 250개)
+            api_key: CoinGecko Pro API 키 (선택사항)
+        """
+        self.path = Path(path)
+        self.refresh_seconds = refresh_hours * 3600
+        self.rank_pages = rank_pages
+        self.api_key = _normalize_api_key(api_key)
+        self._ids: Optional[Dict[str, str]] = None
+        self._built_at = 0.0
+        self._failed_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._ids is not None
+    
+    @staticmethod
+    def build_index(coins: List[Dict], markets: List[Dict]) -> Dict[str, str]:
+        """
+        코인 목록으로 심볼 → ID 인덱스 생성
+        
+        같은 심볼이 여러 개면 (시가총액 순위, ID 길이, ID) 순으로 가장 앞선 코인을 선택합니다.
+        순위가 없는 코인은 순위가 있는 코인보다 뒤로 밀립니다.
+        """
+        ranks = {
+            market["id"]: market["market_cap_rank"]
+            for market in markets
+            if market.get("id") and market.get("market_cap_rank")
+        }
+        best: Dict[str, Tuple[Tuple[float, int, str], str]] = {}
+        
+        for coin in list(coins) + list(markets):
+            symbol = (coin.get("symbol") or "").strip().upper()
+            coin_id = coin.get("id")
+            if not symbol or not coin_id:
+                continue
+            key = (ranks.get(coin_id, math.inf), len(coin_id), coin_id)
+            current = best.get(symbol)
+            if current is None or key < current[0]:
+                best[symbol] = (key, coin_id)
+        
+        return {symbol: coin_id for symbol, (key, coin_id) in best.items()}
+    
+    def _get(self, path: str, params: Optional[Dict] = None):
+        """CoinGecko API GET 요청 (속도 제한 및 크레딧 기록 적용)"""
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            base_url = "https://pro-api.coingecko.com/api/v3"
+            headers["x-cg-pro-api-key"] = self.api_key
+        else:
+            base_url = "https://api.coingecko.com/api/v3"
+        
+        response = call_with_rate_limit(
+            rate_limiters.get("coingecko", self.api_key),
+            lambda: requests.get(f"{base_url}{path}", headers=headers, params=params, timeout=30)
+        )
+        response.raise_for_status()
+        credit_ledger.record("coingecko", self.api_key, 1)
+        return response.json()
+    
+    def download(self) -> Dict[str, str]:
+        """CoinGecko에서 코인 목록과 시가총액 순위를 받아 인덱스 생성"""
+        coins = self._get("/coins/list")
+        markets = []
+        for page in range(1, self.rank_pages + 1):
+            markets.extend(self._get("/coins/markets", {
+                "vs_currency": "usd",
+                "order": "market_cap_desc",
+                "per_page": self.MARKETS_PER_PAGE,
+                "page": page
+            }))
+        return self.build_index(coins, markets)
+    
+    def save(self, ids: Dict[str, str], built_at: float):
+        """인덱스를 디스크에 저장 (심볼 정렬, gzip 압축 TSV)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(f"{self.FILE_HEADER}\t{int(built_at)}\n")
+            for symbol in sorted(ids):
+                f.write(f"{symbol}\t{ids[symbol]}\n")
+        tmp_path.replace(self.path)
+    
+    def load(self) -> Tuple[Dict[str, str], float]:
+        """디스크에서 인덱스 로드"""
+        ids = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header, built_at = f.readline().rstrip("\n").split("\t")
+            if header != self.FILE_HEADER:
+                raise ValueError(f"알 수 없는 인덱스 파일 형식: {header}")
+            for line in f:
+                symbol, coin_id = line.rstrip("\n").split("\t")
+                ids[symbol] = coin_id
+        return ids, float(built_at)
+    
+    def _is_stale(self) -> bool:
+        return time.time() - self._built_at >= self.refresh_seconds
+    
+    def _rebuild(self):
+        ids = self.download()
+        built_at = time.time()
+        self.save(ids, built_at)
+        self._ids, self._built_at = ids, built_at
+        logger.info(f"CoinGecko 심볼 인덱스 갱신 완료: {len(ids)}개 심볼")
+    
+    def _refresh_in_background(self):
+        def run():
+            try:
+                self._rebuild()
+            except Exception as e:
+                logger.warning(f"CoinGecko 심볼 인덱스 갱신 실패 (기존 인덱스 사용): {e}")
+            finally:
+                self._refreshing = False
+        
+        self._refreshing = True
+        threading.Thread(target=run, daemon=True).start()
+    
+    def ensure_loaded(self):
+        """인덱스 로드 (메모리 → 디스크 → 다운로드 순). 오래된 인덱스는 백그라운드에서 갱신"""
+        with self._lock:
+            if self._ids is None and self.path.exists():
+                try:
+                    self._ids, self._built_at = self.load()
+                except (OSError, ValueError) as e:
+                    logger.warning(f"CoinGecko 심볼 인덱스 파일 로드 실패: {e}")
+            
+            if self._ids is not None:
+                if self._is_stale() and not self._refreshing:
+                    self._refresh_in_background()
+                return
+            
+            if time.time() - self._failed_at < self.RETRY_INTERVAL_SECONDS:
+                return
+            try:
+                self._rebuild()
+            except Exception as e:
+                self._failed_at = time.time()
+                logger.error(f"CoinGecko 심볼 인덱스 생성 실패: {e}")
+    
+    def resolve(self, symbol: str) -> Optional[str]:
+        """심볼에 해당하는 CoinGecko ID (없으면 None)"""
+        self.ensure_loaded()
+        if self._ids is None:
+            return None
+        return self._ids.get(symbol.upper())
+
+
+# 모든 CoinGecko 클라이언트가 공유하는 심볼 인덱스
+coingecko_index = CoinGeckoSymbolIndex(
+    path=settings.coingecko_index_path,
+    refresh_hours=settings.coingecko_index_refresh_hours,
+    rank_pages=settings.coingecko_index_rank_pages,
+    api_key=settings.coingecko_api_key
+)
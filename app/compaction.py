@@ -0,0 +1,383 @@
+"""
+스냅샷 이력 압축
+
+원본 스냅샷(price_snapshots)을 1시간 집계로, 1시간 집계를 1일 집계로 묶고
+(포트폴리오 총액 시가/고가/저가/종가와 심볼별 종가/평가액) 보존 기간이 지난 원본 스냅샷, 시세 틱,
+1시간 집계를 삭제합니다.
+모든 작업은 작은 묶음마다 별도 트랜잭션으로 커밋하고 묶음 사이에 잠시 쉬므로
+모니터링 틱의 스냅샷 커밋이 오래 기다리지 않습니다.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, exists, func, or_, select, text
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.config import settings
+from app.database import SessionLocal
+from app.models import PriceSnapshot, PriceTick, SnapshotRollup
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """시각이 속한 집계 구간의 시작 시각"""
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == "1d":
+        start = start.replace(hour=0)
+    return start
+
+
+def _align(timestamp: datetime, reference: datetime) -> datetime:
+    """DB에서 읽은 시각과 비교할 수 있도록 시간대 정보 맞춤 (SQLite는 UTC 기준 naive datetime 반환)"""
+    if reference.tzinfo is None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+@dataclass
+class CompactionReport:
+    """압축 작업 결과"""
+    started_at: Optional[datetime] = None
+    duration_seconds: float = 0.0
+    hourly_rollups: int = 0  # 새로 계산한 1시간 집계 수
+    daily_rollups: int = 0  # 새로 계산한 1일 집계 수
+    deleted_snapshots: int = 0
+    deleted_ticks: int = 0
+    deleted_hourly_rollups: int = 0
+    # 삭제로 확보한 DB 공간 (SQLite만 계산, 파일 크기는 VACUUM 전까지 그대로)
+    reclaimed_bytes: Optional[int] = None
+    
+    @property
+    def deleted_rows(self) -> int:
+        return self.deleted_snapshots + self.deleted_ticks + self.deleted_hourly_rollups
+    
+    def to_dict(self) -> Dict:
+        report = asdict(self)
+        report["deleted_rows"] = self.deleted_rows
+        return report
+
+
+def _merge_rollup(rollup: Optional[Dict], value_open: float, value_high: float, value_low: float,
+                  value_close: float, count: int, closes: Dict[str, float], close_values: Dict[str, float]) -> Dict:
+    """
+    시간순으로 들어오는 값을 집계에 합침 (시가는 처음 값, 종가는 마지막 값)
+    
+    심볼별 평가액은 마지막 값의 보유 심볼만 유지합니다 (매도한 심볼은 종가 시점 평가액에서 제외).
+    """
+    if rollup is None:
+        return {
+            "open_value": value_open,
+            "high_value": value_high,
+            "low_value": value_low,
+            "close_value": value_close,
+            "sample_count": count,
+            "closes": dict(closes),
+            "close_values": dict(close_values),
+        }
+    rollup["high_value"] = max(rollup["high_value"], value_high)
+    rollup["low_value"] = min(rollup["low_value"], value_low)
+    rollup["close_value"] = value_close
+    rollup["sample_count"] += count
+    rollup["closes"].update(closes)
+    rollup["close_values"] = dict(close_values)
+    return rollup
+
+
+class SnapshotCompactor:
+    """
+    스냅샷 이력 압축기
+    
+    1. 완료된 1시간 구간의 원본 스냅샷 → 1시간 집계
+    2. 완료된 1일 구간의 1시간 집계 → 1일 집계
+    3. 보존 기간이 지나고 집계에 반영된 원본 스냅샷 삭제 (사용자별 최신 알림 기준은 유지)
+    4. 남은 스냅샷이 참조하지 않는 오래된 시세 틱 삭제
+    5. 보존 기간이 지나고 1일 집계에 반영된 1시간 집계 삭제
+    
+    집계는 마지막 구간부터 다시 계산하므로 중간에 중단되어도 다음 실행에서 이어집니다.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        pause_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.compaction_batch_size
+        self.pause_seconds = settings.compaction_batch_pause_seconds if pause_seconds is None else pause_seconds
+        self.last_report: Optional[CompactionReport] = None
+        self._lock = threading.Lock()
+    
+    def _run_batches(self, step: Callable[[Session], int]) -> int:
+        """묶음 단위로 step을 반복 (묶음마다 커밋, 처리한 행이 batch_size보다 적으면 종료)"""
+        total = 0
+        while True:
+            db = self.session_factory()
+            try:
+                processed = step(db)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += processed
+            if processed < self.batch_size:
+                return total
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+    
+    def _watermark(self, resolution: str) -> Optional[datetime]:
+        """
+        집계를 다시 시작할 구간 (마지막으로 기록한 구간)
+        
+        마지막 구간은 중간에 중단되었을 수 있으므로 지우고 처음부터 다시 계산합니다.
+        """
+        db = self.session_factory()
+        try:
+            watermark = db.query(func.max(SnapshotRollup.bucket_start)).filter(
+                SnapshotRollup.resolution == resolution
+            ).scalar()
+            if watermark is not None:
+                db.query(SnapshotRollup).filter(
+                    SnapshotRollup.resolution == resolution,
+                    SnapshotRollup.bucket_start >= watermark
+                ).delete(synchronize_session=False)
+                db.commit()
+            return watermark
+        finally:
+            db.close()
+    
+    def _save_rollups(self, db: Session, resolution: str, rollups: Dict[Tuple[int, datetime], Dict]) -> int:
+        """집계를 DB에 반영 (이전 묶음이 기록한 같은 구간은 이어서 합침)"""
+        if not rollups:
+            return 0
+        user_ids = {user_id for user_id, _ in rollups}
+        buckets = {bucket for _, bucket in rollups}
+        existing = {
+            (rollup.user_id, rollup.bucket_start): rollup
+            for rollup in db.query(SnapshotRollup).filter(
+                SnapshotRollup.resolution == resolution,
+                SnapshotRollup.user_id.in_(user_ids),
+                SnapshotRollup.bucket_start.in_(buckets)
+            )
+        }
+        
+        created = 0
+        for (user_id, bucket), values in rollups.items():
+            rollup = existing.get((user_id, bucket))
+            if rollup is None:
+                db.add(SnapshotRollup(user_id=user_id, resolution=resolution, bucket_start=bucket, **values))
+                created += 1
+                continue
+            merged = _merge_rollup(
+                {
+                    "open_value": rollup.open_value,
+                    "high_value": rollup.high_value,
+                    "low_value": rollup.low_value,
+                    "close_value": rollup.close_value,
+                    "sample_count": rollup.sample_count,
+                    "closes": dict(rollup.closes),
+                    "close_values": dict(rollup.close_values or {}),
+                },
+                values["open_value"], values["high_value"], values["low_value"],
+                values["close_value"], values["sample_count"], values["closes"], values["close_values"]
+            )
+            for field, value in merged.items():
+                setattr(rollup, field, value)
+        return created
+    
+    def _rollup_hourly(self, now: datetime) -> int:
+        """완료된 1시간 구간의 원본 스냅샷을 1시간 집계로 묶음"""
+        start = self._watermark("1h")
+        cutoff = bucket_start(now, "1h")
+        position: List[Optional[Tuple[datetime, int]]] = [None]
+        created = [0]
+        
+        def step(db: Session) -> int:
+            query = db.query(PriceSnapshot).options(
+                joinedload(PriceSnapshot.holdings_version),
+                selectinload(PriceSnapshot.price_ticks)
+            ).filter(
+                PriceSnapshot.timestamp.isnot(None),
+                PriceSnapshot.timestamp < cutoff
+            )
+            if start is not None:
+                query = query.filter(PriceSnapshot.timestamp >= start)
+            if position[0] is not None:
+                after_timestamp, after_id = position[0]
+                query = query.filter(or_(
+                    PriceSnapshot.timestamp > after_timestamp,
+                    and_(PriceSnapshot.timestamp == after_timestamp, PriceSnapshot.id > after_id)
+                ))
+            snapshots = query.order_by(PriceSnapshot.timestamp, PriceSnapshot.id).limit(self.batch_size).all()
+            if not snapshots:
+                return 0
+            
+            rollups: Dict[Tuple[int, datetime], Dict] = {}
+            for snapshot in snapshots:
+                key = (snapshot.user_id, bucket_start(snapshot.timestamp, "1h"))
+                value = snapshot.total_portfolio_value
+                closes = {symbol: data["price"] for symbol, data in snapshot.snapshot_data.items()}
+                rollups[key] = _merge_rollup(rollups.get(key), value, value, value, value, 1, closes, snapshot.symbol_values)
+            created[0] += self._save_rollups(db, "1h", rollups)
+            position[0] = (snapshots[-1].timestamp, snapshots[-1].id)
+            return len(snapshots)
+        
+        self._run_batches(step)
+        return created[0]
+    
+    def _rollup_daily(self, now: datetime) -> int:
+        """완료된 1일 구간의 1시간 집계를 1일 집계로 묶음"""
+        start = self._watermark("1d")
+        cutoff = bucket_start(now, "1d")
+        position: List[Optional[Tuple[datetime, int]]] = [None]
+        created = [0]
+        
+        def step(db: Session) -> int:
+            query = db.query(SnapshotRollup).filter(
+                SnapshotRollup.resolution == "1h",
+                SnapshotRollup.bucket_start < cutoff
+            )
+            if start is not None:
+                query = query.filter(SnapshotRollup.bucket_start >= start)
+            if position[0] is not None:
+                after_bucket, after_id = position[0]
+                query = query.filter(or_(
+                    SnapshotRollup.bucket_start > after_bucket,
+                    and_(SnapshotRollup.bucket_start == after_bucket, SnapshotRollup.id > after_id)
+                ))
+            hourly = query.order_by(SnapshotRollup.bucket_start, SnapshotRollup.id).limit(self.batch_size).all()
+            if not hourly:
+                return 0
+            
+            rollups: Dict[Tuple[int, datetime], Dict] = {}
+            for rollup in hourly:
+                key = (rollup.user_id, bucket_start(rollup.bucket_start, "1d"))
+                rollups[key] = _merge_rollup(
+                    rollups.get(key), rollup.open_value, rollup.high_value, rollup.low_value,
+                    rollup.close_value, rollup.sample_count, rollup.closes, rollup.close_values or {}
+                )
+            created[0] += self._save_rollups(db, "1d", rollups)
+            position[0] = (hourly[-1].bucket_start, hourly[-1].id)
+            return len(hourly)
+        
+        self._run_batches(step)
+        return created[0]
+    
+    def _delete_snapshots(self, now: datetime) -> int:
+        """보존 기간이 지나고 1시간 집계에 반영된 원본 스냅샷 삭제 (사용자별 최신 알림 기준은 유지)"""
+        db = self.session_factory()
+        try:
+            rolled_until = db.query(func.max(SnapshotRollup.bucket_start)).filter(
+                SnapshotRollup.resolution == "1h"
+            ).scalar()
+        finally:
+            db.close()
+        if rolled_until is None:
+            return 0
+        cutoff = min(_align(now - timedelta(days=settings.snapshot_retention_days), rolled_until), rolled_until)
+        baselines = select(func.max(PriceSnapshot.id)).where(
+            PriceSnapshot.alert_baseline.is_(True)
+        ).group_by(PriceSnapshot.user_id)
+        
+        def step(db: Session) -> int:
+            ids = [row[0] for row in db.query(PriceSnapshot.id).filter(
+                PriceSnapshot.timestamp < cutoff,
+                PriceSnapshot.id.notin_(baselines)
+            ).limit(self.batch_size)]
+            if ids:
+                db.query(PriceSnapshot).filter(PriceSnapshot.id.in_(ids)).delete(synchronize_session=False)
+            return len(ids)
+        
+        return self._run_batches(step)
+    
+    def _delete_ticks(self, now: datetime) -> int:
+        """보존 기간이 지나고 남은 스냅샷이 참조하지 않는 시세 틱 삭제"""
+        cutoff = now - timedelta(days=settings.snapshot_retention_days)
+        referenced = exists().where(
+            PriceSnapshot.price_provider == PriceTick.provider,
+            PriceSnapshot.price_currency == PriceTick.currency,
+            PriceSnapshot.tick_at == PriceTick.timestamp
+        )
+        
+        def step(db: Session) -> int:
+            ids = [row[0] for row in db.query(PriceTick.id).filter(
+                PriceTick.timestamp < cutoff,
+                ~referenced
+            ).limit(self.batch_size)]
+            if ids:
+                db.query(PriceTick).filter(PriceTick.id.in_(ids)).delete(synchronize_session=False)
+            return len(ids)
+        
+        return self._run_batches(step)
+    
+    def _delete_hourly_rollups(self, now: datetime) -> int:
+        """보존 기간이 지나고 1일 집계에 반영된 1시간 집계 삭제"""
+        db = self.session_factory()
+        try:
+            rolled_until = db.query(func.max(SnapshotRollup.bucket_start)).filter(
+                SnapshotRollup.resolution == "1d"
+            ).scalar()
+        finally:
+            db.close()
+        if rolled_until is None:
+            return 0
+        cutoff = min(_align(now - timedelta(days=settings.hourly_rollup_retention_days), rolled_until), rolled_until)
+        
+        def step(db: Session) -> int:
+            ids = [row[0] for row in db.query(SnapshotRollup.id).filter(
+                SnapshotRollup.resolution == "1h",
+                SnapshotRollup.bucket_start < cutoff
+            ).limit(self.batch_size)]
+            if ids:
+                db.query(SnapshotRollup).filter(SnapshotRollup.id.in_(ids)).delete(synchronize_session=False)
+            return len(ids)
+        
+        return self._run_batches(step)
+    
+    def _used_bytes(self) -> Optional[int]:
+        """SQLite 사용 중인 페이지 크기 (다른 DB는 None)"""
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name != "sqlite":
+                return None
+            page_size = db.execute(text("PRAGMA page_size")).scalar()
+            page_count = db.execute(text("PRAGMA page_count")).scalar()
+            freelist_count = db.execute(text("PRAGMA freelist_count")).scalar()
+            return (page_count - freelist_count) * page_size
+        finally:
+            db.close()
+    
+    def run(self, now: Optional[datetime] = None) -> CompactionReport:
+        """집계 → 보존 기간 정리를 순서대로 실행하고 결과 반환"""
+        with self._lock:
+            now = now or datetime.now(timezone.utc)
+            started = time.perf_counter()
+            report = CompactionReport(started_at=now)
+            used_before = self._used_bytes()
+            
+            report.hourly_rollups = self._rollup_hourly(now)
+            report.daily_rollups = self._rollup_daily(now)
+            report.deleted_snapshots = self._delete_snapshots(now)
+            report.deleted_ticks = self._delete_ticks(now)
+            report.deleted_hourly_rollups = self._delete_hourly_rollups(now)
+            
+            used_after = self._used_bytes()
+            if used_before is not None and used_after is not None:
+                report.reclaimed_bytes = max(used_before - used_after, 0)
+            report.duration_seconds = time.perf_counter() - started
+            self.last_report = report
+            logger.info(
+                f"스냅샷 이력 압축 완료: 1시간 집계 {report.hourly_rollups}개, 1일 집계 {report.daily_rollups}개, "
+                f"삭제 {report.deleted_rows}행 (스냅샷 {report.deleted_snapshots}, 시세 틱 {report.deleted_ticks}, "
+                f"1시간 집계 {report.deleted_hourly_rollups}), 확보 {report.reclaimed_bytes or 0:,} bytes, "
+                f"{report.duration_seconds:.2f}s"
+            )
+            return report
+
+
+# 스케줄러가 주기적으로 실행하고 통계 API가 마지막 결과를 조회하는 압축기
+snapshot_compactor = SnapshotCompactor()
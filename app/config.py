@@ -28,6 +28,115 @@ class Settings(BaseSettings):
     # Scheduler
     scheduler_interval_minutes: int = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", "5"))
     
+    # Quote cache (TTL 0이면 캐시 비활성화)
+    quote_cache_ttl_seconds: float = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "60"))
+    quote_cache_max_entries: int = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
+    
+    # HTTP connection pool (비동기 API 클라이언트 공유)
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    http_per_host_limit: int = int(os.getenv("HTTP_PER_HOST_LIMIT", "10"))
+    http_timeout_seconds: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    
+    # API rate limit (API 키별 분당 요청 수) 및 429 재시도
+    cmc_rate_limit_per_minute: float = float(os.getenv("CMC_RATE_LIMIT_PER_MINUTE", "30"))
+    coingecko_rate_limit_per_minute: float = float(os.getenv("COINGECKO_RATE_LIMIT_PER_MINUTE", "10"))
+    coingecko_pro_rate_limit_per_minute: float = float(os.getenv("COINGECKO_PRO_RATE_LIMIT_PER_MINUTE", "500"))
+    rate_limit_burst: float = float(os.getenv("RATE_LIMIT_BURST", "5"))
+    api_max_retries: int = int(os.getenv("API_MAX_RETRIES", "3"))
+    rate_limit_backoff_base_seconds: float = float(os.getenv("RATE_LIMIT_BACKOFF_BASE_SECONDS", "1"))
+    rate_limit_max_backoff_seconds: float = float(os.getenv("RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+    
+    # API 월간 크레딧 한도 (0이면 무제한)
+    cmc_monthly_credit_limit: int = int(os.getenv("CMC_MONTHLY_CREDIT_LIMIT", "10000"))
+    coingecko_monthly_call_limit: int = int(os.getenv("COINGECKO_MONTHLY_CALL_LIMIT", "0"))
+    
+    # 대량 심볼 조회 시 요청당 최대 심볼 수 및 동시 요청 수
+    cmc_max_symbols_per_request: int = int(os.getenv("CMC_MAX_SYMBOLS_PER_REQUEST", "100"))
+    coingecko_max_ids_per_request: int = int(os.getenv("COINGECKO_MAX_IDS_PER_REQUEST", "150"))
+    quote_chunk_concurrency: int = int(os.getenv("QUOTE_CHUNK_CONCURRENCY", "4"))
+    
+    # 제공자 장애 조치: 응답이 백분위 임계값보다 늦으면 다른 제공자에 헤지 요청
+    provider_failover_enabled: bool = os.getenv("PROVIDER_FAILOVER_ENABLED", "true").lower() == "true"
+    hedge_latency_percentile: float = float(os.getenv("HEDGE_LATENCY_PERCENTILE", "95"))
+    hedge_latency_window: int = int(os.getenv("HEDGE_LATENCY_WINDOW", "100"))
+    hedge_min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+    hedge_default_delay_seconds: float = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "2"))
+    hedge_min_delay_seconds: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.2"))
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    circuit_open_seconds: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "60"))
+    
+    # 스케줄러 틱에서 한 번에 읽어 처리하는 사용자 수
+    tick_chunk_size: int = int(os.getenv("TICK_CHUNK_SIZE", "1000"))
+    # 틱에서 사용자별 알림 전송을 동시에 처리하는 최대 사용자 수와 사용자당 제한 시간
+    tick_user_concurrency: int = int(os.getenv("TICK_USER_CONCURRENCY", "50"))
+    tick_user_timeout_seconds: float = float(os.getenv("TICK_USER_TIMEOUT_SECONDS", "30"))
+    
+    # 다중 프로세스 모니터링 워커 (python -m app.worker): 사용자 ID 해시 샤드 수, 워커 하트비트 주기/만료 시간
+    # MONITOR_WORKER_MODE=true이면 API 서버는 모니터링/요약/압축 작업을 실행하지 않고 워커에 맡김
+    monitor_worker_mode: bool = os.getenv("MONITOR_WORKER_MODE", "false").lower() == "true"
+    shard_count: int = int(os.getenv("SHARD_COUNT", "64"))
+    worker_heartbeat_seconds: int = int(os.getenv("WORKER_HEARTBEAT_SECONDS", "10"))
+    worker_heartbeat_timeout_seconds: int = int(os.getenv("WORKER_HEARTBEAT_TIMEOUT_SECONDS", "30"))
+    
+    # 텔레그램 전송 대기열: 전체/채팅별 초당 전송 수 (텔레그램 제한 약 30건/초, 채팅당 1건/초),
+    # 동시 전송 수, 전송 1건 제한 시간, RetryAfter 재시도 횟수
+    telegram_global_rate_per_second: float = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SECOND", "25"))
+    telegram_chat_rate_per_second: float = float(os.getenv("TELEGRAM_CHAT_RATE_PER_SECOND", "1"))
+    telegram_send_concurrency: int = int(os.getenv("TELEGRAM_SEND_CONCURRENCY", "20"))
+    telegram_send_timeout_seconds: float = float(os.getenv("TELEGRAM_SEND_TIMEOUT_SECONDS", "10"))
+    telegram_max_retries: int = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+    
+    # 알림 아웃박스: 전송 작업 주기, 한 번에 선점할 알림 수, 선점 유지 시간,
+    # 실패 시 지수 백오프 (기본/최대 대기), dead-letter로 옮길 시도 횟수, 전송 완료 알림 보존 기간
+    outbox_poll_seconds: int = int(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    outbox_lease_seconds: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+    outbox_backoff_base_seconds: float = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+    outbox_max_backoff_seconds: float = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "600"))
+    outbox_max_attempts: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+    outbox_retention_days: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+    
+    # 시세 갱신 추적: 바뀌지 않은 시세는 평가/알림/스냅샷 생략, 제공자 갱신 주기에 맞춰 조회
+    freshness_skip_unchanged: bool = os.getenv("FRESHNESS_SKIP_UNCHANGED", "true").lower() == "true"
+    freshness_aligned_scheduling: bool = os.getenv("FRESHNESS_ALIGNED_SCHEDULING", "false").lower() == "true"
+    freshness_min_poll_seconds: int = int(os.getenv("FRESHNESS_MIN_POLL_SECONDS", "60"))
+    freshness_poll_lag_seconds: int = int(os.getenv("FRESHNESS_POLL_LAG_SECONDS", "5"))
+    
+    # 환율 변환 모드: 시세를 기준 통화로 한 번만 조회하고 사용자 통화는 환율 테이블로 변환
+    fx_conversion_enabled: bool = os.getenv("FX_CONVERSION_ENABLED", "false").lower() == "true"
+    quote_pivot_currency: str = os.getenv("QUOTE_PIVOT_CURRENCY", "USD")
+    fx_refresh_minutes: int = int(os.getenv("FX_REFRESH_MINUTES", "60"))
+    
+    # 스냅샷 이력 압축: 원본 스냅샷을 1시간/1일 집계로 묶고 보존 기간이 지난 행 삭제
+    compaction_interval_minutes: int = int(os.getenv("COMPACTION_INTERVAL_MINUTES", "60"))
+    compaction_batch_size: int = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+    compaction_batch_pause_seconds: float = float(os.getenv("COMPACTION_BATCH_PAUSE_SECONDS", "0.05"))
+    snapshot_retention_days: int = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "7"))
+    hourly_rollup_retention_days: int = int(os.getenv("HOURLY_ROLLUP_RETENTION_DAYS", "90"))
+    # 포트폴리오 이력 API의 기본 최대 점 개수 (넘으면 LTTB 다운샘플링)
+    history_max_points: int = int(os.getenv("HISTORY_MAX_POINTS", "500"))
+    
+    # 심볼별 시세 이력 (메모리 맵 배열 파일, 오래된 구간은 압축 시 간격별 마지막 값만 유지)
+    price_history_enabled: bool = os.getenv("PRICE_HISTORY_ENABLED", "true").lower() == "true"
+    price_history_path: str = os.getenv("PRICE_HISTORY_PATH", "./price_history")
+    price_history_compact_after_days: int = int(os.getenv("PRICE_HISTORY_COMPACT_AFTER_DAYS", "30"))
+    price_history_compact_interval_seconds: int = int(os.getenv("PRICE_HISTORY_COMPACT_INTERVAL_SECONDS", "3600"))
+    
+    # 윈도우 변동 알림: (심볼, 통화)별 최근 시세 링 버퍼 크기와 최대 윈도우 길이 (재시작 시 채울 구간)
+    price_window_capacity: int = int(os.getenv("PRICE_WINDOW_CAPACITY", "288"))
+    price_window_max_minutes: int = int(os.getenv("PRICE_WINDOW_MAX_MINUTES", "1440"))
+    
+    # 이상 변동 알림: z-score를 계산하기 전 필요한 수익률 표본 수, 이보다 긴 틱 간격은 수익률에서 제외
+    anomaly_min_samples: int = int(os.getenv("ANOMALY_MIN_SAMPLES", "30"))
+    anomaly_max_gap_minutes: int = int(os.getenv("ANOMALY_MAX_GAP_MINUTES", "60"))
+    
+    # CoinGecko 심볼 → ID 인덱스 (디스크 캐시)
+    coingecko_index_path: str = os.getenv("COINGECKO_INDEX_PATH", "./coingecko_symbols.tsv.gz")
+    coingecko_index_refresh_hours: float = float(os.getenv("COINGECKO_INDEX_REFRESH_HOURS", "24"))
+    coingecko_index_rank_pages: int = int(os.getenv("COINGECKO_INDEX_RANK_PAGES", "4"))
+    
     # Portfolio (JSON string)
     portfolio_json: Optional[str] = os.getenv("PORTFOLIO_JSON", None)
     
@@ -0,0 +1,115 @@
+"""
+시세 갱신 여부 추적
+
+제공자가 반환하는 last_updated를 (API 제공자, 심볼, 통화)별로 기억하여
+실제로 바뀐 시세만 골라내고, 제공자의 시세 갱신 주기를 추정합니다.
+"""
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+from collections import deque
+from datetime import datetime
+from app.quote import Quote
+import math
+import statistics
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_last_updated(value) -> Optional[float]:
+    """last_updated (CMC: ISO 8601 문자열, CoinGecko: 유닉스 시간)를 유닉스 시간으로 변환"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class FreshnessTracker:
+    """(API 제공자, 심볼, 통화)별 마지막 last_updated 기록 및 제공자별 갱신 주기 추정"""
+    
+    def __init__(self, window_size: int = 50):
+        self.window_size = window_size
+        self._last_seen: Dict[Tuple[str, str, str], str] = {}
+        # 시세가 마지막으로 갱신된 것으로 판단한 틱 번호
+        self._changed_tick: Dict[Tuple[str, str, str], int] = {}
+        self._intervals: Dict[str, Deque[float]] = {}
+        self._latest_update: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def observe(
+        self,
+        provider: str,
+        currency: str,
+        quotes: Dict[str, Quote],
+        tick: Optional[int] = None
+    ) -> Set[str]:
+        """
+        조회한 시세를 기록하고 이전 조회 이후 갱신된 심볼 반환
+        
+        last_updated가 없는 시세는 비교할 수 없으므로 항상 갱신된 것으로 봅니다.
+        tick을 주면 같은 틱 안에서 여러 번 관측해도 (사용자 묶음별 조회) 같은 결과를 반환합니다.
+        """
+        changed = set()
+        with self._lock:
+            intervals = self._intervals.setdefault(provider, deque(maxlen=self.window_size))
+            for symbol, quote in quotes.items():
+                if quote.last_updated is None:
+                    changed.add(symbol)
+                    continue
+                
+                key = (provider, symbol, currency)
+                previous = self._last_seen.get(key)
+                if previous == quote.last_updated:
+                    if tick is not None and self._changed_tick.get(key) == tick:
+                        changed.add(symbol)
+                    continue
+                changed.add(symbol)
+                self._last_seen[key] = quote.last_updated
+                if tick is not None:
+                    self._changed_tick[key] = tick
+                
+                updated_at = parse_last_updated(quote.last_updated)
+                if updated_at is None:
+                    continue
+                previous_at = parse_last_updated(previous)
+                if previous_at is not None and updated_at > previous_at:
+                    intervals.append(updated_at - previous_at)
+                self._latest_update[provider] = max(self._latest_update.get(provider, 0.0), updated_at)
+        return changed
+    
+    def cadence(self, provider: str) -> Optional[float]:
+        """제공자의 추정 시세 갱신 주기 (초, 관측값이 없으면 None)"""
+        with self._lock:
+            intervals = list(self._intervals.get(provider, ()))
+        if not intervals:
+            return None
+        return statistics.median(intervals)
+    
+    def next_update_at(self, providers: Iterable[str], now: float) -> Optional[float]:
+        """제공자들 중 가장 먼저 다음 시세가 갱신될 것으로 예상되는 now 이후 시각 (유닉스 시간)"""
+        predictions = []
+        for provider in providers:
+            cadence = self.cadence(provider)
+            latest = self._latest_update.get(provider)
+            if cadence and latest:
+                # 마지막 갱신 이후 주기가 여러 번 지났으면 now 이후의 첫 갱신 시각으로 이동
+                periods = max(1, math.ceil((now - latest) / cadence))
+                predictions.append(latest + cadence * periods)
+        return min(predictions) if predictions else None
+    
+    def clear(self):
+        with self._lock:
+            self._last_seen.clear()
+            self._changed_tick.clear()
+            self._intervals.clear()
+            self._latest_update.clear()
+
+
+# 모니터링 틱이 공유하는 시세 갱신 추적기
+freshness_tracker = FreshnessTracker()
@@ -0,0 +1,106 @@
+"""
+환율 테이블
+
+시세를 기준 통화(pivot, 기본값 USD)로 한 번만 조회하고 사용자별 통화로는 로컬에서 변환합니다.
+환율은 CoinGecko /exchange_rates (무료, API 키 불필요)에서 별도 주기로 갱신합니다.
+"""
+from typing import Dict, Optional
+from app.config import settings
+from app.http_pool import http_pool
+from app.quote import Quote
+from app.rate_limit import rate_limiters, credit_ledger, call_with_rate_limit, call_with_rate_limit_async
+import threading
+import time
+import requests
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FxRateTable:
+    """기준 통화 대비 환율 테이블"""
+    
+    EXCHANGE_RATES_URL = "https://api.coingecko.com/api/v3/exchange_rates"
+    
+    def __init__(self):
+        # {통화: BTC 1개의 해당 통화 가격}
+        self._btc_rates: Dict[str, float] = {}
+        self.updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def _apply(self, data: Dict):
+        btc_rates = {
+            currency.upper(): float(rate["value"])
+            for currency, rate in data.get("rates", {}).items()
+            if rate.get("value")
+        }
+        if not btc_rates:
+            raise Exception("환율 응답에 환율 정보가 없습니다.")
+        with self._lock:
+            self._btc_rates = btc_rates
+            self.updated_at = time.time()
+        logger.info(f"환율 테이블 갱신 완료: {len(btc_rates)}개 통화")
+    
+    def refresh(self):
+        """환율 갱신 (동기)"""
+        response = call_with_rate_limit(
+            rate_limiters.get("coingecko", None),
+            lambda: requests.get(self.EXCHANGE_RATES_URL, headers={"Accept": "application/json"}, timeout=10)
+        )
+        response.raise_for_status()
+        credit_ledger.record("coingecko", None, 1)
+        self._apply(response.json())
+    
+    async def refresh_async(self):
+        """환율 갱신 (비동기)"""
+        response = await call_with_rate_limit_async(
+            rate_limiters.get("coingecko", None),
+            lambda: http_pool.get(self.EXCHANGE_RATES_URL, headers={"Accept": "application/json"})
+        )
+        response.raise_for_status()
+        credit_ledger.record("coingecko", None, 1)
+        self._apply(response.json())
+    
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """from_currency 1단위의 to_currency 가격 (환율 정보가 없으면 None)"""
+        if from_currency.upper() == to_currency.upper():
+            return 1.0
+        with self._lock:
+            from_rate = self._btc_rates.get(from_currency.upper())
+            to_rate = self._btc_rates.get(to_currency.upper())
+        if not from_rate or not to_rate:
+            return None
+        return to_rate / from_rate
+    
+    def can_convert(self, from_currency: str, to_currency: str) -> bool:
+        return self.rate(from_currency, to_currency) is not None
+    
+    def convert_price_data(self, price_data: Dict[str, Quote], from_currency: str, to_currency: str) -> Dict[str, Quote]:
+        """
+        {symbol: Quote}의 가격/시가총액/거래량을 다른 통화로 변환 (변동률은 그대로)
+        
+        Raises:
+            Exception: 환율 정보가 없는 경우
+        """
+        if from_currency.upper() == to_currency.upper():
+            return price_data
+        rate = self.rate(from_currency, to_currency)
+        if rate is None:
+            raise Exception(f"환율 정보가 없습니다: {from_currency} → {to_currency}")
+        return {symbol: quote.scaled(rate) for symbol, quote in price_data.items()}
+
+
+def fetch_currency_for(currency: str) -> str:
+    """
+    시세를 실제로 조회할 통화
+    
+    환율 변환 모드에서는 환율 정보가 있는 통화를 기준 통화로 조회하고,
+    그 외에는 사용자 통화로 직접 조회합니다.
+    """
+    pivot = settings.quote_pivot_currency
+    if settings.fx_conversion_enabled and fx_rates.can_convert(pivot, currency):
+        return pivot
+    return currency
+
+
+# 모든 사용자가 공유하는 환율 테이블
+fx_rates = FxRateTable()
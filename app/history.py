@@ -0,0 +1,184 @@
+"""
+포트폴리오 이력 조회
+
+요청 구간 길이와 보존 기간에 맞춰 원본 스냅샷, 1시간 집계, 1일 집계 중 해상도를 고르고,
+집계가 아직 다루지 않은 최근 구간은 더 세밀한 데이터로 이어 붙입니다.
+점 개수가 max_points를 넘으면 LTTB(Largest-Triangle-Three-Buckets)로 모양을 유지하며 줄입니다.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.config import settings
+from app.models import User, PriceSnapshot, SnapshotRollup
+from app.compaction import bucket_start
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 거친 해상도부터 (이어 붙일 때 순서)
+RESOLUTIONS = ("1d", "1h", "raw")
+BUCKET_LENGTHS = {
+    "1d": timedelta(days=1),
+    "1h": timedelta(hours=1),
+}
+# 해상도 선택 시 허용하는 원본 점 개수 (max_points의 배수, LTTB가 고를 후보)
+OVERSAMPLING = 4
+
+# (시각, 총액, {심볼: 평가액})
+HistoryPoint = Tuple[datetime, float, Dict[str, float]]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    LTTB 다운샘플링으로 남길 점의 인덱스
+    
+    첫 점과 마지막 점은 항상 남기고, 나머지 구간마다 이전에 고른 점과
+    다음 구간 평균점이 이루는 삼각형 넓이가 가장 큰 점을 고릅니다.
+    """
+    count = len(x)
+    if max_points >= count or max_points < 3:
+        return np.arange(count)
+    
+    bucket_size = (count - 2) / (max_points - 2)
+    indices = np.empty(max_points, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = count - 1
+    selected = 0
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """UTC 기준 시각으로 변환 (시간대 정보가 없으면 UTC로 간주, SQLite는 naive datetime 반환)"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def choose_resolution(start: datetime, end: datetime, max_points: int, now: Optional[datetime] = None) -> str:
+    """구간 시작이 보존 기간 안에 있고 점 개수가 적당한 가장 세밀한 해상도"""
+    now = now or datetime.now(timezone.utc)
+    span = (end - start).total_seconds()
+    candidates = (
+        ("raw", settings.scheduler_interval_minutes * 60, settings.snapshot_retention_days),
+        ("1h", BUCKET_LENGTHS["1h"].total_seconds(), settings.hourly_rollup_retention_days),
+    )
+    for resolution, step_seconds, retention_days in candidates:
+        covered = start >= now - timedelta(days=retention_days)
+        if covered and span / step_seconds <= max_points * OVERSAMPLING:
+            return resolution
+    return "1d"
+
+
+class PortfolioHistoryService:
+    """포트폴리오 이력 조회 서비스"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _rollup_points(self, user_id: int, resolution: str, start: datetime, end: datetime) -> List[HistoryPoint]:
+        """start가 속한 구간부터의 집계 종가"""
+        rows = self.db.query(
+            SnapshotRollup.bucket_start,
+            SnapshotRollup.close_value,
+            SnapshotRollup.close_values
+        ).filter(
+            SnapshotRollup.user_id == user_id,
+            SnapshotRollup.resolution == resolution,
+            SnapshotRollup.bucket_start >= bucket_start(start, resolution),
+            SnapshotRollup.bucket_start <= end
+        ).order_by(SnapshotRollup.bucket_start).all()
+        return [(_utc(bucket), value, values or {}) for bucket, value, values in rows]
+    
+    def _raw_points(self, user_id: int, start: datetime, end: datetime) -> List[HistoryPoint]:
+        snapshots = self.db.query(PriceSnapshot).options(
+            joinedload(PriceSnapshot.holdings_version),
+            selectinload(PriceSnapshot.price_ticks)
+        ).filter(
+            PriceSnapshot.user_id == user_id,
+            PriceSnapshot.timestamp >= start,
+            PriceSnapshot.timestamp <= end
+        ).order_by(PriceSnapshot.timestamp, PriceSnapshot.id).all()
+        return [
+            (_utc(snapshot.timestamp), snapshot.total_portfolio_value, snapshot.symbol_values)
+            for snapshot in snapshots
+        ]
+    
+    def load_points(self, user_id: int, start: datetime, end: datetime, resolution: str) -> List[HistoryPoint]:
+        """
+        해상도의 점 목록 (마지막 집계 구간 이후는 더 세밀한 해상도로 이어 붙임)
+        
+        예: 1일 집계 → 오늘의 1시간 집계 → 현재 시간대의 원본 스냅샷
+        """
+        points: List[HistoryPoint] = []
+        cursor = start
+        for level in RESOLUTIONS[RESOLUTIONS.index(resolution):]:
+            if cursor > end:
+                break
+            if level == "raw":
+                points.extend(self._raw_points(user_id, cursor, end))
+                break
+            level_points = self._rollup_points(user_id, level, cursor, end)
+            if level_points:
+                points.extend(level_points)
+                cursor = level_points[-1][0] + BUCKET_LENGTHS[level]
+        return points
+    
+    def get_history(
+        self,
+        user: User,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        max_points: Optional[int] = None
+    ) -> Dict:
+        """
+        포트폴리오 총액과 심볼별 평가액 이력
+        
+        Args:
+            resolution: "raw", "1h", "1d" (None이면 구간 길이와 보존 기간으로 선택)
+            max_points: 최대 점 개수 (넘으면 총액 기준 LTTB로 줄이고 심볼별 값도 같은 시각만 남김)
+        
+        Returns:
+            {"resolution", "base_currency", "from", "to", "source_points", "timestamps", "total_values", "symbol_values"}
+        """
+        max_points = max_points or settings.history_max_points
+        start, end = _utc(start), _utc(end)
+        if end < start:
+            raise ValueError("조회 종료 시각이 시작 시각보다 빠릅니다.")
+        if resolution is None:
+            resolution = choose_resolution(start, end, max_points)
+        elif resolution not in RESOLUTIONS:
+            raise ValueError(f"지원하지 않는 해상도입니다: {resolution} (raw, 1h, 1d)")
+        
+        points = self.load_points(user.id, start, end, resolution)
+        source_points = len(points)
+        if source_points > max_points:
+            times = np.fromiter((point[0].timestamp() for point in points), dtype=np.float64, count=source_points)
+            totals = np.fromiter((point[1] for point in points), dtype=np.float64, count=source_points)
+            points = [points[index] for index in lttb_indices(times, totals, max_points).tolist()]
+            logger.debug(f"포트폴리오 이력 다운샘플링: {source_points}개 → {len(points)}개 ({resolution})")
+        
+        symbols = sorted({symbol for point in points for symbol in point[2]})
+        return {
+            "resolution": resolution,
+            "base_currency": user.base_currency,
+            "from": start,
+            "to": end,
+            "source_points": source_points,
+            "timestamps": [point[0] for point in points],
+            "total_values": [point[1] for point in points],
+            "symbol_values": {symbol: [point[2].get(symbol) for point in points] for symbol in symbols},
+        }
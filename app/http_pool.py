@@ -0,0 +1,109 @@
+"""
+공유 HTTP 커넥션 풀
+
+모든 사용자/클라이언트가 하나의 httpx.AsyncClient를 공유하여
+keep-alive 연결을 재사용합니다 (DNS/TCP/TLS 설정 비용 절감).
+"""
+from typing import Dict, Optional
+from app.config import settings
+import asyncio
+import weakref
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _LoopState:
+    """이벤트 루프별 클라이언트와 호스트별 동시 요청 제한"""
+    
+    def __init__(self, client: httpx.AsyncClient, per_host_limit: int):
+        self.client = client
+        self.per_host_limit = per_host_limit
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    def host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self.host_semaphores[host] = semaphore
+        return semaphore
+
+
+class HttpPool:
+    """
+    비동기 HTTP 커넥션 풀
+    
+    httpx.AsyncClient는 생성된 이벤트 루프에 묶이므로, 스케줄러(uvicorn 루프)와
+    텔레그램 봇(별도 스레드 루프)은 각자의 풀을 갖습니다.
+    """
+    
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        per_host_limit: int,
+        timeout_seconds: float,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.per_host_limit = per_host_limit
+        self.timeout = httpx.Timeout(timeout_seconds)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.transport = transport
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 패키지가 없어 HTTP/1.1 keep-alive로 동작합니다.")
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+    
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self.transport
+            )
+            state = _LoopState(client, self.per_host_limit)
+            self._states[loop] = state
+        return state
+    
+    async def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET 요청 (호스트별 동시 요청 수 제한 적용)"""
+        state = self._state()
+        host = httpx.URL(url).host
+        async with state.host_semaphore(host):
+            return await state.client.get(url, headers=headers, params=params)
+    
+    async def aclose(self):
+        """현재 이벤트 루프의 클라이언트 종료"""
+        loop = asyncio.get_running_loop()
+        state = self._states.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
+
+
+# 모든 비동기 API 클라이언트가 공유하는 커넥션 풀
+http_pool = HttpPool(
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    per_host_limit=settings.http_per_host_limit,
+    timeout_seconds=settings.http_timeout_seconds,
+    http2=settings.http2_enabled
+)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
@@ -11,13 +11,29 @@ from app.schemas import (
     UserCreate, UserUpdate, UserResponse,
     PortfolioItemCreate, PortfolioItemResponse,
     AlertSettingsCreate, AlertSettingsResponse,
-    PortfolioSummaryResponse
+    PriceTriggerCreate, PriceTriggerResponse,
+    PortfolioSummaryResponse, PortfolioHistoryResponse
+)
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from app.services import (
+    PortfolioService, AlertService, PriceTriggerService,
+    rebuild_valuation_index, rebuild_trigger_index
 )
-from typing import Dict, List
-from app.services import PortfolioService, AlertService
 from app.telegram_bot import TelegramBot
 from app.scheduler import MonitoringScheduler
 from app.config import settings
+from app.quote_cache import quote_cache
+from app.http_pool import http_pool
+from app.rate_limit import credit_ledger
+from app.provider_router import provider_router
+from app.compaction import snapshot_compactor
+from app.history import PortfolioHistoryService
+from app.price_window import price_windows
+from app.volatility import return_stats
+from app.outbox import NotificationOutboxService
+from app.sharding import worker_delivery_stats
+from app.telegram_delivery import merge_stats_reports
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -69,6 +85,7 @@ async def lifespan(app: FastAPI):
                         logger.info(f"사용자 {user.id}의 기본 통화를 {settings.base_currency}로 업데이트했습니다.")
                     
                     db.commit()
+                    PortfolioService(db).sync_valuation(user.id)
                     
                     # 포트폴리오 자동 등록/업데이트
                     if settings.portfolio:
@@ -84,6 +101,7 @@ async def lifespan(app: FastAPI):
                             for item in existing_items:
                                 db.delete(item)
                             db.commit()
+                            portfolio_service.sync_valuation(user.id)
                         
                         # .env의 포트폴리오 등록
                         registered_count = 0
@@ -108,12 +126,29 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f".env 설정 자동 적용 중 오류: {e}", exc_info=True)
     
+    # 포트폴리오 평가 인덱스와 가격 트리거 인덱스 구성 (이후 포트폴리오/트리거 변경 시 갱신)
+    try:
+        db = next(get_db())
+        try:
+            rebuild_valuation_index(db)
+            rebuild_trigger_index(db)
+            price_windows.load(db)
+            return_stats.load(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"평가/가격 트리거 인덱스/시세 윈도우/수익률 통계 구성 실패: {e}", exc_info=True)
+    
     # 텔레그램 봇 초기화 (별도 스레드에서 실행)
     try:
         telegram_bot = TelegramBot()
-        scheduler = MonitoringScheduler(telegram_bot)
-        scheduler.start()
-        logger.info("스케줄러 시작 완료")
+        if settings.monitor_worker_mode:
+            # 모니터링/요약/압축은 워커 프로세스(python -m app.worker)가 샤드별로 실행
+            logger.info("워커 모드: 이 서버에서는 모니터링 스케줄러를 실행하지 않습니다.")
+        else:
+            scheduler = MonitoringScheduler(telegram_bot)
+            scheduler.start()
+            logger.info("스케줄러 시작 완료")
         
         # 텔레그램 봇을 별도 스레드에서 실행
         def run_bot():
@@ -133,6 +168,13 @@ async def lifespan(app: FastAPI):
     # 종료 시 정리
     if scheduler:
         scheduler.scheduler.shutdown()
+    await http_pool.aclose()
+    db = next(get_db())
+    try:
+        credit_ledger.flush(db)
+        return_stats.flush(db)
+    finally:
+        db.close()
     # 봇은 daemon 스레드로 실행되므로 애플리케이션 종료 시 자동으로 종료됨
     logger.info("애플리케이션 종료")
 
@@ -168,6 +210,55 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/stats/quote-cache", response_model=Dict)
+async def get_quote_cache_stats():
+    """시세 캐시 적중/실패 통계 (TTL 조정용)"""
+    return quote_cache.stats()
+
+
+@app.get("/api/stats/providers", response_model=Dict)
+async def get_provider_stats():
+    """API 제공자별 서킷 상태, 응답 시간 백분위, 헤지 요청 통계"""
+    return provider_router.stats_report()
+
+
+@app.get("/api/stats/api-credits", response_model=List[Dict])
+async def get_api_credit_usage(db: Session = Depends(get_db)):
+    """API 키별 이번 달 크레딧 사용량 및 남은 예산"""
+    return credit_ledger.usage_report(db)
+
+
+@app.get("/api/stats/telegram-delivery", response_model=Dict)
+async def get_telegram_delivery_stats(db: Session = Depends(get_db)):
+    """
+    텔레그램 전송 대기열 깊이, 전송/실패/RetryAfter 수, 전송 지연 백분위
+    
+    워커 모드에서는 살아 있는 워커가 하트비트에 기록한 통계를 합산하고 워커별 통계를 workers에 담습니다.
+    """
+    if scheduler:
+        return scheduler.delivery.stats_report()
+    return merge_stats_reports(worker_delivery_stats(db))
+
+
+@app.get("/api/stats/outbox", response_model=Dict)
+async def get_outbox_stats(db: Session = Depends(get_db)):
+    """알림 아웃박스 상태별 알림 수 (pending/sent/dead)와 가장 오래 기다린 전송 대기 알림의 대기 시간"""
+    return NotificationOutboxService(db).stats()
+
+
+@app.post("/api/outbox/requeue-dead", response_model=Dict)
+async def requeue_dead_notifications(db: Session = Depends(get_db)):
+    """전송에 계속 실패하여 dead 상태가 된 알림을 다시 전송 대기로 돌림"""
+    return {"requeued": NotificationOutboxService(db).requeue_dead()}
+
+
+@app.get("/api/stats/compaction", response_model=Dict)
+async def get_compaction_stats():
+    """마지막 스냅샷 이력 압축 결과 (집계 수, 삭제한 행 수, 확보한 공간)"""
+    report = snapshot_compactor.last_report
+    return report.to_dict() if report else {}
+
+
 # 사용자 관련 API
 @app.post("/api/users", response_model=UserResponse)
 async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -232,6 +323,7 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    PortfolioService(db).sync_valuation(user.id)
     
     return user
 
@@ -269,14 +361,47 @@ async def get_portfolio_summary(
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
     
     service = PortfolioService(db)
-    summary = service.get_portfolio_summary(user.id)
+    summary = await service.get_portfolio_summary_async(user.id)
     
     if not summary:
         raise HTTPException(status_code=404, detail="포트폴리오가 설정되지 않았습니다.")
     
+    summary["price_data"] = {symbol: quote.to_dict() for symbol, quote in summary["price_data"].items()}
     return summary
 
 
+@app.get("/api/portfolio/history", response_model=PortfolioHistoryResponse)
+async def get_portfolio_history(
+    telegram_chat_id: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    resolution: str = "auto",
+    max_points: Optional[int] = Query(None, ge=3),
+    db: Session = Depends(get_db)
+):
+    """
+    포트폴리오 총액/심볼별 평가액 이력 (차트용)
+    
+    resolution이 auto이면 구간 길이와 보존 기간에 맞춰 원본/1시간/1일 집계를 고르고,
+    점 개수가 max_points(기본 HISTORY_MAX_POINTS)를 넘으면 LTTB로 줄입니다.
+    from/to를 생략하면 최근 7일을 조회합니다.
+    """
+    user = db.query(User).filter(User.telegram_chat_id == telegram_chat_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=7)
+    try:
+        return PortfolioHistoryService(db).get_history(
+            user, start, end,
+            resolution=None if resolution == "auto" else resolution,
+            max_points=max_points
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.delete("/api/portfolio/cleanup", response_model=Dict)
 async def cleanup_duplicate_portfolio_items(
     telegram_chat_id: str,
@@ -306,6 +431,7 @@ async def cleanup_duplicate_portfolio_items(
             seen_symbols.add(item.symbol)
     
     db.commit()
+    PortfolioService(db).sync_valuation(user.id)
     
     return {
         "message": "중복 항목 정리 완료",
@@ -314,6 +440,59 @@ async def cleanup_duplicate_portfolio_items(
     }
 
 
+# 가격 도달 알림 API
+@app.post("/api/triggers", response_model=PriceTriggerResponse)
+async def create_price_trigger(
+    trigger_data: PriceTriggerCreate,
+    telegram_chat_id: str,
+    db: Session = Depends(get_db)
+):
+    """가격 도달 알림 등록 (가격이 목표가를 넘거나 내려가면 한 번 알림)"""
+    user = db.query(User).filter(User.telegram_chat_id == telegram_chat_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    if trigger_data.target_price <= 0:
+        raise HTTPException(status_code=400, detail="목표 가격은 0보다 커야 합니다.")
+    
+    return PriceTriggerService(db).create_trigger(
+        user,
+        trigger_data.symbol,
+        trigger_data.target_price,
+        trigger_data.currency
+    )
+
+
+@app.get("/api/triggers", response_model=List[PriceTriggerResponse])
+async def list_price_triggers(
+    telegram_chat_id: str,
+    include_triggered: bool = False,
+    db: Session = Depends(get_db)
+):
+    """가격 도달 알림 목록 조회"""
+    user = db.query(User).filter(User.telegram_chat_id == telegram_chat_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    
+    return PriceTriggerService(db).list_triggers(user.id, active_only=not include_triggered)
+
+
+@app.delete("/api/triggers/{trigger_id}", response_model=Dict)
+async def delete_price_trigger(
+    trigger_id: int,
+    telegram_chat_id: str,
+    db: Session = Depends(get_db)
+):
+    """가격 도달 알림 삭제"""
+    user = db.query(User).filter(User.telegram_chat_id == telegram_chat_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    
+    if not PriceTriggerService(db).delete_trigger(user.id, trigger_id):
+        raise HTTPException(status_code=404, detail="가격 알림을 찾을 수 없습니다.")
+    
+    return {"message": "가격 알림 삭제 완료", "trigger_id": trigger_id}
+
+
 # 알림 설정 관련 API
 @app.get("/api/alerts", response_model=AlertSettingsResponse)
 async def get_alert_settings(
@@ -366,6 +545,12 @@ async def update_alert_settings(
         alert_settings.portfolio_absolute_threshold = alert_data.portfolio_absolute_threshold
     if alert_data.min_notification_interval_minutes is not None:
         alert_settings.min_notification_interval_minutes = alert_data.min_notification_interval_minutes
+    if alert_data.window_percentage_threshold is not None:
+        alert_settings.window_percentage_threshold = alert_data.window_percentage_threshold
+    if alert_data.window_minutes is not None:
+        alert_settings.window_minutes = alert_data.window_minutes
+    if alert_data.anomaly_zscore_threshold is not None:
+        alert_settings.anomaly_zscore_threshold = alert_data.anomaly_zscore_threshold
     
     db.commit()
     db.refresh(alert_settings)
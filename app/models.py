@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, JSON, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from typing import Dict
 from app.database import Base
 
 
@@ -21,6 +22,7 @@ class User(Base):
     portfolio_items = relationship("PortfolioItem", back_populates="user", cascade="all, delete-orphan")
     alert_settings = relationship("AlertSettings", back_populates="user", uselist=False, cascade="all, delete-orphan")
     price_snapshots = relationship("PriceSnapshot", back_populates="user", cascade="all, delete-orphan")
+    price_triggers = relationship("PriceTrigger", back_populates="user", cascade="all, delete-orphan")
 
 
 class PortfolioItem(Base):
@@ -51,6 +53,13 @@ class AlertSettings(Base):
     portfolio_percentage_threshold = Column(Float, default=10.0)  # %
     portfolio_absolute_threshold = Column(Float, nullable=True)  # absolute value change
     
+    # Rolling window thresholds (최근 window_minutes분 최저/최고가 대비 변동률, None이면 비활성)
+    window_percentage_threshold = Column(Float, nullable=True)  # %
+    window_minutes = Column(Integer, default=60)
+    
+    # Anomaly threshold (틱 수익률이 심볼 평소 변동성의 몇 배(표준편차)인지, None이면 비활성)
+    anomaly_zscore_threshold = Column(Float, nullable=True)
+    
     # Notification settings
     min_notification_interval_minutes = Column(Integer, default=15)  # 최소 알림 간격 (분)
     
@@ -61,15 +70,207 @@ class AlertSettings(Base):
     user = relationship("User", back_populates="alert_settings")
 
 
+class PriceTick(Base):
+    """틱마다 (API 제공자, 심볼, 통화)별로 한 번만 기록하는 시세"""
+    __tablename__ = "price_ticks"
+    __table_args__ = (
+        UniqueConstraint("provider", "symbol", "currency", "timestamp", name="uq_price_ticks_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)  # "cmc" or "coingecko"
+    symbol = Column(String, nullable=False)
+    currency = Column(String, nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)  # 틱 시각
+    price = Column(Float, nullable=False)
+    market_cap = Column(Float, nullable=True)
+    percent_change_24h = Column(Float, nullable=True)
+    
+    def to_snapshot(self) -> Dict[str, float]:
+        """스냅샷 형식 ({price, market_cap, percent_change_24h})"""
+        return {
+            "price": self.price,
+            "market_cap": self.market_cap,
+            "percent_change_24h": self.percent_change_24h
+        }
+
+
+class HoldingsVersion(Base):
+    """사용자 보유 내역 버전 (보유 내역이 바뀔 때만 새 버전 기록)"""
+    __tablename__ = "holdings_versions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    holdings = Column(JSON, nullable=False)  # {symbol: quantity}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class PriceSnapshot(Base):
     __tablename__ = "price_snapshots"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    snapshot_data = Column(JSON, nullable=False)  # {symbol: {price, value, ...}}
     total_portfolio_value = Column(Float, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # 알림 기준 스냅샷 여부 (알림을 보낸 시점의 상태, 다음 알림은 이 스냅샷과 비교)
+    alert_baseline = Column(Boolean, nullable=False, default=False, server_default="0", index=True)
+    # 틱 참조 (price_ticks의 provider, currency, timestamp)와 보유 내역 버전
+    price_provider = Column(String, nullable=True)
+    price_currency = Column(String, nullable=True)
+    tick_at = Column(DateTime(timezone=True), nullable=True)
+    holdings_version_id = Column(Integer, ForeignKey("holdings_versions.id"), nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="price_snapshots")
+    holdings_version = relationship("HoldingsVersion")
+    price_ticks = relationship(
+        "PriceTick",
+        primaryjoin=(
+            "and_(PriceSnapshot.price_provider == foreign(PriceTick.provider), "
+            "PriceSnapshot.price_currency == foreign(PriceTick.currency), "
+            "PriceSnapshot.tick_at == foreign(PriceTick.timestamp))"
+        ),
+        viewonly=True
+    )
+    
+    @property
+    def snapshot_data(self) -> Dict[str, Dict[str, float]]:
+        """{symbol: {price, market_cap, percent_change_24h}} (스냅샷 시점에 보유한 심볼의 틱 시세)"""
+        if self.holdings_version is None:
+            return {}
+        holdings = self.holdings_version.holdings
+        return {tick.symbol: tick.to_snapshot() for tick in self.price_ticks if tick.symbol in holdings}
+    
+    @property
+    def symbol_values(self) -> Dict[str, float]:
+        """{symbol: 평가액} (보유 수량을 모르는 심볼은 제외)"""
+        if self.holdings_version is None:
+            return {}
+        holdings = self.holdings_version.holdings
+        return {
+            tick.symbol: tick.price * holdings[tick.symbol]
+            for tick in self.price_ticks
+            if holdings.get(tick.symbol) is not None
+        }
+
+
+
+class ApiCreditUsage(Base):
+    __tablename__ = "api_credit_usage"
+    __table_args__ = (
+        UniqueConstraint("provider", "api_key_hash", "usage_date", name="uq_api_credit_usage_key_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)  # "cmc" or "coingecko"
+    api_key_hash = Column(String, nullable=False)  # API 키 지문 (원본 키는 저장하지 않음)
+    usage_date = Column(Date, nullable=False)  # UTC 기준 날짜
+    credits = Column(Integer, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class PriceTrigger(Base):
+    __tablename__ = "price_triggers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    symbol = Column(String, nullable=False)  # BTC, SOL, etc.
+    currency = Column(String, nullable=False)  # 목표 가격 통화 (사용자 기준 통화)
+    target_price = Column(Float, nullable=False)
+    # 가격이 목표를 넘거나 내려가면 한 번 알림 후 비활성화
+    active = Column(Boolean, nullable=False, default=True, server_default="1", index=True)
+    triggered_price = Column(Float, nullable=True)
+    triggered_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="price_triggers")
+
+
+class SnapshotRollup(Base):
+    """스냅샷 시간대별 집계 (1시간/1일, 포트폴리오 총액 OHLC와 심볼별 종가)"""
+    __tablename__ = "snapshot_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "resolution", "bucket_start", name="uq_snapshot_rollups_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    resolution = Column(String, nullable=False)  # "1h" or "1d"
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    open_value = Column(Float, nullable=False)
+    high_value = Column(Float, nullable=False)
+    low_value = Column(Float, nullable=False)
+    close_value = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    closes = Column(JSON, nullable=False)  # {symbol: 종가}
+    close_values = Column(JSON, nullable=True)  # {symbol: 종가 시점 평가액}
+
+
+class ReturnStats(Base):
+    """(심볼, 통화, 시세 제공자)별 틱 로그 수익률의 누적 평균/분산 (Welford, 같은 제공자를 쓰는 모든 사용자가 공유)"""
+    __tablename__ = "return_stats"
+    __table_args__ = (
+        UniqueConstraint("provider", "symbol", "currency", name="uq_return_stats_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False, server_default="cmc")  # "cmc" 또는 "coingecko"
+    symbol = Column(String, nullable=False)
+    currency = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0)  # 편차 제곱합
+    last_price = Column(Float, nullable=True)
+    last_tick_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class MonitorWorker(Base):
+    """다중 프로세스 모니터링 워커 (하트비트가 만료되면 종료된 것으로 보고 샤드를 재배정)"""
+    __tablename__ = "monitor_workers"
+    
+    worker_id = Column(String, primary_key=True)  # "호스트:PID"
+    hostname = Column(String, nullable=True)
+    pid = Column(Integer, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    delivery_stats = Column(JSON, nullable=True)  # 마지막 하트비트 시점의 텔레그램 전송 대기열 통계
+
 
+class ShardAssignment(Base):
+    """사용자 샤드(user_id % SHARD_COUNT)의 소유 워커"""
+    __tablename__ = "shard_assignments"
+    
+    shard_id = Column(Integer, primary_key=True, autoincrement=False)
+    worker_id = Column(String, nullable=True, index=True)
+    # 재배정 예정 워커 (현재 소유자가 다음 틱 시작 시 넘겨줌)
+    pending_worker_id = Column(String, nullable=True)
+    generation = Column(Integer, nullable=False, default=0)  # 소유자가 바뀔 때마다 증가
+    assigned_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class NotificationOutbox(Base):
+    """전송 대기 알림 (틱의 상태 변경과 같은 트랜잭션으로 기록, 전송 작업이 비움)"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        UniqueConstraint("idempotency_key", name="uq_notification_outbox_key"),
+        Index("ix_notification_outbox_due", "status", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    chat_id = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # "alert", "price_trigger", "summary"
+    message = Column(String, nullable=False)
+    idempotency_key = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # "pending", "sent", "dead"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    # 전송 중인 프로세스의 선점 토큰과 만료 시각 (만료되면 다른 프로세스가 다시 선점)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
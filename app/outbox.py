@@ -0,0 +1,244 @@
+"""
+알림 아웃박스
+
+틱은 알림을 직접 보내지 않고 notification_outbox 테이블에 스냅샷 저장/트리거 비활성화와 같은 트랜잭션으로 기록하며,
+별도의 전송 작업(MonitoringScheduler.dispatch_outbox)이 대기 중인 알림을 텔레그램 전송 대기열로 보냅니다.
+틱은 텔레그램 응답 속도와 관계없이 끝나고, 프로세스가 재시작되어도 기록된 알림은 남아 다시 전송됩니다.
+
+- 멱등 키: 같은 알림 (같은 알림 기준에 대한 같은 종류/심볼, 같은 트리거, 같은 요약 시간대)은 한 번만 기록
+- 선점: 조건부 UPDATE로 선점 토큰과 만료 시각을 기록하여 여러 프로세스가 같은 알림을 동시에 보내지 않음
+  (전송 중 프로세스가 종료되면 선점이 만료된 뒤 다시 전송, 전송 직후 완료 기록 전에 종료되면 중복 전송될 수 있음)
+- 실패하면 지수 백오프로 재시도하고, OUTBOX_MAX_ATTEMPTS회 실패한 알림은 dead 상태로 남김 (dead-letter)
+"""
+from typing import Dict, List, Optional, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import NotificationOutbox
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    """아웃박스에 기록할 알림"""
+    user_id: int
+    chat_id: str
+    kind: str
+    message: str
+    idempotency_key: str
+
+
+def alert_key(user_id: int, baseline_id: Optional[int], alert: Dict) -> str:
+    """알림 멱등 키 (알림 기준 스냅샷이 같으면 같은 종류/심볼의 알림은 한 번만)"""
+    return f"alert:{user_id}:{baseline_id or 0}:{alert['type']}:{alert.get('symbol', '')}"
+
+
+def trigger_key(trigger_id: int) -> str:
+    """가격 도달 알림 멱등 키 (트리거는 한 번만 발동)"""
+    return f"trigger:{trigger_id}"
+
+
+def summary_key(user_id: int, now: datetime, period_hours: int = 3) -> str:
+    """요약 멱등 키 (요약 주기 구간마다 한 번)"""
+    slot = int(now.timestamp()) // (period_hours * 3600)
+    return f"summary:{user_id}:{slot}"
+
+
+def backoff_seconds(attempts: int) -> float:
+    """attempts번째 실패 후 재시도까지 대기 시간 (지수 백오프, 최대 OUTBOX_MAX_BACKOFF_SECONDS)"""
+    delay = settings.outbox_backoff_base_seconds * 2 ** max(0, attempts - 1)
+    return min(delay, settings.outbox_max_backoff_seconds)
+
+
+class NotificationOutboxService:
+    """알림 아웃박스 기록, 선점, 전송 결과 반영"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def enqueue(self, messages: Sequence[OutboxMessage], now: Optional[datetime] = None) -> int:
+        """
+        알림 기록 (이미 기록된 멱등 키는 건너뜀, 커밋은 호출자가 틱의 상태 변경과 함께 수행)
+        
+        Returns:
+            새로 기록한 알림 수
+        """
+        if not messages:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        keys = {message.idempotency_key for message in messages}
+        seen = {
+            key for key, in self.db.query(NotificationOutbox.idempotency_key).filter(
+                NotificationOutbox.idempotency_key.in_(keys)
+            )
+        }
+        added = 0
+        for message in messages:
+            if message.idempotency_key in seen:
+                continue
+            seen.add(message.idempotency_key)
+            self.db.add(NotificationOutbox(
+                user_id=message.user_id,
+                chat_id=message.chat_id,
+                kind=message.kind,
+                message=message.message,
+                idempotency_key=message.idempotency_key,
+                status=PENDING,
+                attempts=0,
+                next_attempt_at=now
+            ))
+            added += 1
+        return added
+    
+    def claim(self, owner: str, limit: Optional[int] = None, now: Optional[datetime] = None) -> List[NotificationOutbox]:
+        """
+        전송할 차례인 알림을 선점 (OUTBOX_LEASE_SECONDS 동안 다른 프로세스가 가져가지 않음)
+        
+        Returns:
+            선점한 알림 (기록 순서)
+        """
+        now = now or datetime.now(timezone.utc)
+        available = or_(NotificationOutbox.locked_until.is_(None), NotificationOutbox.locked_until < now)
+        ids = [
+            outbox_id for outbox_id, in self.db.query(NotificationOutbox.id).filter(
+                NotificationOutbox.status == PENDING,
+                NotificationOutbox.next_attempt_at <= now,
+                available
+            ).order_by(NotificationOutbox.id).limit(limit or settings.outbox_batch_size)
+        ]
+        if not ids:
+            self.db.rollback()
+            return []
+        
+        # 조회와 선점 사이에 다른 프로세스가 가져간 행은 조건에서 빠짐
+        token = f"{owner}:{uuid.uuid4().hex[:12]}"
+        try:
+            self.db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_(ids),
+                NotificationOutbox.status == PENDING,
+                available
+            ).update({
+                NotificationOutbox.locked_by: token,
+                NotificationOutbox.locked_until: now + timedelta(seconds=settings.outbox_lease_seconds)
+            }, synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return self.db.query(NotificationOutbox).filter(
+            NotificationOutbox.locked_by == token
+        ).order_by(NotificationOutbox.id).all()
+    
+    def complete(
+        self,
+        sent: Sequence[NotificationOutbox],
+        failed: Sequence[NotificationOutbox],
+        error: str = "전송 실패",
+        now: Optional[datetime] = None
+    ):
+        """
+        전송 결과 반영 (선점 해제)
+        
+        실패한 알림은 시도 횟수를 늘리고 지수 백오프 후 재시도하며,
+        OUTBOX_MAX_ATTEMPTS회 실패하면 dead 상태로 옮깁니다.
+        """
+        now = now or datetime.now(timezone.utc)
+        for row in sent:
+            row.status = SENT
+            row.attempts = (row.attempts or 0) + 1
+            row.sent_at = now
+            row.locked_by = None
+            row.locked_until = None
+            row.last_error = None
+        
+        dead = 0
+        for row in failed:
+            row.attempts = (row.attempts or 0) + 1
+            row.last_error = error[:500]
+            row.locked_by = None
+            row.locked_until = None
+            if row.attempts >= settings.outbox_max_attempts:
+                row.status = DEAD
+                dead += 1
+            else:
+                row.next_attempt_at = now + timedelta(seconds=backoff_seconds(row.attempts))
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if dead:
+            logger.error(f"알림 {dead}건이 {settings.outbox_max_attempts}회 전송에 실패하여 dead 상태로 옮겼습니다.")
+    
+    def requeue_dead(self, now: Optional[datetime] = None) -> int:
+        """
+        dead 상태의 알림을 다시 전송 대기로 돌림 (시도 횟수 초기화)
+        
+        Returns:
+            다시 대기열에 넣은 알림 수
+        """
+        now = now or datetime.now(timezone.utc)
+        try:
+            count = self.db.query(NotificationOutbox).filter(NotificationOutbox.status == DEAD).update({
+                NotificationOutbox.status: PENDING,
+                NotificationOutbox.attempts: 0,
+                NotificationOutbox.next_attempt_at: now
+            }, synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if count:
+            logger.info(f"dead 상태의 알림 {count}건을 다시 전송 대기로 돌렸습니다.")
+        return count
+    
+    def purge(self, now: Optional[datetime] = None) -> int:
+        """
+        보존 기간(OUTBOX_RETENTION_DAYS)이 지난 전송 완료 알림 삭제 (멱등 키 확인 범위도 이 기간까지)
+        
+        Returns:
+            삭제한 알림 수
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=settings.outbox_retention_days)
+        try:
+            count = self.db.query(NotificationOutbox).filter(
+                NotificationOutbox.status == SENT,
+                NotificationOutbox.sent_at < cutoff
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return count
+    
+    def stats(self, now: Optional[datetime] = None) -> Dict:
+        """상태별 알림 수와 가장 오래 기다린 전송 대기 알림의 대기 시간"""
+        now = now or datetime.now(timezone.utc)
+        counts = dict(
+            self.db.query(NotificationOutbox.status, func.count(NotificationOutbox.id))
+            .group_by(NotificationOutbox.status).all()
+        )
+        oldest = self.db.query(func.min(NotificationOutbox.created_at)).filter(
+            NotificationOutbox.status == PENDING
+        ).scalar()
+        oldest_age = None
+        if oldest is not None:
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            oldest_age = max(0.0, (now - oldest).total_seconds())
+        return {
+            "pending": counts.get(PENDING, 0),
+            "sent": counts.get(SENT, 0),
+            "dead": counts.get(DEAD, 0),
+            "oldest_pending_seconds": oldest_age,
+        }
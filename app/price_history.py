@@ -0,0 +1,277 @@
+"""
+메모리 맵 열 기반 시세 이력 저장소
+
+(API 제공자, 통화, 심볼)별로 시각(int64, epoch 초)과 가격(float64)을 각각 고정 폭 배열 파일에
+추가 전용으로 기록합니다. 시각은 항상 오름차순이므로 구간 조회는 이분 탐색 후
+np.memmap의 슬라이스(복사 없는 NumPy 뷰)를 그대로 반환합니다.
+
+파일 구성: {경로}/{제공자}/{통화}/{심볼}.ts (int64), {심볼}.px (float64)
+두 파일의 길이가 다르면 (기록 중 중단) 짧은 쪽에 맞춰 읽고, 다음 추가 시 잘라냅니다.
+
+다중 프로세스 워커가 같은 파일에 기록하므로 추가와 압축은 (제공자, 통화) 디렉터리의 잠금 파일로
+프로세스 간 배타 잠금을 잡고, 마지막 시각은 잠금 안에서 파일에서 직접 읽어 확인합니다.
+조회는 같은 잠금 파일의 공유 잠금 안에서 두 파일을 매핑하므로 다른 프로세스의 압축(두 파일 교체) 도중의
+새 가격 파일과 이전 시각 파일을 함께 매핑하지 않습니다.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, unquote
+from app.config import settings
+import numpy as np
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl이 없는 플랫폼(Windows)은 프로세스 간 잠금 없이 동작 (워커 프로세스 1개로 실행)
+    fcntl = None
+
+# (제공자, 통화) 디렉터리의 프로세스 간 잠금 파일
+LOCK_FILE = ".lock"
+
+TIME_DTYPE = np.dtype("<i8")
+PRICE_DTYPE = np.dtype("<f8")
+
+EMPTY_TIMES = np.empty(0, dtype=TIME_DTYPE)
+EMPTY_PRICES = np.empty(0, dtype=PRICE_DTYPE)
+
+
+def to_epoch(timestamp: datetime) -> int:
+    """datetime → epoch 초 (시간대 정보가 없으면 UTC로 간주)"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp())
+
+
+class PriceHistoryStore:
+    """심볼별 시각/가격 배열 파일 저장소"""
+    
+    def __init__(self, path: str):
+        self.root = Path(path)
+        # 파일 경로 → ((레코드 수, 시각 파일 inode, 가격 파일 inode), 시각 memmap, 가격 memmap)
+        self._maps: Dict[Path, Tuple[Tuple[int, int, int], np.ndarray, np.ndarray]] = {}
+        # 파일 경로 → 이 프로세스가 확인한 마지막 시각 (다른 프로세스가 더 뒤의 시각을 기록했을 수 있음)
+        self._last_times: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+    
+    def _series_path(self, provider: str, currency: str, symbol: str) -> Path:
+        # 심볼은 파일 이름으로 쓸 수 있도록 인코딩 (경로 구분자 등)
+        return self.root / provider / currency / quote(symbol, safe="")
+    
+    @staticmethod
+    def _files(series: Path) -> Tuple[Path, Path]:
+        return series.with_name(series.name + ".ts"), series.with_name(series.name + ".px")
+    
+    def _length(self, series: Path, repair: bool = False) -> int:
+        """
+        레코드 수 (두 파일 길이가 다르면 짧은 쪽 기준)
+        
+        repair=True이면 긴 쪽을 잘라냅니다 (다른 프로세스가 기록 중일 수 있으므로 프로세스 간 잠금 안에서만).
+        """
+        times_file, prices_file = self._files(series)
+        if not times_file.exists() or not prices_file.exists():
+            return 0
+        times_count = times_file.stat().st_size // TIME_DTYPE.itemsize
+        prices_count = prices_file.stat().st_size // PRICE_DTYPE.itemsize
+        count = min(times_count, prices_count)
+        if not repair:
+            return count
+        if times_file.stat().st_size != count * TIME_DTYPE.itemsize:
+            os.truncate(times_file, count * TIME_DTYPE.itemsize)
+        if prices_file.stat().st_size != count * PRICE_DTYPE.itemsize:
+            os.truncate(prices_file, count * PRICE_DTYPE.itemsize)
+        return count
+    
+    def _map(self, series: Path) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        시리즈 전체의 memmap (파일이 커졌거나 다른 프로세스가 압축하여 교체했으면 다시 매핑, 기존 뷰는 그대로 유효)
+        
+        두 파일이 같은 시점의 내용이어야 하므로 프로세스 간 잠금 안에서 호출합니다.
+        """
+        count = self._length(series)
+        if count == 0:
+            return EMPTY_TIMES, EMPTY_PRICES
+        times_file, prices_file = self._files(series)
+        signature = (count, times_file.stat().st_ino, prices_file.stat().st_ino)
+        cached = self._maps.get(series)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        times = np.memmap(times_file, dtype=TIME_DTYPE, mode="r", shape=(count,))
+        prices = np.memmap(prices_file, dtype=PRICE_DTYPE, mode="r", shape=(count,))
+        self._maps[series] = (signature, times, prices)
+        return times, prices
+    
+    @contextmanager
+    def _process_lock(self, directory: Path, shared: bool = False):
+        """(제공자, 통화) 디렉터리의 프로세스 간 잠금 (shared=True이면 조회용 공유 잠금)"""
+        if shared and not directory.is_dir():
+            # 기록된 적 없는 디렉터리는 조회할 파일도 없음
+            yield
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(directory / LOCK_FILE, "a+b") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def _last_time(self, series: Path) -> Optional[int]:
+        """파일에 기록된 마지막 시각 (프로세스 간 잠금 안에서 호출)"""
+        count = self._length(series, repair=True)
+        if count == 0:
+            self._last_times.pop(series, None)
+            return None
+        times_file, _ = self._files(series)
+        with open(times_file, "rb") as f:
+            f.seek((count - 1) * TIME_DTYPE.itemsize)
+            last_time = int(np.frombuffer(f.read(TIME_DTYPE.itemsize), dtype=TIME_DTYPE)[0])
+        self._last_times[series] = last_time
+        return last_time
+    
+    def append(self, provider: str, currency: str, timestamp: datetime, prices: Dict[str, float]) -> int:
+        """
+        틱 시세 추가 (시리즈의 마지막 시각 이후만 기록, 같은 틱을 다시 추가하면 무시)
+        
+        Returns:
+            기록한 심볼 수
+        """
+        epoch = to_epoch(timestamp)
+        time_bytes = np.asarray([epoch], dtype=TIME_DTYPE).tobytes()
+        written = 0
+        with self._lock, self._process_lock(self.root / provider / currency):
+            for symbol, price in prices.items():
+                series = self._series_path(provider, currency, symbol)
+                # 이미 확인한 마지막 시각 이전이면 파일을 읽지 않고 건너뜀
+                cached = self._last_times.get(series)
+                if cached is not None and epoch <= cached:
+                    continue
+                last_time = self._last_time(series)
+                if last_time is not None and epoch <= last_time:
+                    continue
+                times_file, prices_file = self._files(series)
+                # 가격을 먼저 기록 (시각 기록 전에 중단되면 다음 조회 시 잘라냄)
+                with open(prices_file, "ab") as f:
+                    f.write(np.asarray([price], dtype=PRICE_DTYPE).tobytes())
+                with open(times_file, "ab") as f:
+                    f.write(time_bytes)
+                self._last_times[series] = epoch
+                written += 1
+        return written
+    
+    def read(
+        self,
+        provider: str,
+        currency: str,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        시각 구간 [start, end]의 (시각, 가격) 배열 (memmap 뷰, 복사 없음)
+        
+        반환된 배열은 읽기 전용이며, 압축 후에도 이전 파일 내용을 계속 가리킵니다.
+        """
+        series = self._series_path(provider, currency, symbol)
+        with self._lock, self._process_lock(series.parent, shared=True):
+            times, prices = self._map(series)
+        lo = 0 if start is None else int(np.searchsorted(times, to_epoch(start), side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, to_epoch(end), side="right"))
+        return times[lo:hi], prices[lo:hi]
+    
+    def read_range(
+        self,
+        provider: str,
+        currency: str,
+        symbols: Iterable[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """여러 심볼의 같은 시각 구간을 한 번에 조회 ({심볼: (시각, 가격)}, 이력이 없는 심볼은 빈 배열)"""
+        return {symbol: self.read(provider, currency, symbol, start, end) for symbol in symbols}
+    
+    def symbols(self, provider: str, currency: str) -> List[str]:
+        """이력이 있는 심볼 목록"""
+        directory = self.root / provider / currency
+        if not directory.is_dir():
+            return []
+        return sorted(unquote(path.name[:-3]) for path in directory.glob("*.ts"))
+    
+    def compact(self, provider: str, currency: str, symbol: str, older_than: datetime, interval_seconds: int) -> Tuple[int, int]:
+        """
+        오래된 구간 솎아내기: older_than 이전 레코드는 interval_seconds 구간마다 마지막 값만 유지
+        
+        새 파일에 기록한 뒤 교체하므로 이미 반환된 뷰는 이전 파일 내용을 계속 가리키고,
+        두 파일 교체는 배타 잠금 안에서 이루어지므로 공유 잠금 안에서 매핑하는 조회(read)와 겹치지 않습니다.
+        
+        Returns:
+            (압축 전 레코드 수, 압축 후 레코드 수)
+        """
+        series = self._series_path(provider, currency, symbol)
+        with self._lock, self._process_lock(series.parent):
+            times, prices = self._map(series)
+            before = len(times)
+            cutoff = int(np.searchsorted(times, to_epoch(older_than), side="left"))
+            if cutoff == 0:
+                return before, before
+            
+            buckets = times[:cutoff] // interval_seconds
+            # 구간이 바뀌기 직전 레코드 (= 구간별 마지막 값)
+            keep = np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+            if len(keep) == cutoff:
+                return before, before
+            new_times = np.concatenate([times[:cutoff][keep], times[cutoff:]])
+            new_prices = np.concatenate([prices[:cutoff][keep], prices[cutoff:]])
+            
+            times_file, prices_file = self._files(series)
+            times_tmp = times_file.with_name(times_file.name + ".tmp")
+            prices_tmp = prices_file.with_name(prices_file.name + ".tmp")
+            new_times.astype(TIME_DTYPE).tofile(times_tmp)
+            new_prices.astype(PRICE_DTYPE).tofile(prices_tmp)
+            os.replace(prices_tmp, prices_file)
+            os.replace(times_tmp, times_file)
+            self._maps.pop(series, None)
+            return before, len(new_times)
+    
+    def compact_all(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        모든 시리즈 압축 (PRICE_HISTORY_COMPACT_AFTER_DAYS 이전은 PRICE_HISTORY_COMPACT_INTERVAL_SECONDS 간격)
+        
+        Returns:
+            {"series": 시리즈 수, "removed_records": 삭제한 레코드 수, "reclaimed_bytes": 줄어든 파일 크기}
+        """
+        now = now or datetime.now(timezone.utc)
+        older_than = now - timedelta(days=settings.price_history_compact_after_days)
+        series_count = 0
+        removed = 0
+        for provider_dir in sorted(self.root.glob("*")):
+            for currency_dir in sorted(provider_dir.glob("*")):
+                for symbol in self.symbols(provider_dir.name, currency_dir.name):
+                    before, after = self.compact(
+                        provider_dir.name, currency_dir.name, symbol, older_than,
+                        settings.price_history_compact_interval_seconds
+                    )
+                    series_count += 1
+                    removed += before - after
+        reclaimed = removed * (TIME_DTYPE.itemsize + PRICE_DTYPE.itemsize)
+        logger.info(f"시세 이력 압축 완료: 시리즈 {series_count}개, 레코드 {removed}개 삭제 ({reclaimed:,} bytes)")
+        return {"series": series_count, "removed_records": removed, "reclaimed_bytes": reclaimed}
+    
+    def clear_cache(self):
+        """열려 있는 memmap과 마지막 시각 캐시 해제"""
+        with self._lock:
+            self._maps.clear()
+            self._last_times.clear()
+
+
+# 스케줄러가 틱마다 추가하고 분석/차트 조회가 공유하는 시세 이력 저장소
+price_history = PriceHistoryStore(settings.price_history_path)
@@ -0,0 +1,192 @@
+"""
+가격 도달 알림 트리거 인덱스
+
+"SOL이 250 USD를 넘으면 알림" 같은 목표 가격 트리거를 (심볼, 통화)별로 정렬된 목록에 보관합니다.
+시세가 바뀌면 이전 가격과 새 가격 사이를 이분 탐색하여 통과한 트리거만 찾으므로
+매 틱마다 모든 사용자의 트리거를 훑지 않습니다.
+
+마지막 관측 가격은 시세 출처(API 제공자)별로 보관하고 같은 틱은 한 번만 반영하므로,
+제공자 간 시세 차이만으로 (가격이 움직이지 않았는데) 트리거가 발동하지 않습니다.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime
+import math
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TriggerEntry:
+    """인덱스에 등록된 활성 트리거"""
+    trigger_id: int
+    user_id: int
+    symbol: str
+    currency: str
+    target_price: float
+
+
+@dataclass(frozen=True, slots=True)
+class PriceCrossing:
+    """목표 가격을 통과한 트리거와 통과 시점의 가격"""
+    trigger: TriggerEntry
+    previous_price: float
+    price: float
+    source: str = ""
+    
+    @property
+    def rising(self) -> bool:
+        return self.price > self.previous_price
+
+
+def format_crossing_message(crossing: PriceCrossing) -> str:
+    """가격 도달 알림 메시지"""
+    trigger = crossing.trigger
+    action = "돌파" if crossing.rising else "하회"
+    return (
+        f"🎯 {trigger.symbol} 가격이 목표가 {trigger.target_price:,.2f} {trigger.currency}를 {action}했습니다 "
+        f"({crossing.previous_price:,.2f} → {crossing.price:,.2f} {trigger.currency})"
+    )
+
+
+class PriceTriggerIndex:
+    """(심볼, 통화)별 목표 가격 정렬 목록과 마지막 관측 가격"""
+    
+    def __init__(self):
+        # (심볼, 통화) -> [(목표 가격, 트리거 ID)] (오름차순)
+        self._targets: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        self._entries: Dict[int, TriggerEntry] = {}
+        # 사용자 -> {(심볼, 통화): 트리거 수}
+        self._user_symbols: Dict[int, Dict[Tuple[str, str], int]] = {}
+        # (출처, 심볼, 통화) -> (마지막 관측 가격, 반영한 틱 시각)
+        self._last_prices: Dict[Tuple[str, str, str], Tuple[float, Optional[float]]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, entry: TriggerEntry):
+        with self._lock:
+            self._remove(entry.trigger_id)
+            self._entries[entry.trigger_id] = entry
+            key = (entry.symbol, entry.currency)
+            insort(self._targets.setdefault(key, []), (entry.target_price, entry.trigger_id))
+            symbols = self._user_symbols.setdefault(entry.user_id, {})
+            symbols[key] = symbols.get(key, 0) + 1
+    
+    def _remove(self, trigger_id: int) -> Optional[TriggerEntry]:
+        entry = self._entries.pop(trigger_id, None)
+        if entry is None:
+            return None
+        key = (entry.symbol, entry.currency)
+        targets = self._targets[key]
+        position = bisect_left(targets, (entry.target_price, entry.trigger_id))
+        del targets[position]
+        if not targets:
+            del self._targets[key]
+        symbols = self._user_symbols[entry.user_id]
+        symbols[key] -= 1
+        if not symbols[key]:
+            del symbols[key]
+        if not symbols:
+            del self._user_symbols[entry.user_id]
+        return entry
+    
+    def remove(self, trigger_id: int) -> Optional[TriggerEntry]:
+        with self._lock:
+            return self._remove(trigger_id)
+    
+    def symbols_for(self, user_id: int) -> Set[str]:
+        """사용자의 활성 트리거 심볼 (보유하지 않은 심볼도 시세를 조회하기 위해 사용)"""
+        with self._lock:
+            return {symbol for symbol, _ in self._user_symbols.get(user_id, ())}
+    
+    def targets_for(self, user_id: int) -> Dict[str, Set[str]]:
+        """사용자의 활성 트리거 심볼을 트리거 통화별로 묶음 ({통화: 심볼})"""
+        with self._lock:
+            targets: Dict[str, Set[str]] = {}
+            for symbol, currency in self._user_symbols.get(user_id, ()):
+                targets.setdefault(currency, set()).add(symbol)
+            return targets
+    
+    def update(
+        self,
+        currency: str,
+        prices: Dict[str, float],
+        source: str = "",
+        timestamp: Optional[datetime] = None
+    ) -> List[PriceCrossing]:
+        """
+        새 시세 반영 후 목표 가격을 통과한 트리거 반환 (반환된 트리거는 인덱스에서 제거)
+        
+        상승: 이전 가격 < 목표 <= 새 가격, 하락: 새 가격 <= 목표 < 이전 가격
+        이전 가격은 같은 출처(source)의 마지막 관측 가격이며, 처음 관측한 심볼은 가격만 기록합니다.
+        timestamp(틱 시각)를 주면 출처별로 이미 반영한 틱 이전의 시세는 건너뜁니다.
+        """
+        epoch = timestamp.timestamp() if timestamp is not None else None
+        crossings: List[PriceCrossing] = []
+        with self._lock:
+            for symbol, price in prices.items():
+                key = (symbol, currency)
+                last_key = (source, symbol, currency)
+                last = self._last_prices.get(last_key)
+                if last is not None and epoch is not None and last[1] is not None and epoch <= last[1]:
+                    continue
+                previous = last[0] if last is not None else None
+                self._last_prices[last_key] = (price, epoch)
+                targets = self._targets.get(key)
+                if previous is None or not targets or price == previous:
+                    continue
+                
+                if price > previous:
+                    start = bisect_right(targets, (previous, math.inf))
+                    end = bisect_right(targets, (price, math.inf))
+                else:
+                    start = bisect_left(targets, (price, -math.inf))
+                    end = bisect_left(targets, (previous, -math.inf))
+                
+                for _, trigger_id in targets[start:end]:
+                    crossings.append(PriceCrossing(self._entries[trigger_id], previous, price, source))
+            
+            for crossing in crossings:
+                self._remove(crossing.trigger.trigger_id)
+        return crossings
+    
+    def restore(self, crossings: Iterable[PriceCrossing]):
+        """
+        발동 처리에 실패한 트리거 되돌리기 (트리거를 다시 등록하고 마지막 관측 가격을 통과 전 가격으로 복원)
+        
+        다음 틱에 같은 방향으로 목표 가격을 넘어 있으면 다시 발동합니다.
+        """
+        with self._lock:
+            for crossing in crossings:
+                entry = crossing.trigger
+                self._last_prices[(crossing.source, entry.symbol, entry.currency)] = (crossing.previous_price, None)
+        for crossing in crossings:
+            self.add(crossing.trigger)
+    
+    def load(self, entries: Iterable[TriggerEntry]):
+        """활성 트리거 목록으로 인덱스 재구성 (마지막 관측 가격은 유지)"""
+        with self._lock:
+            self._targets.clear()
+            self._entries.clear()
+            self._user_symbols.clear()
+        count = 0
+        for entry in entries:
+            self.add(entry)
+            count += 1
+        logger.info(f"가격 트리거 인덱스 구성 완료: 트리거 {count}개")
+    
+    def clear(self):
+        with self._lock:
+            self._targets.clear()
+            self._entries.clear()
+            self._user_symbols.clear()
+            self._last_prices.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 스케줄러, API, 텔레그램 봇이 공유하는 가격 트리거 인덱스
+price_trigger_index = PriceTriggerIndex()
@@ -0,0 +1,228 @@
+"""
+심볼별 최근 시세 윈도우
+
+(심볼, 통화)별 최근 시세를 고정 크기 링 버퍼에 보관하고, 알림 설정에 쓰인 윈도우 길이마다
+단조 덱(monotonic deque)으로 구간 최저가/최고가를 유지합니다.
+새 시세가 들어오면 덱 뒤쪽에서 더 이상 최저/최고가가 될 수 없는 값을, 앞쪽에서 윈도우를 벗어난 값을
+버리므로 윈도우 길이와 관계없이 분할 상환 O(1)로 갱신됩니다.
+서버 재시작 후에는 price_ticks의 최근 틱으로 다시 채웁니다.
+"""
+from typing import Dict, Iterable, Optional, Set, Tuple
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import AlertSettings, PriceTick
+from app.price_history import to_epoch
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """고정 크기 (시각, 가격) 링 버퍼 (가득 차면 가장 오래된 값을 덮어씀)"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        # 지금까지 추가한 값의 개수 (다음 값의 순번)
+        self.count = 0
+    
+    def append(self, timestamp: float, price: float) -> int:
+        """값 추가 후 순번 반환"""
+        position = self.count % self.capacity
+        self.times[position] = timestamp
+        self.prices[position] = price
+        self.count += 1
+        return self.count - 1
+    
+    @property
+    def first_seq(self) -> int:
+        """버퍼에 남아 있는 가장 오래된 값의 순번"""
+        return max(0, self.count - self.capacity)
+    
+    @property
+    def last_time(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return float(self.times[(self.count - 1) % self.capacity])
+    
+    def items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """시간순 (시각, 가격) 배열"""
+        if self.count <= self.capacity:
+            return self.times[:self.count], self.prices[:self.count]
+        position = self.count % self.capacity
+        return (
+            np.concatenate((self.times[position:], self.times[:position])),
+            np.concatenate((self.prices[position:], self.prices[:position]))
+        )
+    
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+
+class MonotonicWindow:
+    """
+    길이가 고정된 시간 윈도우의 최저가/최고가
+    
+    lows는 가격이 오름차순, highs는 내림차순인 (순번, 시각, 가격) 덱이며 맨 앞이 윈도우의 최저/최고가입니다.
+    """
+    
+    __slots__ = ("seconds", "lows", "highs")
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.lows: deque = deque()
+        self.highs: deque = deque()
+    
+    def push(self, seq: int, timestamp: float, price: float, first_seq: int):
+        lows, highs = self.lows, self.highs
+        while lows and lows[-1][2] >= price:
+            lows.pop()
+        lows.append((seq, timestamp, price))
+        while highs and highs[-1][2] <= price:
+            highs.pop()
+        highs.append((seq, timestamp, price))
+        
+        # 윈도우를 벗어났거나 링 버퍼에서 덮어쓴 값 제거
+        since = timestamp - self.seconds
+        while lows[0][1] < since or lows[0][0] < first_seq:
+            lows.popleft()
+        while highs[0][1] < since or highs[0][0] < first_seq:
+            highs.popleft()
+    
+    def extremes(self) -> Optional[Tuple[float, float]]:
+        if not self.lows:
+            return None
+        return self.lows[0][2], self.highs[0][2]
+
+
+class SymbolWindow:
+    """(심볼, 통화) 하나의 링 버퍼와 윈도우 길이별 단조 덱"""
+    
+    def __init__(self, capacity: int, window_seconds: Iterable[float] = ()):
+        self.buffer = RingBuffer(capacity)
+        self.windows: Dict[float, MonotonicWindow] = {}
+        for seconds in window_seconds:
+            self.add_window(seconds)
+    
+    def push(self, timestamp: float, price: float) -> bool:
+        """
+        시세 추가 (마지막 시각 이후만, 같은 틱을 다른 시세 그룹이 다시 넣으면 무시)
+        
+        Returns:
+            추가 여부
+        """
+        last_time = self.buffer.last_time
+        if last_time is not None and timestamp <= last_time:
+            return False
+        seq = self.buffer.append(timestamp, price)
+        first_seq = self.buffer.first_seq
+        for window in self.windows.values():
+            window.push(seq, timestamp, price, first_seq)
+        return True
+    
+    def add_window(self, seconds: float) -> MonotonicWindow:
+        """새 윈도우 길이 등록 (링 버퍼의 값으로 한 번 채움)"""
+        window = self.windows.get(seconds)
+        if window is None:
+            window = self.windows[seconds] = MonotonicWindow(seconds)
+            times, prices = self.buffer.items()
+            first_seq = self.buffer.first_seq
+            for offset, (timestamp, price) in enumerate(zip(times.tolist(), prices.tolist())):
+                window.push(first_seq + offset, timestamp, price, first_seq)
+        return window
+
+
+class PriceWindowIndex:
+    """(심볼, 통화)별 최근 시세 윈도우 인덱스"""
+    
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or settings.price_window_capacity
+        self._symbols: Dict[Tuple[str, str], SymbolWindow] = {}
+        # 알림 설정에서 사용 중인 윈도우 길이 (초), 새 심볼에도 같은 윈도우를 만듦
+        self._window_seconds: Set[float] = set()
+        self._lock = threading.Lock()
+    
+    def _push(self, symbol: str, currency: str, timestamp: float, price: float):
+        key = (symbol, currency)
+        window = self._symbols.get(key)
+        if window is None:
+            window = self._symbols[key] = SymbolWindow(self.capacity, self._window_seconds)
+        window.push(timestamp, price)
+    
+    def update(self, currency: str, prices: Dict[str, float], timestamp: datetime):
+        """틱 시세 추가"""
+        epoch = to_epoch(timestamp)
+        with self._lock:
+            for symbol, price in prices.items():
+                self._push(symbol, currency, epoch, price)
+    
+    def extremes(self, symbols: Iterable[str], currency: str, window_minutes: int) -> Dict[str, Tuple[float, float]]:
+        """
+        심볼별 최근 window_minutes분의 (최저가, 최고가) (PRICE_WINDOW_MAX_MINUTES를 넘으면 잘라냄)
+        
+        처음 쓰는 윈도우 길이는 모든 심볼에 등록하여 이후 틱부터 O(1)로 유지합니다.
+        """
+        seconds = float(min(window_minutes, settings.price_window_max_minutes) * 60)
+        result: Dict[str, Tuple[float, float]] = {}
+        with self._lock:
+            if seconds not in self._window_seconds:
+                self._window_seconds.add(seconds)
+                for window in self._symbols.values():
+                    window.add_window(seconds)
+            for symbol in symbols:
+                window = self._symbols.get((symbol, currency))
+                extremes = window.windows[seconds].extremes() if window else None
+                if extremes is not None:
+                    result[symbol] = extremes
+        return result
+    
+    def extremes_for(
+        self,
+        alert_settings: Optional[AlertSettings],
+        symbols: Iterable[str],
+        currency: str
+    ) -> Optional[Dict[str, Tuple[float, float]]]:
+        """윈도우 변동 알림이 켜진 알림 설정이면 보유 심볼의 윈도우 최저/최고가 (꺼져 있으면 None)"""
+        if not alert_settings or not alert_settings.window_percentage_threshold:
+            return None
+        return self.extremes(symbols, currency, alert_settings.window_minutes or 60)
+    
+    def load(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        price_ticks의 최근 PRICE_WINDOW_MAX_MINUTES분 틱으로 링 버퍼 채우기 (서버 시작 시)
+        
+        Returns:
+            추가한 시세 수
+        """
+        now = now or datetime.now(timezone.utc)
+        since = now - timedelta(minutes=settings.price_window_max_minutes)
+        rows = db.query(
+            PriceTick.symbol, PriceTick.currency, PriceTick.timestamp, PriceTick.price
+        ).filter(
+            PriceTick.timestamp >= since
+        ).order_by(PriceTick.timestamp, PriceTick.id).yield_per(5000)
+        
+        count = 0
+        with self._lock:
+            for symbol, currency, timestamp, price in rows:
+                self._push(symbol, currency, to_epoch(timestamp), price)
+                count += 1
+        logger.info(f"시세 윈도우 구성 완료: 심볼 {len(self._symbols)}개, 틱 {count}개")
+        return count
+    
+    def clear(self):
+        with self._lock:
+            self._symbols.clear()
+            self._window_seconds.clear()
+    
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+
+# 스케줄러가 틱마다 갱신하고 알림 평가가 공유하는 시세 윈도우 인덱스
+price_windows = PriceWindowIndex()
@@ -0,0 +1,259 @@
+"""
+API 제공자 라우터 (헤지 요청 및 장애 조치)
+
+사용자가 선택한 제공자에 먼저 요청하고, 최근 응답 시간의 백분위 임계값 안에 응답이 없으면
+다른 제공자(CMC ↔ CoinGecko)에도 요청을 보내 먼저 성공한 결과를 사용합니다.
+제공자별 서킷 브레이커로 장애 중인 제공자에는 요청을 보내지 않습니다.
+"""
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from app.config import settings
+from app.quote import Quote
+import asyncio
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (provider, api_key, symbols, currency) -> {symbol: Quote}
+PriceFetcher = Callable[[str, Optional[str], List[str], str], Awaitable[Dict[str, Quote]]]
+
+
+class CircuitBreaker:
+    """
+    제공자별 서킷 브레이커
+    
+    - closed: 정상, 모든 요청 허용
+    - open: 연속 실패가 임계값에 도달하면 open_seconds 동안 요청 차단
+    - half_open: 차단 시간이 지나면 시험 요청 1개만 허용 (성공 시 closed, 실패 시 다시 open)
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """요청을 보내도 되는지 확인 (half_open에서는 시험 요청 1개만 허용)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"서킷 브레이커 열림: 연속 실패 {self.failures}회, {self.open_seconds:.0f}초 동안 요청 차단")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """최근 응답 시간 기록 (고정 크기 윈도우)"""
+    
+    def __init__(self, window_size: int):
+        self._samples: Deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """응답 시간 백분위 값 (샘플이 없으면 None)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percent / 100 * len(samples)) - 1))
+        return samples[index]
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ProviderRouter:
+    """헤지 요청과 서킷 브레이커를 적용한 시세 조회 라우터"""
+    
+    PROVIDERS = ("cmc", "coingecko")
+    
+    def __init__(self):
+        self.reset()
+        # 먼저 끝난 요청 이후에도 계속 진행되는 요청 (결과는 캐시 및 응답 시간 기록에 사용)
+        self._background: set = set()
+    
+    def reset(self):
+        """서킷 상태, 응답 시간 기록, 통계 초기화"""
+        self.breakers: Dict[str, CircuitBreaker] = {
+            provider: CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_open_seconds)
+            for provider in self.PROVIDERS
+        }
+        self.latencies: Dict[str, LatencyTracker] = {
+            provider: LatencyTracker(settings.hedge_latency_window)
+            for provider in self.PROVIDERS
+        }
+        self.stats: Dict[str, int] = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+    
+    @staticmethod
+    def fallback_for(provider: str) -> Optional[Tuple[str, Optional[str]]]:
+        """대체 제공자와 API 키 (사용할 수 없으면 None)"""
+        if provider == "cmc":
+            api_key = settings.coingecko_api_key
+            if not api_key or not api_key.strip() or api_key.strip().lower() == "none":
+                api_key = None
+            return "coingecko", api_key
+        if settings.cmc_api_key:
+            return "cmc", settings.cmc_api_key
+        return None
+    
+    def hedge_delay(self, provider: str) -> float:
+        """헤지 요청을 보내기 전 대기 시간 (샘플이 부족하면 기본값)"""
+        tracker = self.latencies[provider]
+        if len(tracker) < settings.hedge_min_samples:
+            return settings.hedge_default_delay_seconds
+        return max(settings.hedge_min_delay_seconds, tracker.percentile(settings.hedge_latency_percentile))
+    
+    async def _attempt(
+        self,
+        fetch: PriceFetcher,
+        provider: str,
+        api_key: Optional[str],
+        symbols: List[str],
+        currency: str
+    ) -> Dict[str, Quote]:
+        started = time.monotonic()
+        try:
+            price_data = await fetch(provider, api_key, symbols, currency)
+        except Exception:
+            self.breakers[provider].record_failure()
+            raise
+        self.latencies[provider].record(time.monotonic() - started)
+        self.breakers[provider].record_success()
+        return price_data
+    
+    def _start(self, fetch: PriceFetcher, provider: str, api_key: Optional[str], symbols: List[str], currency: str):
+        task = asyncio.ensure_future(self._attempt(fetch, provider, api_key, symbols, currency))
+        task.provider = provider
+        return task
+    
+    def _detach(self, tasks):
+        """끝나지 않은 요청은 취소하지 않고 백그라운드에서 마무리 (공유 캐시의 대기자 보호)"""
+        for task in tasks:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    async def fetch_price_data(
+        self,
+        fetch: PriceFetcher,
+        provider: str,
+        api_key: Optional[str],
+        symbols: List[str],
+        currency: str
+    ) -> Dict[str, Quote]:
+        """
+        헤지 요청으로 시세 조회
+        
+        Args:
+            fetch: 실제 조회 함수 (provider, api_key, symbols, currency)
+            provider: 사용자가 선택한 제공자
+        
+        Raises:
+            Exception: 모든 제공자가 실패했거나 사용할 수 없는 경우
+        """
+        self.stats["requests"] += 1
+        if not settings.provider_failover_enabled:
+            return await fetch(provider, api_key, symbols, currency)
+        
+        candidates = [(provider, api_key)]
+        fallback = self.fallback_for(provider)
+        if fallback:
+            candidates.append(fallback)
+        
+        def start_next():
+            # 서킷 브레이커는 실제로 요청을 보낼 때만 확인 (half_open 시험 요청 슬롯 보호)
+            while candidates:
+                next_provider, next_api_key = candidates.pop(0)
+                if self.breakers[next_provider].allow():
+                    return self._start(fetch, next_provider, next_api_key, symbols, currency)
+            return None
+        
+        first = start_next()
+        if first is None:
+            raise Exception(f"사용 가능한 API 제공자가 없습니다 (서킷 브레이커 열림): {provider}")
+        first_provider = first.provider
+        if first_provider != provider:
+            self.stats["failovers"] += 1
+        pending = {first}
+        last_error: Optional[BaseException] = None
+        
+        while pending:
+            timeout = self.hedge_delay(first_provider) if candidates else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            
+            for task in done:
+                if task.exception() is None:
+                    if task.provider != provider:
+                        self.stats["hedge_wins"] += 1
+                        logger.info(f"대체 제공자 응답 사용: {provider} → {task.provider}")
+                    self._detach(pending)
+                    return task.result()
+                last_error = task.exception()
+                logger.warning(f"{task.provider} 시세 조회 실패: {last_error}")
+            
+            # 임계 시간 초과 또는 실패 시 다음 제공자에 요청
+            task = start_next()
+            if task is not None:
+                if done:
+                    self.stats["failovers"] += 1
+                else:
+                    self.stats["hedged"] += 1
+                    logger.info(f"{first_provider} 응답 지연, {task.provider}에 헤지 요청")
+                pending.add(task)
+        
+        raise Exception(f"모든 API 제공자 시세 조회 실패: {last_error}")
+    
+    def stats_report(self) -> Dict:
+        """라우터 통계 (제공자별 서킷 상태, 응답 시간 백분위)"""
+        return {
+            **self.stats,
+            "providers": {
+                provider: {
+                    "circuit": self.breakers[provider].state,
+                    "p50_seconds": self.latencies[provider].percentile(50),
+                    "p95_seconds": self.latencies[provider].percentile(95),
+                    "hedge_delay_seconds": self.hedge_delay(provider),
+                }
+                for provider in self.PROVIDERS
+            }
+        }
+
+
+# 모든 시세 조회가 공유하는 라우터
+provider_router = ProviderRouter()
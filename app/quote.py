@@ -0,0 +1,113 @@
+"""
+시세 데이터 타입
+
+API 클라이언트가 원본 JSON에서 바로 생성하는 불변 Quote 객체와 JSON 디코더.
+중첩 딕셔너리 변환 없이 평가액 계산, 알림, 스냅샷, 메시지 생성에 그대로 사용합니다.
+"""
+from typing import Any, Dict, Optional, Union
+from dataclasses import dataclass, replace
+import json
+
+try:
+    import orjson
+    
+    def loads(content: Union[bytes, str]) -> Any:
+        """JSON 디코딩 (orjson 사용)"""
+        return orjson.loads(content)
+except ImportError:
+    def loads(content: Union[bytes, str]) -> Any:
+        """JSON 디코딩 (orjson이 없으면 표준 json 사용)"""
+        return json.loads(content)
+
+
+# 스냅샷에 저장하는 필드
+SNAPSHOT_FIELDS = ("price", "market_cap", "percent_change_24h")
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    """코인 하나의 시세 (특정 통화 기준)"""
+    
+    symbol: str
+    price: float = 0.0
+    market_cap: float = 0.0
+    volume_24h: float = 0.0
+    percent_change_1h: float = 0.0
+    percent_change_24h: float = 0.0
+    percent_change_7d: float = 0.0
+    last_updated: Optional[str] = None
+    
+    @classmethod
+    def from_cmc(cls, symbol: str, coin_data: Any, convert: str) -> Optional["Quote"]:
+        """
+        CMC quotes/latest 응답의 코인 데이터로 생성
+        
+        Args:
+            symbol: 코인 심볼
+            coin_data: data[symbol] 값 (단일 조회는 딕셔너리, 다중 조회는 리스트)
+            convert: 변환 통화
+        
+        Returns:
+            Quote 또는 None (해당 통화 시세가 없는 경우)
+        """
+        if isinstance(coin_data, list):
+            coin_data = coin_data[0] if coin_data else None
+        if not isinstance(coin_data, dict):
+            return None
+        quote = (coin_data.get("quote") or {}).get(convert)
+        if not quote:
+            return None
+        return cls(
+            symbol=symbol,
+            price=quote.get("price") or 0.0,
+            market_cap=quote.get("market_cap") or 0.0,
+            volume_24h=quote.get("volume_24h") or 0.0,
+            percent_change_1h=quote.get("percent_change_1h") or 0.0,
+            percent_change_24h=quote.get("percent_change_24h") or 0.0,
+            percent_change_7d=quote.get("percent_change_7d") or 0.0,
+            last_updated=quote.get("last_updated")
+        )
+    
+    @classmethod
+    def from_coingecko(cls, symbol: str, coin_data: Dict, vs_currency: str) -> Optional["Quote"]:
+        """
+        CoinGecko simple/price 응답의 코인 데이터로 생성
+        (1시간/7일 변동률은 CoinGecko가 제공하지 않으므로 0)
+        """
+        if vs_currency not in coin_data:
+            return None
+        last_updated = coin_data.get("last_updated_at")
+        return cls(
+            symbol=symbol,
+            price=coin_data.get(vs_currency) or 0.0,
+            market_cap=coin_data.get(f"{vs_currency}_market_cap") or 0.0,
+            volume_24h=coin_data.get(f"{vs_currency}_24h_vol") or 0.0,
+            percent_change_24h=coin_data.get(f"{vs_currency}_24h_change") or 0.0,
+            last_updated=str(last_updated) if last_updated is not None else None
+        )
+    
+    def scaled(self, rate: float) -> "Quote":
+        """가격/시가총액/거래량에 환율을 곱한 Quote (변동률은 그대로)"""
+        return replace(
+            self,
+            price=self.price * rate,
+            market_cap=self.market_cap * rate,
+            volume_24h=self.volume_24h * rate
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """API 응답용 딕셔너리"""
+        return {
+            "symbol": self.symbol,
+            "price": self.price,
+            "market_cap": self.market_cap,
+            "volume_24h": self.volume_24h,
+            "percent_change_1h": self.percent_change_1h,
+            "percent_change_24h": self.percent_change_24h,
+            "percent_change_7d": self.percent_change_7d,
+            "last_updated": self.last_updated
+        }
+    
+    def to_snapshot(self) -> Dict[str, float]:
+        """스냅샷 저장용 딕셔너리"""
+        return {field: getattr(self, field) for field in SNAPSHOT_FIELDS}
@@ -0,0 +1,227 @@
+"""
+시세 캐시
+
+(provider, symbol, currency) 단위로 시세를 TTL 동안 보관하고,
+같은 키에 대한 동시 조회는 하나의 업스트림 요청으로 합칩니다 (single-flight).
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class QuoteCache:
+    """TTL + LRU 시세 캐시 (single-flight 지원)"""
+    
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        """
+        Args:
+            ttl_seconds: 캐시 유지 시간 (초). 0 이하이면 캐시를 사용하지 않음
+            max_entries: 최대 보관 항목 수. 초과 시 가장 오래 사용되지 않은 항목부터 제거
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(provider: str, symbol: str, currency: str) -> CacheKey:
+        return provider.lower(), symbol.upper(), currency
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+    
+    def _get_locked(self, key: CacheKey, now: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def _set_locked(self, key: CacheKey, value: Any, now: float):
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _reserve(
+        self,
+        provider: str,
+        symbols: List[str],
+        currency: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Tuple[CacheKey, Future]], Dict[str, Future]]:
+        """캐시 적중 항목, 직접 조회할 항목, 다른 요청을 기다릴 항목으로 분류"""
+        results: Dict[str, Any] = {}
+        owned: Dict[str, Tuple[CacheKey, Future]] = {}
+        waiting: Dict[str, Future] = {}
+        
+        with self._lock:
+            now = time.monotonic()
+            for symbol in symbols:
+                key = self.make_key(provider, symbol, currency)
+                value = self._get_locked(key, now)
+                if value is not None:
+                    self.hits += 1
+                    results[symbol] = value
+                elif key in self._inflight:
+                    # 다른 요청이 이미 조회 중이면 그 결과를 기다림
+                    self.coalesced += 1
+                    waiting[symbol] = self._inflight[key]
+                else:
+                    self.misses += 1
+                    future = Future()
+                    self._inflight[key] = future
+                    owned[symbol] = (key, future)
+        
+        return results, owned, waiting
+    
+    def _complete(self, owned: Dict[str, Tuple[CacheKey, Future]], loaded: Dict[str, Any], results: Dict[str, Any]):
+        """조회 결과를 캐시에 저장하고 대기 중인 요청에 전달"""
+        with self._lock:
+            now = time.monotonic()
+            for symbol, (key, future) in owned.items():
+                value = loaded.get(symbol)
+                if value is not None:
+                    self._set_locked(key, value, now)
+                self._inflight.pop(key, None)
+        for symbol, (key, future) in owned.items():
+            value = loaded.get(symbol)
+            future.set_result(value)
+            if value is not None:
+                results[symbol] = value
+    
+    def _fail(self, owned: Dict[str, Tuple[CacheKey, Future]], error: BaseException):
+        """
+        조회 실패를 대기 중인 요청에 전달
+        
+        조회를 맡은 요청이 취소/중단된 경우(CancelledError 등) 그대로 전달하면 결과를 기다리던
+        다른 요청까지 취소되므로, 일반 예외로 바꿔 조회 실패로만 전달합니다.
+        """
+        if not isinstance(error, Exception):
+            cancelled = RuntimeError(f"시세 조회 요청이 중단되었습니다: {type(error).__name__}")
+            cancelled.__cause__ = error
+            error = cancelled
+        with self._lock:
+            for key, future in owned.values():
+                self._inflight.pop(key, None)
+        for key, future in owned.values():
+            future.set_exception(error)
+    
+    def get_many(
+        self,
+        provider: str,
+        symbols: List[str],
+        currency: str,
+        loader: Callable[[List[str]], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        캐시에서 시세 조회, 없는 심볼만 loader로 조회
+        
+        Args:
+            provider: API 제공자 ("cmc", "coingecko")
+            symbols: 코인 심볼 리스트
+            currency: 변환 통화
+            loader: 누락된 심볼 리스트를 받아 {symbol: value}를 반환하는 함수
+        
+        Returns:
+            {symbol: value} 딕셔너리 (조회되지 않은 심볼은 제외)
+        """
+        if not self.enabled:
+            return loader(symbols)
+        
+        results, owned, waiting = self._reserve(provider, symbols, currency)
+        
+        if owned:
+            try:
+                loaded = loader(list(owned.keys()))
+            except BaseException as e:
+                self._fail(owned, e)
+                raise
+            self._complete(owned, loaded, results)
+        
+        for symbol, future in waiting.items():
+            value = future.result()
+            if value is not None:
+                results[symbol] = value
+        
+        return results
+    
+    async def aget_many(
+        self,
+        provider: str,
+        symbols: List[str],
+        currency: str,
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """get_many의 비동기 버전 (loader는 코루틴 함수)"""
+        if not self.enabled:
+            return await loader(symbols)
+        
+        results, owned, waiting = self._reserve(provider, symbols, currency)
+        
+        if owned:
+            try:
+                loaded = await loader(list(owned.keys()))
+            except BaseException as e:
+                self._fail(owned, e)
+                raise
+            self._complete(owned, loaded, results)
+        
+        # 동기/비동기 요청 및 다른 이벤트 루프의 요청과도 결과를 공유
+        for symbol, future in waiting.items():
+            value = await asyncio.wrap_future(future)
+            if value is not None:
+                results[symbol] = value
+        
+        return results
+    
+    def clear(self):
+        """캐시 및 통계 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.coalesced = 0
+            self.evictions = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/실패 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+# 모든 사용자/클라이언트가 공유하는 시세 캐시
+quote_cache = QuoteCache(
+    ttl_seconds=settings.quote_cache_ttl_seconds,
+    max_entries=settings.quote_cache_max_entries
+)
@@ -0,0 +1,309 @@
+"""
+API 요청 속도 제한 및 크레딧 사용량 기록
+
+- API 키별 토큰 버킷으로 요청 속도를 제한하고, 429 응답 시 Retry-After 만큼 대기 후 재시도
+- CMC 크레딧(호출당 100심볼 단위) 사용량을 키별/일별로 기록하여 월간 잔여 예산 계산
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import ApiCreditUsage
+import asyncio
+import calendar
+import hashlib
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """토큰 버킷 속도 제한기 (스레드/이벤트 루프 공용)"""
+    
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens: float = 1) -> float:
+        """토큰을 예약하고 대기해야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+    
+    def acquire(self, tokens: float = 1):
+        """토큰을 얻을 때까지 대기 (동기)"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self, tokens: float = 1):
+        """토큰을 얻을 때까지 대기 (비동기)"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def block_for(self, seconds: float):
+        """지정한 시간 동안 모든 요청 보류 (429 Retry-After 대응)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def api_key_fingerprint(api_key: Optional[str]) -> str:
+    """API 키를 저장/표시용 지문으로 변환 (원본 키는 저장하지 않음)"""
+    if not api_key:
+        return "public"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class RateLimiterRegistry:
+    """(API 제공자, API 키)별 토큰 버킷 관리"""
+    
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def requests_per_minute(provider: str, api_key: Optional[str]) -> float:
+        if provider == "coingecko":
+            if api_key:
+                return settings.coingecko_pro_rate_limit_per_minute
+            return settings.coingecko_rate_limit_per_minute
+        return settings.cmc_rate_limit_per_minute
+    
+    def get(self, provider: str, api_key: Optional[str]) -> TokenBucket:
+        key = (provider, api_key_fingerprint(api_key))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(
+                    rate_per_second=self.requests_per_minute(provider, api_key) / 60,
+                    capacity=settings.rate_limit_burst
+                )
+                self._buckets[key] = bucket
+            return bucket
+    
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더 (초 또는 HTTP 날짜) 파싱"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
+def backoff_delay(retry_after: Optional[str], attempt: int) -> float:
+    """429 응답 후 대기 시간 (Retry-After가 없으면 지수 백오프)"""
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = settings.rate_limit_backoff_base_seconds * (2 ** attempt)
+    return min(delay, settings.rate_limit_max_backoff_seconds)
+
+
+def call_with_rate_limit(bucket: TokenBucket, send: Callable):
+    """
+    속도 제한을 적용하여 요청 전송 (동기)
+    
+    429 응답이면 Retry-After 만큼 버킷을 막고 최대 api_max_retries회 재시도합니다.
+    마지막 응답은 상태 코드와 관계없이 그대로 반환합니다.
+    """
+    for attempt in range(settings.api_max_retries + 1):
+        bucket.acquire()
+        response = send()
+        if response.status_code != 429 or attempt == settings.api_max_retries:
+            return response
+        delay = backoff_delay(response.headers.get("Retry-After"), attempt)
+        bucket.block_for(delay)
+        logger.warning(f"API 요청 한도 초과 (429): {delay:.1f}초 후 재시도 ({attempt + 1}/{settings.api_max_retries})")
+
+
+async def call_with_rate_limit_async(bucket: TokenBucket, send: Callable[[], Awaitable]):
+    """call_with_rate_limit의 비동기 버전"""
+    for attempt in range(settings.api_max_retries + 1):
+        await bucket.acquire_async()
+        response = await send()
+        if response.status_code != 429 or attempt == settings.api_max_retries:
+            return response
+        delay = backoff_delay(response.headers.get("Retry-After"), attempt)
+        bucket.block_for(delay)
+        logger.warning(f"API 요청 한도 초과 (429): {delay:.1f}초 후 재시도 ({attempt + 1}/{settings.api_max_retries})")
+
+
+def cmc_credit_cost(response_data: Dict, symbol_count: int) -> int:
+    """
+    CMC quotes/latest 호출의 크레딧 비용
+    
+    응답의 status.credit_count를 우선 사용하고, 없으면 100심볼당 1크레딧으로 계산합니다.
+    """
+    credit_count = (response_data.get("status") or {}).get("credit_count")
+    if isinstance(credit_count, int):
+        return credit_count
+    return max(1, math.ceil(symbol_count / 100))
+
+
+class CreditLedger:
+    """
+    API 크레딧 사용량 기록
+    
+    요청 경로에서는 메모리에만 누적하고, flush() 시 (제공자, 키 지문, 날짜)별로 DB에 합산합니다.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[Tuple[str, str, date], List[int]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def monthly_limit(provider: str) -> int:
+        """월간 크레딧 한도 (0이면 무제한)"""
+        if provider == "coingecko":
+            return settings.coingecko_monthly_call_limit
+        return settings.cmc_monthly_credit_limit
+    
+    def record(self, provider: str, api_key: Optional[str], credits: int):
+        """크레딧 사용 기록 (메모리)"""
+        key = (provider, api_key_fingerprint(api_key), datetime.now(timezone.utc).date())
+        with self._lock:
+            entry = self._pending.setdefault(key, [0, 0])
+            entry[0] += credits
+            entry[1] += 1
+    
+    def flush(self, db: Session):
+        """메모리에 누적된 사용량을 DB에 반영"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        
+        for (provider, key_hash, usage_date), (credits, calls) in pending.items():
+            for _ in range(2):
+                usage = db.query(ApiCreditUsage).filter(
+                    ApiCreditUsage.provider == provider,
+                    ApiCreditUsage.api_key_hash == key_hash,
+                    ApiCreditUsage.usage_date == usage_date
+                ).first()
+                if usage:
+                    usage.credits += credits
+                    usage.calls += calls
+                else:
+                    db.add(ApiCreditUsage(
+                        provider=provider,
+                        api_key_hash=key_hash,
+                        usage_date=usage_date,
+                        credits=credits,
+                        calls=calls
+                    ))
+                try:
+                    db.commit()
+                    break
+                except IntegrityError:
+                    # 다른 프로세스가 같은 날짜 행을 먼저 만든 경우 갱신으로 재시도
+                    db.rollback()
+    
+    def monthly_usage(self, db: Session, provider: str, api_key: Optional[str], today: Optional[date] = None) -> int:
+        """이번 달 사용 크레딧 (DB + 아직 반영되지 않은 사용량)"""
+        today = today or datetime.now(timezone.utc).date()
+        month_start = today.replace(day=1)
+        key_hash = api_key_fingerprint(api_key)
+        
+        used = db.query(func.coalesce(func.sum(ApiCreditUsage.credits), 0)).filter(
+            ApiCreditUsage.provider == provider,
+            ApiCreditUsage.api_key_hash == key_hash,
+            ApiCreditUsage.usage_date >= month_start
+        ).scalar()
+        
+        with self._lock:
+            used += sum(
+                credits
+                for (p, h, d), (credits, calls) in self._pending.items()
+                if p == provider and h == key_hash and d >= month_start
+            )
+        return int(used)
+    
+    def remaining_budget(self, db: Session, provider: str, api_key: Optional[str]) -> Optional[int]:
+        """이번 달 남은 크레딧 (한도가 없으면 None)"""
+        limit = self.monthly_limit(provider)
+        if not limit:
+            return None
+        return max(0, limit - self.monthly_usage(db, provider, api_key))
+    
+    def pacing_factor(
+        self,
+        db: Session,
+        provider: str,
+        api_key: Optional[str],
+        now: Optional[datetime] = None
+    ) -> float:
+        """
+        현재 속도로 사용할 때 월말 예상 사용량 / 월간 한도
+        
+        1.0 이하이면 한도 내, 1.0보다 크면 그 비율만큼 조회 주기를 늘려야 합니다.
+        한도를 모두 사용했으면 inf를 반환합니다.
+        """
+        limit = self.monthly_limit(provider)
+        if not limit:
+            return 1.0
+        
+        now = now or datetime.now(timezone.utc)
+        used = self.monthly_usage(db, provider, api_key, today=now.date())
+        if used >= limit:
+            return math.inf
+        
+        days_in_month = calendar.monthrange(now.year, now.month)[1]
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        # 월초의 짧은 구간에서 과도하게 추정하지 않도록 최소 1일 경과로 계산
+        elapsed_days = max(1.0, (now - month_start).total_seconds() / 86400)
+        projected = used / elapsed_days * days_in_month
+        return max(1.0, projected / limit)
+    
+    def usage_report(self, db: Session) -> List[Dict]:
+        """키별 이번 달 사용량 및 잔여 예산"""
+        self.flush(db)
+        month_start = datetime.now(timezone.utc).date().replace(day=1)
+        rows = db.query(
+            ApiCreditUsage.provider,
+            ApiCreditUsage.api_key_hash,
+            func.sum(ApiCreditUsage.credits),
+            func.sum(ApiCreditUsage.calls)
+        ).filter(
+            ApiCreditUsage.usage_date >= month_start
+        ).group_by(ApiCreditUsage.provider, ApiCreditUsage.api_key_hash).all()
+        
+        report = []
+        for provider, key_hash, credits, calls in rows:
+            limit = self.monthly_limit(provider)
+            report.append({
+                "provider": provider,
+                "api_key_hash": key_hash,
+                "credits_used": int(credits),
+                "calls": int(calls),
+                "monthly_limit": limit or None,
+                "remaining": max(0, limit - int(credits)) if limit else None,
+            })
+        return report
+
+
+# 모든 클라이언트가 공유하는 속도 제한기 및 크레딧 기록
+rate_limiters = RateLimiterRegistry()
+credit_ledger = CreditLedger()
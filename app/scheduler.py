@@ -2,11 +2,36 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from app.database import SessionLocal
 from app.models import User
-from app.services import PortfolioService, AlertService
+from app.services import (
+    PortfolioService, AlertService, QuoteService, PriceTriggerService, quote_group_key, rebuild_trigger_index
+)
+from app.tick_loader import TickLoader, TickUser
+from app.sharding import ShardCoordinator, shard_of
+from app.alert_engine import AlertEngine
+from app.valuation_index import valuation_index
+from app.tick_store import TickStore, TickRef, holdings_versions
+from app.compaction import snapshot_compactor
+from app.price_history import price_history
+from app.price_triggers import price_trigger_index, PriceCrossing, format_crossing_message
+from app.price_window import price_windows
+from app.volatility import return_stats
+from app.quote import Quote
+from app.rate_limit import credit_ledger
+from app.fx import fx_rates
+from app.freshness import freshness_tracker
 from app.telegram_bot import TelegramBot
+from app.telegram_delivery import TelegramDeliveryQueue
+from app.outbox import NotificationOutboxService, OutboxMessage, alert_key, trigger_key, summary_key
 from app.config import settings
-from app.utils import format_portfolio_message
+from app.utils import format_portfolio_message, aggregate_portfolio_items
+import asyncio
 import logging
+import math
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 from telegram import Bot
 
 logger = logging.getLogger(__name__)
@@ -15,73 +40,464 @@ logger = logging.getLogger(__name__)
 class MonitoringScheduler:
     """포트폴리오 모니터링 스케줄러"""
     
-    def __init__(self, telegram_bot: TelegramBot):
+    def __init__(self, telegram_bot: Optional[TelegramBot], coordinator: Optional[ShardCoordinator] = None):
         self.scheduler = AsyncIOScheduler()
         self.telegram_bot = telegram_bot
+        # 워커 모드: 샤드 배정 (None이면 모든 사용자 처리)
+        self.coordinator = coordinator
+        self._shards: Optional[FrozenSet[int]] = None
+        # 아웃박스 선점 토큰 접두사
+        self.outbox_owner = coordinator.worker_id if coordinator else f"{socket.gethostname()}:{os.getpid()}"
         self.bot = Bot(token=settings.telegram_bot_token)
+        # 채팅별 알림 병합, 전체/채팅별 속도 제한을 적용한 전송 대기열
+        self.delivery = TelegramDeliveryQueue(
+            lambda chat_id, text: self.bot.send_message(chat_id=chat_id, text=text)
+        )
+        self._tick_count = 0
+        # 사용자별 마지막으로 평가한 보유 수량 (보유 내역이 바뀌면 시세가 그대로여도 다시 평가)
+        self._valued_holdings: Dict[int, FrozenSet[Tuple[str, float]]] = {}
+        self._fx_updated_at: Optional[float] = None
+        # 이번 틱에 조회를 건너뛸 (API 제공자, API 키)
+        self._pacing_skips: Dict[Tuple[str, Optional[str]], bool] = {}
+        # 이번 틱의 시세 기록기 (틱 시각과 이미 기록한 (제공자, 심볼, 통화))
+        self._tick_store = TickStore()
+    
+    def _begin_tick(self, db):
+        """틱 시작: 크레딧 사용량과 수익률 통계를 DB에 반영하고 키별 조회 여부 판단과 시세 기록기 초기화"""
+        self._tick_count += 1
+        credit_ledger.flush(db)
+        try:
+            return_stats.flush(db)
+        except Exception as e:
+            logger.error(f"수익률 통계 저장 실패 (다음 틱에 재시도): {e}")
+        self._pacing_skips = {}
+        self._tick_store = TickStore()
+    
+    def _claim_shards(self, db) -> Optional[FrozenSet[int]]:
+        """
+        워커 모드: 이번 틱에 처리할 샤드 확정
+        
+        가격 트리거 인덱스는 API 서버에서 등록/삭제한 트리거를 반영하도록 틱마다 소유 샤드 기준으로 다시 읽고,
+        샤드가 바뀌면 평가 인덱스에서 다른 워커로 넘어간 사용자를 제거합니다.
+        
+        Returns:
+            소유 샤드 (워커 모드가 아니면 None)
+        """
+        if self.coordinator is None:
+            return None
+        shards = frozenset(self.coordinator.claim(db))
+        rebuild_trigger_index(db, shards)
+        if shards != self._shards:
+            removed = valuation_index.retain(lambda user_id: shard_of(user_id) in shards)
+            logger.info(f"담당 샤드 변경: {len(shards)}개 (평가 인덱스에서 사용자 {removed}명 제거)")
+            self._shards = shards
+        return shards
+    
+    def _should_skip_key(self, db, provider: str, api_key: Optional[str]) -> bool:
+        factor = credit_ledger.pacing_factor(db, provider, api_key)
+        if math.isinf(factor):
+            logger.warning(f"{provider} API 월간 크레딧 한도를 모두 사용하여 시세 조회를 건너뜁니다.")
+            return True
+        if factor > 1 and self._tick_count % math.ceil(factor) != 0:
+            logger.warning(f"{provider} API 크레딧 소진 속도가 월간 한도의 {factor:.2f}배입니다. 이번 틱을 건너뜁니다.")
+            return True
+        return False
+    
+    def _apply_credit_pacing(self, db, users: List[User]) -> List[User]:
+        """
+        API 키별 월간 크레딧 소진 속도에 맞춰 이번 틱에 조회할 사용자 선택
+        
+        예상 월간 사용량이 한도의 N배이면 해당 키는 N틱에 한 번만 조회하고,
+        한도를 모두 사용한 키는 조회하지 않습니다. (키별 판단은 틱마다 한 번)
+        """
+        selected = []
+        for user in users:
+            key = quote_group_key(user)[:2]
+            if key not in self._pacing_skips:
+                self._pacing_skips[key] = self._should_skip_key(db, *key)
+            if not self._pacing_skips[key]:
+                selected.append(user)
+        return selected
+    
+    def _needs_revaluation(self, user_id: int, items: List, changed: Optional[Set[str]], fx_changed: bool) -> bool:
+        """
+        이번 틱에 사용자 포트폴리오를 다시 평가해야 하는지 확인
+        
+        보유 심볼의 시세가 하나도 갱신되지 않았고 보유 내역과 환율도 그대로이면
+        평가, 스냅샷 저장, 알림 확인을 건너뜁니다.
+        """
+        holdings_signature = frozenset(aggregate_portfolio_items(items)[0].items())
+        holdings_changed = self._valued_holdings.get(user_id) != holdings_signature
+        self._valued_holdings[user_id] = holdings_signature
+        
+        if not settings.freshness_skip_unchanged or holdings_changed or fx_changed:
+            return True
+        return bool(changed) and any(item.symbol in changed for item in items)
+    
+    async def _for_each_user(self, user_ids: Iterable[int], worker: Callable[[int], Awaitable], description: str) -> Set[int]:
+        """
+        사용자별 비동기 작업을 TICK_USER_CONCURRENCY명까지 동시에 실행
+        
+        사용자마다 TICK_USER_TIMEOUT_SECONDS 제한 시간을 두고 (세마포어 대기 시간 제외),
+        시간 초과나 예외는 해당 사용자만 기록하여 느리거나 실패한 사용자가 다른 사용자의 처리를 막지 않습니다.
+        
+        Returns:
+            시간 초과 또는 실패한 사용자 ID
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.tick_user_concurrency))
+        timeout = settings.tick_user_timeout_seconds
+        failed: Set[int] = set()
+        
+        async def run(user_id: int):
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(worker(user_id), timeout=timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"사용자 {user_id} {description} 시간 초과 ({timeout:g}초)")
+                    failed.add(user_id)
+                except Exception as e:
+                    logger.error(f"사용자 {user_id} {description} 실패: {e}")
+                    failed.add(user_id)
+        
+        await asyncio.gather(*(run(user_id) for user_id in user_ids))
+        return failed
+    
+    def _align_next_run(self, providers: Iterable[str]):
+        """다음 모니터링 틱을 제공자의 예상 시세 갱신 시각에 맞춤 (SCHEDULER_INTERVAL_MINUTES를 넘지 않음)"""
+        if not settings.freshness_aligned_scheduling:
+            return
+        job = self.scheduler.get_job("portfolio_monitor")
+        if job is None:
+            return
+        
+        now = time.time()
+        next_update_at = freshness_tracker.next_update_at(providers, now)
+        if next_update_at is None:
+            return
+        delay = next_update_at + settings.freshness_poll_lag_seconds - now
+        delay = min(max(delay, settings.freshness_min_poll_seconds), settings.scheduler_interval_minutes * 60)
+        job.modify(next_run_time=datetime.now(self.scheduler.timezone) + timedelta(seconds=delay))
+        logger.info(f"다음 모니터링 틱: {delay:.0f}초 후 (제공자 시세 갱신 주기 기준)")
+    
+    def _apply_group_prices(
+        self,
+        db,
+        users: List[User],
+        tick_users: Dict[int, TickUser],
+        price_data_by_user: Dict[int, Dict[str, Quote]],
+        crossings: List[PriceCrossing],
+        trigger_prices: Optional[Dict[Tuple[str, str], Dict[str, float]]] = None
+    ) -> Dict[Tuple, TickRef]:
+        """
+        평가 인덱스, 가격 트리거 인덱스, 시세 윈도우, 수익률 통계에 이번 시세 반영 및 시세 틱 기록
+        
+        보유 내역이나 시세 그룹이 인덱스와 다른 사용자는 다시 반영하고 (다른 프로세스의 변경 대비),
+        시세 그룹별로 한 번만 가격을 반영하여 바뀐 심볼을 보유한 사용자의 누계만 조정합니다.
+        trigger_prices({(제공자, 통화): {심볼: 가격}})는 사용자 기준 통화와 다른 통화의 트리거에만 반영합니다.
+        트리거 인덱스는 제공자별 마지막 가격과 비교하고 같은 틱의 시세는 제공자별로 한 번만 반영하므로,
+        같은 틱에 여러 그룹(API 키, 환산 시세)이 같은 심볼을 조회해도 제공자 간 시세 차이로 발동하지 않습니다.
+        목표 가격을 통과한 트리거는 crossings에 추가합니다 (중간에 실패해도 이미 인덱스에서 제거한 트리거를 되돌릴 수 있도록).
+        
+        Returns:
+            {시세 그룹: 틱 참조}
+        """
+        applied_groups: Dict[Tuple, TickRef] = {}
+        for user in users:
+            price_data = price_data_by_user.get(user.id)
+            if price_data is None:
+                continue
+            group = quote_group_key(user)
+            holdings = aggregate_portfolio_items(tick_users[user.id].holdings)[0]
+            if valuation_index.holdings(user.id) != (group, holdings):
+                valuation_index.set_holdings(user.id, group, holdings)
+            if group not in applied_groups:
+                applied_groups[group] = self._tick_store.record(db, group[0], group[2], price_data)
+                prices = {symbol: quote.price for symbol, quote in price_data.items()}
+                self._append_history(group[0], group[2], prices)
+                valuation_index.apply_prices(group, prices)
+                crossings.extend(price_trigger_index.update(group[2], prices, group[0], self._tick_store.timestamp))
+                price_windows.update(group[2], prices, self._tick_store.timestamp)
+                return_stats.update(group[2], prices, self._tick_store.timestamp, group[0])
+        for (provider, currency), prices in (trigger_prices or {}).items():
+            crossings.extend(price_trigger_index.update(currency, prices, provider, self._tick_store.timestamp))
+        return applied_groups
+    
+    def _append_history(self, provider: str, currency: str, prices: Dict[str, float]):
+        """시세 이력 저장소에 이번 틱 시세 추가 (실패해도 틱 처리는 계속)"""
+        if not settings.price_history_enabled:
+            return
+        try:
+            price_history.append(provider, currency, self._tick_store.timestamp, prices)
+        except Exception as e:
+            logger.error(f"시세 이력 기록 실패: {provider}/{currency}, error={e}")
+    
+    def _crossing_messages(
+        self,
+        db,
+        crossings: List[PriceCrossing],
+        tick_users: Dict[int, TickUser]
+    ) -> List[OutboxMessage]:
+        """
+        가격 도달 알림 메시지 생성 및 트리거 비활성화 (커밋은 호출자가 묶음 단위로 수행)
+        
+        Returns:
+            아웃박스에 기록할 가격 도달 알림
+        """
+        if not crossings:
+            return []
+        PriceTriggerService(db).mark_triggered(crossings, commit=False)
+        
+        # 트리거 소유자가 이번 묶음에 없으면 (다른 묶음/조회 건너뜀) chat_id를 한 번에 조회
+        chat_ids = {user_id: tick_user.user.telegram_chat_id for user_id, tick_user in tick_users.items()}
+        missing = {crossing.trigger.user_id for crossing in crossings} - chat_ids.keys()
+        if missing:
+            chat_ids.update(db.query(User.id, User.telegram_chat_id).filter(User.id.in_(missing)).all())
+        
+        messages: List[OutboxMessage] = []
+        for crossing in crossings:
+            user_id = crossing.trigger.user_id
+            messages.append(OutboxMessage(
+                user_id, chat_ids[user_id], "price_trigger",
+                format_crossing_message(crossing), trigger_key(crossing.trigger.trigger_id)
+            ))
+            logger.info(f"가격 도달: user_id={user_id}, trigger_id={crossing.trigger.trigger_id}")
+        return messages
     
     async def check_portfolio_and_alert(self):
         """포트폴리오 확인 및 알림 전송"""
         db = SessionLocal()
         
         try:
-            users = db.query(User).all()
-            logger.info(f"포트폴리오 체크 시작: 등록된 사용자 수 = {len(users)}")
-            
-            if not users:
-                logger.warning("등록된 사용자가 없습니다. /start 명령어로 사용자를 등록하세요.")
+            logger.info("포트폴리오 체크 시작")
+            await asyncio.to_thread(self._begin_tick, db)
+            shards = await asyncio.to_thread(self._claim_shards, db)
+            if shards is not None and not shards:
+                logger.info(f"담당 샤드가 없어 틱을 건너뜁니다: worker={self.coordinator.worker_id}")
                 return
+            fx_changed = fx_rates.updated_at != self._fx_updated_at
+            self._fx_updated_at = fx_rates.updated_at
             
-            for user in users:
+            # 사용자/포트폴리오/알림 설정/알림 기준을 묶음 단위로 일괄 조회 (조회는 별도 스레드에서 실행)
+            user_count = 0
+            providers: Set[str] = set()
+            chunks = TickLoader(db, shards=shards).iter_chunks()
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                user_count += len(chunk)
                 try:
-                    logger.info(f"사용자 {user.id} (chat_id: {user.telegram_chat_id}) 포트폴리오 확인 중...")
-                    portfolio_service = PortfolioService(db)
-                    summary = portfolio_service.get_portfolio_summary(user.id)
-                    
-                    if not summary:
-                        logger.warning(f"사용자 {user.id}의 포트폴리오가 설정되지 않았습니다.")
-                        continue
-                    
-                    logger.info(f"사용자 {user.id} 포트폴리오 총액: {summary['total_value']} {user.base_currency}")
-                    
-                    # 스냅샷 저장
-                    alert_service = AlertService(db)
-                    price_data = {
-                        symbol: {
-                            "price": data.get("price", 0),
-                            "market_cap": data.get("market_cap", 0),
-                            "percent_change_24h": data.get("percent_change_24h", 0)
-                        }
-                        for symbol, data in summary["price_data"].items()
-                    }
-                    alert_service.save_snapshot(
-                        user.id,
-                        price_data,
-                        summary["total_value"]
-                    )
-                    
-                    # 알림 확인
-                    alerts = alert_service.check_alerts(user.id)
-                    logger.info(f"사용자 {user.id} 알림 확인 결과: {len(alerts)}개 알림 발생")
-                    
-                    for alert in alerts:
-                        try:
-                            await self.bot.send_message(
-                                chat_id=user.telegram_chat_id,
-                                text=alert["message"]
-                            )
-                            logger.info(f"알림 전송 완료: user_id={user.id}, type={alert['type']}")
-                        except Exception as e:
-                            logger.error(f"알림 전송 실패: user_id={user.id}, error={e}")
-                
+                    await self._check_chunk(db, chunk, fx_changed, providers)
                 except Exception as e:
-                    logger.error(f"사용자 {user.id} 포트폴리오 확인 실패: {e}")
+                    # 실패한 묶음만 롤백하고 다음 묶음은 계속 처리
+                    logger.error(f"사용자 묶음 처리 실패: 사용자 {len(chunk)}명, error={e}")
+                    await asyncio.to_thread(db.rollback)
+            
+            if not user_count:
+                logger.warning("포트폴리오가 등록된 사용자가 없습니다. /start 명령어로 사용자를 등록하세요.")
+                return
+            logger.info(f"포트폴리오 체크 완료: 사용자 수 = {user_count}")
+            self._align_next_run(providers)
         
         except Exception as e:
             logger.error(f"스케줄러 실행 오류: {e}")
         finally:
             db.close()
     
+    async def _check_chunk(self, db, chunk: List[TickUser], fx_changed: bool, providers: Set[str]):
+        """
+        사용자 묶음의 시세를 한 번에 조회하고 평가/알림/스냅샷 처리 (스냅샷은 묶음 단위로 커밋)
+        
+        시세 조회만 이벤트 루프에서 기다리고, 크레딧 사용량 조회와 시세 반영부터 커밋까지의
+        DB 작업은 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+        """
+        tick_users = {tick_user.user.id: tick_user for tick_user in chunk}
+        users = await asyncio.to_thread(self._apply_credit_pacing, db, [tick_user.user for tick_user in chunk])
+        providers.update(quote_group_key(user)[0] for user in users)
+        
+        # 묶음 내 모든 사용자의 심볼을 그룹별로 묶어 한 번에 시세 조회
+        holdings = {user_id: tick_user.holdings for user_id, tick_user in tick_users.items()}
+        quote_service = QuoteService()
+        trigger_symbols = {user.id: price_trigger_index.targets_for(user.id) for user in users}
+        price_data_by_user = await quote_service.fetch_for_users_async(
+            users,
+            holdings,
+            freshness_tick=self._tick_count,
+            extra_symbols={user_id: symbols for user_id, symbols in trigger_symbols.items() if symbols}
+        )
+        
+        await asyncio.to_thread(self._store_chunk, db, users, tick_users, price_data_by_user, quote_service, fx_changed)
+    
+    def _store_chunk(
+        self,
+        db,
+        users: List[User],
+        tick_users: Dict[int, TickUser],
+        price_data_by_user: Dict[int, Dict[str, Quote]],
+        quote_service: QuoteService,
+        fx_changed: bool
+    ):
+        """조회한 시세를 인덱스와 시세 틱에 반영한 뒤 묶음 평가와 커밋 (실패하면 롤백 후 예외를 올림)"""
+        crossings: List[PriceCrossing] = []
+        try:
+            tick_refs = self._apply_group_prices(
+                db, users, tick_users, price_data_by_user, crossings, quote_service.trigger_prices
+            )
+            self._evaluate_chunk(db, users, tick_users, price_data_by_user, quote_service, crossings, tick_refs, fx_changed)
+        except Exception:
+            # 롤백된 시세 틱과 보유 내역 버전은 다음 묶음/틱에서 다시 기록하고,
+            # 인덱스에서 제거된 트리거는 비활성화가 롤백되었으므로 다음 틱에 다시 발동하도록 되돌림
+            db.rollback()
+            self._tick_store.discard()
+            holdings_versions.clear()
+            price_trigger_index.restore(crossings)
+            raise
+    
+    def _evaluate_chunk(
+        self,
+        db,
+        users: List[User],
+        tick_users: Dict[int, TickUser],
+        price_data_by_user: Dict[int, Dict[str, Quote]],
+        quote_service: QuoteService,
+        crossings: List[PriceCrossing],
+        tick_refs: Dict[Tuple, TickRef],
+        fx_changed: bool
+    ):
+        """
+        묶음의 평가/알림/스냅샷 처리 후 커밋
+        
+        트리거 비활성화, 보유 내역 버전, 아웃박스 기록, 스냅샷이 한 트랜잭션이며
+        실패하면 예외를 그대로 올려 호출자가 롤백과 인덱스 복원을 수행합니다.
+        """
+        outgoing = self._crossing_messages(db, crossings, tick_users)
+        
+        portfolio_service = PortfolioService(db)
+        alert_service = AlertService(db)
+        alert_engine = AlertEngine()
+        valued: List[Tuple[User, Dict]] = []
+        
+        # 1단계: 평가 후 묶음 전체를 알림 엔진의 열 배열에 배치
+        for user in users:
+            tick_user = tick_users[user.id]
+            try:
+                logger.info(f"사용자 {user.id} (chat_id: {user.telegram_chat_id}) 포트폴리오 확인 중...")
+                price_data = price_data_by_user.get(user.id)
+                if price_data is not None and not self._needs_revaluation(
+                    user.id, tick_user.holdings, quote_service.changed_symbols.get(user.id), fx_changed
+                ):
+                    logger.info(f"사용자 {user.id}: 갱신된 시세가 없어 평가를 건너뜁니다.")
+                    continue
+                
+                summary = None
+                if price_data is not None:
+                    summary = portfolio_service.build_portfolio_summary(
+                        user, tick_user.holdings, price_data, total_value=valuation_index.total(user.id)
+                    )
+                
+                if not summary:
+                    logger.warning(f"사용자 {user.id}의 시세를 조회하지 못했습니다.")
+                    continue
+                
+                logger.info(f"사용자 {user.id} 포트폴리오 총액: {summary['total_value']} {user.base_currency}")
+                symbols = [item["symbol"] for item in summary["items"]]
+                provider, _, currency = quote_group_key(user)
+                alert_engine.add(
+                    user.id, user, tick_user.alert_settings, summary, tick_user.baseline,
+                    window_extremes=price_windows.extremes_for(tick_user.alert_settings, symbols, currency),
+                    return_observations=return_stats.observations_for(
+                        tick_user.alert_settings, symbols, currency, self._tick_store.timestamp, provider
+                    )
+                )
+                valued.append((user, summary))
+            
+            except Exception as e:
+                logger.error(f"사용자 {user.id} 포트폴리오 확인 실패: {e}")
+        
+        # 2단계: 이미 계산된 평가를 마지막 알림 시점의 상태와 한 번에 비교 (추가 시세 조회 없음)
+        try:
+            alerts_by_user = alert_engine.evaluate()
+        except Exception as e:
+            logger.error(f"알림 평가 실패: {e}")
+            alerts_by_user = {}
+        
+        # 스냅샷이 참조할 보유 내역 버전 (바뀐 보유 내역만 새로 기록)
+        version_ids = holdings_versions.resolve(db, {
+            user.id: aggregate_portfolio_items(tick_users[user.id].holdings)[0] for user, _ in valued
+        })
+        
+        # 3단계: 가격 도달 알림과 알림을 아웃박스에 기록 (스냅샷과 같은 트랜잭션, 전송은 dispatch_outbox가 수행)
+        for user, _ in valued:
+            alerts = alerts_by_user.get(user.id, [])
+            logger.info(f"사용자 {user.id} 알림 확인 결과: {len(alerts)}개 알림 발생")
+            baseline = tick_users[user.id].baseline
+            outgoing.extend(
+                OutboxMessage(
+                    user.id, user.telegram_chat_id, "alert", alert["message"],
+                    alert_key(user.id, baseline.id if baseline else None, alert)
+                )
+                for alert in alerts
+            )
+        queued = NotificationOutboxService(db).enqueue(outgoing)
+        if queued:
+            logger.info(f"알림 {queued}건을 아웃박스에 기록했습니다.")
+        
+        # 4단계: 스냅샷 저장 (알림을 기록했거나 기준이 없으면 다음 알림의 기준으로 사용)
+        for user, summary in valued:
+            try:
+                alert_service.save_snapshot(
+                    user.id,
+                    summary["total_value"],
+                    tick=tick_refs.get(quote_group_key(user)),
+                    holdings_version_id=version_ids.get(user.id),
+                    alert_baseline=tick_users[user.id].baseline is None or bool(alerts_by_user.get(user.id)),
+                    commit=False
+                )
+            except Exception as e:
+                logger.error(f"사용자 {user.id} 스냅샷 저장 실패: {e}")
+        
+        db.commit()
+    
+    async def compact_history(self):
+        """스냅샷/시세 이력 압축 (묶음 단위 트랜잭션, 이벤트 루프를 막지 않도록 별도 스레드에서 실행)"""
+        if self.coordinator is not None and not self.coordinator.is_coordinator:
+            # 워커 모드에서는 코디네이터 워커만 압축
+            return
+        try:
+            await asyncio.to_thread(snapshot_compactor.run)
+        except Exception as e:
+            logger.error(f"스냅샷 이력 압축 실패: {e}")
+        
+        if settings.price_history_enabled:
+            try:
+                await asyncio.to_thread(price_history.compact_all)
+            except Exception as e:
+                logger.error(f"시세 이력 압축 실패: {e}")
+        
+        db = SessionLocal()
+        try:
+            purged = await asyncio.to_thread(NotificationOutboxService(db).purge)
+            if purged:
+                logger.info(f"보존 기간이 지난 전송 완료 알림 {purged}건 삭제")
+        except Exception as e:
+            logger.error(f"알림 아웃박스 정리 실패: {e}")
+        finally:
+            db.close()
+    
+    async def worker_heartbeat(self):
+        """워커 하트비트 기록 (코디네이터이면 샤드 재배정, API 서버가 모아 볼 수 있도록 전송 대기열 통계도 기록)"""
+        db = SessionLocal()
+        try:
+            await asyncio.to_thread(self.coordinator.heartbeat, db, None, self.delivery.stats_report())
+        except Exception as e:
+            logger.error(f"워커 하트비트 실패: {e}")
+        finally:
+            db.close()
+    
+    async def refresh_fx_rates(self):
+        """환율 테이블 갱신 (시세 조회와 별도 주기)"""
+        try:
+            await fx_rates.refresh_async()
+        except Exception as e:
+            logger.error(f"환율 갱신 실패 (기존 환율 사용): {e}")
+    
     async def send_hourly_summary(self):
         """3시간마다 포트폴리오 요약 전송"""
         logger.info("=" * 60)
@@ -89,44 +505,22 @@ class MonitoringScheduler:
         db = SessionLocal()
         
         try:
-            users = db.query(User).all()
-            logger.info(f"3시간 요약 전송 시작: 등록된 사용자 수 = {len(users)}")
+            shards = None
+            if self.coordinator is not None:
+                shards = await asyncio.to_thread(self.coordinator.owned_shards, db)
+                if not shards:
+                    logger.info("담당 샤드가 없어 3시간 요약을 건너뜁니다.")
+                    return
+            user_count = 0
+            chunks = TickLoader(db, with_baselines=False, shards=shards).iter_chunks()
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                user_count += len(chunk)
+                await self._queue_chunk_summary(db, chunk)
             
-            if not users:
-                logger.warning("등록된 사용자가 없습니다.")
+            if not user_count:
+                logger.warning("포트폴리오가 등록된 사용자가 없습니다.")
                 return
-            
-            for user in users:
-                try:
-                    logger.info(f"사용자 {user.id} (chat_id: {user.telegram_chat_id}) 요약 생성 중...")
-                    portfolio_service = PortfolioService(db)
-                    summary = portfolio_service.get_portfolio_summary(user.id)
-                    
-                    if not summary:
-                        logger.warning(f"사용자 {user.id}의 포트폴리오가 설정되지 않아 요약을 건너뜁니다.")
-                        continue
-                    
-                    logger.info(f"사용자 {user.id} 요약 생성 완료: 총액 {summary['total_value']} {user.base_currency}")
-                    
-                    # 포트폴리오 요약 메시지 생성
-                    message = format_portfolio_message(
-                        total_value=summary['total_value'],
-                        base_currency=user.base_currency,
-                        items=summary['items'],
-                        price_data=summary['price_data']
-                    )
-                    
-                    try:
-                        await self.bot.send_message(
-                            chat_id=user.telegram_chat_id,
-                            text=message
-                        )
-                        logger.info(f"3시간 요약 전송 완료: user_id={user.id}")
-                    except Exception as e:
-                        logger.error(f"3시간 요약 전송 실패: user_id={user.id}, error={e}", exc_info=True)
-                
-                except Exception as e:
-                    logger.error(f"사용자 {user.id} 요약 생성 실패: {e}", exc_info=True)
+            logger.info(f"3시간 요약 기록 완료: 사용자 수 = {user_count}")
         
         except Exception as e:
             logger.error(f"3시간 요약 스케줄러 실행 오류: {e}", exc_info=True)
@@ -135,8 +529,117 @@ class MonitoringScheduler:
             logger.info("3시간 요약 전송 함수 종료")
             logger.info("=" * 60)
     
+    async def _queue_chunk_summary(self, db, chunk: List[TickUser]):
+        """사용자 묶음의 시세를 한 번에 조회하고 요약 메시지를 아웃박스에 기록 (전송은 dispatch_outbox가 수행)"""
+        users = {tick_user.user.id: tick_user.user for tick_user in chunk}
+        holdings = {tick_user.user.id: tick_user.holdings for tick_user in chunk}
+        price_data_by_user = await QuoteService().fetch_for_users_async(list(users.values()), holdings)
+        portfolio_service = PortfolioService(db)
+        now = datetime.now(timezone.utc)
+        messages: List[OutboxMessage] = []
+        
+        for user in users.values():
+            try:
+                logger.info(f"사용자 {user.id} (chat_id: {user.telegram_chat_id}) 요약 생성 중...")
+                price_data = price_data_by_user.get(user.id)
+                summary = None
+                if price_data is not None:
+                    summary = portfolio_service.build_portfolio_summary(
+                        user, holdings[user.id], price_data
+                    )
+                
+                if not summary:
+                    logger.warning(f"사용자 {user.id}의 포트폴리오가 설정되지 않아 요약을 건너뜁니다.")
+                    continue
+                
+                logger.info(f"사용자 {user.id} 요약 생성 완료: 총액 {summary['total_value']} {user.base_currency}")
+                
+                # 포트폴리오 요약 메시지 생성
+                message = format_portfolio_message(
+                    total_value=summary['total_value'],
+                    base_currency=user.base_currency,
+                    items=summary['items'],
+                    price_data=summary['price_data']
+                )
+                messages.append(OutboxMessage(user.id, user.telegram_chat_id, "summary", message, summary_key(user.id, now)))
+            
+            except Exception as e:
+                logger.error(f"사용자 {user.id} 요약 생성 실패: {e}", exc_info=True)
+        
+        def record():
+            try:
+                count = NotificationOutboxService(db).enqueue(messages, now)
+                db.commit()
+                return count
+            except Exception:
+                db.rollback()
+                raise
+        
+        count = await asyncio.to_thread(record)
+        logger.info(f"3시간 요약 {count}건을 아웃박스에 기록했습니다.")
+    
+    async def dispatch_outbox(self):
+        """
+        아웃박스의 전송 대기 알림을 선점하여 사용자별로 합쳐 전송 (대기 알림이 없을 때까지 묶음 단위로 반복)
+        
+        사용자마다 TICK_USER_TIMEOUT_SECONDS 제한 시간을 두고, 실패하거나 시간 초과된 알림은
+        지수 백오프 후 다시 전송합니다.
+        """
+        db = SessionLocal()
+        try:
+            outbox = NotificationOutboxService(db)
+            while True:
+                rows = await asyncio.to_thread(outbox.claim, self.outbox_owner)
+                if not rows:
+                    break
+                by_user: Dict[int, List] = {}
+                for row in rows:
+                    by_user.setdefault(row.user_id, []).append(row)
+                delivered: Set[int] = set()
+                
+                async def deliver(user_id: int):
+                    batch = by_user[user_id]
+                    if await self.delivery.send(batch[-1].chat_id, [row.message for row in batch]):
+                        delivered.add(user_id)
+                        logger.info(f"알림 전송 완료: user_id={user_id}, 알림 {len(batch)}개")
+                    else:
+                        logger.error(f"알림 전송 실패: user_id={user_id}, 알림 {len(batch)}개 (재시도 예정)")
+                
+                await self._for_each_user(by_user, deliver, "알림 전송")
+                sent = [row for user_id in delivered for row in by_user[user_id]]
+                failed = [row for user_id, batch in by_user.items() if user_id not in delivered for row in batch]
+                await asyncio.to_thread(outbox.complete, sent, failed)
+                if len(rows) < settings.outbox_batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"알림 아웃박스 전송 오류: {e}")
+        finally:
+            db.close()
+    
     def start(self):
         """스케줄러 시작"""
+        # 환율 변환 모드: 환율은 시세보다 느린 주기로 갱신 (시작 시 즉시 1회)
+        if settings.fx_conversion_enabled:
+            self.scheduler.add_job(
+                self.refresh_fx_rates,
+                trigger=IntervalTrigger(minutes=settings.fx_refresh_minutes),
+                id="fx_refresh",
+                next_run_time=datetime.now(),
+                replace_existing=True
+            )
+            logger.info(f"환율 갱신 스케줄러 시작: {settings.fx_refresh_minutes}분 간격 (기준 통화: {settings.quote_pivot_currency})")
+        
+        # 워커 모드: 하트비트와 샤드 재배정 (시작 시 즉시 1회)
+        if self.coordinator is not None:
+            self.scheduler.add_job(
+                self.worker_heartbeat,
+                trigger=IntervalTrigger(seconds=settings.worker_heartbeat_seconds),
+                id="worker_heartbeat",
+                next_run_time=datetime.now(),
+                replace_existing=True
+            )
+            logger.info(f"워커 하트비트 스케줄러 시작: {settings.worker_heartbeat_seconds}초 간격 (worker={self.coordinator.worker_id})")
+        
         # 포트폴리오 모니터링 (5분마다)
         interval_minutes = settings.scheduler_interval_minutes
         self.scheduler.add_job(
@@ -147,6 +650,17 @@ class MonitoringScheduler:
         )
         logger.info(f"포트폴리오 모니터링 스케줄러 시작: {interval_minutes}분 간격")
         
+        # 알림 아웃박스 전송 (틱/요약이 기록한 알림을 짧은 주기로 전송, 실패한 알림은 백오프 후 재시도)
+        self.scheduler.add_job(
+            self.dispatch_outbox,
+            trigger=IntervalTrigger(seconds=settings.outbox_poll_seconds),
+            id="outbox_dispatch",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        logger.info(f"알림 아웃박스 전송 스케줄러 시작: {settings.outbox_poll_seconds}초 간격")
+        
         # 3시간마다 요약 전송
         self.scheduler.add_job(
             self.send_hourly_summary,
@@ -156,5 +670,14 @@ class MonitoringScheduler:
         )
         logger.info("3시간 요약 스케줄러 시작: 3시간 간격")
         
+        # 스냅샷 이력 압축 (1시간/1일 집계, 보존 기간 정리)
+        self.scheduler.add_job(
+            self.compact_history,
+            trigger=IntervalTrigger(minutes=settings.compaction_interval_minutes),
+            id="history_compaction",
+            replace_existing=True
+        )
+        logger.info(f"스냅샷 이력 압축 스케줄러 시작: {settings.compaction_interval_minutes}분 간격 (원본 보존 {settings.snapshot_retention_days}일)")
+        
         self.scheduler.start()
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
@@ -52,6 +52,9 @@ class AlertSettingsCreate(BaseModel):
     portfolio_percentage_threshold: Optional[float] = 10.0
     portfolio_absolute_threshold: Optional[float] = None
     min_notification_interval_minutes: int = 15
+    window_percentage_threshold: Optional[float] = None  # 최근 window_minutes분 최저/최고가 대비 변동률 (%)
+    window_minutes: Optional[int] = None
+    anomaly_zscore_threshold: Optional[float] = None  # 틱 수익률이 평소 변동성의 몇 표준편차 이상이면 알림
 
 
 class AlertSettingsResponse(BaseModel):
@@ -61,6 +64,29 @@ class AlertSettingsResponse(BaseModel):
     portfolio_percentage_threshold: float
     portfolio_absolute_threshold: Optional[float]
     min_notification_interval_minutes: int
+    window_percentage_threshold: Optional[float] = None
+    window_minutes: Optional[int] = None
+    anomaly_zscore_threshold: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class PriceTriggerCreate(BaseModel):
+    symbol: str
+    target_price: float
+    currency: Optional[str] = None  # 생략하면 사용자 기준 통화
+
+
+class PriceTriggerResponse(BaseModel):
+    id: int
+    symbol: str
+    currency: str
+    target_price: float
+    active: bool
+    triggered_price: Optional[float]
+    triggered_at: Optional[datetime]
+    created_at: datetime
     
     class Config:
         from_attributes = True
@@ -82,3 +108,11 @@ class PortfolioSummaryResponse(BaseModel):
     items: list[PortfolioItemResponse]
     price_data: Dict[str, Any]
 
+
+class PortfolioHistoryResponse(BaseModel):
+    resolution: str
+    base_currency: str
+    source_points: int
+    timestamps: List[datetime]
+    total_values: List[float]
+    symbol_values: Dict[str, List[Optional[float]]]
@@ -1,14 +1,288 @@
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
-from app.models import User, PortfolioItem, AlertSettings, PriceSnapshot
-from app.cmc_client import CMCClient
-from app.coingecko_client import CoinGeckoClient
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+from app.models import User, PortfolioItem, AlertSettings, PriceSnapshot, PriceTrigger
+from app.cmc_client import CMCClient, AsyncCMCClient
+from app.coingecko_client import CoinGeckoClient, AsyncCoinGeckoClient
+from app.config import settings
+from app.fx import fx_rates, fetch_currency_for
+from app.provider_router import provider_router
+from app.quote import Quote
+from app.freshness import freshness_tracker
+from app.valuation_index import valuation_index
+from app.price_triggers import price_trigger_index, TriggerEntry, PriceCrossing
+from app.price_window import price_windows
+from app.volatility import return_stats, ReturnObservation
+from app.tick_loader import TickLoader
+from app.sharding import shard_clause
+from app.tick_store import TickRef
 from app.utils import aggregate_portfolio_items, calculate_percentage_change
-from datetime import datetime, timedelta
+from app.alert_engine import (
+    is_alert_due,
+    portfolio_percentage_alert,
+    portfolio_absolute_alert,
+    coin_percentage_alert,
+    coin_absolute_alert,
+    coin_window_alert,
+    coin_anomaly_alert,
+    window_change
+)
+from datetime import datetime
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# (api_provider, api_key, currency) - 같은 키를 가진 사용자는 한 번의 요청으로 시세 조회
+QuoteGroupKey = Tuple[str, Optional[str], str]
+
+
+def normalize_provider(api_provider: Optional[str]) -> str:
+    """API 제공자 이름 정규화 ("cmc" 또는 "coingecko")"""
+    if api_provider and api_provider.lower() == "coingecko":
+        return "coingecko"
+    return "cmc"
+
+
+def quote_group_key(user: User) -> QuoteGroupKey:
+    """사용자의 시세 조회 그룹 키 생성"""
+    provider = normalize_provider(user.api_provider)
+    if provider == "coingecko":
+        api_key = user.coingecko_api_key
+        if not api_key or not api_key.strip() or api_key.strip().lower() == "none":
+            api_key = None
+    else:
+        api_key = user.cmc_api_key or settings.cmc_api_key
+    return provider, api_key, user.base_currency
+
+
+def fetch_group_key(user: User) -> QuoteGroupKey:
+    """실제 시세 조회 그룹 키 (환율 변환 모드에서는 통화 대신 기준 통화 사용)"""
+    provider, api_key, currency = quote_group_key(user)
+    return provider, api_key, fetch_currency_for(currency)
+
+
+def create_price_client(api_provider: str, api_key: Optional[str] = None):
+    """API 제공자에 맞는 시세 클라이언트 생성"""
+    if normalize_provider(api_provider) == "coingecko":
+        return CoinGeckoClient(api_key)
+    return CMCClient(api_key)
+
+
+# (api_provider, api_key)별 비동기 클라이언트 (요청마다 새로 만들지 않고 모든 사용자가 공유)
+_async_clients: Dict[Tuple[str, Optional[str]], object] = {}
+
+
+def get_async_price_client(api_provider: str, api_key: Optional[str] = None):
+    """API 제공자에 맞는 공유 비동기 시세 클라이언트 반환"""
+    provider = normalize_provider(api_provider)
+    client = _async_clients.get((provider, api_key))
+    if client is None:
+        if provider == "coingecko":
+            client = AsyncCoinGeckoClient(api_key)
+        else:
+            client = AsyncCMCClient(api_key)
+        _async_clients[(provider, api_key)] = client
+    return client
+
+
+class QuoteService:
+    """시세 조회 서비스 (여러 사용자의 심볼을 묶어 일괄 조회)"""
+    
+    def __init__(self):
+        # fetch_for_users_async(freshness_tick=...) 호출 시 사용자별 갱신된 심볼
+        self.changed_symbols: Dict[int, Set[str]] = {}
+        # fetch_for_users_async(extra_symbols=...) 호출 시 사용자 기준 통화와 다른 통화의 트리거 시세 {(제공자, 통화): {심볼: 가격}}
+        self.trigger_prices: Dict[Tuple[str, str], Dict[str, float]] = {}
+    
+    def fetch_price_data(self, client, symbols: List[str], convert: str) -> Dict[str, Quote]:
+        """
+        심볼 리스트의 시세 조회
+        
+        Returns:
+            {symbol: Quote} 딕셔너리
+        """
+        return client.get_quotes(symbols, convert)
+    
+    async def fetch_price_data_async(self, client, symbols: List[str], convert: str) -> Dict[str, Quote]:
+        """fetch_price_data의 비동기 버전 (AsyncCMCClient/AsyncCoinGeckoClient 사용)"""
+        return await client.get_quotes(symbols, convert)
+    
+    async def _fetch_from_provider(
+        self,
+        provider: str,
+        api_key: Optional[str],
+        symbols: List[str],
+        convert: str
+    ) -> Dict[str, Quote]:
+        return await self.fetch_price_data_async(get_async_price_client(provider, api_key), symbols, convert)
+    
+    async def fetch_routed(self, key: QuoteGroupKey, symbols: List[str]) -> Dict[str, Quote]:
+        """조회 그룹의 시세를 제공자 라우터로 조회 (응답 지연/실패 시 다른 제공자로 헤지)"""
+        provider, api_key, currency = key
+        return await provider_router.fetch_price_data(self._fetch_from_provider, provider, api_key, symbols, currency)
+    
+    def _group_users(
+        self,
+        users: Iterable[User],
+        holdings: Dict[int, List[PortfolioItem]],
+        extra_symbols: Optional[Dict[int, Dict[str, Iterable[str]]]] = None
+    ) -> Tuple[Dict[QuoteGroupKey, set], Dict[int, Tuple[QuoteGroupKey, str]], Dict[str, Dict[QuoteGroupKey, set]]]:
+        """
+        사용자를 시세 조회 그룹으로 묶고 그룹별 심볼 합집합 계산
+        
+        Args:
+            extra_symbols: {user_id: {통화: 보유하지 않았지만 함께 조회할 심볼}} (가격 트리거 등)
+                사용자 기준 통화와 다른 통화의 심볼은 같은 API 키로 그 통화의 조회 그룹에 넣습니다.
+        
+        Returns:
+            (group_symbols, user_targets, extra_targets) 튜플
+            - group_symbols: {조회 그룹 키: 심볼 집합}
+            - user_targets: {user_id: (조회 그룹 키, 사용자 기준 통화)}
+            - extra_targets: {기준 통화와 다른 통화: {조회 그룹 키: 심볼 집합}}
+        """
+        group_symbols: Dict[QuoteGroupKey, set] = defaultdict(set)
+        user_targets: Dict[int, Tuple[QuoteGroupKey, str]] = {}
+        extra_targets: Dict[str, Dict[QuoteGroupKey, set]] = defaultdict(lambda: defaultdict(set))
+        
+        for user in users:
+            items = holdings.get(user.id)
+            if not items:
+                continue
+            key = fetch_group_key(user)
+            user_targets[user.id] = (key, user.base_currency)
+            group_symbols[key].update(item.symbol for item in items)
+            for currency, symbols in (extra_symbols or {}).get(user.id, {}).items():
+                if currency.upper() == user.base_currency.upper():
+                    group_symbols[key].update(symbols)
+                    continue
+                extra_key = (key[0], key[1], fetch_currency_for(currency))
+                group_symbols[extra_key].update(symbols)
+                extra_targets[currency][extra_key].update(symbols)
+        
+        return group_symbols, user_targets, extra_targets
+    
+    def _extra_prices(
+        self,
+        group_prices: Dict[QuoteGroupKey, Dict[str, Quote]],
+        extra_targets: Dict[str, Dict[QuoteGroupKey, set]]
+    ) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """기준 통화와 다른 통화로 요청한 심볼의 시세를 요청 통화로 변환 ({(제공자, 통화): {심볼: 가격}})"""
+        result: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for currency, groups in extra_targets.items():
+            for key, symbols in groups.items():
+                quotes = {symbol: quote for symbol, quote in group_prices.get(key, {}).items() if symbol in symbols}
+                if not quotes:
+                    continue
+                try:
+                    converted = fx_rates.convert_price_data(quotes, key[2], currency)
+                except Exception as e:
+                    logger.error(f"통화 변환 실패: {key[2]} → {currency}, error={e}")
+                    continue
+                result.setdefault((key[0], currency), {}).update((symbol, quote.price) for symbol, quote in converted.items())
+        return result
+    
+    def _distribute(
+        self,
+        group_prices: Dict[QuoteGroupKey, Dict[str, Quote]],
+        user_targets: Dict[int, Tuple[QuoteGroupKey, str]]
+    ) -> Dict[int, Dict[str, Quote]]:
+        """그룹별 조회 결과를 사용자 기준 통화로 변환하여 사용자별로 분배 (같은 통화는 결과 공유)"""
+        converted: Dict[Tuple[QuoteGroupKey, str], Dict[str, Quote]] = {}
+        price_data_by_user = {}
+        
+        for user_id, (key, currency) in user_targets.items():
+            if key not in group_prices:
+                continue
+            if (key, currency) not in converted:
+                try:
+                    converted[(key, currency)] = fx_rates.convert_price_data(group_prices[key], key[2], currency)
+                except Exception as e:
+                    logger.error(f"통화 변환 실패: {key[2]} → {currency}, error={e}")
+                    continue
+            price_data_by_user[user_id] = converted[(key, currency)]
+        
+        return price_data_by_user
+    
+    def fetch_for_users(
+        self,
+        users: Iterable[User],
+        holdings: Dict[int, List[PortfolioItem]]
+    ) -> Dict[int, Dict[str, Quote]]:
+        """
+        여러 사용자의 가격 데이터를 그룹별 1회 요청으로 조회
+        
+        (api_provider, api_key, 조회 통화)가 같은 사용자들의 심볼 합집합을
+        한 번에 조회한 뒤, 그 결과를 각 사용자에게 공유합니다.
+        환율 변환 모드에서는 기준 통화로 한 번 조회하고 사용자 통화로 변환합니다.
+        
+        Args:
+            users: 사용자 리스트
+            holdings: {user_id: [PortfolioItem]} 매핑
+        
+        Returns:
+            {user_id: {symbol: price_info}} 매핑 (조회 실패한 그룹의 사용자는 제외)
+        """
+        group_symbols, user_targets, _ = self._group_users(users, holdings)
+        
+        group_prices: Dict[QuoteGroupKey, Dict[str, Quote]] = {}
+        for key, symbols in group_symbols.items():
+            provider, api_key, currency = key
+            client = create_price_client(provider, api_key)
+            try:
+                group_prices[key] = self.fetch_price_data(client, sorted(symbols), currency)
+                logger.info(f"시세 일괄 조회 완료: provider={provider}, currency={currency}, 심볼 {len(symbols)}개")
+            except Exception as e:
+                logger.error(f"시세 일괄 조회 실패: provider={provider}, currency={currency}, error={e}")
+        
+        return self._distribute(group_prices, user_targets)
+    
+    async def fetch_for_users_async(
+        self,
+        users: Iterable[User],
+        holdings: Dict[int, List[PortfolioItem]],
+        freshness_tick: Optional[int] = None,
+        extra_symbols: Optional[Dict[int, Dict[str, Iterable[str]]]] = None
+    ) -> Dict[int, Dict[str, Quote]]:
+        """
+        fetch_for_users의 비동기 버전 (그룹별 요청을 동시에 전송, 제공자 장애 조치 적용)
+        
+        freshness_tick(모니터링 틱 번호)을 주면 조회 결과의 last_updated를 기록하고,
+        이전 틱 이후 갱신된 심볼을 self.changed_symbols에 사용자별로 저장합니다.
+        extra_symbols의 심볼은 보유하지 않아도 함께 조회하고 (가격 트리거용),
+        사용자 기준 통화와 다른 통화로 요청한 심볼의 시세는 self.trigger_prices에 저장합니다.
+        """
+        group_symbols, user_targets, extra_targets = self._group_users(users, holdings, extra_symbols)
+        keys = list(group_symbols.keys())
+        
+        results = await asyncio.gather(
+            *(self.fetch_routed(key, sorted(group_symbols[key])) for key in keys),
+            return_exceptions=True
+        )
+        
+        group_prices: Dict[QuoteGroupKey, Dict[str, Quote]] = {}
+        for key, result in zip(keys, results):
+            provider, api_key, currency = key
+            if isinstance(result, Exception):
+                logger.error(f"시세 일괄 조회 실패: provider={provider}, currency={currency}, error={result}")
+                continue
+            group_prices[key] = result
+            logger.info(f"시세 일괄 조회 완료: provider={provider}, currency={currency}, 심볼 {len(group_symbols[key])}개")
+        
+        if freshness_tick is not None:
+            group_changes = {
+                key: freshness_tracker.observe(key[0], key[2], quotes, tick=freshness_tick)
+                for key, quotes in group_prices.items()
+            }
+            self.changed_symbols = {
+                user_id: group_changes[key]
+                for user_id, (key, currency) in user_targets.items()
+                if key in group_changes
+            }
+        
+        self.trigger_prices = self._extra_prices(group_prices, extra_targets)
+        return self._distribute(group_prices, user_targets)
+
 
 class PortfolioService:
     """포트폴리오 관련 서비스"""
@@ -16,6 +290,19 @@ class PortfolioService:
     def __init__(self, db: Session):
         self.db = db
     
+    def get_holdings(self, user_ids: List[int]) -> Dict[int, List[PortfolioItem]]:
+        """여러 사용자의 포트폴리오 항목을 한 번에 조회"""
+        holdings: Dict[int, List[PortfolioItem]] = defaultdict(list)
+        if not user_ids:
+            return holdings
+        
+        portfolio_items = self.db.query(PortfolioItem).filter(
+            PortfolioItem.user_id.in_(user_ids)
+        ).all()
+        for item in portfolio_items:
+            holdings[item.user_id].append(item)
+        return holdings
+    
     def get_portfolio_summary(self, user_id: int) -> Optional[Dict]:
         """포트폴리오 요약 조회"""
         user = self.db.query(User).filter(User.id == user_id).first()
@@ -29,51 +316,94 @@ class PortfolioService:
         if not portfolio_items:
             return None
         
-        # 중복 제거: 같은 심볼은 수량 합산
-        aggregated_items, item_ids = aggregate_portfolio_items(portfolio_items)
-        symbols = list(aggregated_items.keys())
+        symbols = list(aggregate_portfolio_items(portfolio_items)[0].keys())
+        provider, api_key, currency = fetch_group_key(user)
+        client = create_price_client(provider, api_key)
+        logger.info(f"{provider} API 사용: 사용자 {user.id}")
         
-        # API 제공자에 따라 클라이언트 선택
-        api_provider = user.api_provider or "cmc"
+        try:
+            price_data = QuoteService().fetch_price_data(client, symbols, currency)
+            price_data = fx_rates.convert_price_data(price_data, currency, user.base_currency)
+        except Exception as e:
+            logger.error(f"포트폴리오 요약 조회 실패: {e}")
+            return None
         
-        if api_provider.lower() == "coingecko":
-            client = CoinGeckoClient(user.coingecko_api_key)
-            logger.info(f"CoinGecko API 사용: 사용자 {user.id}")
-        else:
-            client = CMCClient(user.cmc_api_key)
-            logger.info(f"CoinMarketCap API 사용: 사용자 {user.id}")
+        return self.build_portfolio_summary(user, portfolio_items, price_data)
+    
+    async def get_portfolio_summary_async(self, user_id: int) -> Optional[Dict]:
+        """포트폴리오 요약 조회 (비동기 클라이언트 사용, 이벤트 루프를 막지 않음)"""
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        
+        portfolio_items = self.db.query(PortfolioItem).filter(
+            PortfolioItem.user_id == user_id
+        ).all()
+        
+        if not portfolio_items:
+            return None
+        
+        symbols = list(aggregate_portfolio_items(portfolio_items)[0].keys())
+        key = fetch_group_key(user)
+        currency = key[2]
         
         try:
-            response = client.get_latest_quotes(symbols, user.base_currency)
-            price_data = {}
-            
-            for symbol in symbols:
-                price_info = client.parse_quote_data(response, symbol, user.base_currency)
-                if price_info:
-                    price_data[symbol] = price_info
-            
-            # 총 평가액 계산 (중복 제거된 수량 사용)
+            price_data = await QuoteService().fetch_routed(key, symbols)
+            price_data = fx_rates.convert_price_data(price_data, currency, user.base_currency)
+        except Exception as e:
+            logger.error(f"포트폴리오 요약 조회 실패: {e}")
+            return None
+        
+        return self.build_portfolio_summary(user, portfolio_items, price_data)
+    
+    def build_portfolio_summary(
+        self,
+        user: User,
+        portfolio_items: List[PortfolioItem],
+        price_data: Dict[str, Quote],
+        total_value: Optional[float] = None
+    ) -> Optional[Dict]:
+        """
+        이미 조회된 가격 데이터로 포트폴리오 요약 생성
+        
+        Args:
+            user: 사용자
+            portfolio_items: 사용자의 포트폴리오 항목
+            price_data: {symbol: Quote} (다른 사용자와 공유될 수 있음)
+            total_value: 이미 계산된 총 평가액 (평가 인덱스 누계, 없으면 직접 계산)
+        """
+        if not portfolio_items:
+            return None
+        
+        # 중복 제거: 같은 심볼은 수량 합산
+        aggregated_items, item_ids = aggregate_portfolio_items(portfolio_items)
+        symbols = list(aggregated_items.keys())
+        
+        # 총 평가액 계산 (중복 제거된 수량 사용)
+        if total_value is None:
             total_value = sum(
-                aggregated_items[symbol] * price_data.get(symbol, {}).get("price", 0)
+                aggregated_items[symbol] * price_data[symbol].price
                 for symbol in symbols
+                if symbol in price_data
             )
-            
-            return {
-                "total_value": total_value,
-                "base_currency": user.base_currency,
-                "items": [
-                    {
-                        "id": item_ids[symbol],
-                        "symbol": symbol,
-                        "quantity": aggregated_items[symbol]
-                    }
-                    for symbol in symbols
-                ],
-                "price_data": price_data
+        
+        return {
+            "total_value": total_value,
+            "base_currency": user.base_currency,
+            "items": [
+                {
+                    "id": item_ids[symbol],
+                    "symbol": symbol,
+                    "quantity": aggregated_items[symbol]
+                }
+                for symbol in symbols
+            ],
+            "price_data": {
+                symbol: price_data[symbol]
+                for symbol in symbols
+                if symbol in price_data
             }
-        except Exception as e:
-            logger.error(f"포트폴리오 요약 조회 실패: {e}")
-            return None
+        }
     
     def add_portfolio_item(self, user_id: int, symbol: str, quantity: float) -> PortfolioItem:
         """포트폴리오 항목 추가"""
@@ -85,7 +415,107 @@ class PortfolioService:
         self.db.add(portfolio_item)
         self.db.commit()
         self.db.refresh(portfolio_item)
+        self.sync_valuation(user_id)
         return portfolio_item
+    
+    def sync_valuation(self, user_id: int):
+        """포트폴리오/시세 그룹이 바뀐 사용자의 평가 인덱스 갱신 (포트폴리오 변경 커밋 후 호출)"""
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            valuation_index.remove_user(user_id)
+            return
+        portfolio_items = self.db.query(PortfolioItem).filter(
+            PortfolioItem.user_id == user_id
+        ).all()
+        valuation_index.set_holdings(user_id, quote_group_key(user), aggregate_portfolio_items(portfolio_items)[0])
+
+
+def rebuild_valuation_index(db: Session, shards: Optional[Collection[int]] = None):
+    """DB의 모든 포트폴리오로 평가 인덱스 재구성 (서버 시작 시, 워커 모드에서는 소유 샤드만)"""
+    valuation_index.load(
+        (tick_user.user.id, quote_group_key(tick_user.user), aggregate_portfolio_items(tick_user.holdings)[0])
+        for chunk in TickLoader(db, with_baselines=False, shards=shards).iter_chunks()
+        for tick_user in chunk
+    )
+
+
+class PriceTriggerService:
+    """가격 도달 알림 트리거 서비스"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_trigger(self, user: User, symbol: str, target_price: float, currency: Optional[str] = None) -> PriceTrigger:
+        """
+        트리거 등록 (통화를 생략하면 사용자 기준 통화)
+        
+        Raises:
+            Exception: 목표 가격이 0 이하인 경우
+        """
+        if target_price <= 0:
+            raise Exception("목표 가격은 0보다 커야 합니다.")
+        trigger = PriceTrigger(
+            user_id=user.id,
+            symbol=symbol.upper(),
+            currency=(currency or user.base_currency).upper(),
+            target_price=target_price,
+            active=True
+        )
+        self.db.add(trigger)
+        self.db.commit()
+        self.db.refresh(trigger)
+        price_trigger_index.add(trigger_entry(trigger))
+        return trigger
+    
+    def list_triggers(self, user_id: int, active_only: bool = True) -> List[PriceTrigger]:
+        query = self.db.query(PriceTrigger).filter(PriceTrigger.user_id == user_id)
+        if active_only:
+            query = query.filter(PriceTrigger.active.is_(True))
+        return query.order_by(PriceTrigger.symbol, PriceTrigger.target_price).all()
+    
+    def delete_trigger(self, user_id: int, trigger_id: int) -> bool:
+        """트리거 삭제 (다른 사용자의 트리거는 삭제하지 않음)"""
+        trigger = self.db.query(PriceTrigger).filter(
+            PriceTrigger.id == trigger_id,
+            PriceTrigger.user_id == user_id
+        ).first()
+        if not trigger:
+            return False
+        self.db.delete(trigger)
+        self.db.commit()
+        price_trigger_index.remove(trigger_id)
+        return True
+    
+    def mark_triggered(self, crossings: List[PriceCrossing], commit: bool = True):
+        """통과한 트리거 비활성화 (통과 가격/시각 기록)"""
+        now = datetime.now()
+        for crossing in crossings:
+            self.db.query(PriceTrigger).filter(PriceTrigger.id == crossing.trigger.trigger_id).update({
+                PriceTrigger.active: False,
+                PriceTrigger.triggered_price: crossing.price,
+                PriceTrigger.triggered_at: now
+            }, synchronize_session=False)
+        if commit:
+            self.db.commit()
+
+
+def trigger_entry(trigger: PriceTrigger) -> TriggerEntry:
+    return TriggerEntry(
+        trigger_id=trigger.id,
+        user_id=trigger.user_id,
+        symbol=trigger.symbol,
+        currency=trigger.currency,
+        target_price=trigger.target_price
+    )
+
+
+def rebuild_trigger_index(db: Session, shards: Optional[Collection[int]] = None):
+    """DB의 활성 트리거로 가격 트리거 인덱스 재구성 (서버 시작 시, 워커 모드에서는 틱마다 소유 샤드만)"""
+    triggers = db.query(PriceTrigger).filter(PriceTrigger.active.is_(True))
+    if shards is not None:
+        triggers = triggers.filter(shard_clause(PriceTrigger.user_id, shards))
+    triggers = triggers.yield_per(1000)
+    price_trigger_index.load(trigger_entry(trigger) for trigger in triggers)
 
 
 class AlertService:
@@ -94,68 +524,68 @@ class AlertService:
     def __init__(self, db: Session):
         self.db = db
     
-    def check_alerts(self, user_id: int) -> List[Dict]:
-        """알림 조건 확인 및 알림 메시지 생성"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return []
-        
-        alert_settings = self.db.query(AlertSettings).filter(
+    def get_alert_settings(self, user_id: int) -> Optional[AlertSettings]:
+        return self.db.query(AlertSettings).filter(
             AlertSettings.user_id == user_id
         ).first()
+    
+    def get_alert_baseline(self, user_id: int) -> Optional[PriceSnapshot]:
+        """알림 기준 스냅샷 (마지막으로 알림을 보낸 시점의 상태)"""
+        return self.db.query(PriceSnapshot).filter(
+            PriceSnapshot.user_id == user_id,
+            PriceSnapshot.alert_baseline.is_(True)
+        ).order_by(PriceSnapshot.timestamp.desc(), PriceSnapshot.id.desc()).first()
+    
+    @staticmethod
+    def evaluate_alerts(
+        user: User,
+        alert_settings: AlertSettings,
+        summary: Dict,
+        baseline: Optional[PriceSnapshot],
+        now: Optional[datetime] = None,
+        window_extremes: Optional[Dict[str, Tuple[float, float]]] = None,
+        return_observations: Optional[Dict[str, ReturnObservation]] = None
+    ) -> List[Dict]:
+        """
+        이미 계산된 포트폴리오 평가와 알림 기준 스냅샷을 비교하여 알림 메시지 생성
         
-        if not alert_settings:
-            return []
-        
-        # 최근 스냅샷 조회
-        recent_snapshot = self.db.query(PriceSnapshot).filter(
-            PriceSnapshot.user_id == user_id
-        ).order_by(PriceSnapshot.timestamp.desc()).first()
-        
-        if not recent_snapshot:
-            return []
-        
-        # 최소 알림 간격 확인
-        last_notification_time = recent_snapshot.timestamp
-        min_interval = timedelta(minutes=alert_settings.min_notification_interval_minutes)
-        
-        if datetime.now(last_notification_time.tzinfo) - last_notification_time < min_interval:
-            return []
-        
-        # 현재 포트폴리오 상태 조회
-        portfolio_service = PortfolioService(self.db)
-        current_summary = portfolio_service.get_portfolio_summary(user_id)
+        시세를 조회하거나 DB에 쓰지 않는 순수 함수입니다.
         
-        if not current_summary:
+        Args:
+            user: 사용자
+            alert_settings: 알림 설정
+            summary: build_portfolio_summary 결과
+            baseline: 알림 기준 스냅샷 (없으면 알림 없음)
+            now: 현재 시각 (최소 알림 간격 확인용)
+            window_extremes: {심볼: (최근 윈도우 최저가, 최고가)} (None이면 윈도우 변동 알림 없음)
+            return_observations: {심볼: 이번 틱 수익률 관측값} (None이면 이상 변동 알림 없음)
+        """
+        # 알림 설정/기준 스냅샷 및 최소 알림 간격 확인 (마지막 알림 시각 기준)
+        if not is_alert_due(alert_settings, baseline, now):
             return []
         
         alerts = []
-        old_data = recent_snapshot.snapshot_data
-        old_total = recent_snapshot.total_portfolio_value
-        new_total = current_summary["total_value"]
+        old_data = baseline.snapshot_data
+        old_total = baseline.total_portfolio_value
+        new_total = summary["total_value"]
         
         # 포트폴리오 전체 변동 확인
         if old_total > 0:
             portfolio_change_pct = calculate_percentage_change(old_total, new_total)
             
             if abs(portfolio_change_pct) >= alert_settings.portfolio_percentage_threshold:
-                alerts.append({
-                    "type": "portfolio_percentage",
-                    "message": f"📊 포트폴리오 변동: {portfolio_change_pct:+.2f}% ({old_total:,.2f} → {new_total:,.2f} {user.base_currency})"
-                })
+                alerts.append(portfolio_percentage_alert(portfolio_change_pct, old_total, new_total, user.base_currency))
             
             if alert_settings.portfolio_absolute_threshold:
                 absolute_change = abs(new_total - old_total)
                 if absolute_change >= alert_settings.portfolio_absolute_threshold:
-                    alerts.append({
-                        "type": "portfolio_absolute",
-                        "message": f"💰 포트폴리오 금액 변동: {absolute_change:,.2f} {user.base_currency}"
-                    })
+                    alerts.append(portfolio_absolute_alert(absolute_change, user.base_currency))
         
         # 개별 코인 변동 확인
-        for item in current_summary["items"]:
+        for item in summary["items"]:
             symbol = item["symbol"]
-            new_price = current_summary["price_data"].get(symbol, {}).get("price", 0)
+            quote = summary["price_data"].get(symbol)
+            new_price = quote.price if quote else 0
             old_price_data = old_data.get(symbol, {})
             old_price = old_price_data.get("price", 0)
             
@@ -163,30 +593,95 @@ class AlertService:
                 price_change_pct = calculate_percentage_change(old_price, new_price)
                 
                 if abs(price_change_pct) >= alert_settings.single_coin_percentage_threshold:
-                    alerts.append({
-                        "type": "coin_percentage",
-                        "symbol": symbol,
-                        "message": f"📈 {symbol} 변동: {price_change_pct:+.2f}% (${old_price:,.2f} → ${new_price:,.2f})"
-                    })
+                    alerts.append(coin_percentage_alert(symbol, price_change_pct, old_price, new_price))
                 
                 if alert_settings.single_coin_absolute_threshold:
                     absolute_change = abs(new_price - old_price)
                     if absolute_change >= alert_settings.single_coin_absolute_threshold:
-                        alerts.append({
-                            "type": "coin_absolute",
-                            "symbol": symbol,
-                            "message": f"💵 {symbol} 가격 변동: ${absolute_change:,.2f}"
-                        })
+                        alerts.append(coin_absolute_alert(symbol, absolute_change))
+            
+            # 최근 윈도우 최저/최고가 대비 변동 (한 번에 조금씩 움직여도 누적 변동으로 알림)
+            extremes = window_extremes.get(symbol) if window_extremes is not None else None
+            if extremes and new_price > 0 and alert_settings.window_percentage_threshold:
+                window_pct, reference_price = window_change(*extremes, new_price)
+                if abs(window_pct) >= alert_settings.window_percentage_threshold:
+                    alerts.append(coin_window_alert(
+                        symbol, window_pct, alert_settings.window_minutes or 60, reference_price, new_price
+                    ))
+            
+            # 이번 틱 수익률이 심볼의 평소 변동성 대비 임계값(표준편차 배수) 이상
+            observation = return_observations.get(symbol) if return_observations is not None else None
+            if observation and alert_settings.anomaly_zscore_threshold:
+                if abs(observation.zscore) >= alert_settings.anomaly_zscore_threshold:
+                    alerts.append(coin_anomaly_alert(symbol, observation.change_pct, observation.zscore))
         
         return alerts
     
-    def save_snapshot(self, user_id: int, snapshot_data: Dict, total_value: float):
-        """가격 스냅샷 저장"""
+    def check_alerts(self, user_id: int, summary: Optional[Dict] = None) -> List[Dict]:
+        """
+        알림 조건 확인 및 알림 메시지 생성
+        
+        Args:
+            user_id: 사용자 ID
+            summary: 이미 계산된 포트폴리오 평가 (없으면 시세를 조회하여 계산)
+        """
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return []
+        
+        alert_settings = self.get_alert_settings(user_id)
+        if not alert_settings:
+            return []
+        
+        baseline = self.get_alert_baseline(user_id)
+        if not baseline:
+            return []
+        
+        if summary is None:
+            summary = PortfolioService(self.db).get_portfolio_summary(user_id)
+            if not summary:
+                return []
+        
+        symbols = [item["symbol"] for item in summary["items"]]
+        provider, _, currency = quote_group_key(user)
+        window_extremes = price_windows.extremes_for(alert_settings, symbols, currency)
+        # 이상 변동은 모니터링 틱이 마지막으로 반영한 시세 기준
+        return_observations = return_stats.observations_for(alert_settings, symbols, currency, None, provider)
+        return self.evaluate_alerts(
+            user, alert_settings, summary, baseline,
+            window_extremes=window_extremes, return_observations=return_observations
+        )
+    
+    def save_snapshot(
+        self,
+        user_id: int,
+        total_value: float,
+        tick: Optional[TickRef] = None,
+        holdings_version_id: Optional[int] = None,
+        alert_baseline: bool = False,
+        commit: bool = True
+    ) -> PriceSnapshot:
+        """
+        가격 스냅샷 저장
+        
+        시세는 price_ticks에 틱 단위로 한 번만 기록되므로 스냅샷에는 틱 참조와 보유 내역 버전만 저장합니다.
+        
+        Args:
+            tick: 스냅샷 시점의 틱 참조 (TickStore.record 결과)
+            holdings_version_id: 스냅샷 시점의 보유 내역 버전
+            alert_baseline: 알림 기준 스냅샷 여부 (알림을 보냈거나 기준이 없는 경우 True)
+            commit: False이면 세션에 추가만 하고 커밋은 호출자가 묶어서 처리
+        """
         snapshot = PriceSnapshot(
             user_id=user_id,
-            snapshot_data=snapshot_data,
-            total_portfolio_value=total_value
+            total_portfolio_value=total_value,
+            price_provider=tick.provider if tick else None,
+            price_currency=tick.currency if tick else None,
+            tick_at=tick.timestamp if tick else None,
+            holdings_version_id=holdings_version_id,
+            alert_baseline=alert_baseline
         )
         self.db.add(snapshot)
-        self.db.commit()
-
+        if commit:
+            self.db.commit()
+        return snapshot
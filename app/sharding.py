@@ -0,0 +1,260 @@
+"""
+다중 프로세스 모니터링 워커의 샤드 배정
+
+사용자는 ID 해시(user_id % SHARD_COUNT)로 고정된 샤드에 속하고, 샤드마다 한 워커가 틱을 처리합니다.
+워커는 monitor_workers 테이블에 하트비트를 남기고, 살아 있는 워커 중 가장 먼저 시작한 워커가 코디네이터로서
+워커가 추가/종료될 때 shard_assignments 테이블의 소유자를 다시 배정합니다 (외부 서비스 없이 공유 DB만 사용).
+
+재배정은 살아 있는 워커의 기존 샤드를 최대한 유지하고 (할당량을 넘는 샤드와 주인 없는 샤드만 이동)
+워커 간 샤드 수 차이를 1 이하로 맞춥니다. 살아 있는 워커의 샤드는 바로 빼앗지 않고 재배정 예정으로 표시하며,
+현재 소유자가 다음 틱 시작 시 넘겨주므로 두 워커가 같은 샤드를 동시에 처리하지 않습니다.
+"""
+from typing import Collection, Dict, List, Optional, Set
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import MonitorWorker, ShardAssignment
+import os
+import socket
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(user_id: int, shard_count: Optional[int] = None) -> int:
+    """사용자가 속한 샤드"""
+    return user_id % (shard_count or settings.shard_count)
+
+
+def shard_clause(column, shards: Collection[int], shard_count: Optional[int] = None):
+    """column(사용자 ID)이 shards에 속하는 행만 남기는 SQL 조건"""
+    return (column % (shard_count or settings.shard_count)).in_(sorted(shards))
+
+
+def assign_shards(shard_count: int, workers: List[str], current: Dict[int, Optional[str]]) -> Dict[int, str]:
+    """
+    샤드를 워커에 균등 배정 (기존 소유자를 최대한 유지)
+    
+    워커마다 shard_count // 워커 수개를 받고, 나머지는 지금 샤드를 많이 가진 워커부터 하나씩 더 받습니다.
+    
+    Args:
+        shard_count: 전체 샤드 수
+        workers: 살아 있는 워커 ID
+        current: {샤드: 현재 (또는 예정) 소유 워커}
+    
+    Returns:
+        {샤드: 워커} (워커가 없으면 빈 딕셔너리)
+    """
+    if not workers:
+        return {}
+    held: Dict[str, int] = {worker: 0 for worker in workers}
+    for owner in current.values():
+        if owner in held:
+            held[owner] += 1
+    base, extra = divmod(shard_count, len(workers))
+    order = sorted(workers, key=lambda worker: (-held[worker], worker))
+    quota = {worker: base + (1 if position < extra else 0) for position, worker in enumerate(order)}
+    
+    counts = {worker: 0 for worker in workers}
+    result: Dict[int, str] = {}
+    orphans: List[int] = []
+    for shard in range(shard_count):
+        owner = current.get(shard)
+        if owner in quota and counts[owner] < quota[owner]:
+            result[shard] = owner
+            counts[owner] += 1
+        else:
+            orphans.append(shard)
+    
+    candidates = iter(sorted(workers))
+    worker = next(candidates)
+    for shard in orphans:
+        while counts[worker] >= quota[worker]:
+            worker = next(candidates)
+        result[shard] = worker
+        counts[worker] += 1
+    return result
+
+
+def worker_delivery_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, Dict]:
+    """하트비트가 만료되지 않은 워커별로 마지막 하트비트에 기록한 텔레그램 전송 대기열 통계"""
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=settings.worker_heartbeat_timeout_seconds)
+    rows = db.query(MonitorWorker.worker_id, MonitorWorker.delivery_stats).filter(
+        MonitorWorker.heartbeat_at >= cutoff,
+        MonitorWorker.delivery_stats.isnot(None)
+    ).order_by(MonitorWorker.worker_id).all()
+    return {worker_id: stats for worker_id, stats in rows}
+
+
+class ShardCoordinator:
+    """워커 하나의 하트비트, 샤드 재배정 (코디네이터일 때), 소유 샤드 확인"""
+    
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        shard_count: Optional[int] = None,
+        heartbeat_timeout_seconds: Optional[int] = None
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.shard_count = shard_count or settings.shard_count
+        self.heartbeat_timeout_seconds = heartbeat_timeout_seconds or settings.worker_heartbeat_timeout_seconds
+        # 마지막 하트비트 시점에 이 워커가 코디네이터였는지
+        self.is_coordinator = False
+    
+    def live_workers(self, db: Session, now: datetime) -> List[str]:
+        """하트비트가 만료되지 않은 워커 (먼저 시작한 순서)"""
+        cutoff = now - timedelta(seconds=self.heartbeat_timeout_seconds)
+        rows = db.query(MonitorWorker.worker_id).filter(
+            MonitorWorker.heartbeat_at >= cutoff
+        ).order_by(MonitorWorker.started_at, MonitorWorker.worker_id).all()
+        return [worker_id for worker_id, in rows]
+    
+    def heartbeat(self, db: Session, now: Optional[datetime] = None, delivery_stats: Optional[Dict] = None) -> bool:
+        """
+        하트비트 기록 후 코디네이터이면 샤드 재배정
+        
+        delivery_stats(텔레그램 전송 대기열 통계)를 주면 워커 행에 함께 기록하여 API 서버가 모아 볼 수 있게 합니다.
+        
+        Returns:
+            코디네이터 여부
+        """
+        now = now or datetime.now(timezone.utc)
+        for _ in range(2):
+            worker = db.get(MonitorWorker, self.worker_id)
+            if worker:
+                worker.heartbeat_at = now
+                if delivery_stats is not None:
+                    worker.delivery_stats = delivery_stats
+            else:
+                db.add(MonitorWorker(
+                    worker_id=self.worker_id,
+                    hostname=socket.gethostname(),
+                    pid=os.getpid(),
+                    started_at=now,
+                    heartbeat_at=now,
+                    delivery_stats=delivery_stats
+                ))
+            try:
+                db.commit()
+                break
+            except IntegrityError:
+                # 같은 ID의 워커 행이 먼저 만들어진 경우 갱신으로 재시도
+                db.rollback()
+        
+        live = self.live_workers(db, now)
+        is_coordinator = bool(live) and live[0] == self.worker_id
+        if is_coordinator and not self.is_coordinator:
+            logger.info(f"샤드 코디네이터 역할 시작: worker={self.worker_id}")
+        self.is_coordinator = is_coordinator
+        if is_coordinator:
+            self.rebalance(db, live, now)
+        return is_coordinator
+    
+    def rebalance(self, db: Session, live: List[str], now: Optional[datetime] = None) -> int:
+        """
+        살아 있는 워커에 샤드 재배정 (만료된 워커 행 삭제)
+        
+        Returns:
+            소유자가 바뀌었거나 재배정 예정으로 표시한 샤드 수
+        """
+        now = now or datetime.now(timezone.utc)
+        live_set = set(live)
+        cutoff = now - timedelta(seconds=self.heartbeat_timeout_seconds)
+        expired = db.query(MonitorWorker).filter(MonitorWorker.heartbeat_at < cutoff).delete(synchronize_session=False)
+        if expired:
+            logger.warning(f"하트비트가 만료된 워커 {expired}개를 제거합니다.")
+        
+        rows = {row.shard_id: row for row in db.query(ShardAssignment)}
+        for shard_id, row in rows.items():
+            if shard_id >= self.shard_count:
+                db.delete(row)
+        for shard_id in range(self.shard_count):
+            if shard_id not in rows:
+                rows[shard_id] = ShardAssignment(shard_id=shard_id, generation=0)
+                db.add(rows[shard_id])
+        
+        current = {
+            shard_id: row.pending_worker_id or row.worker_id
+            for shard_id, row in rows.items()
+            if shard_id < self.shard_count
+        }
+        moved = 0
+        for shard_id, owner in assign_shards(self.shard_count, live, current).items():
+            row = rows[shard_id]
+            if row.worker_id in live_set:
+                # 살아 있는 소유자는 다음 틱 시작 시 직접 넘겨줌
+                pending = None if row.worker_id == owner else owner
+                if row.pending_worker_id != pending:
+                    row.pending_worker_id = pending
+                    moved += pending is not None
+            elif row.worker_id != owner:
+                row.worker_id = owner
+                row.pending_worker_id = None
+                row.generation = (row.generation or 0) + 1
+                row.assigned_at = now
+                moved += 1
+        
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if moved:
+            logger.info(f"샤드 재배정: {moved}개 (워커 {len(live)}개, 샤드 {self.shard_count}개)")
+        return moved
+    
+    def claim(self, db: Session, now: Optional[datetime] = None) -> Set[int]:
+        """
+        틱 시작 시 소유 샤드 확정 (재배정 예정인 샤드는 새 소유자에게 넘겨줌)
+        
+        Returns:
+            이번 틱에 처리할 샤드
+        """
+        now = now or datetime.now(timezone.utc)
+        rows = db.query(ShardAssignment).filter(
+            ShardAssignment.worker_id == self.worker_id,
+            ShardAssignment.shard_id < self.shard_count
+        ).all()
+        owned: Set[int] = set()
+        released = 0
+        for row in rows:
+            if row.pending_worker_id and row.pending_worker_id != self.worker_id:
+                row.worker_id = row.pending_worker_id
+                row.pending_worker_id = None
+                row.generation = (row.generation or 0) + 1
+                row.assigned_at = now
+                released += 1
+            else:
+                owned.add(row.shard_id)
+        if released:
+            db.commit()
+            logger.info(f"샤드 {released}개를 다른 워커에 넘겨주었습니다: worker={self.worker_id}")
+        return owned
+    
+    def owned_shards(self, db: Session) -> Set[int]:
+        """현재 소유 샤드 (넘겨줄 예정인 샤드 포함, 변경 없음)"""
+        rows = db.query(ShardAssignment.shard_id).filter(
+            ShardAssignment.worker_id == self.worker_id,
+            ShardAssignment.shard_id < self.shard_count
+        ).all()
+        return {shard_id for shard_id, in rows}
+    
+    def leave(self, db: Session):
+        """워커 종료: 워커 행을 지우고 소유 샤드를 내놓음 (코디네이터가 다음 하트비트에 재배정)"""
+        try:
+            for row in db.query(ShardAssignment).filter(ShardAssignment.worker_id == self.worker_id):
+                row.worker_id = row.pending_worker_id
+                row.pending_worker_id = None
+                row.generation = (row.generation or 0) + 1
+            db.query(ShardAssignment).filter(
+                ShardAssignment.pending_worker_id == self.worker_id
+            ).update({ShardAssignment.pending_worker_id: None}, synchronize_session=False)
+            db.query(MonitorWorker).filter(MonitorWorker.worker_id == self.worker_id).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self.is_coordinator = False
+        logger.info(f"워커 종료, 샤드 반환: worker={self.worker_id}")
@@ -5,7 +5,7 @@ from typing import Optional
 from app.config import settings
 from app.database import SessionLocal
 from app.models import User, AlertSettings, PortfolioItem
-from app.services import PortfolioService
+from app.services import PortfolioService, PriceTriggerService
 from app.utils import format_portfolio_message
 import logging
 import asyncio
@@ -36,6 +36,7 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("alerts", self.alerts_command))
         self.application.add_handler(CommandHandler("set_portfolio", self.set_portfolio_command))
         self.application.add_handler(CommandHandler("set_alert", self.set_alert_command))
+        self.application.add_handler(CommandHandler("price_alert", self.price_alert_command))
         self.application.add_handler(CommandHandler("advice", self.advice_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
         
@@ -122,7 +123,7 @@ class TelegramBot:
                 return
             
             service = PortfolioService(db)
-            summary = service.get_portfolio_summary(user.id)
+            summary = await service.get_portfolio_summary_async(user.id)
             
             if not summary:
                 await update.message.reply_text(
@@ -170,6 +171,10 @@ class TelegramBot:
             message += f"포트폴리오 변동률 임계값: {alert_settings.portfolio_percentage_threshold}%\n"
             if alert_settings.portfolio_absolute_threshold:
                 message += f"포트폴리오 절대금액 변동: {alert_settings.portfolio_absolute_threshold}\n"
+            if alert_settings.window_percentage_threshold:
+                message += f"윈도우 변동률 임계값: {alert_settings.window_minutes or 60}분 내 {alert_settings.window_percentage_threshold}%\n"
+            if alert_settings.anomaly_zscore_threshold:
+                message += f"이상 변동 임계값: 평소 변동성의 {alert_settings.anomaly_zscore_threshold}σ\n"
             message += f"최소 알림 간격: {alert_settings.min_notification_interval_minutes}분\n"
             
             await update.message.reply_text(message)
@@ -203,6 +208,7 @@ class TelegramBot:
                     for item in existing_items:
                         db.delete(item)
                     db.commit()
+                    portfolio_service.sync_valuation(user.id)
                 
                 # .env의 포트폴리오 등록
                 registered_items = []
@@ -243,6 +249,66 @@ class TelegramBot:
             "자세한 내용은 /help 명령어를 참조하세요."
         )
     
+    async def price_alert_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        가격 도달 알림 등록/조회
+        
+        /price_alert SOL 250 [USD] - SOL이 250을 넘거나 내려가면 알림
+        /price_alert - 등록된 가격 알림 목록
+        """
+        chat_id = str(update.effective_chat.id)
+        db = SessionLocal()
+        
+        try:
+            user = db.query(User).filter(User.telegram_chat_id == chat_id).first()
+            
+            if not user:
+                await update.message.reply_text("먼저 /start 명령어로 등록해주세요.")
+                return
+            
+            service = PriceTriggerService(db)
+            args = context.args or []
+            
+            if not args:
+                triggers = service.list_triggers(user.id)
+                if not triggers:
+                    await update.message.reply_text(
+                        "등록된 가격 알림이 없습니다.\n"
+                        "예: /price_alert SOL 250"
+                    )
+                    return
+                message = "🎯 가격 알림 목록\n\n"
+                message += "\n".join(
+                    f"#{trigger.id} {trigger.symbol} {trigger.target_price:,.2f} {trigger.currency}"
+                    for trigger in triggers
+                )
+                await update.message.reply_text(message)
+                return
+            
+            if len(args) not in (2, 3):
+                await update.message.reply_text("사용법: /price_alert SOL 250 [USD]")
+                return
+            
+            try:
+                target_price = float(args[1].replace(",", ""))
+            except ValueError:
+                await update.message.reply_text("목표 가격은 숫자로 입력해주세요. 예: /price_alert SOL 250")
+                return
+            if target_price <= 0:
+                await update.message.reply_text("목표 가격은 0보다 커야 합니다.")
+                return
+            
+            trigger = service.create_trigger(user, args[0], target_price, args[2] if len(args) == 3 else None)
+            await update.message.reply_text(
+                f"✅ 가격 알림 등록: {trigger.symbol}이(가) {trigger.target_price:,.2f} {trigger.currency}를 "
+                f"넘거나 내려가면 알려드립니다. (#{trigger.id})"
+            )
+        except Exception as e:
+            logger.error(f"price_alert_command 오류: {e}", exc_info=True)
+            await update.message.reply_text("가격 알림 등록 중 오류가 발생했습니다.")
+        finally:
+            db.close()
+    
     async def advice_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """투자 조언 요청"""
         await update.message.reply_text(
@@ -260,6 +326,7 @@ class TelegramBot:
 /alerts - 현재 알림 설정 조회
 /set_portfolio - 포트폴리오 등록 (.env의 PORTFOLIO_JSON 사용)
 /set_alert - 알림 기준 설정 (API 사용)
+/price_alert SOL 250 - 가격 도달 알림 등록 (인자 없이 입력하면 목록)
 /advice - 투자 조언 요청
 /help - 이 도움말 표시
 
@@ -269,6 +336,7 @@ class TelegramBot:
 - POST /api/portfolio - 포트폴리오 항목 추가
 - GET /api/portfolio/summary - 포트폴리오 요약
 - PUT /api/alerts - 알림 설정 변경
+- POST /api/triggers - 가격 도달 알림 등록
 
 자세한 API 문서는 /docs 엔드포인트를 참조하세요.
         """
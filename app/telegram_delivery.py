@@ -0,0 +1,220 @@
+"""
+텔레그램 전송 대기열
+
+틱에서 한 채팅으로 보낼 알림을 메시지 하나로 합치고 (4096자를 넘으면 나눔),
+전체 토큰 버킷(텔레그램 제한 약 30건/초)과 채팅별 토큰 버킷(약 1건/초)을 적용하여
+허용 속도 안에서 여러 채팅에 동시에 전송합니다.
+RetryAfter(flood control) 응답을 받으면 지정된 시간 동안 전체 전송을 멈추고 재시도합니다.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import timedelta
+from telegram.error import RetryAfter
+from app.config import settings
+from app.rate_limit import TokenBucket
+from app.provider_router import LatencyTracker
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 텔레그램 메시지 최대 길이
+MESSAGE_LIMIT = 4096
+
+# (chat_id, text) -> 전송
+MessageSender = Callable[[str, str], Awaitable]
+
+
+def merge_messages(texts: Sequence[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """메시지를 빈 줄로 이어 붙여 limit자 이하의 메시지로 묶음 (한 메시지가 limit을 넘으면 잘라서 나눔)"""
+    parts: List[str] = []
+    current = ""
+    for text in texts:
+        while len(text) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(text[:limit])
+            text = text[limit:]
+        if not text:
+            continue
+        candidate = f"{current}\n\n{text}" if current else text
+        if len(candidate) > limit:
+            parts.append(current)
+            current = text
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def merge_stats_reports(reports: Dict[str, Dict]) -> Dict:
+    """
+    워커별 전송 대기열 통계 합산 ({워커 ID: stats_report()})
+    
+    누적 수, 대기열 깊이, 전송 중인 수는 더하고, 지연 백분위는 워커별 값 중 최댓값을 사용합니다.
+    """
+    merged: Dict = {}
+    for report in reports.values():
+        for key, value in report.items():
+            if value is None:
+                merged.setdefault(key, None)
+            elif key.startswith("latency_"):
+                merged[key] = value if merged.get(key) is None else max(merged[key], value)
+            else:
+                merged[key] = (merged.get(key) or 0) + value
+    merged["workers"] = reports
+    return merged
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+@dataclass
+class OutgoingMessage:
+    """대기열의 전송 요청 (future에 전송 성공 여부를 기록)"""
+    chat_id: str
+    text: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class TelegramDeliveryQueue:
+    """전체/채팅별 속도 제한을 적용한 비동기 텔레그램 전송 대기열"""
+    
+    # 이 시간 동안 쓰지 않은 채팅별 버킷은 가득 찬 상태와 같으므로 정리
+    CHAT_BUCKET_IDLE_SECONDS = 60
+    
+    def __init__(self, send: MessageSender, concurrency: Optional[int] = None):
+        self._send = send
+        self.concurrency = concurrency or settings.telegram_send_concurrency
+        self.global_bucket = TokenBucket(settings.telegram_global_rate_per_second, 1)
+        self._chat_buckets: Dict[str, Tuple[TokenBucket, float]] = {}
+        self.latencies = LatencyTracker(1000)
+        self.stats = {"enqueued": 0, "merged": 0, "sent": 0, "failed": 0, "cancelled": 0, "retry_after": 0}
+        self._in_flight = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _ensure_workers(self):
+        """현재 이벤트 루프에서 전송 작업자 시작 (루프가 바뀌면 새 대기열 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        for _ in range(self.concurrency):
+            loop.create_task(self._worker())
+    
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        now = time.monotonic()
+        entry = self._chat_buckets.get(chat_id)
+        bucket = entry[0] if entry else TokenBucket(settings.telegram_chat_rate_per_second, 1)
+        self._chat_buckets[chat_id] = (bucket, now)
+        if entry is None and len(self._chat_buckets) % 1000 == 0:
+            idle = [key for key, (_, used_at) in self._chat_buckets.items() if now - used_at > self.CHAT_BUCKET_IDLE_SECONDS]
+            for key in idle:
+                del self._chat_buckets[key]
+        return bucket
+    
+    async def send(self, chat_id: str, texts: Sequence[str]) -> bool:
+        """
+        채팅에 보낼 메시지를 하나로 합쳐 대기열에 넣고 전송 완료까지 대기
+        
+        호출자가 취소되면 아직 보내지 않은 메시지는 전송하지 않습니다.
+        
+        Returns:
+            모든 메시지 전송 성공 여부
+        """
+        self._ensure_workers()
+        parts = merge_messages(texts)
+        self.stats["merged"] += max(0, len(texts) - len(parts))
+        futures = []
+        for text in parts:
+            message = OutgoingMessage(chat_id, text, self._loop.create_future())
+            self._queue.put_nowait(message)
+            futures.append(message.future)
+        self.stats["enqueued"] += len(futures)
+        results = await asyncio.gather(*futures)
+        return all(results)
+    
+    async def _worker(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                if not message.future.done():
+                    await self._deliver(message)
+            except Exception as e:
+                logger.error(f"텔레그램 전송 작업자 오류: chat_id={message.chat_id}, error={e}")
+                self._resolve(message, False)
+            finally:
+                self._queue.task_done()
+    
+    @staticmethod
+    def _resolve(message: OutgoingMessage, delivered: bool):
+        if not message.future.done():
+            message.future.set_result(delivered)
+    
+    async def _deliver(self, message: OutgoingMessage):
+        for attempt in range(settings.telegram_max_retries + 1):
+            await self._chat_bucket(message.chat_id).acquire_async()
+            await self.global_bucket.acquire_async()
+            if message.future.done():
+                # 대기하는 동안 호출자가 취소 (시간 초과)
+                self.stats["cancelled"] += 1
+                return
+            
+            self._in_flight += 1
+            try:
+                await asyncio.wait_for(
+                    self._send(message.chat_id, message.text),
+                    timeout=settings.telegram_send_timeout_seconds
+                )
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                self.stats["retry_after"] += 1
+                self.global_bucket.block_for(delay)
+                logger.warning(f"텔레그램 flood control: {delay:g}초 후 재시도 (chat_id={message.chat_id}, 시도 {attempt + 1})")
+                continue
+            except asyncio.TimeoutError:
+                self.stats["failed"] += 1
+                logger.error(f"텔레그램 전송 시간 초과: chat_id={message.chat_id} ({settings.telegram_send_timeout_seconds:g}초)")
+                self._resolve(message, False)
+                return
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"텔레그램 전송 실패: chat_id={message.chat_id}, error={e}")
+                self._resolve(message, False)
+                return
+            finally:
+                self._in_flight -= 1
+            
+            self.stats["sent"] += 1
+            self.latencies.record(time.monotonic() - message.enqueued_at)
+            self._resolve(message, True)
+            return
+        
+        self.stats["failed"] += 1
+        logger.error(f"텔레그램 전송 실패: chat_id={message.chat_id}, RetryAfter 재시도 {settings.telegram_max_retries}회 초과")
+        self._resolve(message, False)
+    
+    @property
+    def depth(self) -> int:
+        """전송 대기 중인 메시지 수"""
+        return self._queue.qsize() if self._queue else 0
+    
+    def stats_report(self) -> Dict:
+        """대기열 깊이, 전송 중인 수, 누적 전송 통계, 대기열 진입부터 전송 완료까지의 지연 백분위"""
+        return {
+            **self.stats,
+            "queue_depth": self.depth,
+            "in_flight": self._in_flight,
+            "latency_p50_seconds": self.latencies.percentile(50),
+            "latency_p95_seconds": self.latencies.percentile(95),
+        }
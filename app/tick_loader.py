@@ -0,0 +1,131 @@
+"""
+스케줄러 틱 데이터 일괄 로더
+
+사용자, 포트폴리오 항목, 알림 설정, 알림 기준 스냅샷을 사용자 묶음마다
+고정된 수의 쿼리로 읽어옵니다 (사용자별 N+1 쿼리 제거).
+사용자 ID 기준 키셋 페이지네이션으로 묶음 단위로 읽고, 처리한 묶음은 세션에서 분리하여
+사용자 수가 많아도 메모리 사용량이 일정하게 유지됩니다.
+"""
+from typing import Collection, Dict, Iterator, List, Optional
+from dataclasses import dataclass
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.config import settings
+from app.models import User, PortfolioItem, AlertSettings, PriceSnapshot
+from app.sharding import shard_clause
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TickUser:
+    """틱 처리에 필요한 사용자 데이터"""
+    user: User
+    holdings: List[PortfolioItem]
+    alert_settings: Optional[AlertSettings]
+    baseline: Optional[PriceSnapshot]
+
+
+class TickLoader:
+    """
+    틱 데이터 로더
+    
+    묶음마다 쿼리 4개만 실행합니다.
+    1. 포트폴리오가 있는 사용자 + 알림 설정 (joinedload)
+    2. 포트폴리오 항목 (selectinload, IN 쿼리 1개)
+    3. 사용자별 최신 알림 기준 스냅샷 (ROW_NUMBER 윈도우 함수) + 보유 내역 버전 (joinedload)
+    4. 기준 스냅샷이 참조하는 시세 틱 (selectinload, IN 쿼리 1개)
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: Optional[int] = None,
+        with_baselines: bool = True,
+        shards: Optional[Collection[int]] = None
+    ):
+        self.db = db
+        self.chunk_size = chunk_size or settings.tick_chunk_size
+        # False이면 알림 기준 스냅샷 쿼리 생략 (baseline은 None)
+        self.with_baselines = with_baselines
+        # 워커 모드: 이 샤드에 속한 사용자만 읽음 (None이면 전체)
+        self.shards = shards
+    
+    def load_baselines(self, user_ids: List[int]) -> Dict[int, PriceSnapshot]:
+        """사용자별 최신 알림 기준 스냅샷을 한 번의 쿼리로 조회"""
+        if not user_ids:
+            return {}
+        ranked = select(
+            PriceSnapshot.id,
+            func.row_number().over(
+                partition_by=PriceSnapshot.user_id,
+                order_by=(PriceSnapshot.timestamp.desc(), PriceSnapshot.id.desc())
+            ).label("rank")
+        ).where(
+            PriceSnapshot.user_id.in_(user_ids),
+            PriceSnapshot.alert_baseline.is_(True)
+        ).subquery()
+        
+        snapshots = self.db.query(PriceSnapshot).options(
+            joinedload(PriceSnapshot.holdings_version),
+            selectinload(PriceSnapshot.price_ticks)
+        ).join(
+            ranked, PriceSnapshot.id == ranked.c.id
+        ).filter(ranked.c.rank == 1).all()
+        return {snapshot.user_id: snapshot for snapshot in snapshots}
+    
+    def _load_users(self, after_id: int) -> List[User]:
+        has_holdings = select(PortfolioItem.id).where(PortfolioItem.user_id == User.id).exists()
+        query = self.db.query(User).options(
+            selectinload(User.portfolio_items),
+            joinedload(User.alert_settings)
+        ).filter(
+            User.id > after_id,
+            has_holdings
+        )
+        if self.shards is not None:
+            query = query.filter(shard_clause(User.id, self.shards))
+        return query.order_by(User.id).limit(self.chunk_size).all()
+    
+    def _release(self, chunk: List[TickUser]):
+        """처리한 묶음의 객체를 세션에서 분리 (포트폴리오 항목/알림 설정은 User에서 함께 분리)"""
+        for tick_user in chunk:
+            if tick_user.user in self.db:
+                self.db.expunge(tick_user.user)
+            baseline = tick_user.baseline
+            if baseline is None or baseline not in self.db:
+                continue
+            # 기준 스냅샷의 보유 내역 버전과 시세 틱 (여러 사용자가 같은 틱을 공유)
+            related = list(baseline.__dict__.get("price_ticks", ()))
+            related.append(baseline.__dict__.get("holdings_version"))
+            self.db.expunge(baseline)
+            for obj in related:
+                if obj is not None and obj in self.db:
+                    self.db.expunge(obj)
+    
+    def iter_chunks(self) -> Iterator[List[TickUser]]:
+        """포트폴리오가 있는 사용자를 chunk_size명씩 묶어 순회"""
+        after_id = 0
+        while True:
+            users = self._load_users(after_id)
+            if not users:
+                return
+            
+            baselines = self.load_baselines([user.id for user in users]) if self.with_baselines else {}
+            chunk = [
+                TickUser(
+                    user=user,
+                    holdings=list(user.portfolio_items),
+                    alert_settings=user.alert_settings,
+                    baseline=baselines.get(user.id)
+                )
+                for user in users
+            ]
+            # 소비자가 커밋하면 객체가 만료되므로 다음 묶음 기준 ID는 미리 저장
+            after_id = users[-1].id
+            yield chunk
+            
+            self._release(chunk)
+            if len(users) < self.chunk_size:
+                return
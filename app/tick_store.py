@@ -0,0 +1,139 @@
+"""
+정규화된 시세 틱 저장소
+
+스냅샷마다 사용자별 JSON으로 시세를 복사하던 방식 대신,
+틱마다 (API 제공자, 심볼, 통화)별 시세를 price_ticks에 한 번만 기록하고
+스냅샷은 틱 참조(제공자, 통화, 틱 시각)와 보유 내역 버전만 저장합니다.
+보유 내역 버전은 보유 심볼/수량이 바뀔 때만 새로 기록합니다.
+"""
+from typing import Dict, Optional, Set, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models import PriceTick, HoldingsVersion
+from app.quote import Quote
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TickRef:
+    """스냅샷이 참조하는 틱 (price_ticks의 provider, currency, timestamp)"""
+    provider: str
+    currency: str
+    timestamp: datetime
+
+
+class TickStore:
+    """
+    틱 하나의 시세 기록기
+    
+    같은 틱에서 (제공자, 심볼, 통화)는 한 번만 기록합니다.
+    (API 키만 다른 시세 그룹이나 다음 사용자 묶음에서 같은 시세를 다시 기록하지 않음)
+    """
+    
+    def __init__(self, timestamp: Optional[datetime] = None):
+        self.timestamp = timestamp or datetime.now(timezone.utc)
+        self._written: Set[Tuple[str, str, str]] = set()
+    
+    def ref(self, provider: str, currency: str) -> TickRef:
+        return TickRef(provider, currency, self.timestamp)
+    
+    def record(self, db: Session, provider: str, currency: str, quotes: Dict[str, Quote]) -> TickRef:
+        """
+        시세 그룹의 시세를 세션에 추가 (커밋은 호출자가 스냅샷과 함께 수행)
+        
+        Returns:
+            스냅샷에 저장할 틱 참조
+        """
+        ticks = []
+        for symbol, quote in quotes.items():
+            key = (provider, symbol, currency)
+            if key in self._written:
+                continue
+            self._written.add(key)
+            ticks.append(PriceTick(
+                provider=provider,
+                symbol=symbol,
+                currency=currency,
+                timestamp=self.timestamp,
+                price=quote.price,
+                market_cap=quote.market_cap,
+                percent_change_24h=quote.percent_change_24h
+            ))
+        db.add_all(ticks)
+        return self.ref(provider, currency)
+    
+    def discard(self):
+        """커밋 실패 시 기록 여부 초기화 (롤백된 시세를 다음 묶음에서 다시 기록)"""
+        self._written.clear()
+
+
+class HoldingsVersionCache:
+    """사용자별 최신 보유 내역 버전 캐시 (보유 내역이 그대로이면 새 버전을 만들지 않음)"""
+    
+    def __init__(self):
+        # user_id -> ({심볼: 수량}, 버전 ID)
+        self._latest: Dict[int, Tuple[Dict[str, float], int]] = {}
+        self._lock = threading.Lock()
+    
+    def _load_latest(self, db: Session, user_ids: Set[int]) -> Dict[int, HoldingsVersion]:
+        """사용자별 최신 보유 내역 버전을 한 번의 쿼리로 조회"""
+        latest_ids = select(func.max(HoldingsVersion.id)).where(
+            HoldingsVersion.user_id.in_(user_ids)
+        ).group_by(HoldingsVersion.user_id)
+        versions = db.query(HoldingsVersion).filter(HoldingsVersion.id.in_(latest_ids)).all()
+        return {version.user_id: version for version in versions}
+    
+    def resolve(self, db: Session, holdings_by_user: Dict[int, Dict[str, float]]) -> Dict[int, int]:
+        """
+        사용자별 보유 내역의 버전 ID 반환 (바뀐 보유 내역만 새 버전으로 기록)
+        
+        Args:
+            holdings_by_user: {user_id: {심볼: 수량}}
+        
+        Returns:
+            {user_id: 보유 내역 버전 ID}
+        """
+        with self._lock:
+            resolved: Dict[int, int] = {}
+            misses = set()
+            for user_id, holdings in holdings_by_user.items():
+                cached = self._latest.get(user_id)
+                if cached is not None and cached[0] == holdings:
+                    resolved[user_id] = cached[1]
+                elif cached is None:
+                    misses.add(user_id)
+            
+            stored = self._load_latest(db, misses) if misses else {}
+            created = []
+            for user_id, holdings in holdings_by_user.items():
+                if user_id in resolved:
+                    continue
+                version = stored.get(user_id)
+                if version is not None and version.holdings == holdings:
+                    self._latest[user_id] = (dict(holdings), version.id)
+                    resolved[user_id] = version.id
+                    continue
+                version = HoldingsVersion(user_id=user_id, holdings=dict(holdings))
+                db.add(version)
+                created.append((user_id, holdings, version))
+            
+            if created:
+                db.flush()
+                for user_id, holdings, version in created:
+                    self._latest[user_id] = (dict(holdings), version.id)
+                    resolved[user_id] = version.id
+                logger.debug(f"보유 내역 버전 {len(created)}개 기록")
+            return resolved
+    
+    def clear(self):
+        with self._lock:
+            self._latest.clear()
+
+
+# 스케줄러가 공유하는 보유 내역 버전 캐시 (커밋 실패 시 clear)
+holdings_versions = HoldingsVersionCache()
@@ -1,12 +1,17 @@
 """
 유틸리티 함수 모음
 """
-from typing import Dict, List, Tuple
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple, TypeVar
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 def aggregate_portfolio_items(portfolio_items: List) -> Tuple[Dict[str, float], Dict[str, int]]:
     """
@@ -71,7 +76,7 @@ def format_portfolio_message(
     total_value: float,
     base_currency: str,
     items: List[Dict],
-    price_data: Dict[str, Dict],
+    price_data: Dict,
     timestamp: str = None
 ) -> str:
     """
@@ -81,7 +86,7 @@ def format_portfolio_message(
         total_value: 총 평가액
         base_currency: 기준 통화
         items: 포트폴리오 항목 리스트
-        price_data: 가격 데이터
+        price_data: {symbol: Quote} 시세
         timestamp: 타임스탬프 (선택)
     
     Returns:
@@ -99,10 +104,10 @@ def format_portfolio_message(
     for item in items:
         symbol = item['symbol']
         quantity = item['quantity']
-        price_info = price_data.get(symbol, {})
-        price = price_info.get('price', 0)
+        quote = price_data.get(symbol)
+        price = quote.price if quote else 0
         value = quantity * price
-        change_24h = price_info.get('percent_change_24h', 0)
+        change_24h = quote.percent_change_24h if quote else 0
         
         message += f"💵 {symbol}\n"
         message += f"   수량: {quantity:,.6f}\n"
@@ -128,3 +133,64 @@ def calculate_percentage_change(old_value: float, new_value: float) -> float:
         return 0.0
     return ((new_value - old_value) / old_value) * 100
 
+
+
+
+def chunked(items: Sequence[T], size: int) -> List[List[T]]:
+    """
+    리스트를 최대 size 크기의 묶음으로 분할
+    
+    Args:
+        items: 분할할 리스트
+        size: 묶음 최대 크기
+    
+    Returns:
+        묶음 리스트
+    """
+    size = max(1, size)
+    return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+def fetch_chunks(fetch: Callable[[T], R], chunks: List[T], concurrency: int) -> List[R]:
+    """
+    묶음별 조회를 스레드로 동시에 실행 (하나라도 실패하면 예외 발생)
+    
+    Args:
+        fetch: 묶음 하나를 조회하는 함수
+        chunks: 묶음 리스트
+        concurrency: 최대 동시 실행 수
+    
+    Returns:
+        묶음 순서대로의 조회 결과
+    """
+    if len(chunks) <= 1 or concurrency <= 1:
+        return [fetch(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=min(len(chunks), concurrency)) as executor:
+        return list(executor.map(fetch, chunks))
+
+
+async def fetch_chunks_async(fetch: Callable[[T], Awaitable[R]], chunks: List[T], concurrency: int) -> List[R]:
+    """fetch_chunks의 비동기 버전"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def run(chunk: T) -> R:
+        async with semaphore:
+            return await fetch(chunk)
+    
+    return list(await asyncio.gather(*(run(chunk) for chunk in chunks)))
+
+
+def merge_dicts(dicts: List[Dict]) -> Dict:
+    """
+    묶음별 조회 결과 딕셔너리를 하나로 병합
+    
+    Args:
+        dicts: {symbol: ...} 형식 딕셔너리 리스트
+    
+    Returns:
+        병합된 딕셔너리
+    """
+    merged = {}
+    for item in dicts:
+        merged.update(item)
+    return merged
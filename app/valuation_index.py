@@ -0,0 +1,143 @@
+"""
+증분 포트폴리오 평가 인덱스
+
+심볼 → (사용자, 수량) 역색인과 사용자별 평가액 누계를 메모리에 유지합니다.
+시세가 바뀌면 해당 심볼을 보유한 사용자의 누계만 quantity * (새 가격 - 이전 가격)만큼 조정하므로
+틱당 계산량이 전체 보유 건수가 아니라 바뀐 심볼을 보유한 건수에 비례합니다.
+
+가격은 사용자가 실제로 받는 시세 그룹(API 제공자, API 키, 사용자 통화)별로 구분합니다.
+"""
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ValuationIndex:
+    """심볼 → 보유자 역색인과 사용자별 평가액 누계"""
+    
+    def __init__(self):
+        # (그룹, 심볼) -> {user_id: 수량}
+        self._holders: Dict[Tuple[Hashable, str], Dict[int, float]] = {}
+        # (그룹, 심볼) -> 마지막으로 반영한 가격
+        self._prices: Dict[Tuple[Hashable, str], float] = {}
+        # user_id -> (그룹, {심볼: 수량})
+        self._users: Dict[int, Tuple[Hashable, Dict[str, float]]] = {}
+        self._totals: Dict[int, float] = {}
+        self._lock = threading.Lock()
+    
+    def _remove(self, user_id: int):
+        entry = self._users.pop(user_id, None)
+        self._totals.pop(user_id, None)
+        if entry is None:
+            return
+        group, holdings = entry
+        for symbol in holdings:
+            key = (group, symbol)
+            holders = self._holders.get(key)
+            if holders is None:
+                continue
+            holders.pop(user_id, None)
+            if not holders:
+                # 보유자가 없는 심볼은 가격도 잊음 (다시 보유하면 다음 시세로 채워짐)
+                del self._holders[key]
+                self._prices.pop(key, None)
+    
+    def set_holdings(self, user_id: int, group: Hashable, holdings: Dict[str, float]):
+        """
+        사용자 보유 내역 교체 (포트폴리오/시세 그룹 변경 시)
+        
+        총액은 이미 반영된 가격으로 다시 계산하며, 가격을 모르는 심볼은 시세가 들어올 때 더해집니다.
+        """
+        with self._lock:
+            self._remove(user_id)
+            if not holdings:
+                return
+            self._users[user_id] = (group, dict(holdings))
+            total = 0.0
+            for symbol, quantity in holdings.items():
+                key = (group, symbol)
+                self._holders.setdefault(key, {})[user_id] = quantity
+                price = self._prices.get(key)
+                if price is not None:
+                    total += quantity * price
+            self._totals[user_id] = total
+    
+    def remove_user(self, user_id: int):
+        with self._lock:
+            self._remove(user_id)
+    
+    def retain(self, keep: Callable[[int], bool]) -> int:
+        """
+        keep(user_id)가 거짓인 사용자 제거 (워커의 샤드가 바뀐 경우)
+        
+        Returns:
+            제거한 사용자 수
+        """
+        with self._lock:
+            removed = [user_id for user_id in self._users if not keep(user_id)]
+            for user_id in removed:
+                self._remove(user_id)
+        return len(removed)
+    
+    def apply_prices(self, group: Hashable, prices: Dict[str, float]) -> Set[int]:
+        """
+        시세 반영: 가격이 바뀐 심볼의 보유자만 누계를 조정
+        
+        Args:
+            group: 시세 그룹 (API 제공자, API 키, 사용자 통화)
+            prices: {심볼: 가격}
+        
+        Returns:
+            누계가 바뀐 사용자 ID
+        """
+        affected: Set[int] = set()
+        with self._lock:
+            for symbol, price in prices.items():
+                key = (group, symbol)
+                holders = self._holders.get(key)
+                if not holders:
+                    continue
+                previous = self._prices.get(key)
+                if previous == price:
+                    continue
+                self._prices[key] = price
+                delta = price - (previous or 0.0)
+                for user_id, quantity in holders.items():
+                    self._totals[user_id] += quantity * delta
+                affected.update(holders)
+        return affected
+    
+    def holdings(self, user_id: int) -> Optional[Tuple[Hashable, Dict[str, float]]]:
+        """인덱스에 반영된 사용자 보유 내역 (그룹, {심볼: 수량})"""
+        with self._lock:
+            return self._users.get(user_id)
+    
+    def total(self, user_id: int) -> Optional[float]:
+        """사용자 평가액 누계 (인덱스에 없으면 None)"""
+        with self._lock:
+            return self._totals.get(user_id)
+    
+    def load(self, entries: Iterable[Tuple[int, Hashable, Dict[str, float]]]):
+        """(user_id, 그룹, {심볼: 수량}) 목록으로 인덱스 전체 재구성 (가격은 다음 시세부터 반영)"""
+        self.clear()
+        count = 0
+        for user_id, group, holdings in entries:
+            self.set_holdings(user_id, group, holdings)
+            count += 1
+        logger.info(f"평가 인덱스 재구성 완료: 사용자 {count}명, 심볼 {len(self._holders)}개")
+    
+    def clear(self):
+        with self._lock:
+            self._holders.clear()
+            self._prices.clear()
+            self._users.clear()
+            self._totals.clear()
+    
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+# 스케줄러와 포트폴리오 변경이 공유하는 평가 인덱스
+valuation_index = ValuationIndex()
@@ -0,0 +1,299 @@
+"""
+심볼별 변동성 통계와 이상 변동 감지
+
+(심볼, 통화, 시세 제공자)별로 틱 사이 로그 수익률의 평균/분산을 Welford 방식으로 O(1) 누적하고,
+새 틱의 수익률이 평소 변동성의 몇 배(z-score)인지 계산합니다.
+통계는 심볼마다 한 번만 계산하여 같은 제공자의 시세를 쓰는 모든 사용자가 공유하며 (제공자 간 시세 차이가 수익률에 섞이지 않도록
+제공자별로 따로 누적), return_stats 테이블에 저장되어 재시작 후에도 이어집니다.
+다중 프로세스 워커는 마지막 저장 이후 관측한 (시각, 가격)을 DB의 통계에 같은 규칙으로 이어 붙이므로
+(이미 반영된 시각 이전과 가격이 그대로인 관측은 건너뜀) 여러 워커가 같은 심볼을 관측해도 한 흐름으로 누적됩니다.
+
+틱 간격이 일정하지 않으므로 (시세 갱신 주기 정렬, 틱 건너뜀) 수익률은 √(경과 분)으로 나눠 1분 기준으로 맞춥니다.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import AlertSettings, ReturnStats
+from app.price_history import to_epoch
+import math
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# provider를 주지 않은 호출의 시세 제공자 (services.normalize_provider의 기본값)
+DEFAULT_PROVIDER = "cmc"
+
+
+@dataclass(slots=True)
+class WelfordStats:
+    """누적 평균/분산 (Welford 온라인 알고리즘)과 마지막 관측 가격"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    last_price: Optional[float] = None
+    last_at: Optional[float] = None  # epoch 초
+    
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def accepts(self, price: float, epoch: float) -> bool:
+        """마지막 관측 이후의 바뀐 가격인지 (같은 틱, 제공자 미갱신 시세는 제외)"""
+        return self.last_at is None or (epoch > self.last_at and price != self.last_price)
+    
+    def log_return(self, price: float, epoch: float, max_gap: float) -> Optional[Tuple[float, float]]:
+        """(로그 수익률, 1분 기준 수익률) - 직전 가격이 없거나 max_gap초보다 오래되었으면 None"""
+        if self.last_price is None or epoch - self.last_at > max_gap:
+            return None
+        log_return = math.log(price / self.last_price)
+        return log_return, log_return / math.sqrt((epoch - self.last_at) / 60)
+    
+    def observe(self, price: float, epoch: float, max_gap: float):
+        """관측 가격 반영 (update와 같은 규칙, z-score 계산 없음)"""
+        if not self.accepts(price, epoch):
+            return
+        returns = self.log_return(price, epoch, max_gap)
+        if returns is not None:
+            self.add(returns[1])
+        self.last_price = price
+        self.last_at = epoch
+    
+    @property
+    def variance(self) -> float:
+        """표본 분산"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+    
+    def zscore(self, value: float) -> Optional[float]:
+        std = self.std
+        if self.count < 2 or std <= 0:
+            return None
+        return (value - self.mean) / std
+
+
+@dataclass(frozen=True, slots=True)
+class ReturnObservation:
+    """한 틱의 수익률과 그 직전까지의 통계 기준 z-score"""
+    symbol: str
+    currency: str
+    log_return: float
+    zscore: Optional[float]
+    timestamp: float
+    
+    @property
+    def change_pct(self) -> float:
+        return math.expm1(self.log_return) * 100
+
+
+class ReturnStatsIndex:
+    """(심볼, 통화, 제공자)별 수익률 통계와 이번 틱의 관측값"""
+    
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str, str], WelfordStats] = {}
+        self._observations: Dict[Tuple[str, str, str], ReturnObservation] = {}
+        # 마지막 저장 이후 반영한 (시각, 가격) - 저장 시 DB의 통계에 이어 붙임
+        self._pending: Dict[Tuple[str, str, str], List[Tuple[float, float]]] = {}
+        # (통화, 제공자)별 마지막으로 반영한 틱 시각
+        self._latest: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+    
+    def update(
+        self,
+        currency: str,
+        prices: Dict[str, float],
+        timestamp: datetime,
+        provider: str = DEFAULT_PROVIDER
+    ) -> Dict[str, ReturnObservation]:
+        """
+        provider(시세 제공자)의 틱 시세로 통계 갱신
+        
+        z-score는 새 수익률을 넣기 전 통계로 계산합니다 (이상치가 자기 기준을 넓히지 않도록).
+        처음 보는 심볼, ANOMALY_MAX_GAP_MINUTES보다 오래된 직전 가격은 기준 가격만 기록하고,
+        같은 틱(다른 시세 그룹)이나 가격이 그대로인 시세(제공자 미갱신)는 건너뜁니다.
+        
+        Returns:
+            {심볼: 관측값} (수익률을 계산한 심볼만)
+        """
+        epoch = to_epoch(timestamp)
+        max_gap = settings.anomaly_max_gap_minutes * 60
+        observations: Dict[str, ReturnObservation] = {}
+        with self._lock:
+            self._latest[(currency, provider)] = max(epoch, self._latest.get((currency, provider), epoch))
+            for symbol, price in prices.items():
+                if not price or price <= 0:
+                    continue
+                key = (symbol, currency, provider)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = WelfordStats()
+                if not stats.accepts(price, epoch):
+                    continue
+                
+                returns = stats.log_return(price, epoch, max_gap)
+                if returns is not None:
+                    log_return, normalized = returns
+                    zscore = stats.zscore(normalized) if stats.count >= settings.anomaly_min_samples else None
+                    stats.add(normalized)
+                    observation = ReturnObservation(symbol, currency, log_return, zscore, epoch)
+                    self._observations[key] = observation
+                    observations[symbol] = observation
+                stats.last_price = price
+                stats.last_at = epoch
+                self._pending.setdefault(key, []).append((epoch, price))
+        return observations
+    
+    def observations(
+        self,
+        symbols: Iterable[str],
+        currency: str,
+        timestamp: Optional[datetime],
+        provider: str = DEFAULT_PROVIDER
+    ) -> Dict[str, ReturnObservation]:
+        """
+        timestamp 틱에서 provider의 시세로 z-score를 계산한 심볼의 관측값 (이전 틱의 관측값은 제외)
+        
+        timestamp가 None이면 해당 통화/제공자로 마지막에 반영한 틱을 사용합니다.
+        """
+        result: Dict[str, ReturnObservation] = {}
+        with self._lock:
+            epoch = to_epoch(timestamp) if timestamp is not None else self._latest.get((currency, provider))
+            for symbol in symbols:
+                observation = self._observations.get((symbol, currency, provider))
+                if observation is not None and observation.timestamp == epoch and observation.zscore is not None:
+                    result[symbol] = observation
+        return result
+    
+    def observations_for(
+        self,
+        alert_settings: Optional[AlertSettings],
+        symbols: Iterable[str],
+        currency: str,
+        timestamp: Optional[datetime],
+        provider: str = DEFAULT_PROVIDER
+    ) -> Optional[Dict[str, ReturnObservation]]:
+        """이상 변동 알림이 켜진 알림 설정이면 보유 심볼의 이번 틱 관측값 (꺼져 있으면 None)"""
+        if not alert_settings or not alert_settings.anomaly_zscore_threshold:
+            return None
+        return self.observations(symbols, currency, timestamp, provider)
+    
+    def stats(self, symbol: str, currency: str, provider: str = DEFAULT_PROVIDER) -> Optional[WelfordStats]:
+        with self._lock:
+            stats = self._stats.get((symbol, currency, provider))
+            return replace(stats) if stats is not None else None
+    
+    def load(self, db: Session) -> int:
+        """저장된 통계 불러오기 (서버 시작 시)"""
+        rows = db.query(ReturnStats).all()
+        with self._lock:
+            for row in rows:
+                self._stats[(row.symbol, row.currency, row.provider)] = self._row_stats(row)
+        logger.info(f"수익률 통계 불러오기 완료: 심볼 {len(rows)}개")
+        return len(rows)
+    
+    def flush(self, db: Session, attempts: int = 3):
+        """
+        마지막 저장 이후 관측을 DB의 통계에 이어 붙이고, 합친 통계를 이 프로세스의 통계로 사용
+        
+        다른 워커가 먼저 저장한 통계가 있으면 그 뒤에 이어 붙이고 (이미 반영된 시각 이전은 건너뜀),
+        읽은 뒤 다른 워커가 행을 바꿨으면 (조건부 UPDATE 실패) 다시 읽어 재시도합니다.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        
+        max_gap = settings.anomaly_max_gap_minutes * 60
+        symbols = {symbol for symbol, _, _ in pending}
+        try:
+            for attempt in range(attempts):
+                merged: Dict[Tuple[str, str, str], WelfordStats] = {}
+                rows = {
+                    (row.symbol, row.currency, row.provider): row
+                    for row in db.query(ReturnStats).filter(ReturnStats.symbol.in_(symbols))
+                }
+                conflict = False
+                for key, points in pending.items():
+                    row = rows.get(key)
+                    stats = self._row_stats(row) if row is not None else WelfordStats()
+                    for epoch, price in points:
+                        stats.observe(price, epoch, max_gap)
+                    merged[key] = stats
+                    values = {
+                        ReturnStats.count: stats.count,
+                        ReturnStats.mean: stats.mean,
+                        ReturnStats.m2: stats.m2,
+                        ReturnStats.last_price: stats.last_price,
+                        ReturnStats.last_tick_at: (
+                            datetime.fromtimestamp(stats.last_at, timezone.utc) if stats.last_at is not None else None
+                        ),
+                    }
+                    if row is None:
+                        db.add(ReturnStats(symbol=key[0], currency=key[1], provider=key[2], **{column.key: value for column, value in values.items()}))
+                        continue
+                    unchanged = db.query(ReturnStats).filter(
+                        ReturnStats.id == row.id,
+                        ReturnStats.count == row.count,
+                        ReturnStats.last_tick_at.is_(None) if row.last_tick_at is None else ReturnStats.last_tick_at == row.last_tick_at
+                    ).update(values, synchronize_session=False)
+                    if not unchanged:
+                        conflict = True
+                        break
+                
+                if not conflict:
+                    try:
+                        db.commit()
+                        break
+                    except IntegrityError:
+                        # 다른 워커가 같은 심볼의 행을 먼저 만든 경우
+                        pass
+                db.rollback()
+                db.expire_all()
+            else:
+                raise RuntimeError(f"다른 워커와 저장이 {attempts}회 충돌했습니다.")
+        except Exception:
+            # 다음 저장 때 다시 시도
+            db.rollback()
+            with self._lock:
+                for key, points in pending.items():
+                    self._pending[key] = points + self._pending.get(key, [])
+            raise
+        
+        with self._lock:
+            for key, stats in merged.items():
+                # 저장하는 동안 이 프로세스가 새로 관측한 가격은 이어 붙여 유지
+                for epoch, price in self._pending.get(key, ()):
+                    stats.observe(price, epoch, max_gap)
+                self._stats[key] = stats
+    
+    @staticmethod
+    def _row_stats(row: ReturnStats) -> WelfordStats:
+        return WelfordStats(
+            count=row.count,
+            mean=row.mean,
+            m2=row.m2,
+            last_price=row.last_price,
+            last_at=to_epoch(row.last_tick_at) if row.last_tick_at else None
+        )
+    
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._observations.clear()
+            self._pending.clear()
+            self._latest.clear()
+    
+    def __len__(self) -> int:
+        return len(self._stats)
+
+
+# 스케줄러가 틱마다 갱신하고 알림 평가가 공유하는 수익률 통계
+return_stats = ReturnStatsIndex()
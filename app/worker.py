@@ -0,0 +1,114 @@
+"""
+다중 프로세스 모니터링 워커
+
+워커 프로세스마다 사용자 샤드의 일부를 맡아 모니터링 틱(시세 조회, 평가, 알림, 스냅샷)과 3시간 요약을 실행합니다.
+샤드 배정은 공유 DB의 monitor_workers/shard_assignments 테이블로 조정되므로 (app/sharding.py)
+같은 DB를 쓰는 여러 호스트에서 실행할 수 있습니다.
+API 서버는 MONITOR_WORKER_MODE=true로 실행하여 모니터링 작업을 워커에 맡깁니다 (텔레그램 봇 명령어는 API 서버가 처리).
+
+사용법:
+    python -m app.worker                    # CPU 코어 수만큼 워커 프로세스 실행
+    python -m app.worker --processes 4
+    python -m app.worker --processes 1 --worker-id host-a   # 호스트마다 한 프로세스
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+
+from app.database import SessionLocal, engine, Base
+from app.sharding import ShardCoordinator
+from app.scheduler import MonitoringScheduler
+from app.price_window import price_windows
+from app.volatility import return_stats
+from app.rate_limit import credit_ledger
+from app.http_pool import http_pool
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(worker_id: Optional[str] = None):
+    """워커 하나 실행 (SIGTERM/SIGINT를 받으면 샤드를 반환하고 종료)"""
+    coordinator = ShardCoordinator(worker_id)
+    
+    db = SessionLocal()
+    try:
+        price_windows.load(db)
+        return_stats.load(db)
+    except Exception as e:
+        logger.warning(f"시세 윈도우/수익률 통계 구성 실패: {e}", exc_info=True)
+    finally:
+        db.close()
+    
+    scheduler = MonitoringScheduler(None, coordinator=coordinator)
+    scheduler.start()
+    logger.info(f"모니터링 워커 시작: worker={coordinator.worker_id}, 샤드 {coordinator.shard_count}개")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+    
+    scheduler.scheduler.shutdown(wait=False)
+    await http_pool.aclose()
+    db = SessionLocal()
+    try:
+        credit_ledger.flush(db)
+        return_stats.flush(db)
+        coordinator.leave(db)
+    except Exception as e:
+        logger.error(f"워커 종료 처리 실패: {e}")
+    finally:
+        db.close()
+    logger.info(f"모니터링 워커 종료: worker={coordinator.worker_id}")
+
+
+def run_worker(worker_id: Optional[str] = None):
+    """워커 프로세스 진입점"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(name)s %(levelname)s %(message)s")
+    asyncio.run(serve(worker_id))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="다중 프로세스 모니터링 워커")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="실행할 워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--worker-id", default=None, help="워커 ID 접두사 (기본: 호스트 이름)")
+    args = parser.parse_args(argv)
+    
+    # 테이블 생성은 워커를 띄우기 전에 한 번만 (프로세스 간 DDL 경합 방지)
+    Base.metadata.create_all(bind=engine)
+    prefix = args.worker_id or socket.gethostname()
+    if args.processes <= 1:
+        run_worker(args.worker_id)
+        return
+    
+    # 워커마다 별도 프로세스 (spawn: 부모의 DB 연결/이벤트 루프를 물려받지 않음)
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(f"{prefix}-{index}",), name=f"monitor-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"모니터링 워커 {len(processes)}개 실행 (샤드 {settings.shard_count}개)")
+    
+    def terminate(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+알림 평가 벤치마크
+
+가짜 사용자/보유 코인(기본 10만 명 x 10개 = 100만 건)을 만들어
+사용자별 Python 루프(AlertService.evaluate_alerts)와 벡터화 알림 엔진(AlertEngine)의
+평가 시간을 비교하고, 두 결과가 같은지 확인합니다.
+
+사용법:
+    python scripts/benchmark_alert_engine.py
+    python scripts/benchmark_alert_engine.py --users 200000 --holdings 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.alert_engine import AlertEngine
+from app.quote import Quote
+from app.services import AlertService
+
+
+def make_tick(user_count: int, holdings_per_user: int, symbol_count: int, seed: int):
+    """사용자별 (사용자, 알림 설정, 평가 결과, 알림 기준) 생성 (시세와 기준 스냅샷은 사용자 간 공유)"""
+    rng = random.Random(seed)
+    symbols = [f"COIN{i}" for i in range(symbol_count)]
+    old_prices = {symbol: rng.uniform(0.01, 50000) for symbol in symbols}
+    quotes = {symbol: Quote(symbol=symbol, price=price * rng.gauss(1.0, 0.01)) for symbol, price in old_prices.items()}
+    snapshot_data = {symbol: {"price": price} for symbol, price in old_prices.items()}
+    timestamp = datetime.now(timezone.utc) - timedelta(hours=1)
+    settings = SimpleNamespace(
+        single_coin_percentage_threshold=3.0,
+        single_coin_absolute_threshold=None,
+        portfolio_percentage_threshold=1.0,
+        portfolio_absolute_threshold=None,
+        min_notification_interval_minutes=15,
+    )
+    
+    users = []
+    for user_id in range(user_count):
+        held = rng.sample(symbols, holdings_per_user)
+        summary = {
+            "total_value": sum(quotes[symbol].price for symbol in held),
+            "items": [{"id": i, "symbol": symbol, "quantity": 1.0} for i, symbol in enumerate(held)],
+            "price_data": {symbol: quotes[symbol] for symbol in held},
+        }
+        baseline = SimpleNamespace(
+            snapshot_data=snapshot_data,
+            total_portfolio_value=sum(old_prices[symbol] for symbol in held),
+            timestamp=timestamp
+        )
+        users.append((user_id, SimpleNamespace(base_currency="USD"), settings, summary, baseline))
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description="알림 평가 벤치마크 (Python 루프 vs NumPy 엔진)")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--holdings", type=int, default=10, help="사용자당 보유 코인 수")
+    parser.add_argument("--symbols", type=int, default=5000, help="전체 코인 종류 수")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("알림 평가 벤치마크")
+    print(f"사용자: {args.users:,}명, 사용자당 보유: {args.holdings}개, 보유 건수: {args.users * args.holdings:,}")
+    print("=" * 60)
+    
+    users = make_tick(args.users, args.holdings, args.symbols, args.seed)
+    now = datetime.now(timezone.utc)
+    
+    started = time.perf_counter()
+    expected = {}
+    for user_id, user, settings, summary, baseline in users:
+        alerts = AlertService.evaluate_alerts(user, settings, summary, baseline, now=now)
+        if alerts:
+            expected[user_id] = alerts
+    loop_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    engine = AlertEngine()
+    for user_id, user, settings, summary, baseline in users:
+        engine.add(user_id, user, settings, summary, baseline, now=now)
+    layout_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = engine.evaluate()
+    evaluate_seconds = time.perf_counter() - started
+    
+    alert_count = sum(len(alerts) for alerts in actual.values())
+    print(f"Python 루프: {loop_seconds:.3f}s")
+    print(f"알림 엔진: {layout_seconds + evaluate_seconds:.3f}s (열 배치 {layout_seconds:.3f}s + 벡터 평가 {evaluate_seconds:.3f}s)")
+    print(f"알림 발생: 사용자 {len(actual):,}명, 알림 {alert_count:,}개")
+    print(f"결과 일치: {'예' if actual == expected else '아니오'}")
+
+
+if __name__ == "__main__":
+    main()
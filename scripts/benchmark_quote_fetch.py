@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+대량 심볼 시세 조회 벤치마크
+
+실제 API 대신 지연 시간을 흉내 낸 가짜 CMC 서버(httpx.MockTransport)를 사용하여
+심볼 수(100, 1,000, 5,000)별 틱 지연 시간을 측정합니다.
+
+사용법:
+    python scripts/benchmark_quote_fetch.py
+    python scripts/benchmark_quote_fetch.py --latency-ms 300 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.cmc_client import AsyncCMCClient
+from app.config import settings
+from app.http_pool import HttpPool
+from app.quote_cache import quote_cache
+from app.rate_limit import rate_limiters
+
+
+def make_transport(latency_seconds: float, per_symbol_seconds: float) -> httpx.MockTransport:
+    """요청당 고정 지연 + 심볼당 처리 시간을 흉내 내는 가짜 CMC 서버"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        symbols = request.url.params["symbol"].split(",")
+        await asyncio.sleep(latency_seconds + per_symbol_seconds * len(symbols))
+        return httpx.Response(200, json={
+            "data": {
+                symbol: [{"quote": {"USD": {"price": 1.0, "last_updated": "2024-01-01T00:00:00Z"}}}]
+                for symbol in symbols
+            }
+        })
+    return httpx.MockTransport(handler)
+
+
+async def measure(symbol_count: int, chunk_size: int, concurrency: int, transport: httpx.MockTransport) -> float:
+    """한 틱(캐시 미적중)의 조회 시간 측정 (초)"""
+    quote_cache.clear()
+    rate_limiters.clear()
+    symbols = [f"COIN{i}" for i in range(symbol_count)]
+    pool = HttpPool(
+        max_connections=100,
+        max_keepalive_connections=20,
+        per_host_limit=concurrency,
+        timeout_seconds=60,
+        transport=transport
+    )
+    with patch("app.cmc_client.http_pool", pool), \
+            patch.object(settings, "cmc_max_symbols_per_request", chunk_size), \
+            patch.object(settings, "quote_chunk_concurrency", concurrency), \
+            patch.object(settings, "cmc_rate_limit_per_minute", 60000), \
+            patch.object(settings, "rate_limit_burst", 1000):
+        client = AsyncCMCClient(api_key="benchmark")
+        started = time.perf_counter()
+        quotes = await client.get_quotes(symbols, "USD")
+        elapsed = time.perf_counter() - started
+    await pool.aclose()
+    assert len(quotes) == symbol_count
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="대량 심볼 시세 조회 벤치마크")
+    parser.add_argument("--latency-ms", type=float, default=200, help="요청당 왕복 지연 시간 (ms)")
+    parser.add_argument("--per-symbol-us", type=float, default=200, help="심볼당 서버 처리 시간 (us)")
+    parser.add_argument("--chunk-size", type=int, default=settings.cmc_max_symbols_per_request)
+    parser.add_argument("--concurrency", type=int, default=settings.quote_chunk_concurrency)
+    args = parser.parse_args()
+    
+    transport = make_transport(args.latency_ms / 1000, args.per_symbol_us / 1_000_000)
+    
+    print("=" * 60)
+    print("시세 조회 벤치마크 (가짜 CMC 서버)")
+    print(f"요청 지연: {args.latency_ms:.0f}ms, 심볼당 처리: {args.per_symbol_us:.0f}us")
+    print(f"묶음 크기: {args.chunk_size}, 동시 요청: {args.concurrency}")
+    print("=" * 60)
+    print(f"{'심볼 수':>8} | {'요청 수':>6} | {'순차 (1)':>10} | {'동시 (' + str(args.concurrency) + ')':>10}")
+    
+    for symbol_count in (100, 1000, 5000):
+        requests_count = -(-symbol_count // args.chunk_size)
+        sequential = await measure(symbol_count, args.chunk_size, 1, transport)
+        concurrent = await measure(symbol_count, args.chunk_size, args.concurrency, transport)
+        print(f"{symbol_count:>8} | {requests_count:>6} | {sequential:>9.2f}s | {concurrent:>9.2f}s")
+    
+    print()
+    print("참고: 실제 환경에서는 API 키별 속도 제한(CMC_RATE_LIMIT_PER_MINUTE)이 추가로 적용됩니다.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
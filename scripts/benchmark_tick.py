@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+모니터링 틱 벤치마크
+
+가짜 사용자(기본 1,000명)를 임시 SQLite DB에 만들고, 시세 조회와 텔레그램 전송을
+지연 시간을 흉내 낸 가짜 구현으로 바꿔 모니터링 틱(check_portfolio_and_alert) 전체 시간과
+틱이 아웃박스에 기록한 알림의 전송(dispatch_outbox) 시간을 따로 측정합니다.
+첫 틱은 알림 기준을 만들고, 두 번째 틱에서 모든 사용자에게 알림이 발생합니다.
+일부 사용자는 전송이 멈춘 것처럼 동작하여 사용자별 제한 시간이 다른 사용자를 막지 않는지 확인합니다.
+
+사용법:
+    python scripts/benchmark_tick.py
+    python scripts/benchmark_tick.py --users 5000 --send-latency-ms 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import User, PortfolioItem, AlertSettings
+from app.quote import Quote
+from app.services import QuoteService
+import app.scheduler as scheduler_module
+
+
+class FakeBot:
+    """전송마다 고정 지연, 멈춘 chat_id는 응답하지 않는 가짜 텔레그램 봇"""
+    
+    def __init__(self, latency_seconds: float, stalled: set):
+        self.latency_seconds = latency_seconds
+        self.stalled = stalled
+        self.sent = 0
+    
+    async def send_message(self, chat_id, text):
+        if chat_id in self.stalled:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(self.latency_seconds)
+        self.sent += 1
+
+
+def make_users(session_factory, user_count: int, holdings_per_user: int, symbols: list, seed: int):
+    rng = random.Random(seed)
+    db = session_factory()
+    for i in range(user_count):
+        user = User(telegram_chat_id=str(i), base_currency="USD")
+        db.add(user)
+        db.flush()
+        for symbol in rng.sample(symbols, holdings_per_user):
+            db.add(PortfolioItem(user_id=user.id, symbol=symbol, quantity=rng.uniform(0.1, 10)))
+        db.add(AlertSettings(user_id=user.id, min_notification_interval_minutes=0))
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--holdings", type=int, default=5, help="사용자당 보유 코인 수")
+    parser.add_argument("--symbols", type=int, default=50, help="전체 심볼 수")
+    parser.add_argument("--send-latency-ms", type=float, default=100, help="텔레그램 전송 1건 지연 시간")
+    parser.add_argument("--quote-latency-ms", type=float, default=300, help="시세 그룹 조회 지연 시간")
+    parser.add_argument("--stalled", type=int, default=10, help="전송이 멈추는 사용자 수")
+    parser.add_argument("--concurrency", type=int, default=settings.tick_user_concurrency)
+    parser.add_argument("--timeout", type=float, default=5, help="사용자당 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    settings.tick_user_concurrency = args.concurrency
+    settings.tick_user_timeout_seconds = args.timeout
+    settings.price_history_enabled = False
+    
+    symbols = [f"COIN{i}" for i in range(args.symbols)]
+    tmpdir = tempfile.mkdtemp(prefix="benchmark_tick_")
+    engine = create_engine(f"sqlite:///{tmpdir}/tick.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    scheduler_module.SessionLocal = session_factory
+    make_users(session_factory, args.users, args.holdings, symbols, args.seed)
+    
+    # 시세 그룹 조회 1회 지연 후 모든 심볼을 같은 배율로 변동
+    factor = {"value": 1.0}
+    
+    async def fetch(self, users, holdings, freshness_tick=None, extra_symbols=None):
+        await asyncio.sleep(args.quote_latency_ms / 1000)
+        self.changed_symbols = {user.id: set(symbols) for user in users}
+        quotes = {symbol: Quote(symbol=symbol, price=100.0 * factor["value"]) for symbol in symbols}
+        return {user.id: quotes for user in users}
+    
+    QuoteService.fetch_for_users_async = fetch
+    
+    scheduler = scheduler_module.MonitoringScheduler(None)
+    stalled = {str(i) for i in range(min(args.stalled, args.users))}
+    scheduler.bot = FakeBot(args.send_latency_ms / 1000, stalled)
+    
+    print(f"사용자 {args.users:,}명, 보유 {args.holdings}개, 동시 처리 {args.concurrency}명, 멈춘 사용자 {len(stalled)}명")
+    for label, value in (("기준 틱", 1.0), ("알림 틱", 1.2)):
+        factor["value"] = value
+        scheduler.bot.sent = 0
+        started = time.perf_counter()
+        asyncio.run(scheduler.check_portfolio_and_alert())
+        tick_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        asyncio.run(scheduler.dispatch_outbox())
+        elapsed = time.perf_counter() - started
+        sequential = scheduler.bot.sent * args.send_latency_ms / 1000 + len(stalled) * args.timeout
+        print(
+            f"  {label}: 틱 {tick_elapsed:7.2f}초, 아웃박스 전송 {elapsed:7.2f}초 "
+            f"(전송 {scheduler.bot.sent:,}건, 순차 전송 예상 {sequential:,.1f}초)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.quote_cache import quote_cache
+from app.rate_limit import rate_limiters
+from app.provider_router import provider_router
+from app.valuation_index import valuation_index
+from app.price_triggers import price_trigger_index
+from app.tick_store import holdings_versions
+from app.price_window import price_windows
+from app.volatility import return_stats
+
+
+@pytest.fixture(autouse=True)
+def clear_quote_cache():
+    """테스트 간 공유 시세 캐시, 속도 제한, 제공자 라우터, 평가/가격 트리거 인덱스, 보유 내역 버전 캐시, 시세 윈도우, 수익률 통계 상태 초기화"""
+    quote_cache.clear()
+    rate_limiters.clear()
+    provider_router.reset()
+    valuation_index.clear()
+    price_trigger_index.clear()
+    holdings_versions.clear()
+    price_windows.clear()
+    return_stats.clear()
+    yield
+    quote_cache.clear()
+    rate_limiters.clear()
+    provider_router.reset()
+    valuation_index.clear()
+    price_trigger_index.clear()
+    holdings_versions.clear()
+    price_windows.clear()
+    return_stats.clear()
+
+
+@pytest.fixture
+def db():
+    """테스트용 인메모리 SQLite 세션"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
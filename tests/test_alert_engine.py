@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.alert_engine import AlertEngine
+from app.quote import Quote
+from app.services import AlertService
+
+
+def make_case(rng):
+    symbols = rng.sample(["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE"], rng.randint(1, 5))
+    old_prices = {symbol: rng.choice([0.0, rng.uniform(0.1, 50000)]) for symbol in symbols}
+    new_prices = {symbol: price * rng.uniform(0.8, 1.2) for symbol, price in old_prices.items()}
+    # 현재 시세가 없는 심볼과 기준 스냅샷에 없는 심볼도 포함
+    if rng.random() < 0.3:
+        new_prices.pop(symbols[0])
+    if rng.random() < 0.3:
+        old_prices.pop(symbols[-1])
+    
+    user = SimpleNamespace(base_currency=rng.choice(["USD", "KRW"]))
+    settings = SimpleNamespace(
+        single_coin_percentage_threshold=rng.choice([1.0, 5.0, 10.0]),
+        single_coin_absolute_threshold=rng.choice([None, 0, 10.0, 1000.0]),
+        portfolio_percentage_threshold=rng.choice([1.0, 5.0, 10.0]),
+        portfolio_absolute_threshold=rng.choice([None, 0, 100.0]),
+        min_notification_interval_minutes=15,
+    )
+    summary = {
+        "total_value": rng.choice([0.0, rng.uniform(0, 100000)]),
+        "base_currency": user.base_currency,
+        "items": [{"id": i, "symbol": symbol, "quantity": 1.0} for i, symbol in enumerate(symbols)],
+        "price_data": {symbol: Quote(symbol=symbol, price=price) for symbol, price in new_prices.items()},
+    }
+    baseline = SimpleNamespace(
+        snapshot_data={symbol: {"price": price} for symbol, price in old_prices.items()},
+        total_portfolio_value=rng.choice([0.0, rng.uniform(0, 100000)]),
+        timestamp=datetime.now(timezone.utc) - timedelta(minutes=rng.choice([5, 60]))
+    )
+    return user, settings, summary, baseline
+
+
+def test_engine_matches_evaluate_alerts():
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    cases = [make_case(rng) for _ in range(500)]
+    
+    engine = AlertEngine()
+    for i, (user, settings, summary, baseline) in enumerate(cases):
+        engine.add(i, user, settings, summary, baseline, now=now)
+    alerts_by_user = engine.evaluate()
+    
+    expected = {
+        i: AlertService.evaluate_alerts(user, settings, summary, baseline, now=now)
+        for i, (user, settings, summary, baseline) in enumerate(cases)
+    }
+    assert any(expected.values())
+    assert {i: alerts_by_user.get(i, []) for i in expected} == expected
+
+
+def test_engine_skips_users_without_settings_or_within_interval():
+    now = datetime.now(timezone.utc)
+    user = SimpleNamespace(base_currency="USD")
+    settings = SimpleNamespace(
+        single_coin_percentage_threshold=5.0,
+        single_coin_absolute_threshold=None,
+        portfolio_percentage_threshold=10.0,
+        portfolio_absolute_threshold=None,
+        min_notification_interval_minutes=15,
+    )
+    summary = {
+        "total_value": 200.0,
+        "items": [{"id": 1, "symbol": "BTC", "quantity": 1.0}],
+        "price_data": {"BTC": Quote(symbol="BTC", price=200.0)},
+    }
+    recent = SimpleNamespace(snapshot_data={"BTC": {"price": 100.0}}, total_portfolio_value=100.0, timestamp=now - timedelta(minutes=5))
+    
+    engine = AlertEngine()
+    assert not engine.add(1, user, None, summary, recent, now=now)
+    assert not engine.add(2, user, settings, summary, None, now=now)
+    assert not engine.add(3, user, settings, summary, recent, now=now)
+    assert len(engine) == 0
+    assert engine.evaluate() == {}
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.models import User, AlertSettings
+from app.quote import Quote
+from app.services import AlertService
+from app.tick_store import TickStore, holdings_versions
+from app.volatility import return_stats
+
+
+def make_summary(total_value, prices):
+    return {
+        "total_value": total_value,
+        "base_currency": "USD",
+        "items": [{"id": i, "symbol": symbol, "quantity": 1.0} for i, symbol in enumerate(prices)],
+        "price_data": {symbol: Quote(symbol=symbol, price=price) for symbol, price in prices.items()},
+    }
+
+
+def make_settings(**overrides):
+    values = {
+        "single_coin_percentage_threshold": 5.0,
+        "single_coin_absolute_threshold": None,
+        "portfolio_percentage_threshold": 10.0,
+        "portfolio_absolute_threshold": None,
+        "min_notification_interval_minutes": 15,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def make_baseline(total_value, prices, minutes_ago=60):
+    return SimpleNamespace(
+        snapshot_data={symbol: {"price": price} for symbol, price in prices.items()},
+        total_portfolio_value=total_value,
+        timestamp=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    )
+
+
+def test_evaluate_alerts_compares_against_baseline():
+    user = SimpleNamespace(base_currency="USD")
+    alerts = AlertService.evaluate_alerts(
+        user,
+        make_settings(),
+        make_summary(120.0, {"BTC": 110.0, "ETH": 10.1}),
+        make_baseline(100.0, {"BTC": 100.0, "ETH": 10.0})
+    )
+    
+    assert [(alert["type"], alert.get("symbol")) for alert in alerts] == [
+        ("portfolio_percentage", None),
+        ("coin_percentage", "BTC"),
+    ]
+
+
+def test_evaluate_alerts_respects_min_interval_and_missing_baseline():
+    user = SimpleNamespace(base_currency="USD")
+    summary = make_summary(200.0, {"BTC": 200.0})
+    
+    assert AlertService.evaluate_alerts(user, make_settings(), summary, make_baseline(100.0, {"BTC": 100.0}, minutes_ago=5)) == []
+    assert AlertService.evaluate_alerts(user, make_settings(), summary, None) == []
+
+
+def test_alert_baseline_is_last_notified_snapshot(db):
+    user = User(telegram_chat_id="1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    db.add(AlertSettings(user_id=user.id, min_notification_interval_minutes=0))
+    db.commit()
+    service = AlertService(db)
+    
+    notified_tick = TickStore(datetime.now(timezone.utc) - timedelta(minutes=2))
+    latest_tick = TickStore(datetime.now(timezone.utc) - timedelta(minutes=1))
+    version_id = holdings_versions.resolve(db, {user.id: {"BTC": 1.0}})[user.id]
+    notified = service.save_snapshot(
+        user.id, 100.0,
+        tick=notified_tick.record(db, "cmc", "USD", {"BTC": Quote(symbol="BTC", price=100.0)}),
+        holdings_version_id=version_id,
+        alert_baseline=True
+    )
+    service.save_snapshot(
+        user.id, 104.0,
+        tick=latest_tick.record(db, "cmc", "USD", {"BTC": Quote(symbol="BTC", price=104.0)}),
+        holdings_version_id=version_id
+    )
+    
+    assert service.get_alert_baseline(user.id).id == notified.id
+    
+    # 직전 스냅샷(104)이 아니라 마지막 알림 시점(100) 대비 변동으로 알림
+    alerts = service.check_alerts(user.id, summary=make_summary(106.0, {"BTC": 106.0}))
+    assert [alert["type"] for alert in alerts] == ["coin_percentage"]
+
+
+def test_check_alerts_includes_anomaly_from_last_tick(db):
+    """check_alerts도 모니터링 틱이 마지막으로 반영한 사용자 제공자의 수익률로 이상 변동을 알림"""
+    user = User(telegram_chat_id="1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    db.add(AlertSettings(
+        user_id=user.id, min_notification_interval_minutes=0, single_coin_percentage_threshold=50.0,
+        portfolio_percentage_threshold=50.0, anomaly_zscore_threshold=4.0
+    ))
+    db.commit()
+    service = AlertService(db)
+    start = datetime.now(timezone.utc) - timedelta(hours=2)
+    version_id = holdings_versions.resolve(db, {user.id: {"BTC": 1.0}})[user.id]
+    service.save_snapshot(
+        user.id, 100.0,
+        tick=TickStore(start).record(db, "cmc", "USD", {"BTC": Quote(symbol="BTC", price=100.0)}),
+        holdings_version_id=version_id,
+        alert_baseline=True
+    )
+    
+    price = 100.0
+    for minute in range(100):
+        price *= 1.001 if minute % 2 else 0.999
+        return_stats.update("USD", {"BTC": price}, start + timedelta(minutes=minute), "cmc")
+    return_stats.update("USD", {"BTC": price * 1.03}, start + timedelta(minutes=100), "cmc")
+    # 다른 제공자의 나중 틱은 이 사용자(cmc)의 관측에 영향 없음
+    return_stats.update("USD", {"BTC": 90.0}, start + timedelta(minutes=101), "coingecko")
+    
+    alerts = service.check_alerts(user.id, summary=make_summary(price * 1.03, {"BTC": price * 1.03}))
+    assert [(alert["type"], alert["symbol"]) for alert in alerts] == [("coin_anomaly", "BTC")]
@@ -85,3 +85,20 @@ def test_get_nonexistent_user(client):
     response = client.get("/api/users/999999999")
     assert response.status_code == 404
 
+
+
+def test_portfolio_history(client):
+    client.post("/api/users", json={"telegram_chat_id": "123456789", "base_currency": "USD"})
+    response = client.get("/api/portfolio/history", params={
+        "telegram_chat_id": "123456789",
+        "from": "2026-01-01T00:00:00Z",
+        "to": "2026-01-02T00:00:00Z",
+        "resolution": "1h",
+    })
+    assert response.status_code == 200
+    assert response.json()["resolution"] == "1h"
+    assert response.json()["timestamps"] == []
+    
+    response = client.get("/api/portfolio/history", params={"telegram_chat_id": "123456789", "resolution": "5m"})
+    assert response.status_code == 400
+    assert client.get("/api/portfolio/history", params={"telegram_chat_id": "999999999"}).status_code == 404
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+import httpx
+from unittest.mock import patch
+from app.cmc_client import AsyncCMCClient
+from app.coingecko_client import AsyncCoinGeckoClient
+from app.http_pool import HttpPool
+
+
+def make_pool(handler):
+    return HttpPool(
+        max_connections=10,
+        max_keepalive_connections=5,
+        per_host_limit=2,
+        timeout_seconds=5,
+        transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_cmc_client_parses_quotes():
+    def handler(request):
+        assert request.url.params["symbol"] == "BTC,ETH"
+        return httpx.Response(200, json={
+            "data": {
+                "BTC": [{"quote": {"USD": {"price": 50000, "percent_change_24h": 5.0}}}],
+                "ETH": [{"quote": {"USD": {"price": 3000}}}],
+            }
+        })
+    
+    with patch("app.cmc_client.http_pool", make_pool(handler)):
+        client = AsyncCMCClient(api_key="test_key")
+        quotes = await client.get_quotes(["BTC", "ETH"], "USD")
+    
+    assert quotes["BTC"].price == 50000
+    assert quotes["BTC"].percent_change_24h == 5.0
+    assert quotes["ETH"].price == 3000
+
+
+@pytest.mark.asyncio
+async def test_async_cmc_client_failure():
+    def handler(request):
+        return httpx.Response(500, json={})
+    
+    with patch("app.cmc_client.http_pool", make_pool(handler)):
+        client = AsyncCMCClient(api_key="test_key")
+        with pytest.raises(Exception) as exc_info:
+            await client.get_latest_quotes(["BTC"], "USD")
+    
+    assert "CMC API 요청 실패" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_async_coingecko_client_builds_quotes():
+    def handler(request):
+        assert request.url.params["ids"] == "bitcoin"
+        return httpx.Response(200, json={"bitcoin": {"krw": 90000000, "krw_24h_change": -1.5}})
+    
+    with patch("app.coingecko_client.http_pool", make_pool(handler)):
+        client = AsyncCoinGeckoClient()
+        response = await client.get_latest_quotes(["BTC"], "KRW")
+    
+    result = client.parse_quote_data(response, "BTC", "KRW")
+    assert result.price == 90000000
+    assert result.percent_change_24h == -1.5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_requests_share_one_upstream_call():
+    calls = []
+    
+    async def handler(request):
+        calls.append(request.url.params["symbol"])
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"data": {"BTC": [{"quote": {"USD": {"price": 1}}}]}})
+    
+    with patch("app.cmc_client.http_pool", make_pool(handler)):
+        client = AsyncCMCClient(api_key="test_key")
+        await asyncio.gather(*(client.get_latest_quotes(["BTC"], "USD") for _ in range(5)))
+    
+    assert calls == ["BTC"]
+
+
+@pytest.mark.asyncio
+async def test_http_pool_reuses_client_within_loop():
+    pool = make_pool(lambda request: httpx.Response(200, json={}))
+    
+    await pool.get("https://example.com/a")
+    first = pool._state().client
+    await pool.get("https://example.com/b")
+    
+    assert pool._state().client is first
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_large_symbol_sets_are_chunked_and_merged():
+    requested = []
+    
+    def handler(request):
+        symbols = request.url.params["symbol"].split(",")
+        requested.append(len(symbols))
+        return httpx.Response(200, json={
+            "data": {symbol: [{"quote": {"USD": {"price": i}}}] for i, symbol in enumerate(symbols)}
+        })
+    
+    symbols = [f"C{i}" for i in range(250)]
+    with patch("app.cmc_client.http_pool", make_pool(handler)), \
+            patch("app.cmc_client.settings.cmc_max_symbols_per_request", 100):
+        client = AsyncCMCClient(api_key="test_key")
+        quotes = await client.get_quotes(symbols, "USD")
+    
+    assert sorted(requested) == [50, 100, 100]
+    assert set(quotes.keys()) == set(symbols)
@@ -1,7 +1,16 @@
+import json
 import pytest
 from unittest.mock import Mock, patch
 import requests
 from app.cmc_client import CMCClient
+from app.quote import Quote
+
+
+def mock_json_response(data):
+    mock_response = Mock()
+    mock_response.content = json.dumps(data).encode()
+    mock_response.raise_for_status = Mock()
+    return mock_response
 
 
 def test_cmc_client_init():
@@ -12,8 +21,7 @@ def test_cmc_client_init():
 
 @patch("app.cmc_client.requests.get")
 def test_get_latest_quotes_success(mock_get):
-    mock_response = Mock()
-    mock_response.json.return_value = {
+    mock_get.return_value = mock_json_response({
         "data": {
             "BTC": [{
                 "quote": {
@@ -25,15 +33,14 @@ def test_get_latest_quotes_success(mock_get):
                 }
             }]
         }
-    }
-    mock_response.raise_for_status = Mock()
-    mock_get.return_value = mock_response
+    })
     
     client = CMCClient(api_key="test_key")
     result = client.get_latest_quotes(["BTC"], "USD")
     
     assert "data" in result
     assert "BTC" in result["data"]
+    assert client.parse_quote_data(result, "BTC", "USD").price == 50000
 
 
 @patch("app.cmc_client.requests.get")
@@ -70,8 +77,26 @@ def test_parse_quote_data():
     client = CMCClient(api_key="test_key")
     result = client.parse_quote_data(response_data, "BTC", "USD")
     
-    assert result is not None
-    assert result["symbol"] == "BTC"
-    assert result["price"] == 50000
-    assert result["percent_change_24h"] == 5.0
+    assert isinstance(result, Quote)
+    assert result.symbol == "BTC"
+    assert result.price == 50000
+    assert result.percent_change_24h == 5.0
 
+
+
+@patch("app.cmc_client.requests.get")
+def test_get_latest_quotes_chunks_large_symbol_sets(mock_get):
+    def fake_get(url, headers=None, params=None, timeout=None):
+        symbols = params["symbol"].split(",")
+        return mock_json_response({
+            "data": {symbol: [{"quote": {"USD": {"price": 1}}}] for symbol in symbols}
+        })
+    
+    mock_get.side_effect = fake_get
+    symbols = [f"C{i}" for i in range(150)]
+    
+    with patch("app.cmc_client.settings.cmc_max_symbols_per_request", 100):
+        result = CMCClient(api_key="test_key").get_quotes(symbols, "USD")
+    
+    assert mock_get.call_count == 2
+    assert len(result) == 150
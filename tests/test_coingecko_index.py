@@ -0,0 +1,73 @@
+import time
+from unittest.mock import patch
+from app.coingecko_client import CoinGeckoClient
+from app.coingecko_index import CoinGeckoSymbolIndex
+
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "pepe", "symbol": "pepe", "name": "Pepe"},
+    {"id": "pepe-token-on-some-chain", "symbol": "pepe", "name": "Pepe (bridged)"},
+    {"id": "zeta-b", "symbol": "zeta", "name": "Zeta B"},
+    {"id": "zeta-a", "symbol": "zeta", "name": "Zeta A"},
+]
+MARKETS = [
+    {"id": "bitcoin", "symbol": "btc", "market_cap_rank": 1},
+    {"id": "pepe-token-on-some-chain", "symbol": "pepe", "market_cap_rank": 30},
+]
+
+
+def make_index(tmp_path, refresh_hours=24):
+    return CoinGeckoSymbolIndex(str(tmp_path / "symbols.tsv.gz"), refresh_hours=refresh_hours, rank_pages=1)
+
+
+def test_build_index_prefers_market_cap_rank():
+    ids = CoinGeckoSymbolIndex.build_index(COINS, MARKETS)
+    
+    assert ids["BTC"] == "bitcoin"
+    assert ids["PEPE"] == "pepe-token-on-some-chain"
+    # 순위가 없으면 ID 길이, ID 순으로 결정
+    assert ids["ZETA"] == "zeta-a"
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = make_index(tmp_path)
+    ids = CoinGeckoSymbolIndex.build_index(COINS, MARKETS)
+    
+    index.save(ids, built_at=1700000000)
+    loaded, built_at = index.load()
+    
+    assert loaded == ids
+    assert built_at == 1700000000
+
+
+def test_resolve_downloads_once_and_persists(tmp_path):
+    index = make_index(tmp_path)
+    ids = CoinGeckoSymbolIndex.build_index(COINS, MARKETS)
+    
+    with patch.object(CoinGeckoSymbolIndex, "download", return_value=ids) as mock_download:
+        assert index.resolve("pepe") == "pepe-token-on-some-chain"
+        assert index.resolve("ZETA") == "zeta-a"
+        assert index.resolve("UNKNOWN") is None
+    
+    assert mock_download.call_count == 1
+    assert make_index(tmp_path).resolve("BTC") == "bitcoin"
+
+
+def test_stale_index_is_used_while_refreshing(tmp_path):
+    index = make_index(tmp_path, refresh_hours=1)
+    index.save({"OLD": "old-coin"}, built_at=time.time() - 7200)
+    
+    with patch.object(CoinGeckoSymbolIndex, "_refresh_in_background") as mock_refresh:
+        assert index.resolve("OLD") == "old-coin"
+    
+    mock_refresh.assert_called_once()
+
+
+def test_client_falls_back_to_index(tmp_path):
+    index = make_index(tmp_path)
+    index.save({"PEPE": "pepe", "BTC": "some-other-btc"}, built_at=time.time())
+    
+    with patch("app.coingecko_client.coingecko_index", index):
+        client = CoinGeckoClient()
+        assert client._get_coin_ids(["BTC", "PEPE", "NOPE"]) == {"BTC": "bitcoin", "PEPE": "pepe"}
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import User, PriceSnapshot, PriceTick, SnapshotRollup
+from app.quote import Quote
+from app.compaction import SnapshotCompactor
+from app.tick_store import TickStore, holdings_versions
+
+DAY = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def session_factory():
+    """압축기가 묶음마다 새 세션을 열어도 같은 인메모리 DB를 사용"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def add_snapshots(db, user_id, points, alert_baseline_at=()):
+    """(시각, BTC 가격) 목록으로 틱과 스냅샷 기록 (보유: BTC 1개)"""
+    version_id = holdings_versions.resolve(db, {user_id: {"BTC": 1.0}})[user_id]
+    for timestamp, price in points:
+        tick = TickStore(timestamp).record(db, "cmc", "USD", {"BTC": Quote(symbol="BTC", price=price)})
+        db.add(PriceSnapshot(
+            user_id=user_id, total_portfolio_value=price, timestamp=timestamp,
+            price_provider=tick.provider, price_currency=tick.currency, tick_at=tick.timestamp,
+            holdings_version_id=version_id, alert_baseline=timestamp in alert_baseline_at
+        ))
+    db.commit()
+
+
+def rollups(db, resolution):
+    return [
+        (rollup.bucket_start, rollup.open_value, rollup.high_value, rollup.low_value, rollup.close_value,
+         rollup.sample_count, rollup.closes)
+        for rollup in db.query(SnapshotRollup).filter(SnapshotRollup.resolution == resolution).order_by(SnapshotRollup.bucket_start)
+    ]
+
+
+def make_history(session_factory):
+    db = session_factory()
+    user = User(telegram_chat_id="1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    add_snapshots(db, user.id, [
+        (DAY + timedelta(hours=10, minutes=5), 100.0),
+        (DAY + timedelta(hours=10, minutes=20), 120.0),
+        (DAY + timedelta(hours=10, minutes=50), 90.0),
+        (DAY + timedelta(hours=11, minutes=10), 110.0),
+        (DAY + timedelta(days=1, minutes=10), 130.0),
+    ])
+    return db
+
+
+@pytest.mark.parametrize("batch_size", [2, 100])
+def test_rollups_are_ohlc_of_total_value_with_symbol_closes(session_factory, batch_size):
+    db = make_history(session_factory)
+    
+    report = SnapshotCompactor(session_factory, batch_size=batch_size, pause_seconds=0).run(now=DAY + timedelta(days=1, hours=1, minutes=30))
+    
+    day = DAY.replace(tzinfo=None)
+    assert rollups(db, "1h") == [
+        (day + timedelta(hours=10), 100.0, 120.0, 90.0, 90.0, 3, {"BTC": 90.0}),
+        (day + timedelta(hours=11), 110.0, 110.0, 110.0, 110.0, 1, {"BTC": 110.0}),
+        (day + timedelta(days=1), 130.0, 130.0, 130.0, 130.0, 1, {"BTC": 130.0}),
+    ]
+    # 진행 중인 날(다음 날)은 1일 집계에서 제외
+    assert rollups(db, "1d") == [(day, 100.0, 120.0, 90.0, 110.0, 4, {"BTC": 110.0})]
+    assert (report.hourly_rollups, report.daily_rollups) == (3, 1)
+    assert [rollup.close_values for rollup in db.query(SnapshotRollup).order_by(SnapshotRollup.resolution.desc(), SnapshotRollup.bucket_start)] == [
+        {"BTC": 90.0}, {"BTC": 110.0}, {"BTC": 130.0}, {"BTC": 110.0}
+    ]
+
+
+def test_rerun_recomputes_last_bucket_without_duplicates(session_factory):
+    db = make_history(session_factory)
+    compactor = SnapshotCompactor(session_factory, pause_seconds=0)
+    now = DAY + timedelta(days=1, hours=1, minutes=30)
+    compactor.run(now=now)
+    first = rollups(db, "1h")
+    
+    compactor.run(now=now)
+    
+    db.expire_all()
+    assert rollups(db, "1h") == first
+    assert len(rollups(db, "1d")) == 1
+
+
+def test_retention_deletes_old_rows_but_keeps_latest_baseline(session_factory, monkeypatch):
+    monkeypatch.setattr("app.compaction.settings.snapshot_retention_days", 7)
+    db = session_factory()
+    user = User(telegram_chat_id="1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    baseline_at = DAY + timedelta(hours=1)
+    add_snapshots(db, user.id, [
+        (DAY, 100.0),
+        (baseline_at, 101.0),
+        (DAY + timedelta(hours=2), 102.0),
+        (DAY + timedelta(days=10), 150.0),
+    ], alert_baseline_at={baseline_at})
+    
+    report = SnapshotCompactor(session_factory, batch_size=1, pause_seconds=0).run(now=DAY + timedelta(days=10, hours=2))
+    
+    db.expire_all()
+    remaining = [snapshot.total_portfolio_value for snapshot in db.query(PriceSnapshot).order_by(PriceSnapshot.timestamp)]
+    assert remaining == [101.0, 150.0]
+    # 남은 스냅샷이 참조하는 틱만 유지
+    assert sorted(tick.price for tick in db.query(PriceTick)) == [101.0, 150.0]
+    assert (report.deleted_snapshots, report.deleted_ticks) == (2, 2)
+    assert report.to_dict()["deleted_rows"] == 4
+    assert report.reclaimed_bytes is not None
+    # 삭제 전에 집계에 반영됨
+    assert [row[4] for row in rollups(db, "1h")][:3] == [100.0, 101.0, 102.0]
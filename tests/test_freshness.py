@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+from app.freshness import FreshnessTracker, freshness_tracker, parse_last_updated
+from app.quote import Quote
+from app.services import QuoteService
+from tests.test_services import make_user, make_item
+
+
+def quotes_at(last_updated, **prices):
+    return {symbol: Quote(symbol=symbol, price=price, last_updated=last_updated) for symbol, price in prices.items()}
+
+
+def test_parse_last_updated_formats():
+    assert parse_last_updated("2024-01-01T00:01:00.000Z") == parse_last_updated("2024-01-01T00:00:00Z") + 60
+    assert parse_last_updated("1704067200") == 1704067200.0
+    assert parse_last_updated(None) is None
+
+
+def test_observe_reports_only_changed_symbols():
+    tracker = FreshnessTracker()
+    
+    assert tracker.observe("cmc", "USD", quotes_at("2024-01-01T00:00:00Z", BTC=1.0, ETH=2.0)) == {"BTC", "ETH"}
+    assert tracker.observe("cmc", "USD", quotes_at("2024-01-01T00:00:00Z", BTC=1.0, ETH=2.0)) == set()
+    
+    quotes = quotes_at("2024-01-01T00:00:00Z", ETH=2.0)
+    quotes.update(quotes_at("2024-01-01T00:01:00Z", BTC=1.5))
+    assert tracker.observe("cmc", "USD", quotes) == {"BTC"}
+    
+    # 통화가 다르면 별도로 추적
+    assert tracker.observe("cmc", "KRW", quotes) == {"BTC", "ETH"}
+
+
+def test_observe_same_tick_reports_same_changes():
+    tracker = FreshnessTracker()
+    quotes = quotes_at("2024-01-01T00:00:00Z", BTC=1.0)
+    
+    # 같은 틱의 다른 사용자 묶음에서 다시 관측해도 갱신으로 판단
+    assert tracker.observe("cmc", "USD", quotes, tick=1) == {"BTC"}
+    assert tracker.observe("cmc", "USD", quotes, tick=1) == {"BTC"}
+    assert tracker.observe("cmc", "USD", quotes, tick=2) == set()
+
+
+def test_cadence_and_next_update():
+    tracker = FreshnessTracker()
+    base = parse_last_updated("2024-01-01T00:00:00Z")
+    for minute in range(4):
+        tracker.observe("cmc", "USD", quotes_at(f"2024-01-01T00:0{minute}:00Z", BTC=1.0))
+    
+    assert tracker.cadence("cmc") == 60
+    assert tracker.cadence("coingecko") is None
+    # 마지막 갱신(3분) 이후 시각에서 다음 갱신은 4분, 주기를 여러 번 지났으면 now 이후 첫 갱신
+    assert tracker.next_update_at(["cmc", "coingecko"], now=base + 200) == base + 240
+    assert tracker.next_update_at(["cmc"], now=base + 250) == base + 300
+
+
+@pytest.mark.asyncio
+async def test_fetch_for_users_async_tracks_changed_symbols():
+    users = [make_user(1), make_user(2)]
+    holdings = {1: [make_item(1, 1, "BTC", 1.0)], 2: [make_item(2, 2, "ETH", 1.0)]}
+    responses = [
+        quotes_at("2024-01-01T00:00:00Z", BTC=1.0, ETH=2.0),
+        {**quotes_at("2024-01-01T00:00:00Z", ETH=2.0), **quotes_at("2024-01-01T00:01:00Z", BTC=1.1)},
+    ]
+    
+    async def fake_fetch(self, key, symbols):
+        return responses.pop(0)
+    
+    freshness_tracker.clear()
+    with patch.object(QuoteService, "fetch_routed", fake_fetch):
+        first = QuoteService()
+        await first.fetch_for_users_async(users, holdings, freshness_tick=1)
+        second = QuoteService()
+        await second.fetch_for_users_async(users, holdings, freshness_tick=2)
+    freshness_tracker.clear()
+    
+    assert first.changed_symbols[1] == {"BTC", "ETH"}
+    assert second.changed_symbols[1] == {"BTC"}
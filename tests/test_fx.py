@@ -0,0 +1,64 @@
+from unittest.mock import patch
+from app.cmc_client import CMCClient
+from app.config import settings
+from app.fx import FxRateTable, fx_rates, fetch_currency_for
+from app.services import QuoteService
+from app.quote import Quote
+from tests.test_services import make_user, make_item, make_quotes
+
+
+EXCHANGE_RATES = {
+    "rates": {
+        "btc": {"name": "Bitcoin", "unit": "BTC", "value": 1.0, "type": "crypto"},
+        "usd": {"name": "US Dollar", "unit": "$", "value": 50000.0, "type": "fiat"},
+        "krw": {"name": "South Korean Won", "unit": "₩", "value": 65000000.0, "type": "fiat"},
+    }
+}
+
+
+def test_rate_and_convert_price_data():
+    table = FxRateTable()
+    table._apply(EXCHANGE_RATES)
+    
+    assert table.rate("USD", "KRW") == 1300.0
+    assert table.rate("krw", "usd") == 1 / 1300.0
+    assert table.rate("USD", "EUR") is None
+    
+    price_data = {"BTC": Quote(symbol="BTC", price=100.0, market_cap=10.0, percent_change_24h=5.0)}
+    converted = table.convert_price_data(price_data, "USD", "KRW")
+    assert converted["BTC"] == Quote(symbol="BTC", price=130000.0, market_cap=13000.0, percent_change_24h=5.0)
+    assert price_data["BTC"].price == 100.0
+    assert table.convert_price_data(price_data, "USD", "usd") is price_data
+
+
+def test_fetch_currency_for_falls_back_without_rate():
+    table = FxRateTable()
+    table._apply(EXCHANGE_RATES)
+    
+    with patch("app.fx.fx_rates", table), patch.object(settings, "fx_conversion_enabled", True):
+        assert fetch_currency_for("KRW") == "USD"
+        assert fetch_currency_for("EUR") == "EUR"
+    with patch("app.fx.fx_rates", table), patch.object(settings, "fx_conversion_enabled", False):
+        assert fetch_currency_for("KRW") == "KRW"
+
+
+def test_fetch_for_users_fetches_pivot_once_and_converts():
+    users = [make_user(1), make_user(2, currency="KRW")]
+    holdings = {
+        1: [make_item(1, 1, "BTC", 1.0)],
+        2: [make_item(2, 2, "ETH", 1.0)],
+    }
+    calls = []
+    
+    def fake_get_quotes(self, symbols, convert="USD"):
+        calls.append((tuple(symbols), convert))
+        return make_quotes({symbol: 100.0 for symbol in symbols})
+    
+    with patch.object(fx_rates, "_btc_rates", {}), patch.object(settings, "fx_conversion_enabled", True), \
+            patch.object(CMCClient, "get_quotes", fake_get_quotes):
+        fx_rates._apply(EXCHANGE_RATES)
+        price_data_by_user = QuoteService().fetch_for_users(users, holdings)
+    
+    assert calls == [(("BTC", "ETH"), "USD")]
+    assert price_data_by_user[1]["BTC"].price == 100.0
+    assert price_data_by_user[2]["ETH"].price == 130000.0
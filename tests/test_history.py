@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from app.models import User, PriceSnapshot, SnapshotRollup
+from app.quote import Quote
+from app.history import PortfolioHistoryService, choose_resolution, lttb_indices
+from app.tick_store import TickStore, holdings_versions
+
+NOW = datetime(2026, 6, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def add_rollup(db, user_id, resolution, bucket, value):
+    db.add(SnapshotRollup(
+        user_id=user_id, resolution=resolution, bucket_start=bucket,
+        open_value=value, high_value=value, low_value=value, close_value=value,
+        sample_count=1, closes={"BTC": value / 2}, close_values={"BTC": value}
+    ))
+
+
+def add_snapshot(db, user_id, timestamp, prices, holdings):
+    version_id = holdings_versions.resolve(db, {user_id: holdings})[user_id]
+    tick = TickStore(timestamp).record(db, "cmc", "USD", {
+        symbol: Quote(symbol=symbol, price=price) for symbol, price in prices.items()
+    })
+    db.add(PriceSnapshot(
+        user_id=user_id, total_portfolio_value=sum(prices[symbol] * qty for symbol, qty in holdings.items()),
+        timestamp=timestamp, price_provider=tick.provider, price_currency=tick.currency,
+        tick_at=tick.timestamp, holdings_version_id=version_id
+    ))
+
+
+@pytest.fixture
+def user(db):
+    user = User(telegram_chat_id="1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    y[400] = 10.0
+    y[700] = -10.0
+    
+    indices = lttb_indices(x, y, 50)
+    
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 400 in indices and 700 in indices
+    assert np.all(np.diff(indices) > 0)
+    # 점 개수가 이미 작으면 그대로
+    assert lttb_indices(x[:10], y[:10], 50).tolist() == list(range(10))
+
+
+def test_choose_resolution_by_span_and_retention():
+    assert choose_resolution(NOW - timedelta(days=1), NOW, 500, now=NOW) == "raw"
+    assert choose_resolution(NOW - timedelta(days=30), NOW, 500, now=NOW) == "1h"
+    assert choose_resolution(NOW - timedelta(days=365), NOW, 500, now=NOW) == "1d"
+    # 원본 스냅샷 보존 기간 밖에서 시작하면 짧은 구간이라도 집계 사용
+    assert choose_resolution(NOW - timedelta(days=20), NOW - timedelta(days=19), 500, now=NOW) == "1h"
+
+
+def test_daily_history_is_stitched_with_hourly_and_raw_tail(db, user):
+    today = NOW.replace(hour=0, minute=0)
+    for day in range(3, 0, -1):
+        add_rollup(db, user.id, "1d", today - timedelta(days=day), 100.0 + day)
+    for hour in range(12):
+        add_rollup(db, user.id, "1h", today + timedelta(hours=hour), 200.0 + hour)
+    # 이미 1일 집계에 포함된 시간대의 1시간 집계는 중복으로 나오지 않아야 함
+    add_rollup(db, user.id, "1h", today - timedelta(days=1, hours=-5), 999.0)
+    add_snapshot(db, user.id, today + timedelta(hours=12, minutes=5), {"BTC": 50.0, "ETH": 10.0}, {"BTC": 2.0, "ETH": 3.0})
+    db.commit()
+    
+    history = PortfolioHistoryService(db).get_history(user, NOW - timedelta(days=3), NOW, resolution="1d")
+    
+    assert history["resolution"] == "1d"
+    assert history["source_points"] == 3 + 12 + 1
+    assert history["total_values"] == [103.0, 102.0, 101.0] + [200.0 + hour for hour in range(12)] + [130.0]
+    assert history["timestamps"][-1] == today + timedelta(hours=12, minutes=5)
+    assert history["symbol_values"]["BTC"][-1] == 100.0
+    assert history["symbol_values"]["ETH"] == [None] * 15 + [30.0]
+
+
+def test_history_is_downsampled_to_max_points(db, user):
+    start = NOW - timedelta(days=60)
+    for hour in range(60 * 24):
+        add_rollup(db, user.id, "1h", start + timedelta(hours=hour), 1000.0 + hour % 24)
+    db.commit()
+    
+    history = PortfolioHistoryService(db).get_history(user, start, NOW, resolution="1h", max_points=100)
+    
+    assert history["resolution"] == "1h"
+    assert history["source_points"] == 60 * 24
+    assert len(history["timestamps"]) == len(history["total_values"]) == len(history["symbol_values"]["BTC"]) == 100
+    assert history["timestamps"][0] == start
+    assert history["total_values"] == history["symbol_values"]["BTC"]
+
+
+def test_invalid_range_or_resolution_is_rejected(db, user):
+    service = PortfolioHistoryService(db)
+    with pytest.raises(ValueError):
+        service.get_history(user, NOW, NOW - timedelta(days=1))
+    with pytest.raises(ValueError):
+        service.get_history(user, NOW - timedelta(days=1), NOW, resolution="5m")
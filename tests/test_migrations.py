@@ -0,0 +1,70 @@
+from datetime import datetime
+from pathlib import Path
+import importlib.util
+import sqlalchemy as sa
+from alembic.runtime.migration import MigrationContext
+from alembic.operations import Operations
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+def load_migration(name):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(connection, step):
+    with Operations.context(MigrationContext.configure(connection)):
+        step()
+
+
+def test_price_ticks_migration_round_trips_snapshot_data():
+    """같은 시각에 사용자마다 다른 시세를 저장한 스냅샷도 업그레이드/다운그레이드 후 자신의 시세를 유지"""
+    migration = load_migration("c41e7b2d9f06_add_price_ticks")
+    engine = sa.create_engine("sqlite://")
+    metadata = sa.MetaData()
+    users = sa.Table(
+        "users", metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("api_provider", sa.String),
+        sa.Column("base_currency", sa.String),
+    )
+    snapshots = sa.Table(
+        "price_snapshots", metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("timestamp", sa.DateTime(timezone=True)),
+        sa.Column("snapshot_data", sa.JSON, nullable=False),
+    )
+    at = datetime(2026, 1, 1, 0, 0, 0)
+    snapshot_data = {
+        1: {"BTC": {"price": 100.0, "market_cap": 1.0, "percent_change_24h": 0.5}},
+        2: {"BTC": {"price": 101.0, "market_cap": 1.0, "percent_change_24h": 0.5}},
+        3: {"BTC": {"price": 100.0, "market_cap": 1.0, "percent_change_24h": 0.5},
+            "ETH": {"price": 10.0, "market_cap": 2.0, "percent_change_24h": -1.0}},
+        4: {"BTC": {"price": 101.0, "market_cap": 1.0, "percent_change_24h": 0.5}},
+    }
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+        connection.execute(users.insert(), [
+            {"id": user_id, "api_provider": "coinmarketcap", "base_currency": "USD"} for user_id in snapshot_data
+        ])
+        connection.execute(snapshots.insert(), [
+            {"id": user_id, "user_id": user_id, "timestamp": at, "snapshot_data": data}
+            for user_id, data in snapshot_data.items()
+        ])
+    
+    with engine.begin() as connection:
+        run(connection, migration.upgrade)
+        ticks = connection.execute(sa.text("SELECT symbol, timestamp, price FROM price_ticks")).fetchall()
+        tick_at = dict(connection.execute(sa.text("SELECT user_id, tick_at FROM price_snapshots")).fetchall())
+    # 같은 시세는 틱을 공유하고, 다른 시세는 자신의 틱을 가리킴
+    assert len(ticks) == 3
+    assert tick_at[1] == tick_at[3] != tick_at[2] == tick_at[4]
+    
+    with engine.begin() as connection:
+        run(connection, migration.downgrade)
+        restored = dict(connection.execute(sa.select(snapshots.c.user_id, snapshots.c.snapshot_data)).fetchall())
+    assert restored == snapshot_data
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.models import User, NotificationOutbox
+from app.outbox import NotificationOutboxService, OutboxMessage, backoff_seconds, summary_key
+
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def add_messages(db, keys):
+    user = User(telegram_chat_id="chat", base_currency="USD")
+    db.add(user)
+    db.flush()
+    outbox = NotificationOutboxService(db)
+    added = outbox.enqueue([OutboxMessage(user.id, "chat", "alert", f"message {key}", key) for key in keys], NOW)
+    db.commit()
+    return outbox, added
+
+
+def test_enqueue_skips_duplicate_idempotency_keys(db):
+    """같은 멱등 키는 한 묶음 안에서도, 이미 기록된 경우에도 한 번만 기록"""
+    outbox, added = add_messages(db, ["a", "b", "a"])
+    assert added == 2
+    assert outbox.enqueue([OutboxMessage(1, "chat", "alert", "again", "b"), OutboxMessage(1, "chat", "alert", "c", "c")], NOW) == 1
+    db.commit()
+    assert db.query(NotificationOutbox).count() == 3
+    assert summary_key(1, NOW) == summary_key(1, NOW + timedelta(minutes=30))
+    assert summary_key(1, NOW) != summary_key(1, NOW + timedelta(hours=3))
+
+
+def test_claimed_rows_are_exclusive_until_lease_expires(db, monkeypatch):
+    """선점한 알림은 다른 프로세스가 가져가지 않고, 완료 기록 없이 선점이 만료되면 (재시작) 다시 전송"""
+    monkeypatch.setattr(settings, "outbox_lease_seconds", 60)
+    outbox, _ = add_messages(db, ["a", "b", "c"])
+    
+    first = outbox.claim("w1", limit=2, now=NOW)
+    second = outbox.claim("w2", now=NOW)
+    assert [row.idempotency_key for row in first] == ["a", "b"]
+    assert [row.idempotency_key for row in second] == ["c"]
+    assert outbox.claim("w2", now=NOW + timedelta(seconds=30)) == []
+    
+    outbox.complete(second, [], now=NOW)
+    # w1이 전송 결과를 기록하지 못하고 종료 -> 선점 만료 후 다른 워커가 가져감
+    retried = outbox.claim("w2", now=NOW + timedelta(seconds=61))
+    assert [row.idempotency_key for row in retried] == ["a", "b"]
+    outbox.complete(retried, [], now=NOW + timedelta(seconds=61))
+    assert outbox.stats(NOW)["sent"] == 3
+
+
+def test_failed_rows_back_off_then_dead_letter(db, monkeypatch):
+    """실패하면 지수 백오프 후 재시도하고, 최대 시도 횟수를 넘으면 dead 상태 (다시 대기열로 돌릴 수 있음)"""
+    monkeypatch.setattr(settings, "outbox_backoff_base_seconds", 10)
+    monkeypatch.setattr(settings, "outbox_max_backoff_seconds", 25)
+    monkeypatch.setattr(settings, "outbox_max_attempts", 3)
+    assert [backoff_seconds(attempts) for attempts in (1, 2, 3)] == [10, 20, 25]
+    outbox, _ = add_messages(db, ["a"])
+    
+    now = NOW
+    for attempt in range(1, 3):
+        rows = outbox.claim("w1", now=now)
+        assert len(rows) == 1
+        outbox.complete([], rows, error="telegram down", now=now)
+        assert outbox.claim("w1", now=now + timedelta(seconds=backoff_seconds(attempt) - 1)) == []
+        now += timedelta(seconds=backoff_seconds(attempt))
+    
+    rows = outbox.claim("w1", now=now)
+    outbox.complete([], rows, error="telegram down", now=now)
+    row = db.query(NotificationOutbox).one()
+    assert (row.status, row.attempts, row.last_error) == ("dead", 3, "telegram down")
+    assert outbox.claim("w1", now=now + timedelta(days=1)) == []
+    
+    assert outbox.requeue_dead(now) == 1
+    assert len(outbox.claim("w1", now=now)) == 1
+
+
+def test_purge_removes_old_sent_rows(db, monkeypatch):
+    monkeypatch.setattr(settings, "outbox_retention_days", 7)
+    outbox, _ = add_messages(db, ["a", "b"])
+    rows = outbox.claim("w1", now=NOW)
+    outbox.complete(rows[:1], rows[1:], now=NOW)
+    
+    assert outbox.purge(NOW + timedelta(days=6)) == 0
+    assert outbox.purge(NOW + timedelta(days=8)) == 1
+    stats = outbox.stats(NOW)
+    assert (stats["pending"], stats["sent"], stats["dead"]) == (1, 0, 0)
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone
+import multiprocessing
+import threading
+import numpy as np
+import pytest
+from app.price_history import PriceHistoryStore, to_epoch
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def fill(store, minutes, symbols=("BTC", "ETH")):
+    for minute in range(minutes):
+        store.append("cmc", "USD", START + timedelta(minutes=minute), {symbol: 100.0 + minute + i for i, symbol in enumerate(symbols)})
+
+
+def test_read_range_returns_memmap_views_for_each_symbol(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    fill(store, 10)
+    
+    series = store.read_range("cmc", "USD", ["BTC", "ETH", "SOL"], START + timedelta(minutes=3), START + timedelta(minutes=5))
+    
+    times, prices = series["BTC"]
+    assert times.tolist() == [to_epoch(START + timedelta(minutes=m)) for m in (3, 4, 5)]
+    assert prices.tolist() == [103.0, 104.0, 105.0]
+    assert series["ETH"][1].tolist() == [104.0, 105.0, 106.0]
+    assert len(series["SOL"][0]) == 0
+    # 복사 없이 파일을 가리키는 읽기 전용 뷰
+    assert isinstance(prices, np.memmap) and not prices.flags.writeable
+
+
+def test_append_ignores_ticks_at_or_before_last_time(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    fill(store, 3)
+    
+    assert store.append("cmc", "USD", START + timedelta(minutes=2), {"BTC": 1.0}) == 0
+    assert store.append("cmc", "USD", START + timedelta(minutes=1), {"BTC": 1.0, "SOL": 5.0}) == 1
+    
+    # 새 인스턴스도 파일의 마지막 시각을 이어받음
+    reopened = PriceHistoryStore(str(tmp_path))
+    assert reopened.append("cmc", "USD", START + timedelta(minutes=2), {"BTC": 1.0}) == 0
+    assert reopened.read("cmc", "USD", "BTC")[1].tolist() == [100.0, 101.0, 102.0]
+    assert reopened.symbols("cmc", "USD") == ["BTC", "ETH", "SOL"]
+
+
+def test_interrupted_append_is_truncated_to_complete_records(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    fill(store, 3, symbols=("BTC",))
+    with open(tmp_path / "cmc" / "USD" / "BTC.px", "ab") as f:
+        f.write(np.asarray([999.0]).tobytes())
+    
+    times, prices = PriceHistoryStore(str(tmp_path)).read("cmc", "USD", "BTC")
+    
+    assert len(times) == len(prices) == 3
+
+
+def test_compact_keeps_last_value_per_interval_for_old_records(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    fill(store, 180, symbols=("BTC",))
+    old_times, _ = store.read("cmc", "USD", "BTC")
+    
+    before, after = store.compact("cmc", "USD", "BTC", START + timedelta(hours=2), interval_seconds=3600)
+    
+    times, prices = store.read("cmc", "USD", "BTC")
+    assert (before, after) == (180, 2 + 60)
+    assert prices[:3].tolist() == [159.0, 219.0, 220.0]
+    assert np.all(np.diff(times) > 0)
+    # 압축 전에 받은 뷰는 이전 내용을 그대로 가리킴
+    assert len(old_times) == 180
+    assert store.append("cmc", "USD", START + timedelta(hours=3), {"BTC": 1.0}) == 1
+
+
+
+def test_read_waits_for_compaction_in_other_process(tmp_path):
+    """조회는 공유 잠금 안에서 매핑하므로 다른 프로세스의 압축(배타 잠금) 중에는 기다리고, 교체된 파일을 다시 매핑"""
+    fcntl = pytest.importorskip("fcntl")
+    writer, reader = PriceHistoryStore(str(tmp_path)), PriceHistoryStore(str(tmp_path))
+    fill(writer, 180, symbols=("BTC",))
+    assert len(reader.read("cmc", "USD", "BTC")[0]) == 180
+    
+    # 다른 프로세스가 압축 후 같은 수만큼 추가 -> 레코드 수가 같아도 교체된 파일을 읽음
+    writer.compact("cmc", "USD", "BTC", START + timedelta(hours=2), interval_seconds=3600)
+    for minute in range(118):
+        writer.append("cmc", "USD", START + timedelta(hours=3, minutes=minute), {"BTC": 1.0})
+    times, prices = reader.read("cmc", "USD", "BTC")
+    assert len(times) == 180 and prices[:3].tolist() == [159.0, 219.0, 220.0]
+    
+    result = []
+    with open(tmp_path / "cmc" / "USD" / ".lock", "a+b") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: result.append(reader.read("cmc", "USD", "BTC")))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive() and not result
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    thread.join(5)
+    assert len(result[0][0]) == 180
+
+
+def append_ticks(path, worker, minutes):
+    """워커 프로세스: 같은 틱 시각을 순서대로 추가 (다른 워커와 동시에)"""
+    store = PriceHistoryStore(path)
+    for minute in range(minutes):
+        store.append("cmc", "USD", START + timedelta(minutes=minute), {"BTC": worker * 1000.0 + minute, "ETH": 1.0})
+
+
+def test_concurrent_worker_processes_keep_series_consistent(tmp_path):
+    """여러 워커 프로세스가 같은 시리즈에 기록해도 시각이 중복/역전되지 않고 두 파일 길이가 같음"""
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=append_ticks, args=(str(tmp_path), worker, 300)) for worker in (1, 2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    
+    store = PriceHistoryStore(str(tmp_path))
+    for symbol in ("BTC", "ETH"):
+        times, prices = store.read("cmc", "USD", symbol)
+        assert times.tolist() == [to_epoch(START + timedelta(minutes=minute)) for minute in range(300)]
+        assert len(prices) == 300
+    assert (tmp_path / "cmc" / "USD" / "BTC.ts").stat().st_size == (tmp_path / "cmc" / "USD" / "BTC.px").stat().st_size
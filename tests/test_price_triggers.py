@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from app.models import User, PriceTrigger
+from app.price_triggers import PriceTriggerIndex, TriggerEntry, format_crossing_message, price_trigger_index
+from app.services import PriceTriggerService, rebuild_trigger_index
+
+
+def entry(trigger_id, target, symbol="SOL", user_id=1, currency="USD"):
+    return TriggerEntry(trigger_id=trigger_id, user_id=user_id, symbol=symbol, currency=currency, target_price=target)
+
+
+def crossed_ids(crossings):
+    return sorted(crossing.trigger.trigger_id for crossing in crossings)
+
+
+def test_update_finds_triggers_between_old_and_new_price():
+    index = PriceTriggerIndex()
+    for trigger_id, target in enumerate([200.0, 240.0, 250.0, 260.0, 300.0], start=1):
+        index.add(entry(trigger_id, target))
+    
+    # 처음 관측한 가격은 기록만 함
+    assert index.update("USD", {"SOL": 230.0}) == []
+    # 상승: 230 < 목표 <= 250
+    assert crossed_ids(index.update("USD", {"SOL": 250.0})) == [2, 3]
+    # 하락: 190 <= 목표 < 250
+    crossings = index.update("USD", {"SOL": 190.0})
+    assert crossed_ids(crossings) == [1]
+    assert not crossings[0].rising
+    # 한 번 알린 트리거는 제거됨
+    assert crossed_ids(index.update("USD", {"SOL": 400.0})) == [4, 5]
+    assert len(index) == 0
+
+
+def test_update_is_scoped_to_symbol_and_currency():
+    index = PriceTriggerIndex()
+    index.add(entry(1, 250.0))
+    index.add(entry(2, 250.0, currency="KRW"))
+    index.add(entry(3, 250.0, symbol="ETH"))
+    
+    index.update("USD", {"SOL": 240.0, "ETH": 240.0})
+    crossings = index.update("USD", {"SOL": 260.0})
+    
+    assert crossed_ids(crossings) == [1]
+    assert format_crossing_message(crossings[0]) == (
+        "🎯 SOL 가격이 목표가 250.00 USD를 돌파했습니다 (240.00 → 260.00 USD)"
+    )
+
+
+def test_groups_in_one_tick_do_not_cross_on_provider_spread():
+    """같은 틱에 여러 시세 그룹이 같은 심볼을 반영해도 제공자 간 시세 차이로는 발동하지 않음"""
+    index = PriceTriggerIndex()
+    index.add(entry(1, 100.0, symbol="BTC"))
+    tick = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+    
+    for second in (tick, tick + timedelta(seconds=60)):
+        assert index.update("USD", {"BTC": 100.2}, "coinmarketcap", second) == []
+        assert index.update("USD", {"BTC": 99.9}, "coingecko", second) == []
+    # 같은 제공자의 다른 그룹 (API 키, 환산 시세)은 같은 틱에 한 번만 반영
+    assert index.update("USD", {"BTC": 99.0}, "coinmarketcap", tick + timedelta(seconds=60)) == []
+    
+    crossings = index.update("USD", {"BTC": 99.5}, "coinmarketcap", tick + timedelta(seconds=120))
+    assert crossed_ids(crossings) == [1]
+    assert (crossings[0].previous_price, crossings[0].source) == (100.2, "coinmarketcap")
+
+
+def test_restore_rearms_crossed_trigger():
+    """발동 처리에 실패해 되돌린 트리거는 다음 틱에 다시 발동"""
+    index = PriceTriggerIndex()
+    index.add(entry(1, 100.0, symbol="BTC"))
+    tick = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+    index.update("USD", {"BTC": 98.0}, "coinmarketcap", tick)
+    crossings = index.update("USD", {"BTC": 101.0}, "coinmarketcap", tick + timedelta(seconds=60))
+    assert crossed_ids(crossings) == [1] and len(index) == 0
+    
+    index.restore(crossings)
+    assert len(index) == 1
+    assert crossed_ids(index.update("USD", {"BTC": 101.0}, "coinmarketcap", tick + timedelta(seconds=120))) == [1]
+
+
+def test_remove_and_symbols_for():
+    index = PriceTriggerIndex()
+    index.add(entry(1, 250.0))
+    index.add(entry(2, 300.0))
+    index.add(entry(3, 3000.0, symbol="ETH", user_id=2))
+    
+    assert index.symbols_for(1) == {"SOL"}
+    index.remove(1)
+    assert index.symbols_for(1) == {"SOL"}
+    index.remove(2)
+    assert index.symbols_for(1) == set()
+    
+    index.add(entry(4, 250.0))
+    index.add(entry(5, 300000.0, currency="KRW"))
+    assert index.targets_for(1) == {"USD": {"SOL"}, "KRW": {"SOL"}}
+    index.remove(4)
+    index.remove(5)
+    
+    index.update("USD", {"SOL": 200.0})
+    assert index.update("USD", {"SOL": 400.0}) == []
+
+
+def test_service_persists_and_rebuilds_index(db):
+    user = User(telegram_chat_id="chat-1", base_currency="USD")
+    db.add(user)
+    db.commit()
+    
+    service = PriceTriggerService(db)
+    trigger = service.create_trigger(user, "sol", 250.0)
+    assert (trigger.symbol, trigger.currency, trigger.active) == ("SOL", "USD", True)
+    assert price_trigger_index.symbols_for(user.id) == {"SOL"}
+    
+    price_trigger_index.clear()
+    rebuild_trigger_index(db)
+    price_trigger_index.update("USD", {"SOL": 240.0})
+    crossings = price_trigger_index.update("USD", {"SOL": 251.0})
+    assert crossed_ids(crossings) == [trigger.id]
+    
+    service.mark_triggered(crossings)
+    db.refresh(trigger)
+    assert (trigger.active, trigger.triggered_price) == (False, 251.0)
+    assert service.list_triggers(user.id) == []
+    
+    assert not service.delete_trigger(user.id + 1, trigger.id)
+    assert service.delete_trigger(user.id, trigger.id)
+    assert db.query(PriceTrigger).count() == 0
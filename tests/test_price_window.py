@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.models import PriceTick
+from app.price_window import PriceWindowIndex, RingBuffer, SymbolWindow
+from app.alert_engine import AlertEngine
+from app.quote import Quote
+from app.services import AlertService
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_ring_buffer_overwrites_oldest():
+    buffer = RingBuffer(3)
+    for i in range(5):
+        assert buffer.append(float(i), float(i * 10)) == i
+    times, prices = buffer.items()
+    assert times.tolist() == [2.0, 3.0, 4.0]
+    assert prices.tolist() == [20.0, 30.0, 40.0]
+    assert (len(buffer), buffer.first_seq, buffer.last_time) == (3, 2, 4.0)
+
+
+def test_window_extremes_match_brute_force():
+    rng = random.Random(7)
+    capacity = 50
+    window = SymbolWindow(capacity, [600.0, 3600.0])
+    history = []
+    timestamp = 0.0
+    for _ in range(500):
+        timestamp += rng.choice([60.0, 300.0, 900.0])
+        price = rng.uniform(90, 110)
+        assert window.push(timestamp, price)
+        history.append((timestamp, price))
+        kept = history[-capacity:]
+        for seconds in (600.0, 3600.0):
+            recent = [p for t, p in kept if t >= timestamp - seconds]
+            assert window.windows[seconds].extremes() == (min(recent), max(recent))
+    # 같은 시각(다른 시세 그룹의 같은 틱)은 무시
+    assert not window.push(timestamp, 1.0)
+
+
+def test_new_window_length_is_built_from_buffer():
+    index = PriceWindowIndex(capacity=100)
+    for minute, price in enumerate([100.0, 97.0, 95.0, 93.0, 92.0]):
+        index.update("USD", {"BTC": price}, START + timedelta(minutes=minute * 30))
+    
+    assert index.extremes(["BTC", "ETH"], "USD", 60) == {"BTC": (92.0, 95.0)}
+    assert index.extremes(["BTC"], "USD", 180) == {"BTC": (92.0, 100.0)}
+    # 등록된 윈도우는 이후 틱에서도 유지
+    index.update("USD", {"BTC": 99.0}, START + timedelta(minutes=150))
+    assert index.extremes(["BTC"], "USD", 60) == {"BTC": (92.0, 99.0)}
+    assert index.extremes(["BTC"], "KRW", 60) == {}
+
+
+def test_load_refills_from_price_ticks(db):
+    now = START + timedelta(hours=30)
+    for minutes, price in [(0, 1.0), (29 * 60, 100.0), (29 * 60 + 30, 110.0), (29 * 60 + 45, 105.0)]:
+        db.add(PriceTick(provider="cmc", symbol="BTC", currency="USD", timestamp=START + timedelta(minutes=minutes), price=price))
+    # 다른 제공자의 같은 틱은 한 번만 반영
+    db.add(PriceTick(provider="coingecko", symbol="BTC", currency="USD", timestamp=START + timedelta(minutes=29 * 60 + 45), price=50.0))
+    db.commit()
+    
+    index = PriceWindowIndex(capacity=10)
+    assert index.load(db, now=now) == 4
+    assert index.extremes(["BTC"], "USD", 120) == {"BTC": (100.0, 110.0)}
+
+
+def window_settings(threshold):
+    return SimpleNamespace(
+        single_coin_percentage_threshold=50.0,
+        single_coin_absolute_threshold=None,
+        portfolio_percentage_threshold=50.0,
+        portfolio_absolute_threshold=None,
+        min_notification_interval_minutes=15,
+        window_percentage_threshold=threshold,
+        window_minutes=120,
+    )
+
+
+def test_slow_slide_fires_window_alert():
+    index = PriceWindowIndex(capacity=100)
+    now = START
+    # 5분마다 0.4%씩 2시간 하락: 한 번의 변동은 작지만 누적 약 9%
+    price = 100.0
+    for _ in range(25):
+        index.update("USD", {"BTC": price}, now)
+        price *= 0.996
+        now += timedelta(minutes=5)
+    price /= 0.996
+    now -= timedelta(minutes=5)
+    
+    user = SimpleNamespace(base_currency="USD")
+    summary = {
+        "total_value": price,
+        "items": [{"id": 1, "symbol": "BTC", "quantity": 1.0}],
+        "price_data": {"BTC": Quote(symbol="BTC", price=price)},
+    }
+    baseline = SimpleNamespace(snapshot_data={"BTC": {"price": price / 0.996}}, total_portfolio_value=price / 0.996, timestamp=now - timedelta(minutes=30))
+    settings = window_settings(8.0)
+    extremes = index.extremes_for(settings, ["BTC"], "USD")
+    
+    alerts = AlertService.evaluate_alerts(user, settings, summary, baseline, now=now, window_extremes=extremes)
+    assert [alert["type"] for alert in alerts] == ["coin_window"]
+    assert "120분 내 변동: -9.17%" in alerts[0]["message"]
+    assert index.extremes_for(window_settings(None), ["BTC"], "USD") is None
+
+
+def test_engine_matches_evaluate_alerts_with_windows():
+    rng = random.Random(3)
+    now = START
+    engine = AlertEngine()
+    expected = {}
+    for i in range(300):
+        symbols = rng.sample(["BTC", "ETH", "SOL", "XRP"], rng.randint(1, 4))
+        new_prices = {symbol: rng.uniform(50, 150) for symbol in symbols if rng.random() > 0.1}
+        extremes = {}
+        for symbol in symbols:
+            if rng.random() > 0.2:
+                low, high = sorted([rng.uniform(50, 150), rng.uniform(50, 150)])
+                extremes[symbol] = (low, high)
+        user = SimpleNamespace(base_currency="USD")
+        settings = window_settings(rng.choice([None, 5.0, 20.0]))
+        summary = {
+            "total_value": 100.0,
+            "items": [{"id": j, "symbol": symbol, "quantity": 1.0} for j, symbol in enumerate(symbols)],
+            "price_data": {symbol: Quote(symbol=symbol, price=price) for symbol, price in new_prices.items()},
+        }
+        baseline = SimpleNamespace(snapshot_data={}, total_portfolio_value=100.0, timestamp=now - timedelta(hours=1))
+        window_extremes = extremes if settings.window_percentage_threshold else None
+        engine.add(i, user, settings, summary, baseline, now=now, window_extremes=window_extremes)
+        expected[i] = AlertService.evaluate_alerts(user, settings, summary, baseline, now=now, window_extremes=window_extremes)
+    
+    alerts_by_user = engine.evaluate()
+    assert any(expected.values())
+    assert {i: alerts_by_user.get(i, []) for i in expected} == expected
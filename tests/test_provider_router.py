@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.config import settings
+from app.provider_router import CircuitBreaker, LatencyTracker, ProviderRouter
+
+
+def make_fetcher(delays, failures=()):
+    """제공자별 지연 시간/실패를 흉내 내는 조회 함수"""
+    calls = []
+    
+    async def fetch(provider, api_key, symbols, currency):
+        calls.append(provider)
+        await asyncio.sleep(delays.get(provider, 0))
+        if provider in failures:
+            raise Exception(f"{provider} 장애")
+        return {symbol: {"price": 1.0, "provider": provider} for symbol in symbols}
+    
+    return fetch, calls
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, open_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    # 차단 시간이 지나면 시험 요청 1개만 허용
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker(window_size=100)
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) == 0.95
+    assert tracker.percentile(50) == 0.5
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_does_not_hedge():
+    router = ProviderRouter()
+    fetch, calls = make_fetcher({"cmc": 0})
+    
+    price_data = await router.fetch_price_data(fetch, "cmc", "key", ["BTC"], "USD")
+    
+    assert price_data["BTC"]["provider"] == "cmc"
+    assert calls == ["cmc"]
+    assert router.stats["hedged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_fastest_wins():
+    router = ProviderRouter()
+    fetch, calls = make_fetcher({"cmc": 0.5, "coingecko": 0})
+    
+    with patch.object(settings, "hedge_default_delay_seconds", 0.05):
+        price_data = await router.fetch_price_data(fetch, "cmc", "key", ["BTC"], "USD")
+    
+    assert price_data["BTC"]["provider"] == "coingecko"
+    assert calls == ["cmc", "coingecko"]
+    assert router.stats["hedged"] == 1
+    assert router.stats["hedge_wins"] == 1
+    
+    # 느린 요청은 취소되지 않고 끝까지 진행되어 응답 시간이 기록됨
+    await asyncio.gather(*router._background)
+    assert len(router.latencies["cmc"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_fails_over_and_opens_circuit():
+    router = ProviderRouter()
+    fetch, calls = make_fetcher({}, failures={"cmc"})
+    
+    with patch.object(settings, "circuit_failure_threshold", 2):
+        router.reset()
+        for _ in range(2):
+            price_data = await router.fetch_price_data(fetch, "cmc", "key", ["BTC"], "USD")
+            assert price_data["BTC"]["provider"] == "coingecko"
+        
+        # 서킷이 열린 뒤에는 CMC에 요청하지 않음
+        calls.clear()
+        await router.fetch_price_data(fetch, "cmc", "key", ["BTC"], "USD")
+    
+    assert router.breakers["cmc"].state == CircuitBreaker.OPEN
+    assert calls == ["coingecko"]
+
+
+@pytest.mark.asyncio
+async def test_all_providers_failing_raises():
+    router = ProviderRouter()
+    fetch, calls = make_fetcher({}, failures={"cmc", "coingecko"})
+    
+    with pytest.raises(Exception, match="모든 API 제공자"):
+        await router.fetch_price_data(fetch, "coingecko", None, ["BTC"], "USD")
+    assert calls == ["coingecko", "cmc"]
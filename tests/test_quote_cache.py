@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from app.cmc_client import CMCClient
+from app.quote_cache import QuoteCache, quote_cache
+
+
+def test_cache_hit_skips_loader():
+    cache = QuoteCache(ttl_seconds=60, max_entries=10)
+    loader = Mock(return_value={"BTC": 1, "ETH": 2})
+    
+    assert cache.get_many("cmc", ["BTC", "ETH"], "USD", loader) == {"BTC": 1, "ETH": 2}
+    assert cache.get_many("cmc", ["BTC", "ETH"], "USD", loader) == {"BTC": 1, "ETH": 2}
+    
+    assert loader.call_count == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_loads_only_missing_symbols():
+    cache = QuoteCache(ttl_seconds=60, max_entries=10)
+    cache.get_many("cmc", ["BTC"], "USD", lambda missing: {"BTC": 1})
+    loader = Mock(return_value={"ETH": 2})
+    
+    result = cache.get_many("cmc", ["BTC", "ETH"], "USD", loader)
+    
+    loader.assert_called_once_with(["ETH"])
+    assert result == {"BTC": 1, "ETH": 2}
+
+
+def test_cache_key_includes_provider_and_currency():
+    cache = QuoteCache(ttl_seconds=60, max_entries=10)
+    cache.get_many("cmc", ["BTC"], "USD", lambda missing: {"BTC": 1})
+    loader = Mock(return_value={"BTC": 2})
+    
+    cache.get_many("coingecko", ["BTC"], "USD", loader)
+    cache.get_many("cmc", ["BTC"], "KRW", loader)
+    
+    assert loader.call_count == 2
+
+
+def test_cache_entries_expire():
+    cache = QuoteCache(ttl_seconds=0.01, max_entries=10)
+    loader = Mock(return_value={"BTC": 1})
+    
+    cache.get_many("cmc", ["BTC"], "USD", loader)
+    time.sleep(0.02)
+    cache.get_many("cmc", ["BTC"], "USD", loader)
+    
+    assert loader.call_count == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = QuoteCache(ttl_seconds=60, max_entries=2)
+    cache.get_many("cmc", ["BTC", "ETH"], "USD", lambda missing: {s: 1 for s in missing})
+    cache.get_many("cmc", ["BTC"], "USD", lambda missing: {})
+    cache.get_many("cmc", ["SOL"], "USD", lambda missing: {"SOL": 1})
+    loader = Mock(return_value={"ETH": 1})
+    
+    cache.get_many("cmc", ["BTC", "ETH"], "USD", loader)
+    
+    loader.assert_called_once_with(["ETH"])
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = QuoteCache(ttl_seconds=60, max_entries=10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def slow_loader(missing):
+        calls.append(list(missing))
+        started.set()
+        release.wait(1)
+        return {"BTC": 1}
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_many("cmc", ["BTC"], "USD", slow_loader)))
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=lambda: results.append(cache.get_many("cmc", ["BTC"], "USD", slow_loader)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    
+    assert calls == [["BTC"]]
+    assert results == [{"BTC": 1}, {"BTC": 1}]
+    assert cache.stats()["coalesced"] == 1
+
+
+
+def test_cancelled_loader_fails_waiters_without_cancelling_them():
+    """조회를 맡은 요청이 취소되어도 결과를 기다리던 요청은 취소되지 않고 조회 실패만 받음"""
+    cache = QuoteCache(ttl_seconds=60, max_entries=10)
+    
+    async def slow_loader(missing):
+        await asyncio.sleep(10)
+        return {"BTC": 1}
+    
+    async def run():
+        leader = asyncio.create_task(cache.aget_many("cmc", ["BTC"], "USD", slow_loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_many("cmc", ["BTC"], "USD", slow_loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(RuntimeError):
+            await follower
+        assert leader.cancelled() and not follower.cancelled()
+    
+    asyncio.run(run())
+    assert cache.stats()["coalesced"] == 1
+
+
+@patch("app.cmc_client.requests.get")
+def test_cmc_client_uses_shared_cache(mock_get):
+    mock_response = Mock()
+    mock_response.content = b'{"data": {"BTC": [{"quote": {"USD": {"price": 50000}}}]}}'
+    mock_response.raise_for_status = Mock()
+    mock_get.return_value = mock_response
+    
+    CMCClient(api_key="a").get_quotes(["BTC"], "USD")
+    result = CMCClient(api_key="b").get_quotes(["BTC"], "USD")
+    
+    assert mock_get.call_count == 1
+    assert result["BTC"].price == 50000
+    assert quote_cache.stats()["hits"] == 1
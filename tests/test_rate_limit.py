@@ -0,0 +1,79 @@
+import math
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+import pytest
+from app.rate_limit import (
+    TokenBucket, CreditLedger, call_with_rate_limit,
+    parse_retry_after, cmc_credit_cost, api_key_fingerprint
+)
+
+
+def test_token_bucket_waits_when_empty():
+    bucket = TokenBucket(rate_per_second=100, capacity=1)
+    
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.01, abs=0.005)
+
+
+def test_token_bucket_block_for():
+    bucket = TokenBucket(rate_per_second=100, capacity=10)
+    bucket.block_for(5)
+    
+    assert bucket._reserve() > 4
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_call_with_rate_limit_retries_on_429():
+    limited = Mock(status_code=429, headers={"Retry-After": "0"})
+    ok = Mock(status_code=200, headers={})
+    send = Mock(side_effect=[limited, ok])
+    
+    response = call_with_rate_limit(TokenBucket(rate_per_second=1000, capacity=10), send)
+    
+    assert response is ok
+    assert send.call_count == 2
+
+
+def test_cmc_credit_cost():
+    assert cmc_credit_cost({"status": {"credit_count": 3}}, 1) == 3
+    assert cmc_credit_cost({}, 1) == 1
+    assert cmc_credit_cost({}, 250) == 3
+
+
+def test_credit_ledger_flush_and_monthly_usage(db):
+    ledger = CreditLedger()
+    ledger.record("cmc", "key", 2)
+    ledger.record("cmc", "key", 3)
+    ledger.record("cmc", "other", 100)
+    
+    assert ledger.monthly_usage(db, "cmc", "key") == 5
+    ledger.flush(db)
+    ledger.record("cmc", "key", 1)
+    
+    assert ledger.monthly_usage(db, "cmc", "key") == 6
+    report = {row["api_key_hash"]: row for row in ledger.usage_report(db)}
+    assert report[api_key_fingerprint("key")]["credits_used"] == 6
+    assert report[api_key_fingerprint("key")]["calls"] == 3
+
+
+def test_credit_ledger_pacing_factor(db):
+    ledger = CreditLedger()
+    now = datetime(2026, 10, 10, tzinfo=timezone.utc)
+    
+    with patch("app.rate_limit.settings.cmc_monthly_credit_limit", 3100):
+        assert ledger.pacing_factor(db, "cmc", "key", now=now) == 1.0
+        with patch("app.rate_limit.datetime") as mock_datetime:
+            mock_datetime.now.return_value = now
+            ledger.record("cmc", "key", 2000)
+        # 9일 동안 2000 사용 → 월말 예상 약 6889 (한도의 약 2.2배)
+        assert ledger.pacing_factor(db, "cmc", "key", now=now) == pytest.approx(2000 / 9 * 31 / 3100)
+        with patch("app.rate_limit.datetime") as mock_datetime:
+            mock_datetime.now.return_value = now
+            ledger.record("cmc", "key", 2000)
+        assert math.isinf(ledger.pacing_factor(db, "cmc", "key", now=now))
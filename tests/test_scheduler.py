@@ -0,0 +1,255 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+from app.models import User, PortfolioItem, AlertSettings, PriceSnapshot, NotificationOutbox, PriceTrigger
+from app.quote import Quote
+from app.services import QuoteService, PriceTriggerService
+import app.scheduler as scheduler_module
+from app.scheduler import MonitoringScheduler
+from app.sharding import ShardCoordinator
+
+
+class FakeBot:
+    """chat_id별 지연/실패를 흉내 내고 동시 전송 수를 기록하는 봇"""
+    
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def send_message(self, chat_id, text):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(chat_id, 0.01))
+            if chat_id in self.failing:
+                raise RuntimeError("telegram down")
+            self.sent.append(chat_id)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """스레드 간에 공유되는 인메모리 SQLite (틱이 조회/커밋을 별도 스레드에서 실행)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", factory)
+    monkeypatch.setattr(settings, "price_history_enabled", False)
+    return factory
+
+
+@pytest.fixture
+def prices(monkeypatch):
+    """모든 사용자에게 같은 BTC 시세를 돌려주는 가짜 시세 조회"""
+    current = {"BTC": 100.0}
+    
+    async def fetch(self, users, holdings, freshness_tick=None, extra_symbols=None):
+        self.changed_symbols = {user.id: {"BTC"} for user in users}
+        return {user.id: {"BTC": Quote(symbol="BTC", price=current["BTC"])} for user in users}
+    
+    monkeypatch.setattr(QuoteService, "fetch_for_users_async", fetch)
+    return current
+
+
+def add_users(factory, count):
+    db = factory()
+    for i in range(count):
+        user = User(telegram_chat_id=f"chat{i}", base_currency="USD")
+        db.add(user)
+        db.flush()
+        db.add(PortfolioItem(user_id=user.id, symbol="BTC", quantity=1.0))
+        db.add(AlertSettings(user_id=user.id, min_notification_interval_minutes=0))
+    db.commit()
+    db.close()
+
+
+def latest_baselines(factory):
+    """chat_id별 마지막 스냅샷의 알림 기준 여부"""
+    db = factory()
+    result = {}
+    for snapshot in db.query(PriceSnapshot).order_by(PriceSnapshot.id):
+        result[db.get(User, snapshot.user_id).telegram_chat_id] = snapshot.alert_baseline
+    db.close()
+    return result
+
+
+def outbox_statuses(factory):
+    """chat_id별 아웃박스 알림 상태"""
+    db = factory()
+    result = {}
+    for row in db.query(NotificationOutbox).order_by(NotificationOutbox.id):
+        result.setdefault(row.chat_id, set()).add(row.status)
+    db.close()
+    return result
+
+
+def test_tick_records_alerts_without_waiting_for_telegram(session_factory, prices, monkeypatch):
+    """틱은 알림을 아웃박스에 기록만 하고 바로 끝나며, 전송 작업이 느리거나 실패한 사용자를 격리하여 재시도"""
+    monkeypatch.setattr(settings, "tick_user_timeout_seconds", 0.2)
+    monkeypatch.setattr(settings, "outbox_backoff_base_seconds", 0)
+    monkeypatch.setattr(settings, "outbox_max_attempts", 2)
+    add_users(session_factory, 4)
+    scheduler = MonitoringScheduler(None)
+    scheduler.bot = FakeBot(delays={"chat1": 5.0}, failing={"chat2"})
+    
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    prices["BTC"] = 120.0
+    started = time.perf_counter()
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    assert time.perf_counter() - started < 1.0
+    assert scheduler.bot.sent == []
+    # 알림을 기록했으면 전송 전이라도 다음 알림의 기준
+    assert latest_baselines(session_factory) == {f"chat{i}": True for i in range(4)}
+    assert outbox_statuses(session_factory) == {f"chat{i}": {"pending"} for i in range(4)}
+    
+    started = time.perf_counter()
+    asyncio.run(scheduler.dispatch_outbox())
+    assert time.perf_counter() - started < 2.0
+    assert sorted(scheduler.bot.sent) == ["chat0", "chat3"]
+    
+    # 재시도 후에도 실패하면 dead 상태로 남고, 이미 보낸 알림은 다시 보내지 않음
+    asyncio.run(scheduler.dispatch_outbox())
+    assert sorted(scheduler.bot.sent) == ["chat0", "chat3"]
+    assert outbox_statuses(session_factory) == {
+        "chat0": {"sent"}, "chat1": {"dead"}, "chat2": {"dead"}, "chat3": {"sent"}
+    }
+
+
+def test_alert_delivery_concurrency_is_bounded(session_factory, prices, monkeypatch):
+    """동시에 전송하는 사용자 수는 TICK_USER_CONCURRENCY를 넘지 않고, 순차 전송보다 빠르게 끝남"""
+    monkeypatch.setattr(settings, "tick_user_concurrency", 5)
+    monkeypatch.setattr(settings, "telegram_global_rate_per_second", 1000)
+    add_users(session_factory, 20)
+    scheduler = MonitoringScheduler(None)
+    scheduler.bot = FakeBot(delays={f"chat{i}": 0.05 for i in range(20)})
+    
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    prices["BTC"] = 120.0
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    started = time.perf_counter()
+    asyncio.run(scheduler.dispatch_outbox())
+    elapsed = time.perf_counter() - started
+    
+    # 사용자당 알림 2개 (포트폴리오, 코인)는 메시지 하나로 합쳐 전송
+    assert len(scheduler.bot.sent) == 20
+    assert scheduler.bot.max_in_flight == 5
+    assert elapsed < 20 * 0.05
+
+
+def test_workers_process_only_their_shards(session_factory, prices, monkeypatch):
+    """워커 모드에서는 각 워커가 소유 샤드의 사용자만 처리하고, 합치면 모든 사용자를 한 번씩 처리"""
+    monkeypatch.setattr(settings, "shard_count", 4)
+    add_users(session_factory, 8)
+    workers = [MonitoringScheduler(None, coordinator=ShardCoordinator(worker_id)) for worker_id in ("w1", "w2")]
+    db = session_factory()
+    for worker in workers + workers[:1]:
+        worker.coordinator.heartbeat(db)
+    db.close()
+    
+    for worker in workers:
+        worker.bot = FakeBot()
+        asyncio.run(worker.check_portfolio_and_alert())
+    prices["BTC"] = 120.0
+    for worker in workers:
+        asyncio.run(worker.check_portfolio_and_alert())
+    
+    db = session_factory()
+    snapshots = [user_id for user_id, in db.query(PriceSnapshot.user_id)]
+    db.close()
+    assert sorted(snapshots) == sorted(list(range(1, 9)) * 2)
+    
+    # 아웃박스는 어느 워커든 비울 수 있고, 선점한 알림은 한 번만 전송
+    for worker in workers:
+        asyncio.run(worker.dispatch_outbox())
+    sent = [worker.bot.sent for worker in workers]
+    assert sorted(sent[0] + sent[1]) == sorted(f"chat{i}" for i in range(8))
+
+
+def test_trigger_in_other_currency_than_base_currency_fires(session_factory, monkeypatch):
+    """기준 통화(KRW)와 다른 통화(USD)의 트리거는 트리거 통화로 시세를 조회하여 판단"""
+    usd_prices = {"BTC": 60000.0, "SOL": 200.0}
+    requests = []
+    
+    async def fetch_routed(self, key, symbols):
+        requests.append((tuple(symbols), key[2]))
+        rate = 1300.0 if key[2] == "KRW" else 1.0
+        return {symbol: Quote(symbol=symbol, price=usd_prices[symbol] * rate) for symbol in symbols}
+    
+    monkeypatch.setattr(QuoteService, "fetch_routed", fetch_routed)
+    db = session_factory()
+    user = User(telegram_chat_id="chat0", base_currency="KRW")
+    db.add(user)
+    db.flush()
+    db.add(PortfolioItem(user_id=user.id, symbol="BTC", quantity=1.0))
+    db.commit()
+    trigger = PriceTriggerService(db).create_trigger(user, "SOL", 250.0, "USD")
+    db.close()
+    scheduler = MonitoringScheduler(None)
+    
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    assert sorted(requests) == [(("BTC",), "KRW"), (("SOL",), "USD")]
+    usd_prices["SOL"] = 300.0
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    
+    db = session_factory()
+    assert db.get(PriceTrigger, trigger.id).active is False
+    rows = db.query(NotificationOutbox).filter(NotificationOutbox.kind == "price_trigger").all()
+    assert [row.idempotency_key for row in rows] == [f"trigger:{trigger.id}"]
+    assert "250.00 USD" in rows[0].message
+    db.close()
+
+
+def test_trigger_fires_again_after_chunk_rollback(session_factory, prices, monkeypatch):
+    """묶음 커밋이 실패하면 트리거 비활성화가 롤백되므로 인덱스에서도 되돌려 다음 틱에 다시 발동"""
+    add_users(session_factory, 1)
+    db = session_factory()
+    trigger = PriceTriggerService(db).create_trigger(db.query(User).one(), "BTC", 150.0, "USD")
+    db.close()
+    scheduler = MonitoringScheduler(None)
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    
+    enqueue = scheduler_module.NotificationOutboxService.enqueue
+    
+    def failing_enqueue(self, messages, now=None):
+        raise RuntimeError("database is locked")
+    
+    prices["BTC"] = 200.0
+    monkeypatch.setattr(scheduler_module.NotificationOutboxService, "enqueue", failing_enqueue)
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    db = session_factory()
+    assert db.get(PriceTrigger, trigger.id).active is True
+    assert db.query(NotificationOutbox).count() == 0
+    db.close()
+    
+    monkeypatch.setattr(scheduler_module.NotificationOutboxService, "enqueue", enqueue)
+    asyncio.run(scheduler.check_portfolio_and_alert())
+    db = session_factory()
+    assert db.get(PriceTrigger, trigger.id).active is False
+    rows = db.query(NotificationOutbox).filter(NotificationOutbox.kind == "price_trigger").all()
+    assert [row.idempotency_key for row in rows] == [f"trigger:{trigger.id}"]
+    db.close()
+
+
+def test_failed_chunk_does_not_stop_later_chunks(session_factory, prices, monkeypatch):
+    """한 묶음이 실패해도 롤백 후 다음 묶음은 계속 처리"""
+    monkeypatch.setattr(settings, "tick_chunk_size", 1)
+    add_users(session_factory, 3)
+    resolve = scheduler_module.holdings_versions.resolve
+    
+    def failing_resolve(db, holdings_by_user):
+        if 1 in holdings_by_user:
+            raise RuntimeError("database is locked")
+        return resolve(db, holdings_by_user)
+    
+    monkeypatch.setattr(scheduler_module.holdings_versions, "resolve", failing_resolve)
+    asyncio.run(MonitoringScheduler(None).check_portfolio_and_alert())
+    assert latest_baselines(session_factory) == {"chat1": True, "chat2": True}
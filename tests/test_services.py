@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.cmc_client import CMCClient
+from app.quote import Quote
+from app.services import QuoteService, PortfolioService, quote_group_key
+
+
+def make_user(user_id, provider="cmc", api_key="key", currency="USD"):
+    return SimpleNamespace(
+        id=user_id,
+        api_provider=provider,
+        cmc_api_key=api_key,
+        coingecko_api_key=None,
+        base_currency=currency
+    )
+
+
+def make_item(item_id, user_id, symbol, quantity):
+    return SimpleNamespace(id=item_id, user_id=user_id, symbol=symbol, quantity=quantity)
+
+
+def make_quotes(prices):
+    return {symbol: Quote(symbol=symbol, price=price) for symbol, price in prices.items()}
+
+
+def test_quote_group_key_uses_provider_key_and_currency():
+    assert quote_group_key(make_user(1)) == ("cmc", "key", "USD")
+    assert quote_group_key(make_user(2, provider="CoinGecko", currency="KRW")) == ("coingecko", None, "KRW")
+
+
+def test_fetch_for_users_batches_symbols_per_group():
+    users = [make_user(1), make_user(2), make_user(3, currency="KRW")]
+    holdings = {
+        1: [make_item(1, 1, "BTC", 1.0), make_item(2, 1, "ETH", 2.0)],
+        2: [make_item(3, 2, "BTC", 0.5), make_item(4, 2, "SOL", 10.0)],
+        3: [make_item(5, 3, "BTC", 1.0)],
+    }
+    calls = []
+    
+    def fake_get_quotes(self, symbols, convert="USD"):
+        calls.append((tuple(symbols), convert))
+        return make_quotes({symbol: 100.0 for symbol in symbols})
+    
+    with patch.object(CMCClient, "get_quotes", fake_get_quotes):
+        price_data_by_user = QuoteService().fetch_for_users(users, holdings)
+    
+    assert sorted(calls) == [(("BTC",), "KRW"), (("BTC", "ETH", "SOL"), "USD")]
+    assert price_data_by_user[1] is price_data_by_user[2]
+    assert price_data_by_user[3]["BTC"].price == 100.0
+
+
+def test_fetch_for_users_skips_failed_group():
+    users = [make_user(1), make_user(2, api_key="other")]
+    holdings = {
+        1: [make_item(1, 1, "BTC", 1.0)],
+        2: [make_item(2, 2, "BTC", 1.0)],
+    }
+    
+    def fake_get_quotes(self, symbols, convert="USD"):
+        if self.api_key == "other":
+            raise Exception("CMC API 요청 실패")
+        return make_quotes({"BTC": 100.0})
+    
+    with patch.object(CMCClient, "get_quotes", fake_get_quotes):
+        price_data_by_user = QuoteService().fetch_for_users(users, holdings)
+    
+    assert 1 in price_data_by_user
+    assert 2 not in price_data_by_user
+
+
+def test_build_portfolio_summary_uses_shared_price_data():
+    user = make_user(1)
+    items = [make_item(1, 1, "BTC", 1.0), make_item(2, 1, "BTC", 1.0), make_item(3, 1, "ETH", 2.0)]
+    price_data = make_quotes({"BTC": 100.0, "ETH": 10.0, "SOL": 1.0})
+    
+    summary = PortfolioService(db=None).build_portfolio_summary(user, items, price_data)
+    
+    assert summary["total_value"] == 220.0
+    assert set(summary["price_data"].keys()) == {"BTC", "ETH"}
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.models import User, PortfolioItem, PriceTrigger, ShardAssignment
+from app.sharding import ShardCoordinator, assign_shards, shard_of, worker_delivery_stats
+from app.telegram_delivery import merge_stats_reports
+from app.services import rebuild_trigger_index
+from app.price_triggers import price_trigger_index
+from app.tick_loader import TickLoader
+
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def owners(db):
+    return {row.shard_id: row.worker_id for row in db.query(ShardAssignment)}
+
+
+def test_assign_shards_balances_and_keeps_existing_owners():
+    """균등 배정 후 워커가 추가/종료되면 필요한 샤드만 이동"""
+    first = assign_shards(16, ["a", "b"], {})
+    assert sorted(first.values()).count("a") == 8
+    
+    second = assign_shards(16, ["a", "b", "c"], first)
+    counts = {worker: list(second.values()).count(worker) for worker in "abc"}
+    assert sorted(counts.values()) == [5, 5, 6]
+    # 기존 워커는 새 워커에 넘겨준 샤드 외에는 그대로 유지
+    assert sum(first[shard] != second[shard] for shard in range(16)) == counts["c"]
+    
+    third = assign_shards(16, ["a", "c"], second)
+    assert set(third.values()) == {"a", "c"}
+    assert all(third[shard] == owner for shard, owner in second.items() if owner != "b")
+    assert assign_shards(16, [], first) == {}
+
+
+def test_coordinator_hands_over_shards_between_ticks(db):
+    """살아 있는 소유자는 다음 틱 시작 시 샤드를 넘겨주고, 그 전까지 두 워커가 같은 샤드를 처리하지 않음"""
+    a = ShardCoordinator("a", shard_count=8, heartbeat_timeout_seconds=30)
+    b = ShardCoordinator("b", shard_count=8, heartbeat_timeout_seconds=30)
+    
+    assert a.heartbeat(db, NOW) is True
+    assert a.claim(db, NOW) == set(range(8))
+    
+    assert b.heartbeat(db, NOW + timedelta(seconds=1)) is False
+    a.heartbeat(db, NOW + timedelta(seconds=2))
+    # 재배정 예정일 뿐 아직 a가 소유
+    assert b.claim(db) == set()
+    assert len(a.owned_shards(db)) == 8
+    
+    a_shards = a.claim(db, NOW + timedelta(seconds=3))
+    b_shards = b.claim(db, NOW + timedelta(seconds=3))
+    assert len(a_shards) == len(b_shards) == 4
+    assert a_shards | b_shards == set(range(8))
+
+
+def test_expired_worker_shards_are_reassigned(db):
+    """하트비트가 끊긴 워커의 샤드는 바로 다른 워커에 배정되고, 코디네이터 역할도 넘어감"""
+    a = ShardCoordinator("a", shard_count=6, heartbeat_timeout_seconds=30)
+    b = ShardCoordinator("b", shard_count=6, heartbeat_timeout_seconds=30)
+    a.heartbeat(db, NOW)
+    b.heartbeat(db, NOW)
+    a.heartbeat(db, NOW)
+    a.claim(db, NOW)
+    assert b.claim(db, NOW) and set(owners(db).values()) == {"a", "b"}
+    
+    # a가 응답하지 않음 -> b가 코디네이터가 되어 모든 샤드를 가져감
+    later = NOW + timedelta(seconds=60)
+    assert b.heartbeat(db, later) is True
+    assert b.claim(db, later) == set(range(6))
+    
+    # 정상 종료한 워커의 샤드도 반환
+    a.heartbeat(db, later)
+    b.heartbeat(db, later)
+    a.claim(db, later)
+    a.leave(db)
+    b.heartbeat(db, later)
+    assert b.claim(db, later) == set(range(6))
+
+
+def test_tick_loader_and_trigger_index_filter_by_shard(db, monkeypatch):
+    """워커는 소유 샤드의 사용자와 트리거만 읽음"""
+    monkeypatch.setattr(settings, "shard_count", 4)
+    for i in range(6):
+        user = User(telegram_chat_id=str(i), base_currency="USD")
+        db.add(user)
+        db.flush()
+        db.add(PortfolioItem(user_id=user.id, symbol="BTC", quantity=1.0))
+        db.add(PriceTrigger(user_id=user.id, symbol="BTC", currency="USD", target_price=100.0 + i, active=True))
+    db.commit()
+    
+    shards = {0, 2}
+    loaded = [tick_user.user.id for chunk in TickLoader(db, shards=shards).iter_chunks() for tick_user in chunk]
+    assert loaded and all(shard_of(user_id, 4) in shards for user_id in loaded)
+    assert len(loaded) == sum(shard_of(user_id, 4) in shards for user_id in range(1, 7))
+    
+    rebuild_trigger_index(db, shards)
+    assert {user_id for user_id in range(1, 7) if price_trigger_index.symbols_for(user_id)} == set(loaded)
+
+
+def test_workers_publish_delivery_stats_with_heartbeat(db, monkeypatch):
+    """워커가 하트비트에 기록한 전송 통계를 살아 있는 워커만 모아 합산"""
+    monkeypatch.setattr(settings, "worker_heartbeat_timeout_seconds", 30)
+    report = {"sent": 3, "failed": 1, "queue_depth": 2, "latency_p50_seconds": 0.5, "latency_p95_seconds": None}
+    ShardCoordinator("a", shard_count=4).heartbeat(db, NOW, report)
+    ShardCoordinator("b", shard_count=4).heartbeat(db, NOW, {**report, "sent": 5, "latency_p95_seconds": 2.0})
+    ShardCoordinator("c", shard_count=4).heartbeat(db, NOW - timedelta(minutes=5), {**report, "sent": 100})
+    
+    stats = worker_delivery_stats(db, NOW + timedelta(seconds=10))
+    assert sorted(stats) == ["a", "b"]
+    merged = merge_stats_reports(stats)
+    assert (merged["sent"], merged["failed"], merged["queue_depth"]) == (8, 2, 4)
+    assert (merged["latency_p50_seconds"], merged["latency_p95_seconds"]) == (0.5, 2.0)
+    assert merged["workers"]["b"]["sent"] == 5
+    assert merge_stats_reports({}) == {"workers": {}}
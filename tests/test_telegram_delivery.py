@@ -0,0 +1,99 @@
+import asyncio
+import time
+from telegram.error import RetryAfter
+from app.config import settings
+from app.telegram_delivery import TelegramDeliveryQueue, merge_messages
+
+
+class RecordingSender:
+    """전송 시각을 기록하고, 지정한 횟수만큼 RetryAfter를 발생시키는 전송 함수"""
+    
+    def __init__(self, retry_after=None, retries=0, delay=0.0):
+        self.calls = []
+        self.retry_after = retry_after
+        self.retries = retries
+        self.delay = delay
+    
+    async def __call__(self, chat_id, text):
+        if self.retries:
+            self.retries -= 1
+            raise RetryAfter(self.retry_after)
+        await asyncio.sleep(self.delay)
+        self.calls.append((chat_id, text, time.monotonic()))
+
+
+def test_merge_messages_joins_and_splits_at_limit():
+    assert merge_messages(["a", "b", "c"]) == ["a\n\nb\n\nc"]
+    assert merge_messages(["aaaa", "bbbb", "cc"], limit=10) == ["aaaa\n\nbbbb", "cc"]
+    assert merge_messages(["x" * 25], limit=10) == ["x" * 10, "x" * 10, "x" * 5]
+    assert merge_messages([]) == []
+
+
+def test_per_chat_and_global_rate_limits(monkeypatch):
+    """같은 채팅은 채팅별 속도, 전체 전송은 전체 속도를 넘지 않음"""
+    monkeypatch.setattr(settings, "telegram_chat_rate_per_second", 20)
+    monkeypatch.setattr(settings, "telegram_global_rate_per_second", 50)
+    sender = RecordingSender()
+    queue = TelegramDeliveryQueue(sender, concurrency=10)
+    
+    async def run():
+        # 채팅 하나에 메시지 3개 (각각 한계 길이라 합쳐지지 않음) + 다른 채팅 10개
+        long_texts = ["x" * 4096] * 3
+        results = await asyncio.gather(
+            queue.send("chat", long_texts),
+            *(queue.send(f"other{i}", ["hi"]) for i in range(10))
+        )
+        return results
+    
+    started = time.monotonic()
+    assert all(asyncio.run(run()))
+    elapsed = time.monotonic() - started
+    
+    chat_times = [sent_at for chat_id, _, sent_at in sender.calls if chat_id == "chat"]
+    assert len(chat_times) == 3
+    assert chat_times[-1] - chat_times[0] >= 2 / 20 * 0.9
+    # 13건을 초당 50건으로 전송 (첫 건은 바로)
+    assert elapsed >= 12 / 50 * 0.9
+    assert queue.stats_report()["sent"] == 13
+
+
+def test_retry_after_blocks_and_retries(monkeypatch):
+    """RetryAfter를 받으면 지정된 시간만큼 기다린 뒤 다시 보냄"""
+    monkeypatch.setattr(settings, "telegram_global_rate_per_second", 1000)
+    sender = RecordingSender(retry_after=0.2, retries=1)
+    queue = TelegramDeliveryQueue(sender, concurrency=2)
+    
+    started = time.monotonic()
+    assert asyncio.run(queue.send("chat", ["alert"])) is True
+    assert time.monotonic() - started >= 0.2
+    stats = queue.stats_report()
+    assert stats["retry_after"] == 1 and stats["sent"] == 1
+    assert stats["latency_p95_seconds"] >= 0.2
+
+
+def test_retry_after_limit_and_cancelled_caller(monkeypatch):
+    """재시도 횟수를 넘으면 실패, 호출자가 취소한 메시지는 보내지 않음"""
+    monkeypatch.setattr(settings, "telegram_global_rate_per_second", 1000)
+    monkeypatch.setattr(settings, "telegram_chat_rate_per_second", 1)
+    monkeypatch.setattr(settings, "telegram_max_retries", 1)
+    sender = RecordingSender(retry_after=0, retries=5)
+    queue = TelegramDeliveryQueue(sender, concurrency=2)
+    assert asyncio.run(queue.send("chat", ["alert"])) is False
+    assert queue.stats["failed"] == 1
+    
+    sender = RecordingSender()
+    queue = TelegramDeliveryQueue(sender, concurrency=2)
+    
+    async def run():
+        await queue.send("chat", ["first"])
+        # 같은 채팅의 두 번째 메시지는 채팅별 버킷에서 약 1초 대기 -> 그 전에 취소
+        try:
+            await asyncio.wait_for(queue.send("chat", ["second"]), timeout=0.1)
+        except asyncio.TimeoutError:
+            pass
+        assert queue.depth == 0
+        await asyncio.sleep(1.1)
+    
+    asyncio.run(run())
+    assert [text for _, text, _ in sender.calls] == ["first"]
+    assert queue.stats["cancelled"] == 1
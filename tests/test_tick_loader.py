@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.models import User, PortfolioItem, AlertSettings, PriceSnapshot
+from app.tick_loader import TickLoader
+
+
+def add_user(db, chat_id, symbols=(), with_settings=True):
+    user = User(telegram_chat_id=chat_id, base_currency="USD")
+    db.add(user)
+    db.flush()
+    for symbol in symbols:
+        db.add(PortfolioItem(user_id=user.id, symbol=symbol, quantity=1.0))
+    if with_settings:
+        db.add(AlertSettings(user_id=user.id))
+    return user
+
+
+def count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_iter_chunks_skips_users_without_holdings(db):
+    for i in range(5):
+        add_user(db, f"chat-{i}", symbols=("BTC", "ETH") if i != 2 else ())
+    db.commit()
+    
+    chunks = list(TickLoader(db, chunk_size=2).iter_chunks())
+    
+    assert [[tick_user.user.telegram_chat_id for tick_user in chunk] for chunk in chunks] == [
+        ["chat-0", "chat-1"],
+        ["chat-3", "chat-4"],
+    ]
+    assert all(len(tick_user.holdings) == 2 for chunk in chunks for tick_user in chunk)
+
+
+def test_iter_chunks_uses_fixed_query_count_per_chunk(db):
+    for i in range(5):
+        add_user(db, f"chat-{i}", symbols=("BTC",), with_settings=i % 2 == 0)
+    db.commit()
+    
+    statements = count_queries(db)
+    for chunk in TickLoader(db, chunk_size=3).iter_chunks():
+        for tick_user in chunk:
+            # 미리 불러온 데이터는 추가 쿼리 없이 사용
+            tick_user.holdings[0].symbol
+            tick_user.alert_settings
+    
+    # 묶음 2개 (3명, 2명) x (사용자 + 포트폴리오 항목 + 알림 기준)
+    assert len(statements) == 6
+
+
+def test_load_baselines_picks_latest_flagged_snapshot(db):
+    user = add_user(db, "chat-0", symbols=("BTC",))
+    other = add_user(db, "chat-1", symbols=("BTC",))
+    now = datetime.now()
+    db.add_all([
+        PriceSnapshot(user_id=user.id, total_portfolio_value=100.0,
+                      timestamp=now - timedelta(hours=2), alert_baseline=True),
+        PriceSnapshot(user_id=user.id, total_portfolio_value=110.0,
+                      timestamp=now - timedelta(hours=1), alert_baseline=True),
+        PriceSnapshot(user_id=user.id, total_portfolio_value=120.0,
+                      timestamp=now, alert_baseline=False),
+        PriceSnapshot(user_id=other.id, total_portfolio_value=50.0,
+                      timestamp=now, alert_baseline=False),
+    ])
+    db.commit()
+    
+    baselines = TickLoader(db).load_baselines([user.id, other.id])
+    
+    assert set(baselines) == {user.id}
+    assert baselines[user.id].total_portfolio_value == 110.0
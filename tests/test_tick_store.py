@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from app.models import User, PriceTick, HoldingsVersion
+from app.quote import Quote
+from app.services import AlertService
+from app.tick_loader import TickLoader
+from app.tick_store import TickStore, holdings_versions
+
+
+def add_user(db, chat_id):
+    user = User(telegram_chat_id=chat_id, base_currency="USD")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def quotes(prices):
+    return {symbol: Quote(symbol=symbol, price=price, market_cap=price * 10, percent_change_24h=1.5) for symbol, price in prices.items()}
+
+
+def test_record_writes_each_symbol_once_per_tick(db):
+    store = TickStore(datetime(2026, 1, 1, tzinfo=timezone.utc))
+    
+    # API 키만 다른 그룹과 다음 묶음에서 같은 시세를 다시 기록하지 않음
+    store.record(db, "cmc", "USD", quotes({"BTC": 100.0, "ETH": 10.0}))
+    store.record(db, "cmc", "USD", quotes({"BTC": 100.0, "SOL": 1.0}))
+    store.record(db, "cmc", "KRW", quotes({"BTC": 130000.0}))
+    db.commit()
+    
+    rows = db.query(PriceTick.symbol, PriceTick.currency).order_by(PriceTick.currency, PriceTick.symbol).all()
+    assert rows == [("BTC", "KRW"), ("BTC", "USD"), ("ETH", "USD"), ("SOL", "USD")]
+
+
+def test_holdings_version_is_reused_until_holdings_change(db):
+    user = add_user(db, "1")
+    
+    first = holdings_versions.resolve(db, {user.id: {"BTC": 1.0}})[user.id]
+    assert holdings_versions.resolve(db, {user.id: {"BTC": 1.0}})[user.id] == first
+    
+    # 캐시가 비어도 DB의 최신 버전을 재사용
+    holdings_versions.clear()
+    assert holdings_versions.resolve(db, {user.id: {"BTC": 1.0}})[user.id] == first
+    
+    second = holdings_versions.resolve(db, {user.id: {"BTC": 2.0}})[user.id]
+    assert second != first
+    assert db.query(HoldingsVersion).count() == 2
+
+
+def test_baseline_snapshot_data_reads_shared_ticks(db):
+    user = add_user(db, "1")
+    other = add_user(db, "2")
+    store = TickStore(datetime(2026, 1, 1, tzinfo=timezone.utc))
+    tick = store.record(db, "cmc", "USD", quotes({"BTC": 100.0, "ETH": 10.0, "SOL": 1.0}))
+    versions = holdings_versions.resolve(db, {user.id: {"BTC": 1.0, "ETH": 2.0}, other.id: {"SOL": 5.0}})
+    service = AlertService(db)
+    service.save_snapshot(user.id, 120.0, tick=tick, holdings_version_id=versions[user.id], alert_baseline=True, commit=False)
+    service.save_snapshot(other.id, 5.0, tick=tick, holdings_version_id=versions[other.id], alert_baseline=True)
+    user_id, other_id = user.id, other.id
+    db.expunge_all()
+    
+    baselines = TickLoader(db).load_baselines([user_id, other_id])
+    
+    # 틱은 한 번만 저장되고 스냅샷별로 보유 심볼의 시세만 보임
+    assert db.query(PriceTick).count() == 3
+    assert baselines[user_id].snapshot_data == {
+        "BTC": {"price": 100.0, "market_cap": 1000.0, "percent_change_24h": 1.5},
+        "ETH": {"price": 10.0, "market_cap": 100.0, "percent_change_24h": 1.5},
+    }
+    assert baselines[other_id].snapshot_data == {"SOL": {"price": 1.0, "market_cap": 10.0, "percent_change_24h": 1.5}}
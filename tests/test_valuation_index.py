@@ -0,0 +1,91 @@
+import random
+import pytest
+from app.models import User
+from app.services import PortfolioService, rebuild_valuation_index, quote_group_key
+from app.valuation_index import ValuationIndex, valuation_index
+
+GROUP = ("cmc", "key", "USD")
+
+
+def test_apply_prices_adjusts_only_holders_of_changed_symbols():
+    index = ValuationIndex()
+    index.set_holdings(1, GROUP, {"BTC": 2.0, "ETH": 10.0})
+    index.set_holdings(2, GROUP, {"ETH": 1.0})
+    index.set_holdings(3, GROUP, {"SOL": 5.0})
+    
+    assert index.apply_prices(GROUP, {"BTC": 100.0, "ETH": 10.0, "SOL": 20.0}) == {1, 2, 3}
+    assert index.total(1) == 300.0
+    assert index.total(3) == 100.0
+    
+    # ETH만 바뀌면 ETH 보유자만 조정
+    assert index.apply_prices(GROUP, {"BTC": 100.0, "ETH": 12.0, "SOL": 20.0}) == {1, 2}
+    assert index.total(1) == 320.0
+    assert index.total(2) == 12.0
+    assert index.total(3) == 100.0
+
+
+def test_prices_are_kept_per_group():
+    index = ValuationIndex()
+    krw_group = ("cmc", "key", "KRW")
+    index.set_holdings(1, GROUP, {"BTC": 1.0})
+    index.set_holdings(2, krw_group, {"BTC": 1.0})
+    
+    index.apply_prices(GROUP, {"BTC": 100.0})
+    index.apply_prices(krw_group, {"BTC": 130000.0})
+    
+    assert index.total(1) == 100.0
+    assert index.total(2) == 130000.0
+
+
+def test_set_holdings_uses_known_prices_and_remove_user():
+    index = ValuationIndex()
+    index.set_holdings(1, GROUP, {"BTC": 1.0})
+    index.apply_prices(GROUP, {"BTC": 100.0})
+    
+    index.set_holdings(2, GROUP, {"BTC": 3.0, "ETH": 1.0})
+    assert index.total(2) == 300.0
+    index.apply_prices(GROUP, {"ETH": 5.0})
+    assert index.total(2) == 305.0
+    
+    index.set_holdings(1, GROUP, {"BTC": 0.5})
+    assert index.total(1) == 50.0
+    index.remove_user(2)
+    assert index.total(2) is None
+    assert len(index) == 1
+
+
+def test_incremental_totals_match_full_recomputation():
+    rng = random.Random(3)
+    symbols = [f"COIN{i}" for i in range(30)]
+    holdings = {
+        user_id: {symbol: rng.uniform(0.1, 10) for symbol in rng.sample(symbols, 5)}
+        for user_id in range(200)
+    }
+    index = ValuationIndex()
+    index.load((user_id, GROUP, held) for user_id, held in holdings.items())
+    
+    prices = {}
+    for _ in range(50):
+        for symbol in rng.sample(symbols, 3):
+            prices[symbol] = rng.uniform(1, 1000)
+        index.apply_prices(GROUP, prices)
+    
+    for user_id, held in holdings.items():
+        expected = sum(quantity * prices.get(symbol, 0.0) for symbol, quantity in held.items())
+        assert index.total(user_id) == pytest.approx(expected)
+
+
+def test_portfolio_writes_update_index(db):
+    user = User(telegram_chat_id="chat-1", api_provider="cmc", cmc_api_key="key", base_currency="USD")
+    db.add(user)
+    db.commit()
+    group = quote_group_key(user)
+    
+    service = PortfolioService(db)
+    service.add_portfolio_item(user.id, "btc", 1.0)
+    service.add_portfolio_item(user.id, "BTC", 0.5)
+    assert valuation_index.holdings(user.id) == (group, {"BTC": 1.5})
+    
+    valuation_index.clear()
+    rebuild_valuation_index(db)
+    assert valuation_index.holdings(user.id) == (group, {"BTC": 1.5})
@@ -0,0 +1,186 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import numpy as np
+from app.alert_engine import AlertEngine
+from app.quote import Quote
+from app.services import AlertService
+from app.volatility import ReturnStatsIndex, WelfordStats
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def feed(index, prices, currency="USD", step=timedelta(minutes=5)):
+    """[{심볼: 가격}, ...]을 step 간격 틱으로 반영하고 마지막 틱 시각 반환"""
+    timestamp = START
+    for tick in prices:
+        index.update(currency, tick, timestamp)
+        timestamp += step
+    return timestamp - step
+
+
+def test_welford_matches_numpy():
+    rng = random.Random(1)
+    values = [rng.gauss(0.001, 0.02) for _ in range(1000)]
+    stats = WelfordStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == 1000
+    assert math.isclose(stats.mean, np.mean(values), rel_tol=1e-9)
+    assert math.isclose(stats.variance, np.var(values, ddof=1), rel_tol=1e-9)
+
+
+def test_zscore_uses_stats_before_the_tick_and_is_shared_per_symbol():
+    rng = random.Random(2)
+    index = ReturnStatsIndex()
+    price = 100.0
+    ticks = []
+    for _ in range(200):
+        price *= math.exp(rng.gauss(0, 0.002))
+        ticks.append({"BTC": price})
+    ticks.append({"BTC": price * 1.05})
+    last = feed(index, ticks)
+    
+    observation = index.observations(["BTC"], "USD", last)["BTC"]
+    assert math.isclose(observation.change_pct, 5.0, rel_tol=1e-9)
+    # 평소 틱 변동성 약 0.2%의 약 24배 (5분 간격을 1분 기준으로 맞춘 값으로 비교)
+    assert observation.zscore > 15
+    assert index.stats("BTC", "USD").count == 200
+    # 다른 시세 그룹이 같은 틱을 다시 넣어도 통계는 한 번만 갱신
+    assert index.update("USD", {"BTC": price * 1.04}, last) == {}
+    assert index.stats("BTC", "USD").count == 200
+    # 이전 틱 관측값은 다음 틱 알림에 쓰이지 않음
+    assert index.observations(["BTC"], "USD", last + timedelta(minutes=5)) == {}
+
+
+def test_unchanged_prices_and_long_gaps_are_not_returns():
+    index = ReturnStatsIndex()
+    index.update("USD", {"ETH": 100.0}, START)
+    index.update("USD", {"ETH": 100.0}, START + timedelta(minutes=5))
+    assert index.update("USD", {"ETH": 101.0}, START + timedelta(minutes=10))
+    # ANOMALY_MAX_GAP_MINUTES(60분)보다 긴 공백 뒤 가격은 새 기준으로만 사용
+    assert index.update("USD", {"ETH": 150.0}, START + timedelta(hours=5)) == {}
+    stats = index.stats("ETH", "USD")
+    assert (stats.count, stats.last_price) == (1, 150.0)
+
+
+def test_no_zscore_until_min_samples():
+    index = ReturnStatsIndex()
+    last = feed(index, [{"SOL": 100.0 + i} for i in range(10)])
+    assert index.observations(["SOL"], "USD", last) == {}
+
+
+def test_stats_survive_restart(db):
+    rng = random.Random(3)
+    index = ReturnStatsIndex()
+    last = feed(index, [{"BTC": 100.0 * math.exp(rng.gauss(0, 0.01))} for _ in range(50)])
+    index.flush(db)
+    index.update("USD", {"BTC": 120.0}, last + timedelta(minutes=5))
+    index.flush(db)
+    
+    restored = ReturnStatsIndex()
+    assert restored.load(db) == 1
+    assert restored.stats("BTC", "USD") == index.stats("BTC", "USD")
+
+
+def test_workers_share_one_stream_per_symbol(db):
+    """두 워커가 같은 심볼을 관측해도 저장된 통계는 한 흐름으로 누적 (같은 틱은 한 번, 서로 다른 틱은 시간 순서로)"""
+    rng = random.Random(4)
+    ticks = [{"BTC": 100.0 * math.exp(rng.gauss(0, 0.01))} for _ in range(40)]
+    reference = ReturnStatsIndex()
+    feed(reference, ticks)
+    
+    first, second = ReturnStatsIndex(), ReturnStatsIndex()
+    timestamp = START
+    for position, tick in enumerate(ticks):
+        # 처음 20틱은 두 워커가 모두 관측, 이후는 번갈아 관측 (틱마다 시작 시 저장)
+        workers = (first, second) if position < 20 else ((first,) if position % 2 else (second,))
+        for worker in workers:
+            worker.update("USD", tick, timestamp)
+            worker.flush(db)
+        timestamp += timedelta(minutes=5)
+    first.flush(db)
+    second.flush(db)
+    
+    restored = ReturnStatsIndex()
+    restored.load(db)
+    stored, expected = restored.stats("BTC", "USD"), reference.stats("BTC", "USD")
+    assert stored.count == expected.count == 39
+    assert math.isclose(stored.mean, expected.mean, rel_tol=1e-9)
+    assert math.isclose(stored.m2, expected.m2, rel_tol=1e-9)
+    # 저장한 워커는 합친 통계로 다음 z-score를 계산
+    assert first.stats("BTC", "USD") == stored
+
+
+
+def test_providers_keep_separate_streams(db):
+    """제공자마다 따로 누적하여 제공자 간 시세 차이가 수익률에 섞이지 않음"""
+    index = ReturnStatsIndex()
+    timestamp = START
+    for position in range(30):
+        move = 1 + 0.0001 * (position % 2)
+        index.update("USD", {"BTC": 100.2 * move}, timestamp, "cmc")
+        index.update("USD", {"BTC": 99.9 * move}, timestamp + timedelta(seconds=1), "coingecko")
+        timestamp += timedelta(minutes=5)
+    for provider in ("cmc", "coingecko"):
+        stats = index.stats("BTC", "USD", provider)
+        # 약 0.3%의 제공자 간 차이 없이 틱마다 0.01%씩만 움직인 흐름
+        assert stats.count == 29
+        assert stats.std < 0.0001
+    
+    observations = index.update("USD", {"BTC": 100.2 * 1.01}, timestamp, "cmc")
+    assert math.isclose(observations["BTC"].change_pct, 100 * (1.01 / 1.0001 - 1), rel_tol=1e-9)
+    assert index.observations(["BTC"], "USD", timestamp, "coingecko") == {}
+    
+    index.flush(db)
+    restored = ReturnStatsIndex()
+    assert restored.load(db) == 2
+    assert restored.stats("BTC", "USD", "cmc") == index.stats("BTC", "USD", "cmc")
+    assert restored.stats("BTC", "USD", "coingecko") == index.stats("BTC", "USD", "coingecko")
+
+
+def anomaly_settings(threshold):
+    return SimpleNamespace(
+        single_coin_percentage_threshold=50.0,
+        single_coin_absolute_threshold=None,
+        portfolio_percentage_threshold=50.0,
+        portfolio_absolute_threshold=None,
+        min_notification_interval_minutes=15,
+        window_percentage_threshold=None,
+        window_minutes=60,
+        anomaly_zscore_threshold=threshold,
+    )
+
+
+def test_anomaly_alert_in_engine_and_evaluate_alerts():
+    rng = random.Random(4)
+    index = ReturnStatsIndex()
+    ticks = []
+    prices = {"BTC": 100.0, "DOGE": 0.1}
+    for _ in range(100):
+        prices = {"BTC": prices["BTC"] * math.exp(rng.gauss(0, 0.001)), "DOGE": prices["DOGE"] * math.exp(rng.gauss(0, 0.02))}
+        ticks.append(prices)
+    # 같은 3% 상승: BTC에는 이상 변동, 평소 변동이 큰 DOGE에는 아님
+    ticks.append({"BTC": prices["BTC"] * 1.03, "DOGE": prices["DOGE"] * 1.03})
+    last = feed(index, ticks)
+    
+    user = SimpleNamespace(base_currency="USD")
+    summary = {
+        "total_value": 100.0,
+        "items": [{"id": 1, "symbol": "BTC", "quantity": 1.0}, {"id": 2, "symbol": "DOGE", "quantity": 1.0}],
+        "price_data": {symbol: Quote(symbol=symbol, price=price) for symbol, price in ticks[-1].items()},
+    }
+    baseline = SimpleNamespace(snapshot_data={}, total_portfolio_value=100.0, timestamp=last - timedelta(hours=1))
+    engine = AlertEngine()
+    expected = {}
+    for i, threshold in enumerate([None, 4.0]):
+        settings = anomaly_settings(threshold)
+        observations = index.observations_for(settings, ["BTC", "DOGE"], "USD", last)
+        engine.add(i, user, settings, summary, baseline, now=last, return_observations=observations)
+        expected[i] = AlertService.evaluate_alerts(user, settings, summary, baseline, now=last, return_observations=observations)
+    
+    assert expected[0] == []
+    assert [(alert["type"], alert["symbol"]) for alert in expected[1]] == [("coin_anomaly", "BTC")]
+    assert "이상 변동: +3.00%" in expected[1][0]["message"]
+    assert engine.evaluate() == {1: expected[1]}